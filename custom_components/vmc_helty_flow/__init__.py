@@ -1,7 +1,11 @@
 """Integrazione VMC Helty Flow per Home Assistant."""
 
+import asyncio
 import logging
+import time
+from collections.abc import Iterable, Mapping
 from datetime import timedelta
+from functools import partial
 from typing import Any
 
 import voluptuous as vol
@@ -10,24 +14,38 @@ from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry
 
 from .const import (
+    ADAPTIVE_TIMEOUT_MIN,
+    BULK_MAX_CONCURRENT,
+    CONF_COMMAND_RATE_LIMIT,
+    CONF_PROFILES,
+    DEFAULT_COMMAND_RATE_LIMIT,
     DEFAULT_PORT,
     DEFAULT_ROOM_VOLUME,
+    DEFAULT_TIMEOUT,
     DOMAIN,
     MAX_ROOM_VOLUME,
     MIN_ROOM_VOLUME,
     NETWORK_INFO_UPDATE_INTERVAL,
+    PROFILE_SETTINGS,
+    RELOAD_OPTIONS,
     SENSORS_UPDATE_INTERVAL,
 )
 from .coordinator import VmcHeltyCoordinator
 from .device_action import async_setup_device_actions
 from .device_registry import async_get_or_create_device, async_remove_orphaned_devices
 from .helpers import (
-    tcp_send_command,
+    async_close_device_connection,
+    async_write_setting,
+    get_device_connection,
     validate_network_connectivity,
 )
+from .protocol import LIGHT_LEVEL_COMMANDS, SPECIAL_MODE_SPEEDS, fan_speed_command
+from .scheduler import PollScheduler
+from .storage import VmcHeltyStorage
 
 _LOGGER = logging.getLogger(__name__)
 _LOGGER.setLevel(logging.DEBUG)
@@ -64,12 +82,15 @@ async def _handle_network_diagnostics(
 
     # Log the results
     _LOGGER.info(
-        "Network diagnostics for %s:%s - Ping: %s, TCP: %s, Reachable: %s",
+        "Network diagnostics for %s:%s - Ping: %s, TCP: %s/%s, Reachable: %s, "
+        "Connect RTT: %s",
         ip,
         port,
         diagnostics.get("ping_success"),
-        diagnostics.get("tcp_connection"),
+        diagnostics.get("tcp_successes"),
+        diagnostics.get("tcp_probes"),
         diagnostics.get("reachable"),
+        diagnostics.get("connect_rtt"),
     )
 
     if diagnostics.get("error_details"):
@@ -83,11 +104,10 @@ async def _handle_network_diagnostics(
     return diagnostics
 
 
-async def _handle_set_special_mode(hass: HomeAssistant, call: ServiceCall) -> None:
-    """Handle set special mode service call."""
-    entity_id = call.data["entity_id"]
-    mode = call.data["mode"]
-
+def _get_entity_coordinator(
+    hass: HomeAssistant, entity_id: str
+) -> tuple[ConfigEntry, VmcHeltyCoordinator]:
+    """Restituisce config entry e coordinatore del dispositivo di un'entità."""
     # Trova l'entità
     entity_registry_instance = entity_registry.async_get(hass)
     entity_entry = entity_registry_instance.async_get(entity_id)
@@ -109,22 +129,34 @@ async def _handle_set_special_mode(hass: HomeAssistant, call: ServiceCall) -> No
     if not coordinator:
         raise HomeAssistantError(f"Coordinator not found for entity {entity_id}")
 
-    # Mapping mode to speed values come da protocollo VMC
-    mode_mapping = {
-        "night_mode": 6,  # 150% -> comando VMWH0000006
-        "hyperventilation": 5,  # 125% -> comando VMWH0000005
-        "free_cooling": 7,  # 175% -> comando VMWH0000007
-    }
+    return config_entry, coordinator
 
-    if mode not in mode_mapping:
+
+async def _handle_set_special_mode(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Handle set special mode service call."""
+    entity_id = call.data["entity_id"]
+    mode = call.data["mode"]
+    force = call.data.get("force", False)
+
+    _, coordinator = _get_entity_coordinator(hass, entity_id)
+
+    if mode not in SPECIAL_MODE_SPEEDS:
         raise HomeAssistantError(f"Invalid mode: {mode}")
 
-    speed = mode_mapping[mode]
+    speed = SPECIAL_MODE_SPEEDS[mode]
 
     try:
-        # Use tcp_send_command directly
-        command = f"VMWH{speed:07d}"
-        result = await tcp_send_command(coordinator.ip, DEFAULT_PORT, command)
+        command = fan_speed_command(speed)
+        result = await async_write_setting(
+            coordinator.ip,
+            command,
+            lambda: coordinator.async_write(command),
+            coordinator.data,
+            force=force,
+        )
+        if result is None:
+            _LOGGER.debug("Special mode %s already active for %s", mode, entity_id)
+            return
 
         _LOGGER.info(
             "Set special mode %s (speed %d) for %s: %s",
@@ -134,15 +166,176 @@ async def _handle_set_special_mode(hass: HomeAssistant, call: ServiceCall) -> No
             result,
         )
 
-        # Aggiorna i dati del coordinatore
-        await coordinator.async_request_refresh()
-
     except Exception as err:
         _LOGGER.exception("Failed to set special mode %s for %s", mode, entity_id)
         raise HomeAssistantError(f"Failed to set special mode {mode}: {err}") from err
 
 
-def _create_service_schemas() -> tuple[vol.Schema, vol.Schema]:
+def _resolve_profile(
+    config_entry: ConfigEntry, data: Mapping[str, Any]
+) -> dict[str, Any]:
+    """Costruisce il profilo da applicare a un dispositivo.
+
+    Il profilo salvato (`profile`) viene completato con le impostazioni
+    passate esplicitamente: una velocità esplicita sostituisce la modalità
+    salvata e viceversa.
+    """
+    profile: dict[str, Any] = {}
+    if (name := data.get("profile")) is not None:
+        profiles = config_entry.options.get(CONF_PROFILES, {})
+        if name not in profiles:
+            raise HomeAssistantError(
+                f"Profile {name} not found for {config_entry.title}"
+            )
+        profile.update(profiles[name])
+
+    explicit = {key: data[key] for key in PROFILE_SETTINGS if key in data}
+    if "fan_speed" in explicit:
+        profile.pop("mode", None)
+    if "mode" in explicit:
+        profile.pop("fan_speed", None)
+    profile.update(explicit)
+    if not profile:
+        raise HomeAssistantError("No settings to apply: pass a profile or a setting")
+    return profile
+
+
+async def _handle_apply_profile(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Handle apply profile service call.
+
+    Con `save_as` il profilo risultante viene salvato nelle opzioni prima di
+    essere applicato.
+    """
+    entity_id = call.data["entity_id"]
+    config_entry, coordinator = _get_entity_coordinator(hass, entity_id)
+    profile = _resolve_profile(config_entry, call.data)
+
+    if (save_as := call.data.get("save_as")) is not None:
+        profiles = {**config_entry.options.get(CONF_PROFILES, {}), save_as: profile}
+        hass.config_entries.async_update_entry(
+            config_entry, options={**config_entry.options, CONF_PROFILES: profiles}
+        )
+
+    try:
+        commands = await coordinator.async_apply_profile(
+            profile, force=call.data.get("force", False)
+        )
+    except HomeAssistantError as err:
+        _LOGGER.exception("Failed to apply profile to %s", entity_id)
+        raise HomeAssistantError(f"Failed to apply profile: {err}") from err
+
+    if not commands:
+        _LOGGER.debug("Profile already active for %s", entity_id)
+        return
+    _LOGGER.info("Applied profile to %s: %s", entity_id, ", ".join(commands))
+
+
+def _area_entry_ids(hass: HomeAssistant, area_id: str) -> set[str | None]:
+    """Restituisce le config entry di dispositivi ed entità di un'area."""
+    entry_ids: set[str | None] = set()
+    for device in dr.async_entries_for_area(dr.async_get(hass), area_id):
+        entry_ids.update(device.config_entries)
+    entity_reg = entity_registry.async_get(hass)
+    for entity in entity_registry.async_entries_for_area(entity_reg, area_id):
+        entry_ids.add(entity.config_entry_id)
+    return entry_ids
+
+
+def _resolve_bulk_targets(
+    hass: HomeAssistant, data: Mapping[str, Any]
+) -> list[ConfigEntry]:
+    """Risolve entità, dispositivi e aree nelle config entry da controllare.
+
+    Entità e dispositivi si risolvono con una ricerca diretta nei registri,
+    le aree con gli indici per area dei registri. Un'area senza dispositivi
+    VMC viene ignorata; un'entità o un dispositivo sconosciuti sollevano un
+    errore.
+    """
+    coordinators = hass.data.get(DOMAIN, {})
+    entity_reg = entity_registry.async_get(hass)
+    device_reg = dr.async_get(hass)
+
+    def _vmc_entries(entry_ids: Iterable[str | None]) -> set[str]:
+        return {
+            entry_id
+            for entry_id in entry_ids
+            if entry_id is not None and entry_id in coordinators
+        }
+
+    matches: dict[str, set[str]] = {}
+    for entity_id in data.get("entity_id", []):
+        entity = entity_reg.async_get(entity_id)
+        matches[entity_id] = _vmc_entries([entity.config_entry_id] if entity else [])
+    for device_id in data.get("device_id", []):
+        device = device_reg.async_get(device_id)
+        matches[device_id] = _vmc_entries(device.config_entries if device else [])
+    unknown = [target for target, entry_ids in matches.items() if not entry_ids]
+    if unknown:
+        raise HomeAssistantError(f"Unknown VMC targets: {', '.join(unknown)}")
+    targets: set[str] = set().union(*matches.values())
+    for area_id in data.get("area_id", []):
+        targets.update(_vmc_entries(_area_entry_ids(hass, area_id)))
+
+    entries = [
+        entry
+        for entry_id in sorted(targets)
+        if (entry := hass.config_entries.async_get_entry(entry_id)) is not None
+    ]
+    if not entries:
+        raise HomeAssistantError("No VMC Helty Flow device matches the targets")
+    return entries
+
+
+async def _handle_bulk_apply_profile(
+    hass: HomeAssistant, call: ServiceCall
+) -> dict[str, Any]:
+    """Handle bulk apply profile service call.
+
+    Il profilo viene applicato a tutti i dispositivi indicati in parallelo,
+    al massimo BULK_MAX_CONCURRENT alla volta; l'errore di un dispositivo non
+    interrompe gli altri. La risposta riporta esito, comandi inviati e
+    latenza di ogni dispositivo.
+    """
+    force = call.data.get("force", False)
+    semaphore = asyncio.Semaphore(BULK_MAX_CONCURRENT)
+
+    async def _apply(config_entry: ConfigEntry) -> dict[str, Any]:
+        coordinator = hass.data[DOMAIN][config_entry.entry_id]
+        result: dict[str, Any] = {"name": config_entry.title, "ip": coordinator.ip}
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                profile = _resolve_profile(config_entry, call.data)
+                commands = await coordinator.async_apply_profile(profile, force=force)
+            except HomeAssistantError as err:
+                result.update(success=False, error=str(err))
+            else:
+                result.update(success=True, commands=commands)
+            result["latency_ms"] = round((time.monotonic() - start) * 1000, 1)
+        return result
+
+    config_entries = _resolve_bulk_targets(hass, call.data)
+    results = await asyncio.gather(*(_apply(entry) for entry in config_entries))
+    devices = {
+        entry.entry_id: result
+        for entry, result in zip(config_entries, results, strict=True)
+    }
+    failed = [result["name"] for result in results if not result["success"]]
+    if failed:
+        _LOGGER.warning("Bulk profile failed for: %s", ", ".join(failed))
+    _LOGGER.info(
+        "Bulk profile applied to %d of %d devices",
+        len(results) - len(failed),
+        len(results),
+    )
+    return {
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed),
+        "devices": devices,
+    }
+
+
+def _create_service_schemas() -> tuple[vol.Schema, vol.Schema, vol.Schema, vol.All]:
     """Create service schemas for all VMC services."""
     network_diagnostics_schema = vol.Schema(
         {
@@ -157,16 +350,69 @@ def _create_service_schemas() -> tuple[vol.Schema, vol.Schema]:
             vol.Required("mode"): vol.In(
                 ["hyperventilation", "night_mode", "free_cooling"]
             ),
+            vol.Optional("force", default=False): cv.boolean,
+        }
+    )
+
+    profile_fields: dict[vol.Marker, Any] = {
+        vol.Optional("profile"): cv.string,
+        vol.Exclusive("fan_speed", "fan"): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=4)
+        ),
+        vol.Exclusive("mode", "fan"): vol.In(list(SPECIAL_MODE_SPEEDS)),
+        vol.Optional("panel_led"): cv.boolean,
+        vol.Optional("sensors"): cv.boolean,
+        # Il dispositivo supporta solo i livelli 0, 25, 50, 75 e 100
+        vol.Optional("light_level"): vol.All(
+            vol.Coerce(int), vol.In(list(LIGHT_LEVEL_COMMANDS))
+        ),
+        vol.Optional("light_timer"): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=86400)
+        ),
+        vol.Optional("force", default=False): cv.boolean,
+    }
+
+    apply_profile_schema = vol.Schema(
+        {
+            vol.Required("entity_id"): cv.entity_id,
+            vol.Optional("save_as"): cv.string,
+            **profile_fields,
         }
     )
 
-    return (network_diagnostics_schema, set_special_mode_schema)
+    bulk_apply_profile_schema = vol.All(
+        cv.has_at_least_one_key("entity_id", "device_id", "area_id"),
+        vol.Schema(
+            {
+                vol.Optional("entity_id", default=[]): cv.entity_ids,
+                vol.Optional("device_id", default=[]): vol.All(
+                    cv.ensure_list, [cv.string]
+                ),
+                vol.Optional("area_id", default=[]): vol.All(
+                    cv.ensure_list, [cv.string]
+                ),
+                **profile_fields,
+            }
+        ),
+    )
+
+    return (
+        network_diagnostics_schema,
+        set_special_mode_schema,
+        apply_profile_schema,
+        bulk_apply_profile_schema,
+    )
 
 
 async def async_setup_services(hass: HomeAssistant) -> None:
     """Setup services for the integration."""
     # Get service schemas
-    network_diagnostics_schema, set_special_mode_schema = _create_service_schemas()
+    (
+        network_diagnostics_schema,
+        set_special_mode_schema,
+        apply_profile_schema,
+        bulk_apply_profile_schema,
+    ) = _create_service_schemas()
 
     async def _async_handle_network_diagnostics(call: ServiceCall) -> dict[str, Any]:
         """Handle network diagnostics service."""
@@ -176,6 +422,14 @@ async def async_setup_services(hass: HomeAssistant) -> None:
         """Handle set special mode service."""
         await _handle_set_special_mode(hass, call)
 
+    async def _async_handle_apply_profile(call: ServiceCall) -> None:
+        """Handle apply profile service."""
+        await _handle_apply_profile(hass, call)
+
+    async def _async_handle_bulk_apply_profile(call: ServiceCall) -> dict[str, Any]:
+        """Handle bulk apply profile service."""
+        return await _handle_bulk_apply_profile(hass, call)
+
     # Register services using async handler functions
     hass.services.async_register(
         DOMAIN,
@@ -192,6 +446,21 @@ async def async_setup_services(hass: HomeAssistant) -> None:
         schema=set_special_mode_schema,
     )
 
+    hass.services.async_register(
+        DOMAIN,
+        "apply_profile",
+        _async_handle_apply_profile,
+        schema=apply_profile_schema,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        "bulk_apply_profile",
+        _async_handle_bulk_apply_profile,
+        schema=bulk_apply_profile_schema,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
 
 async def _migrate_room_volume_to_options(
     hass: HomeAssistant, entry: ConfigEntry
@@ -238,6 +507,29 @@ async def _migrate_room_volume_to_options(
         )
 
 
+async def _async_register_device(
+    hass: HomeAssistant, coordinator: VmcHeltyCoordinator
+) -> None:
+    """Registra il dispositivo nel device registry."""
+    coordinator.device_entry = await async_get_or_create_device(hass, coordinator)
+
+    # Aggiunge device_id per i sensori
+    coordinator.device_id = (
+        coordinator.device_entry.id if coordinator.device_entry else None
+    )
+
+
+async def _async_start_device(
+    hass: HomeAssistant, coordinator: VmcHeltyCoordinator
+) -> None:
+    """Esegue il primo poll e registra il dispositivo dopo l'avvio."""
+    await coordinator.async_refresh()
+    try:
+        await _async_register_device(hass, coordinator)
+    except Exception:
+        _LOGGER.exception("Failed to register device %s", coordinator.ip)
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up VMC Helty Flow from a config entry."""
     # Inizializza il dominio se non esiste
@@ -259,16 +551,41 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Crea il coordinatore per questo dispositivo
     coordinator = VmcHeltyCoordinator(hass, entry)
 
-    # Effettua il primo fetch dei dati
-    await coordinator.async_config_entry_first_refresh()
-
-    # Registra il dispositivo nel device registry
-    coordinator.device_entry = await async_get_or_create_device(hass, coordinator)
+    # Connessione persistente condivisa da coordinatore, entità e device actions
+    coordinator.connection = get_device_connection(coordinator.ip, DEFAULT_PORT)
+    coordinator.connection.scheduler.set_rate_limit(
+        float(entry.options.get(CONF_COMMAND_RATE_LIMIT, DEFAULT_COMMAND_RATE_LIMIT))
+    )
+    coordinator.connection.set_timeout_bounds(
+        ADAPTIVE_TIMEOUT_MIN, float(entry.options.get("timeout", DEFAULT_TIMEOUT))
+    )
 
-    # Aggiunge device_id per i sensori
-    coordinator.device_id = (
-        coordinator.device_entry.id if coordinator.device_entry else None
+    # Scheduler dei poll condiviso da tutti i dispositivi dell'integrazione
+    coordinator.poll_scheduler = hass.data[DOMAIN].setdefault(
+        "poll_scheduler", PollScheduler()
+    )
+    coordinator.poll_scheduler.add_device(coordinator.ip)
+    # Rilasciati anche quando il setup fallisce (ConfigEntryNotReady):
+    # in quel caso HA non chiama async_unload_entry ma esegue queste callback
+    entry.async_on_unload(
+        partial(coordinator.poll_scheduler.remove_device, coordinator.ip)
     )
+    entry.async_on_unload(
+        partial(async_close_device_connection, coordinator.ip, DEFAULT_PORT)
+    )
+
+    if await coordinator.async_restore_snapshot():
+        # Le entità partono dall'ultimo stato salvato: il primo poll e la
+        # registrazione del dispositivo non ritardano l'avvio
+        entry.async_create_background_task(
+            hass,
+            _async_start_device(hass, coordinator),
+            f"{DOMAIN} start {coordinator.ip}",
+        )
+    else:
+        # Nessuno stato salvato: serve un primo poll riuscito
+        await coordinator.async_config_entry_first_refresh()
+        await _async_register_device(hass, coordinator)
 
     # Salva il coordinatore
     hass.data[DOMAIN][entry.entry_id] = coordinator
@@ -290,15 +607,31 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     # Remove the data stored for this entry
     if unload_ok:
+        # Scheduler e connessione vengono rilasciati dalle callback
+        # registrate con entry.async_on_unload
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return bool(unload_ok)
 
 
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+    """Reload config entry when its connection parameters change."""
+    # Le scritture nei dati (identità, nome) e le opzioni di calcolo non
+    # richiedono un reload: il coordinatore le applica a caldo
+    coordinator = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if (
+        coordinator is not None
+        and coordinator.ip == entry.data.get("ip")
+        and all(
+            coordinator.options.get(key) == entry.options.get(key)
+            for key in RELOAD_OPTIONS
+        )
+    ):
+        coordinator.async_apply_options()
+        return
+    # Il reload passa da HA: solo così vengono eseguite le callback di
+    # entry.async_on_unload (connessione, scheduler, shutdown del coordinatore)
+    hass.config_entries.async_schedule_reload(entry.entry_id)
 
 
 async def async_remove_config_entry_device(
@@ -317,7 +650,10 @@ async def async_remove_config_entry_device(
     return True
 
 
-async def async_remove_entry(hass: HomeAssistant, _entry: ConfigEntry) -> None:
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Handle removal of an entry."""
+    # Rimuovi i dati persistenti del dispositivo
+    await VmcHeltyStorage(hass, entry.entry_id).async_remove()
+
     # Rimuovi dispositivi orfani dopo la rimozione dell'entry
     await async_remove_orphaned_devices(hass)
@@ -6,9 +6,9 @@ from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN, ENTITY_NAME_PREFIX, FILTER_MAX_HOURS
+from .const import DOMAIN, ENTITY_NAME_PREFIX
 from .device_info import VmcHeltyEntity
-from .helpers import tcp_send_command
+from .protocol import FILTER_RESET_COMMAND
 
 
 async def async_setup_entry(
@@ -29,6 +29,8 @@ async def async_setup_entry(
 class VmcHeltyResetFilterButton(VmcHeltyEntity, ButtonEntity):
     """VMC Helty reset filter button."""
 
+    _coordinator_inputs = frozenset()
+
     def __init__(self, coordinator):
         """Initialize the button."""
         super().__init__(coordinator)
@@ -38,13 +40,7 @@ class VmcHeltyResetFilterButton(VmcHeltyEntity, ButtonEntity):
 
     async def async_press(self) -> None:
         """Reset filter counter."""
-        response = await tcp_send_command(
-            self.coordinator.ip,
-            5001,
-            f"VMWH04{FILTER_MAX_HOURS}",
-        )
-        if response == "OK":
-            await self.coordinator.async_request_refresh()
+        await self.coordinator.async_write(FILTER_RESET_COMMAND)
 
     def press(self) -> None:
         """Synchronous write is not supported; use async path."""
@@ -10,12 +10,25 @@ from homeassistant import config_entries
 from homeassistant.core import callback
 
 from .const import (
+    CONF_ADAPTIVE_POLLING,
+    CONF_COMMAND_RATE_LIMIT,
+    CONF_PROFILES,
+    CONF_STALE_GRACE_PERIOD,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_COMMAND_RATE_LIMIT,
+    DEFAULT_DEADBANDS,
+    DEFAULT_POLL_INTERVALS,
     DEFAULT_PORT,
     DEFAULT_ROOM_VOLUME,
+    DEFAULT_STALE_GRACE_PERIOD,
     DOMAIN,
     IP_NETWORK_PREFIX,
+    MAX_COMMAND_RATE_LIMIT,
+    MAX_DEADBANDS,
     MAX_ROOM_VOLUME,
+    MAX_STALE_GRACE_PERIOD,
     MIN_ROOM_VOLUME,
+    POLL_INTERVAL_RANGES,
 )
 from .helpers import discover_vmc_devices, get_device_info
 from .helpers_net import (
@@ -665,6 +678,9 @@ class VmcHeltyOptionsFlowHandler(config_entries.OptionsFlow):
     async def async_step_init(self, user_input=None):
         """Manage the VMC Helty Flow options."""
         if user_input is not None:
+            # I profili salvati dal servizio apply_profile non sono nel form
+            if CONF_PROFILES in self.config_entry.options:
+                user_input[CONF_PROFILES] = self.config_entry.options[CONF_PROFILES]
             return self.async_create_entry(title="", data=user_input)
 
         # Ottieni i valori correnti dalle options (non da data)
@@ -686,14 +702,30 @@ class VmcHeltyOptionsFlowHandler(config_entries.OptionsFlow):
                     vol.Range(min=MIN_ROOM_VOLUME, max=MAX_ROOM_VOLUME),
                 ),
                 vol.Optional(
-                    "scan_interval",
-                    description={
-                        "suggested_value": self.config_entry.options.get(
-                            "scan_interval", 60
+                    CONF_ADAPTIVE_POLLING,
+                    default=self.config_entry.options.get(
+                        CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING
+                    ),
+                ): bool,
+                # Intervalli del piano di polling (vedi poll_plan.py)
+                **{
+                    vol.Optional(
+                        key,
+                        description={
+                            "suggested_value": self.config_entry.options.get(
+                                key, default
+                            ),
+                        },
+                        default=self.config_entry.options.get(key, default),
+                    ): vol.All(
+                        vol.Coerce(int),
+                        vol.Range(
+                            min=POLL_INTERVAL_RANGES[key][0],
+                            max=POLL_INTERVAL_RANGES[key][1],
                         ),
-                    },
-                    default=self.config_entry.options.get("scan_interval", 60),
-                ): vol.All(vol.Coerce(int), vol.Range(min=30, max=600)),
+                    )
+                    for key, default in DEFAULT_POLL_INTERVALS.items()
+                },
                 vol.Optional(
                     "timeout",
                     description={
@@ -710,6 +742,50 @@ class VmcHeltyOptionsFlowHandler(config_entries.OptionsFlow):
                     },
                     default=self.config_entry.options.get("retry_attempts", 3),
                 ): vol.All(vol.Coerce(int), vol.Range(min=1, max=10)),
+                vol.Optional(
+                    CONF_COMMAND_RATE_LIMIT,
+                    description={
+                        "suggested_value": self.config_entry.options.get(
+                            CONF_COMMAND_RATE_LIMIT, DEFAULT_COMMAND_RATE_LIMIT
+                        ),
+                    },
+                    default=self.config_entry.options.get(
+                        CONF_COMMAND_RATE_LIMIT, DEFAULT_COMMAND_RATE_LIMIT
+                    ),
+                ): vol.All(
+                    vol.Coerce(float),
+                    vol.Range(min=0, max=MAX_COMMAND_RATE_LIMIT),
+                ),
+                vol.Optional(
+                    CONF_STALE_GRACE_PERIOD,
+                    description={
+                        "suggested_value": self.config_entry.options.get(
+                            CONF_STALE_GRACE_PERIOD, DEFAULT_STALE_GRACE_PERIOD
+                        ),
+                    },
+                    default=self.config_entry.options.get(
+                        CONF_STALE_GRACE_PERIOD, DEFAULT_STALE_GRACE_PERIOD
+                    ),
+                ): vol.All(
+                    vol.Coerce(int),
+                    vol.Range(min=0, max=MAX_STALE_GRACE_PERIOD),
+                ),
+                # Deadband dei sensori (0 = ogni variazione aggiorna lo stato)
+                **{
+                    vol.Optional(
+                        key,
+                        description={
+                            "suggested_value": self.config_entry.options.get(
+                                key, default
+                            ),
+                        },
+                        default=self.config_entry.options.get(key, default),
+                    ): vol.All(
+                        vol.Coerce(float),
+                        vol.Range(min=0, max=MAX_DEADBANDS[key]),
+                    )
+                    for key, default in DEFAULT_DEADBANDS.items()
+                },
             }
         )
 
@@ -721,8 +797,9 @@ class VmcHeltyOptionsFlowHandler(config_entries.OptionsFlow):
                     "Configura le opzioni per l'integrazione VMC Helty Flow. "
                     f"Il volume della stanza deve essere compreso tra "
                     f"{MIN_ROOM_VOLUME} e {MAX_ROOM_VOLUME} m³. "
-                    "Le modifiche verranno applicate dopo il riavvio "
-                    "dell'integrazione."
+                    "Le modifiche a timeout, tentativi e limite dei comandi "
+                    "riavviano l'integrazione; le altre vengono applicate "
+                    "subito."
                 )
             },
         )
@@ -9,9 +9,134 @@ ENTITY_NAME_PREFIX = "VMC Helty"  # Prefisso per i nomi delle entità
 # Timeout per le connessioni TCP
 TCP_TIMEOUT = 5
 
+# Timeout adattivi basati sul round-trip time misurato
+ADAPTIVE_TIMEOUT_MIN = 1.0  # Secondi; il massimo è l'opzione "timeout"
+
+# Circuit breaker per i dispositivi irraggiungibili
+BREAKER_FAILURE_THRESHOLD = 5  # Errori consecutivi prima di aprire il circuito
+BREAKER_BASE_DELAY = 30  # Secondi di attesa alla prima apertura
+BREAKER_MAX_DELAY = 600  # Attesa massima tra due tentativi (10 minuti)
+BREAKER_JITTER = 0.2  # Variazione casuale dell'attesa (±20%)
+
+# Framing delle risposte: ogni risposta termina con un fine riga
+MAX_FRAME_SIZE = 1024  # Byte massimi di una singola risposta
+
+# Diagnostica di rete (ping e tentativi di connessione TCP)
+NETWORK_DIAG_PROBES = 5  # Tentativi di connessione per misurare i tempi
+NETWORK_DIAG_CONNECT_TIMEOUT = 3  # Secondi per ogni tentativo di connessione
+NETWORK_DIAG_PING_TIMEOUT = 5  # Secondi massimi di attesa del comando ping
+
+# Rate limit dei comandi verso il dispositivo (token bucket)
+CONF_COMMAND_RATE_LIMIT = "command_rate_limit"
+DEFAULT_COMMAND_RATE_LIMIT = 2.0  # Comandi al secondo (0 = nessun limite)
+MAX_COMMAND_RATE_LIMIT = 20.0
+COMMAND_RATE_BURST = 4  # Comandi consecutivi consentiti senza attesa
+
+# Opzioni di connessione: solo una loro modifica ricarica la config entry,
+# le altre (volume, deadband, piano di polling) vengono applicate a caldo
+RELOAD_OPTIONS = ("timeout", "retry_attempts", CONF_COMMAND_RATE_LIMIT)
+
+# Profili di impostazioni salvati nelle opzioni (servizio apply_profile)
+CONF_PROFILES = "profiles"
+PROFILE_SETTINGS = (
+    "mode",
+    "fan_speed",
+    "panel_led",
+    "sensors",
+    "light_level",
+    "light_timer",
+)
+
+# Scheduler globale dei poll di tutti i dispositivi dell'integrazione
+POLL_MAX_CONCURRENT = 4  # Poll contemporanei al massimo su tutta la rete
+POLL_MAX_RECOVERING = 1  # Di cui al massimo questi verso dispositivi in errore
+
+# Dati non aggiornati: dopo un poll fallito le entità restano disponibili con
+# l'ultimo snapshot valido fino a questa età (0 = subito non disponibili)
+CONF_STALE_GRACE_PERIOD = "stale_grace_period"
+DEFAULT_STALE_GRACE_PERIOD = 300  # Secondi
+MAX_STALE_GRACE_PERIOD = 3600
+STALE_RETRY_DELAY = 5  # Secondi prima del nuovo tentativo dopo il primo errore
+
+# Servizi bulk: dispositivi controllati in parallelo al massimo
+BULK_MAX_CONCURRENT = 4
+
+# Scritture ridondanti: una scrittura viene saltata se lo stato letto è recente
+REDUNDANT_WRITE_MAX_AGE = 240  # Secondi (intervallo di polling predefinito + margine)
+
+# Aggiornamento ottimistico: rilettura dello stato dopo una scrittura riuscita
+WRITE_VERIFY_DELAY = 3  # Secondi; più scritture ravvicinate danno una sola lettura
+
+# Soglie di variazione (deadband) sotto cui lo stato di un sensore non viene
+# riscritto: piccole oscillazioni non generano eventi state_changed
+CONF_DEADBAND_TEMPERATURE = "deadband_temperature"
+CONF_DEADBAND_HUMIDITY = "deadband_humidity"
+CONF_DEADBAND_CO2 = "deadband_co2"
+CONF_DEADBAND_VOC = "deadband_voc"
+DEFAULT_DEADBANDS = {
+    CONF_DEADBAND_TEMPERATURE: 0.2,  # °C
+    CONF_DEADBAND_HUMIDITY: 1.0,  # %
+    CONF_DEADBAND_CO2: 20.0,  # ppm
+    CONF_DEADBAND_VOC: 10.0,  # ppb
+}
+MAX_DEADBANDS = {
+    CONF_DEADBAND_TEMPERATURE: 5.0,
+    CONF_DEADBAND_HUMIDITY: 10.0,
+    CONF_DEADBAND_CO2: 500.0,
+    CONF_DEADBAND_VOC: 500.0,
+}
+
 # Intervalli di aggiornamento (in secondi)
 SENSORS_UPDATE_INTERVAL = 180  # Sensori e stato
 NETWORK_INFO_UPDATE_INTERVAL = 900  # Nome e info rete (15 minuti)
+# Nome e rete cambiano solo con le nostre scritture, che invalidano i dati:
+# la rilettura periodica è solo una sicurezza (24 ore)
+DEVICE_INFO_TTL = 86400
+
+# Piano di polling: intervallo di ogni interrogazione (opzioni, in secondi)
+CONF_SCAN_INTERVAL = "scan_interval"  # Stato (VMGH?)
+CONF_SENSORS_INTERVAL = "sensors_interval"  # Sensori (VMGI?)
+CONF_SENSORS_FAST_INTERVAL = "sensors_fast_interval"  # VMGI? con CO2 in aumento
+CONF_DEVICE_INFO_INTERVAL = "device_info_interval"  # Nome e rete (VMNM?/VMSL?)
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_ADAPTIVE_MIN_INTERVAL = "adaptive_min_interval"
+CONF_ADAPTIVE_MAX_INTERVAL = "adaptive_max_interval"
+DEFAULT_SENSORS_FAST_INTERVAL = 30  # 0 = disabilitato
+DEFAULT_ADAPTIVE_POLLING = True
+DEFAULT_POLL_INTERVALS = {
+    CONF_SCAN_INTERVAL: SENSORS_UPDATE_INTERVAL,
+    CONF_SENSORS_INTERVAL: SENSORS_UPDATE_INTERVAL,
+    CONF_SENSORS_FAST_INTERVAL: DEFAULT_SENSORS_FAST_INTERVAL,
+    CONF_DEVICE_INFO_INTERVAL: DEVICE_INFO_TTL,
+    CONF_ADAPTIVE_MIN_INTERVAL: 30,
+    CONF_ADAPTIVE_MAX_INTERVAL: 600,
+}
+POLL_INTERVAL_RANGES = {
+    CONF_SCAN_INTERVAL: (30, 600),
+    CONF_SENSORS_INTERVAL: (30, 600),
+    CONF_SENSORS_FAST_INTERVAL: (0, 600),
+    CONF_DEVICE_INFO_INTERVAL: (300, 86400),
+    CONF_ADAPTIVE_MIN_INTERVAL: (10, 600),
+    CONF_ADAPTIVE_MAX_INTERVAL: (30, 3600),
+}
+POLL_MIN_INTERVAL = 10  # Intervallo minimo tra due poll
+
+# Connessione TCP persistente per dispositivo: secondi di inattività prima di
+# riaprire il socket. Supera l'intervallo più lungo tra due poll dello stato
+# (adaptive_max_interval), così ogni ciclo riusa il socket del precedente
+CONNECTION_IDLE_TIMEOUT = POLL_INTERVAL_RANGES[CONF_ADAPTIVE_MAX_INTERVAL][1] + 60
+
+POLL_TICK_TOLERANCE = 1.0  # Anticipo ammesso sulla scadenza di un'interrogazione
+POLL_STALENESS_FACTOR = 3  # Età massima dei dati = fattore per intervallo
+CO2_RISING_MIN_DELTA = 10  # ppm tra due letture per considerare la CO2 in aumento
+
+# Polling adattivo: una variazione rapida riporta stato e sensori all'intervallo
+# minimo, ogni poll stabile allunga l'intervallo fino al massimo
+ADAPTIVE_BACKOFF_FACTOR = 1.5
+ADAPTIVE_CO2_MIN_DELTA = 20  # ppm
+ADAPTIVE_CO2_RATE = 10.0  # ppm/min
+ADAPTIVE_HUMIDITY_MIN_DELTA = 1.0  # %
+ADAPTIVE_HUMIDITY_RATE = 0.5  # %/min
 
 # Range di scansione IP
 IP_RANGE_START = 1
@@ -22,6 +147,7 @@ IP_NETWORK_PREFIX = 24
 PART_INDEX_FAN_SPEED = 1
 PART_INDEX_PANEL_LED = 2
 PART_INDEX_SENSORS = 4
+PART_INDEX_FILTER_HOURS = 5
 PART_INDEX_LIGHTS_LEVEL = 11
 PART_INDEX_LIGHTS_TIMER = 15
 
@@ -199,6 +325,9 @@ CO2_ALERT_DURATION_MINUTES = 5
 
 # Configuration constants
 CONF_DEVICE_ID = "device_id"
+# Identità del dispositivo salvata nei dati della config entry
+CONF_DEVICE_IDENTITY = "device_identity"
+DEVICE_IDENTITY_MAX_AGE = 7 * 86400  # secondi prima di una nuova verifica
 
 # Comfort Index Levels
 COMFORT_LEVEL_EXCELLENT = "Excellent"
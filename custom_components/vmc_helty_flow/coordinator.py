@@ -4,31 +4,74 @@ import logging
 import re
 import time
 from datetime import timedelta
+from typing import Any, NoReturn
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.device_registry import DeviceEntry
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .const import (
+    BREAKER_FAILURE_THRESHOLD,
+    CONF_ADAPTIVE_POLLING,
+    CONF_STALE_GRACE_PERIOD,
+    DEFAULT_DEADBANDS,
+    DEFAULT_POLL_INTERVALS,
     DEFAULT_PORT,
     DEFAULT_ROOM_VOLUME,
+    DEFAULT_STALE_GRACE_PERIOD,
     DOMAIN,
-    NETWORK_INFO_UPDATE_INTERVAL,
     SENSORS_UPDATE_INTERVAL,
+    STALE_RETRY_DELAY,
+    WRITE_VERIFY_DELAY,
 )
 from .helpers import (
+    VmcConnection,
     VMCConnectionError,
     VMCTimeoutError,
+    async_probe_device,
+    get_write_coalescer,
+    mask_vmsl_response,
+    summarize_vmsl_response,
     tcp_send_command,
+    tcp_send_commands,
     validate_network_connectivity,
 )
+from .metrics import DerivedMetrics, derive_metrics
+from .poll_plan import PollPlan, build_poll_plan
+from .protocol import (
+    StatusSnapshot,
+    apply_write_to_status,
+    changed_fields,
+    decode_sensors,
+    decode_status,
+    profile_commands,
+)
+from .resilience import BREAKER_CLOSED, BREAKER_HALF_OPEN, CircuitBreaker
+from .scheduler import PollScheduler
+from .storage import VmcHeltyStorage
 
 _LOGGER = logging.getLogger(__name__)
 
 DEFAULT_SCAN_INTERVAL = timedelta(seconds=SENSORS_UPDATE_INTERVAL)
-NETWORK_INFO_INTERVAL = timedelta(seconds=NETWORK_INFO_UPDATE_INTERVAL)
-DEVICE_NAME_INTERVAL = timedelta(seconds=NETWORK_INFO_UPDATE_INTERVAL)
+
+# Chiavi dei dati confrontate direttamente (stato e sensori campo per campo)
+DATA_INPUTS = (
+    "available",
+    "data_age",
+    "filter_hours",
+    "last_update",
+    "name",
+    "network",
+)
+
+# Chiavi dei dati salvate come ultimo snapshot valido del dispositivo
+# ("network" viene salvato a parte, senza la password del Wi-Fi)
+SNAPSHOT_KEYS = ("status", "sensors", "name", "filter_hours", "last_update")
+# Dati che cambiano solo con le nostre scritture e comando che li legge
+DEVICE_INFO_QUERIES = {"name": "VMNM?", "network": "VMSL?"}
 
 
 class VmcHeltyCoordinator(DataUpdateCoordinator):
@@ -36,11 +79,17 @@ class VmcHeltyCoordinator(DataUpdateCoordinator):
 
     def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry):
         """Initialize the coordinator."""
+        # Interrogazioni e cadenze del poll, configurabili dalle opzioni
+        self.poll_plan: PollPlan = build_poll_plan(config_entry.options or {})
+        # Opzioni in uso, per distinguere un cambio di opzioni da una
+        # semplice scrittura nei dati della config entry
+        self.options = dict(config_entry.options or {})
+        self._normal_update_interval = timedelta(seconds=self.poll_plan.base_interval)
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=DEFAULT_SCAN_INTERVAL,
+            update_interval=self._normal_update_interval,
             config_entry=config_entry,
         )
         self.config_entry = config_entry
@@ -48,15 +97,25 @@ class VmcHeltyCoordinator(DataUpdateCoordinator):
         self.name = config_entry.data["name"]
         self.device_entry: DeviceEntry | None = None
         self.device_id: str | None = None
+        # Connessione persistente, assegnata in async_setup_entry
+        self.connection: VmcConnection | None = None
+        # Scheduler dei poll condiviso tra i dispositivi, assegnato in
+        # async_setup_entry
+        self.poll_scheduler: PollScheduler | None = None
+        # Dati persistenti, caricati in _async_setup
+        self.storage: VmcHeltyStorage | None = None
         self._consecutive_errors = 0
-        self._max_consecutive_errors = 5
-        self._error_recovery_interval = timedelta(seconds=30)
-        self._normal_update_interval = DEFAULT_SCAN_INTERVAL
-        self._recovery_update_interval = timedelta(seconds=60)
-
-        # Timestamps for smart update intervals
-        self._last_network_update = 0.0
-        self._last_name_update = 0.0
+        self._max_consecutive_errors = BREAKER_FAILURE_THRESHOLD
+        # Evita poll destinati al timeout quando il dispositivo è irraggiungibile
+        self.breaker = CircuitBreaker(failure_threshold=BREAKER_FAILURE_THRESHOLD)
+        # Rilettura dello stato dopo le scritture applicate in modo ottimistico
+        self._verify_debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=WRITE_VERIFY_DELAY,
+            immediate=False,
+            function=self._async_verify_status,
+        )
 
         # Cache for last valid data
         self._cached_data: dict[str, str | None] = {
@@ -64,6 +123,11 @@ class VmcHeltyCoordinator(DataUpdateCoordinator):
             "network": None,
         }
 
+        # Ingressi cambiati dall'ultima notifica (None = tutte le entità)
+        self.changed_inputs: frozenset[str] | None = None
+        self._notified: tuple[Any, bool, Any] | None = None
+        self.state_writes = {"written": 0, "unchanged": 0, "deadband": 0}
+
     @property
     def room_volume(self) -> float:
         """Return configured room volume from config entry options."""
@@ -73,6 +137,15 @@ class VmcHeltyCoordinator(DataUpdateCoordinator):
         room_volume = self.config_entry.options.get("room_volume", DEFAULT_ROOM_VOLUME)
         return float(room_volume)
 
+    @property
+    def deadbands(self) -> dict[str, float]:
+        """Return the configured deadband of each sensor group."""
+        options = self.config_entry.options if self.config_entry else {}
+        return {
+            key: float(options.get(key, default))
+            for key, default in DEFAULT_DEADBANDS.items()
+        }
+
     @property
     def name_slug(self) -> str:
         """Return device name as a slug with vmc_helty_ prefix (safe for entity IDs)."""
@@ -85,147 +158,532 @@ class VmcHeltyCoordinator(DataUpdateCoordinator):
             slug = f"vmc_helty_{slug}"
         return slug
 
-    def _parse_filter_hours(self, status_response: str) -> int | None:
-        """Parse filter hours from VMGH? response.
-
-        Response format: VMGO,<fan_speed>,<led>,<temp>,<humidity>,<filter_hours>
-        Filter hours is at position 5.
+    async def _async_setup(self) -> None:
+        """Load persisted device state before the first refresh."""
+        if self.config_entry is None or self.storage is not None:
+            return
+        self.storage = VmcHeltyStorage(self.hass, self.config_entry.entry_id)
+        await self.storage.async_load()
+        self.storage.register("snapshot", self._snapshot_as_stored_dict)
+        if self.connection is not None:
+            # I timeout partono già calibrati sui tempi misurati in precedenza
+            self.connection.restore_timing(self.storage.get("timing"))
+            self.storage.register("timing", self.connection.timing_as_stored_dict)
+
+    async def async_restore_snapshot(self) -> bool:
+        """Ripristina l'ultimo snapshot salvato come dati non aggiornati.
+
+        Ritorna True se lo snapshot è valido: le entità possono allora partire
+        subito, mentre il primo poll reale viene eseguito in background.
         """
-        try:
-            if not status_response or not status_response.startswith("VMGO"):
-                return None
+        await self._async_setup()
+        snapshot = self.storage.get("snapshot") if self.storage else None
+        if not isinstance(snapshot, dict) or not decode_status(snapshot.get("status")):
+            return False
+        snapshot = dict(snapshot)
+        # Nome e rete letti di recente restano validi fino alla scadenza del
+        # piano: il primo poll non li rilegge
+        read_at = snapshot.pop("read_at", None) or {}
+        network = snapshot.get("network")
+        if isinstance(network, str):
+            # Snapshot di versioni precedenti: contiene ancora la risposta grezza
+            network = summarize_vmsl_response(network)
+        snapshot["network"] = mask_vmsl_response(network)
+        for key, command in DEVICE_INFO_QUERIES.items():
+            when = read_at.get(command)
+            if snapshot.get(key) and isinstance(when, int | float):
+                self.poll_plan.record(command, when, snapshot[key])
+                self._cached_data[key] = snapshot[key]
+        # Il dispositivo non è ancora stato contattato: "available" resta False
+        # finché il primo poll non lo conferma
+        self.data = {**snapshot, "available": False, "stale": True}
+        _LOGGER.debug("Restored last known state of %s", self.ip)
+        return True
+
+    def _snapshot_as_stored_dict(self) -> dict[str, Any] | None:
+        """Return the last known device data to persist."""
+        if not self.data:
+            return self.storage.get("snapshot") if self.storage else None
+        return {
+            **{key: self.data.get(key) for key in SNAPSHOT_KEYS},
+            "network": summarize_vmsl_response(self.data.get("network")),
+            "read_at": {
+                command: self.poll_plan.read_at(command)
+                for command in DEVICE_INFO_QUERIES.values()
+            },
+        }
+
+    async def async_shutdown(self) -> None:
+        """Flush persisted state when the coordinator is shut down."""
+        await super().async_shutdown()
+        self._verify_debouncer.async_shutdown()
+        if self.storage is not None:
+            await self.storage.async_save()
 
-            parts = status_response.split(",")
-            # Need 6 parts: VMGO + fan_speed + led + temp + humidity + filter_hours
-            if len(parts) < 6:  # noqa: PLR2004
-                return None
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify listeners, recording which inputs changed since last time."""
+        self.changed_inputs = self._changed_inputs()
+        super().async_update_listeners()
 
-            return int(parts[5])
-        except (ValueError, IndexError):
+    def _changed_inputs(self) -> frozenset[str] | None:
+        """Confronta i dati con quelli dell'ultima notifica.
+
+        Ritorna None (aggiornare tutte le entità) alla prima notifica e quando
+        cambia la disponibilità del dispositivo.
+        """
+        previous = self._notified
+        current = (self.data, self.last_update_success, self.room_volume)
+        self._notified = current
+        if previous is None or previous[1] != current[1]:
             return None
+        old, new = previous[0] or {}, current[0] or {}
+        changed = {key for key in DATA_INPUTS if old.get(key) != new.get(key)}
+        changed |= changed_fields(
+            decode_status(old.get("status")), decode_status(new.get("status"))
+        )
+        changed |= changed_fields(
+            decode_sensors(old.get("sensors")), decode_sensors(new.get("sensors"))
+        )
+        if previous[2] != current[2]:
+            changed.add("room_volume")
+        return frozenset(changed)
+
+    async def async_invalidate(self, *commands: str) -> None:
+        """Invalidate device data changed by a write and read it again now."""
+        for command in commands:
+            self.poll_plan.invalidate(command)
+        await self.async_request_refresh()
+
+    @callback
+    def async_apply_options(self) -> None:
+        """Apply changed options to the running coordinator without a reload.
+
+        Il piano di polling viene ricostruito mantenendo le letture già fatte;
+        un nuovo volume della stanza ricalcola le metriche derivate dai dati
+        correnti e aggiorna solo le entità che ne dipendono.
+        """
+        options = dict(self.config_entry.options) if self.config_entry else {}
+        previous, self.options = self.options, options
+        if any(
+            previous.get(key) != options.get(key)
+            for key in (*DEFAULT_POLL_INTERVALS, CONF_ADAPTIVE_POLLING)
+        ):
+            plan = build_poll_plan(options)
+            plan.carry_over(self.poll_plan)
+            self.poll_plan = plan
+            self._normal_update_interval = timedelta(seconds=plan.base_interval)
+            # Con il circuit breaker aperto resta l'attesa in corso
+            if self._consecutive_errors == 0 and self._unsub_refresh is not None:
+                self.update_interval = timedelta(seconds=plan.next_poll_in(time.time()))
+                self._schedule_refresh()
+        if self.data and previous.get("room_volume") != options.get("room_volume"):
+            self.async_update_listeners()
+
+    @property
+    def metrics(self) -> DerivedMetrics:
+        """Return the metrics derived from the current data."""
+        data = self.data or {}
+        return derive_metrics(
+            decode_status(data.get("status")),
+            decode_sensors(data.get("sensors")),
+            self.room_volume,
+        )
 
-    async def _get_status_data(self) -> str:
-        """Get device status data."""
+    async def async_write(self, command: str) -> str:
+        """Send a write and read back the status in the same device session."""
+        (response,) = await self._async_write_session([command])
+        if isinstance(response, HomeAssistantError):
+            raise response
+        return response
+
+    async def async_apply_profile(
+        self, profile: dict[str, Any], force: bool = False
+    ) -> list[str]:
+        """Bring the device to a profile of settings in a single session.
+
+        Vengono inviate solo le scritture che cambiano lo stato attuale (tutte
+        con `force`), una dopo l'altra sulla stessa connessione e seguite da
+        una sola rilettura dello stato. Restituisce i comandi inviati.
+        """
+        coalescer = get_write_coalescer(self.ip)
+        commands = [
+            command
+            for command in profile_commands(profile)
+            if force or not coalescer.is_redundant(command, self.data)
+        ]
+        if not commands:
+            return []
+
+        responses = await self._async_write_session(commands)
+        failed = [
+            command
+            for command, response in zip(commands, responses, strict=True)
+            if response != "OK"
+        ]
+        if failed:
+            raise HomeAssistantError(
+                f"Device {self.ip} rejected profile commands: {', '.join(failed)}"
+            )
+        return commands
+
+    async def _async_write_session(
+        self, commands: list[str]
+    ) -> list[str | HomeAssistantError]:
+        """Invia le scritture seguite da VMGH? in un'unica sessione.
+
+        Lo stato VMGO riletto sostituisce solo lo stato nei dati: sensori, nome
+        e rete restano invariati. Se la rilettura non riesce le scritture
+        confermate vengono applicate in modo ottimistico con verifica
+        ritardata (async_apply_write). Restituisce le risposte alle scritture.
+        """
+        *responses, status = await tcp_send_commands(
+            self.ip, DEFAULT_PORT, [*commands, "VMGH?"], return_exceptions=True
+        )
+        written = [
+            command
+            for command, response in zip(commands, responses, strict=True)
+            if response == "OK"
+        ]
+        if not written:
+            return responses
+        if (
+            not isinstance(status, str)
+            or (snapshot := decode_status(status)) is None
+            or not self.data
+        ):
+            for command in written:
+                self.async_apply_write(command)
+            return responses
+        self._async_apply_status(status, snapshot)
+        return responses
+
+    @callback
+    def async_apply_write(self, command: str) -> None:
+        """Apply a successful write to the current data without a full poll.
+
+        Il valore scritto viene riportato subito nello stato VMGO e notificato
+        alle entità; una sola rilettura di VMGH? dopo WRITE_VERIFY_DELAY
+        secondi conferma lo stato reale e corregge eventuali differenze.
+        """
+        if self.data:
+            status = apply_write_to_status(self.data.get("status"), command)
+            if status is not None and status != self.data.get("status"):
+                # Non si usa async_set_updated_data per non spostare il poll
+                self.data = {**self.data, "status": status}
+                self.async_update_listeners()
+        self._verify_debouncer.async_schedule_call()
+
+    async def _async_verify_status(self) -> None:
+        """Rilegge lo stato dopo una scrittura e riallinea i dati ottimistici."""
         try:
-            return await tcp_send_command(self.ip, DEFAULT_PORT, "VMGH?")
-        except VMCTimeoutError as err:
+            status = await tcp_send_command(self.ip, DEFAULT_PORT, "VMGH?")
+        except HomeAssistantError as err:
+            _LOGGER.debug("Status verification for %s failed: %s", self.ip, err)
+            await self.async_request_refresh()
+            return
+
+        snapshot = decode_status(status)
+        if not self.data or snapshot is None:
+            await self.async_request_refresh()
+            return
+
+        if status != self.data.get("status"):
+            _LOGGER.debug(
+                "Status of %s differs from the optimistic update: %s", self.ip, status
+            )
+        self._async_apply_status(status, snapshot)
+
+    @callback
+    def _async_apply_status(self, status: str, snapshot: StatusSnapshot) -> None:
+        """Sostituisce lo stato con quello riletto, lasciando invariati gli altri dati.
+
+        Non si usa async_set_updated_data per non spostare il poll. Il
+        dispositivo ha appena risposto: i dati non sono più "stale".
+        """
+        now = time.time()
+        self.poll_plan.record("VMGH?", now, status)
+        data = {key: value for key, value in self.data.items() if key != "data_age"}
+        self.data = {
+            **data,
+            "status": status,
+            "filter_hours": snapshot.filter_hours,
+            "available": True,
+            "stale": False,
+            "last_update": now,
+        }
+        self.async_update_listeners()
+
+    def _build_poll_commands(self, current_time: float) -> list[str]:
+        """Return the ordered queries that the poll plan marks as due."""
+        return self.poll_plan.due_commands(current_time)
+
+    def _record_poll(
+        self, results: dict[str, str | HomeAssistantError], current_time: float
+    ) -> None:
+        """Registra nel piano di polling le risposte valide ricevute."""
+        for command, response in results.items():
+            if isinstance(response, str):
+                self.poll_plan.record(command, current_time, response)
+        if (adaptive := self.poll_plan.adaptive) is not None:
+            reason = adaptive.reason
+            adaptive.observe(
+                current_time,
+                decode_status(results.get("VMGH?")),
+                decode_sensors(results.get("VMGI?")),
+            )
+            if adaptive.reason != reason:
+                _LOGGER.debug(
+                    "Polling interval for %s: %.0f s (%s)",
+                    self.ip,
+                    adaptive.interval,
+                    adaptive.reason,
+                )
+
+    async def _get_poll_status(
+        self, results: dict[str, str | HomeAssistantError]
+    ) -> str | None:
+        """Return the status for this poll, reusing it when VMGH? was not due."""
+        if "VMGH?" in results:
+            return await self._get_status_data(results["VMGH?"])
+        # Un errore di connessione colpisce tutte le interrogazioni del batch
+        first = next(iter(results.values()))
+        if isinstance(first, HomeAssistantError):
+            await self._get_status_data(first)
+        return (self.data or {}).get("status")
+
+    @property
+    def _recovering(self) -> bool:
+        """Return True while the device is failing or being probed."""
+        return self._consecutive_errors > 0 or self.breaker.state == BREAKER_HALF_OPEN
+
+    async def _poll_device(
+        self, commands: list[str]
+    ) -> dict[str, str | HomeAssistantError]:
+        """Send all poll queries in a single device session."""
+        if self.poll_scheduler is None:
+            results = await tcp_send_commands(
+                self.ip, DEFAULT_PORT, commands, return_exceptions=True
+            )
+        else:
+            async with self.poll_scheduler.async_slot(self._recovering):
+                results = await tcp_send_commands(
+                    self.ip, DEFAULT_PORT, commands, return_exceptions=True
+                )
+        return dict(zip(commands, results, strict=True))
+
+    async def _get_status_data(self, response: str | HomeAssistantError) -> str:
+        """Get device status data from the VMGH? poll result."""
+        if isinstance(response, str):
+            return response
+
+        err = response
+        if isinstance(err, VMCTimeoutError):
             _LOGGER.warning("Timeout getting status from %s: %s", self.ip, err)
             self._handle_error()
             raise UpdateFailed(f"Timeout communicating with {self.ip}") from err
-        except VMCConnectionError as err:
-            _LOGGER.exception("Connection error to %s", self.ip)
-            if self._consecutive_errors == 0 or self._consecutive_errors % 5 == 0:
-                try:
-                    diagnostics = await validate_network_connectivity(
-                        self.ip, DEFAULT_PORT
-                    )
-                    _LOGGER.info(
-                        "Network diagnostics for %s: ping=%s, tcp=%s, details=%s",
-                        self.ip,
-                        diagnostics.get("ping_success"),
-                        diagnostics.get("tcp_connection"),
-                        diagnostics.get("error_details"),
-                    )
-                except Exception as diag_err:
-                    _LOGGER.debug("Unable to run network diagnostics: %s", diag_err)
+        if isinstance(err, VMCConnectionError):
+            _LOGGER.error("Connection error to %s: %s", self.ip, err)
+            # Diagnostica di rete solo al primo errore di ogni interruzione,
+            # in background per non ritardare l'esito dell'aggiornamento
+            if self._consecutive_errors == 0:
+                self.hass.async_create_background_task(
+                    self._async_log_network_diagnostics(),
+                    f"{DOMAIN} network diagnostics {self.ip}",
+                )
             self._handle_error()
             raise UpdateFailed(f"Connection error to {self.ip}: {err}") from err
+        raise err
 
-    async def _get_additional_data(self) -> dict[str, str | None]:
-        """Get additional device data (sensors, name, network) with smart intervals."""
-        responses: dict[str, str | None] = {}
-        current_time = time.time()
-
-        # Sensors data - always updated (every 60 seconds)
+    async def _async_log_network_diagnostics(self) -> None:
+        """Esegue la diagnostica di rete del dispositivo e ne registra l'esito."""
         try:
-            responses["sensors"] = await tcp_send_command(
-                self.ip, DEFAULT_PORT, "VMGI?"
-            )
-        except VMCConnectionError as err:
-            _LOGGER.warning("Unable to read sensors from %s: %s", self.ip, err)
-            responses["sensors"] = None
+            diagnostics = await validate_network_connectivity(self.ip, DEFAULT_PORT)
+        except Exception as diag_err:
+            _LOGGER.debug("Unable to run network diagnostics: %s", diag_err)
+            return
+        _LOGGER.info(
+            "Network diagnostics for %s: ping=%s, tcp=%s/%s, connect_rtt=%s, "
+            "details=%s",
+            self.ip,
+            diagnostics.get("ping_success"),
+            diagnostics.get("tcp_successes"),
+            diagnostics.get("tcp_probes"),
+            diagnostics.get("connect_rtt"),
+            diagnostics.get("error_details"),
+        )
 
-        # Device name - updated every 15 minutes
-        time_since_name_update = current_time - self._last_name_update
-        if time_since_name_update >= DEVICE_NAME_INTERVAL.total_seconds():
-            try:
-                responses["name"] = await tcp_send_command(
-                    self.ip, DEFAULT_PORT, "VMNM?"
-                )
-                self._last_name_update = current_time
-                if responses["name"]:
-                    self._cached_data["name"] = responses["name"]
-                _LOGGER.debug("Updated device name for %s", self.ip)
-            except VMCConnectionError as err:
-                _LOGGER.warning("Unable to read name from %s: %s", self.ip, err)
-                responses["name"] = None
-        else:
-            responses["name"] = self._cached_data["name"]
+    def _get_additional_data(
+        self, results: dict[str, str | HomeAssistantError]
+    ) -> dict[str, str | None]:
+        """Get additional device data (sensors, name, network) from the poll results."""
+        responses: dict[str, str | None] = {}
 
-        # Network info - updated every 15 minutes
-        time_since_network_update = current_time - self._last_network_update
-        if time_since_network_update >= NETWORK_INFO_INTERVAL.total_seconds():
-            try:
-                responses["network"] = await tcp_send_command(
-                    self.ip, DEFAULT_PORT, "VMSL?"
-                )
-                self._last_network_update = current_time
-                if responses["network"]:
-                    self._cached_data["network"] = responses["network"]
-                _LOGGER.debug("Updated network info for %s", self.ip)
-            except VMCConnectionError as err:
-                _LOGGER.warning("Unable to read network info from %s: %s", self.ip, err)
-                responses["network"] = None
+        # Sensors data - previous reading kept when VMGI? was not due
+        sensors = results.get("VMGI?")
+        if "VMGI?" not in results:
+            sensors = (self.data or {}).get("sensors")
+        elif isinstance(sensors, HomeAssistantError):
+            _LOGGER.warning("Unable to read sensors from %s: %s", self.ip, sensors)
+            sensors = None
+        responses["sensors"] = sensors
+
+        # Device name - cadence from the poll plan
+        if "VMNM?" not in results:
+            responses["name"] = self._cached_data["name"]
+        elif isinstance(name := results["VMNM?"], HomeAssistantError):
+            _LOGGER.warning("Unable to read name from %s: %s", self.ip, name)
+            responses["name"] = None
         else:
+            responses["name"] = name
+            if name:
+                self._cached_data["name"] = name
+            _LOGGER.debug("Updated device name for %s", self.ip)
+
+        # Network info - cadence from the poll plan
+        if "VMSL?" not in results:
             responses["network"] = self._cached_data["network"]
+        elif isinstance(network := results["VMSL?"], HomeAssistantError):
+            _LOGGER.warning("Unable to read network info from %s: %s", self.ip, network)
+            responses["network"] = None
+        else:
+            responses["network"] = network
+            if network:
+                self._cached_data["network"] = network
+            _LOGGER.debug("Updated network info for %s", self.ip)
 
         return responses
 
-    def _handle_successful_update(self) -> None:
-        """Handle successful data update."""
+    async def _async_probe_device(self) -> None:
+        """Check with a connect-only probe that the device is back online."""
+        _LOGGER.debug("Probing %s before resuming polls", self.ip)
+        try:
+            if self.poll_scheduler is None:
+                await async_probe_device(self.ip, DEFAULT_PORT)
+            else:
+                async with self.poll_scheduler.async_slot(recovering=True):
+                    await async_probe_device(self.ip, DEFAULT_PORT)
+        except VMCConnectionError as err:
+            self._handle_error()
+            raise UpdateFailed(f"Device {self.ip} still unreachable: {err}") from err
+
+    def _handle_successful_update(self, current_time: float) -> None:
+        """Handle successful data update and schedule the next poll."""
         if self._consecutive_errors > 0:
             _LOGGER.info(
                 "Connection restored with %s after %d consecutive errors",
                 self.ip,
                 self._consecutive_errors,
             )
+            if self.poll_scheduler is not None:
+                # Dopo un'interruzione comune (es. access point) i dispositivi
+                # tornerebbero a interrogare tutti insieme
+                self.poll_scheduler.add_device(self.ip)
 
         self._consecutive_errors = 0
-        if self.update_interval != self._normal_update_interval:  # type: ignore[has-type]
-            self.update_interval = self._normal_update_interval  # type: ignore[has-type]
-            _LOGGER.info("Restored normal update interval for %s", self.ip)
+        self.breaker.record_success()
+        # Il prossimo poll parte alla prima scadenza del piano
+        delay = self.poll_plan.next_poll_in(current_time)
+        if self.poll_scheduler is not None:
+            delay = self.poll_scheduler.stagger(self.ip, delay)
+        self.update_interval = timedelta(seconds=delay)
 
     async def _async_update_data(self):
-        """Fetch data from VMC device."""
+        """Fetch data from VMC device, serving recent data on a failed poll."""
+        try:
+            return await self._async_fetch_data()
+        except UpdateFailed as err:
+            if (data := self._stale_data()) is None:
+                raise
+            _LOGGER.warning(
+                "Poll of %s failed, keeping data from %d seconds ago: %s",
+                self.ip,
+                data["data_age"],
+                err,
+            )
+            return data
+
+    def _stale_data(self) -> dict[str, Any] | None:
+        """Restituisce l'ultimo snapshot valido da servire dopo un poll fallito.
+
+        Un singolo pacchetto perso non deve rendere non disponibili tutte le
+        entità del dispositivo: finché i dati hanno meno di
+        `stale_grace_period` secondi e il circuit breaker è chiuso restano
+        serviti, con "available" a False e la loro età in "data_age". Il primo
+        errore anticipa il poll successivo a STALE_RETRY_DELAY secondi.
+        Ritorna None quando le entità devono diventare non disponibili.
+        """
+        grace = float(
+            self.options.get(CONF_STALE_GRACE_PERIOD, DEFAULT_STALE_GRACE_PERIOD)
+        )
+        updated = (self.data or {}).get("last_update")
+        if (
+            not grace
+            or self.breaker.state != BREAKER_CLOSED
+            or not isinstance(updated, int | float)
+        ):
+            return None
+        age = time.time() - updated
+        if age > grace:
+            return None
+
+        if self._consecutive_errors <= 1:
+            self.update_interval = timedelta(seconds=STALE_RETRY_DELAY)
+        else:
+            self.update_interval = self._normal_update_interval
+        return {**self.data, "available": False, "stale": True, "data_age": round(age)}
+
+    async def _async_fetch_data(self) -> dict[str, Any]:
+        """Interroga il dispositivo e restituisce i nuovi dati."""
 
-        def _raise_update_failed(status_response: str) -> None:
+        def _raise_update_failed(status_response: str) -> NoReturn:
             """Raise UpdateFailed after handling error."""
             self._handle_error()
             raise UpdateFailed(
                 f"Device {self.ip} did not respond correctly: {status_response}"
             )
 
-        try:
-            status_response = await self._get_status_data()
+        if self.storage is not None:
+            self.storage.async_schedule_save()
 
-            if not status_response or not status_response.startswith("VMGO"):
-                _raise_update_failed(status_response)
+        if not self.breaker.allow_request():
+            raise UpdateFailed(
+                f"Device {self.ip} unreachable, next attempt in "
+                f"{self.breaker.retry_in:.0f} seconds"
+            )
+        if self.breaker.state == BREAKER_HALF_OPEN:
+            await self._async_probe_device()
+
+        try:
+            current_time = time.time()
+            results = await self._poll_device(self._build_poll_commands(current_time))
+            status_response = await self._get_poll_status(results)
 
-            additional_data = await self._get_additional_data()
+            # Ogni frame viene decodificato una sola volta: le entità leggono
+            # gli snapshot memorizzati da decode_status/decode_sensors
+            status = decode_status(status_response)
+            if status is None:
+                _raise_update_failed(str(status_response))
 
-            self._handle_successful_update()
+            self._record_poll(results, current_time)
+            additional_data = self._get_additional_data(results)
+            # Le metriche derivate vengono calcolate solo quando un'entità
+            # abilitata le legge (vedi metrics.DerivedMetrics)
+            decode_sensors(additional_data["sensors"])
 
-            # Parse filter hours from status response
-            filter_hours = self._parse_filter_hours(status_response)
+            self._handle_successful_update(current_time)
 
             data = {
                 "status": status_response,
                 "sensors": additional_data["sensors"],
                 "name": additional_data["name"],
                 "network": additional_data["network"],
-                "filter_hours": filter_hours,
+                "filter_hours": status.filter_hours,
                 "available": True,
-                "last_update": time.time(),
+                "stale": False,
+                # Istante di inizio del poll: una scrittura inviata durante
+                # l'attesa della sessione non risulta già letta
+                "last_update": current_time,
             }
 
             self._maybe_update_device_name(additional_data["name"])
@@ -250,7 +708,7 @@ class VmcHeltyCoordinator(DataUpdateCoordinator):
             _LOGGER.warning("Communication error with %s", self.ip)
         elif self._consecutive_errors == self._max_consecutive_errors:
             _LOGGER.error(
-                "Reached %d consecutive errors with %s, switching to recovery mode",
+                "Reached %d consecutive errors with %s, pausing polls",
                 self._max_consecutive_errors,
                 self.ip,
             )
@@ -263,15 +721,13 @@ class VmcHeltyCoordinator(DataUpdateCoordinator):
                 "Consecutive error #%d for %s", self._consecutive_errors, self.ip
             )
 
-        if (
-            self._consecutive_errors >= self._max_consecutive_errors
-            and self.update_interval != self._error_recovery_interval
-        ):
-            self.update_interval = self._error_recovery_interval  # type: ignore
+        if self.breaker.record_failure():
+            # Nessun poll fino allo scadere dell'attesa del circuit breaker
+            self.update_interval = timedelta(seconds=self.breaker.last_delay)
             _LOGGER.info(
-                "Changed update interval for %s to %d seconds (recovery mode)",
+                "Circuit breaker open for %s, next attempt in %d seconds",
                 self.ip,
-                self._error_recovery_interval.total_seconds(),
+                self.breaker.last_delay,
             )
 
     def _maybe_update_device_name(self, name_response):
@@ -15,6 +15,17 @@ from .const import (
     MIN_PASSWORD_LENGTH,
 )
 from .helpers import tcp_send_command
+from .protocol import (
+    FILTER_RESET_COMMAND,
+    fan_speed_command,
+    name_command,
+    network_command,
+    panel_led_command,
+    sensors_command,
+)
+
+# Azioni che modificano dati letti raramente e comando da rileggere
+_INVALIDATED_QUERIES = {"set_device_name": "VMNM?", "set_network_config": "VMSL?"}
 
 # Schema di validazione per le azioni del dispositivo
 DEVICE_ACTION_SCHEMA = vol.Schema(
@@ -55,6 +66,13 @@ async def async_setup_device_actions(hass: HomeAssistant) -> None:
         # Esegue l'azione richiesta
         await _execute_device_action(ip, action, parameters)
 
+        # Il coordinatore rilegge subito nome o rete invece di attendere il TTL
+        if (command := _INVALIDATED_QUERIES.get(action)) is not None:
+            for entry_id in device.config_entries:
+                coordinator = hass.data.get(DOMAIN, {}).get(entry_id)
+                if coordinator is not None:
+                    await coordinator.async_invalidate(command)
+
     # Registra il servizio per le azioni del dispositivo
     hass.services.async_register(
         DOMAIN,
@@ -90,7 +108,7 @@ async def _set_fan_speed(ip: str, parameters: dict) -> None:
     if not FAN_SPEED_OFF <= speed <= FAN_SPEED_MAX_NORMAL:
         raise HomeAssistantError("Speed must be between 0 and 4")
 
-    response = await tcp_send_command(ip, 5001, f"VMWH000000{speed}")
+    response = await tcp_send_command(ip, 5001, fan_speed_command(speed))
     if response != "OK":
         raise HomeAssistantError(f"Failed to set fan speed: {response}")
 
@@ -98,7 +116,7 @@ async def _set_fan_speed(ip: str, parameters: dict) -> None:
 async def _set_hyperventilation(ip: str, parameters: dict) -> None:
     """Set hyperventilation mode."""
     enable = parameters.get("enable", True)
-    command = "VMWH0000005" if enable else "VMWH0000001"  # Enable or set to speed 1
+    command = fan_speed_command(5 if enable else 1)  # Enable or set to speed 1
 
     response = await tcp_send_command(ip, 5001, command)
     if response != "OK":
@@ -108,7 +126,7 @@ async def _set_hyperventilation(ip: str, parameters: dict) -> None:
 async def _set_night_mode(ip: str, parameters: dict) -> None:
     """Set night mode."""
     enable = parameters.get("enable", True)
-    command = "VMWH0000006" if enable else "VMWH0000001"  # Enable or set to speed 1
+    command = fan_speed_command(6 if enable else 1)  # Enable or set to speed 1
 
     response = await tcp_send_command(ip, 5001, command)
     if response != "OK":
@@ -118,7 +136,7 @@ async def _set_night_mode(ip: str, parameters: dict) -> None:
 async def _set_free_cooling(ip: str, parameters: dict) -> None:
     """Set free cooling mode."""
     enable = parameters.get("enable", True)
-    command = "VMWH0000007" if enable else "VMWH0000001"  # Enable or set to speed 1
+    command = fan_speed_command(7 if enable else 1)  # Enable or set to speed 1
 
     response = await tcp_send_command(ip, 5001, command)
     if response != "OK":
@@ -128,7 +146,7 @@ async def _set_free_cooling(ip: str, parameters: dict) -> None:
 async def _set_panel_led(ip: str, parameters: dict) -> None:
     """Set panel LED state."""
     enable = parameters.get("enable", True)
-    command = "VMWH0100010" if enable else "VMWH0100000"
+    command = panel_led_command(enable)
 
     response = await tcp_send_command(ip, 5001, command)
     if response != "OK":
@@ -138,7 +156,7 @@ async def _set_panel_led(ip: str, parameters: dict) -> None:
 async def _set_sensors(ip: str, parameters: dict) -> None:
     """Set sensors state."""
     enable = parameters.get("enable", True)
-    command = "VMWH0300000" if enable else "VMWH0300002"
+    command = sensors_command(enable)
 
     response = await tcp_send_command(ip, 5001, command)
     if response != "OK":
@@ -147,7 +165,7 @@ async def _set_sensors(ip: str, parameters: dict) -> None:
 
 async def _reset_filter(ip: str, _parameters: dict) -> None:
     """Reset filter counter."""
-    response = await tcp_send_command(ip, 5001, "VMWH0417744")
+    response = await tcp_send_command(ip, 5001, FILTER_RESET_COMMAND)
     if response != "OK":
         raise HomeAssistantError(f"Failed to reset filter: {response}")
 
@@ -158,10 +176,7 @@ async def _set_device_name(ip: str, parameters: dict) -> None:
     if not name or len(name) > MAX_DEVICE_NAME_LENGTH:
         raise HomeAssistantError("Name must be between 1 and 32 characters")
 
-    # Rimuove caratteri non ASCII e spazi
-    safe_name = "".join(c for c in name if c.isalnum() or c == "_")
-
-    response = await tcp_send_command(ip, 5001, f"VMNM {safe_name}")
+    response = await tcp_send_command(ip, 5001, name_command(name))
     if response != "OK":
         raise HomeAssistantError(f"Failed to set device name: {response}")
 
@@ -181,11 +196,8 @@ async def _set_network_config(ip: str, parameters: dict) -> None:
     ):
         raise HomeAssistantError("Password must be between 8 and 32 characters")
 
-    # Formatta il comando con padding
-    ssid_padded = ssid.ljust(32, "*")
-    password_padded = password.ljust(32, "*")
-
-    response = await tcp_send_command(ip, 5001, f"VMSL {ssid_padded}{password_padded}")
+    # Il comando richiede SSID e password con padding a 32 caratteri
+    response = await tcp_send_command(ip, 5001, network_command(ssid, password))
     if response != "OK":
         raise HomeAssistantError(f"Failed to set network config: {response}")
 
@@ -1,11 +1,15 @@
 """Device info utilities for VMC Helty Flow integration."""
 
 import logging
+from typing import Any
 
+from homeassistant.core import callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity import Entity
 
 from .const import DOMAIN
+from .metrics import DerivedMetrics, derive_metrics
+from .protocol import SensorsSnapshot, StatusSnapshot, decode_sensors, decode_status
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -13,6 +17,15 @@ _LOGGER = logging.getLogger(__name__)
 class VmcHeltyEntity(Entity):
     """Base class for VMC Helty entities."""
 
+    # Campi dei dati da cui dipende lo stato dell'entità (nomi dei campi degli
+    # snapshot o chiavi dei dati); None = aggiornare a ogni notifica
+    _coordinator_inputs: frozenset[str] | None = None
+    # Opzione con la deadband del valore (CONF_DEADBAND_*), None = nessuna
+    _deadband_option: str | None = None
+
+    _metrics_cache: tuple[tuple[Any, Any, Any], DerivedMetrics] | None = None
+    _written_value: Any = None
+
     def __init__(self, coordinator, device_info=None):
         """Initialize VMC Helty entity."""
         self.coordinator = coordinator
@@ -53,6 +66,38 @@ class VmcHeltyEntity(Entity):
             suggested_area=self._device_info.get("suggested_area"),
         )
 
+    @property
+    def status_snapshot(self) -> StatusSnapshot | None:
+        """Return the decoded VMGO status, None if not available."""
+        if not self.coordinator.data:
+            return None
+        return decode_status(self.coordinator.data.get("status"))
+
+    @property
+    def sensors_snapshot(self) -> SensorsSnapshot | None:
+        """Return the decoded VMGI sensor readings, None if not available."""
+        if not self.coordinator.data:
+            return None
+        return decode_sensors(self.coordinator.data.get("sensors"))
+
+    @property
+    def metrics(self) -> DerivedMetrics:
+        """Return the metrics derived from the current data."""
+        data = self.coordinator.data or {}
+        key = (
+            data.get("status"),
+            data.get("sensors"),
+            getattr(self.coordinator, "room_volume", None),
+        )
+        # Stato e attributi leggono più metriche per aggiornamento: finché i
+        # frame non cambiano si riusa l'oggetto già ottenuto
+        cached = self._metrics_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        metrics = derive_metrics(decode_status(key[0]), decode_sensors(key[1]), key[2])
+        self._metrics_cache = (key, metrics)
+        return metrics
+
     @property
     def available(self) -> bool:
         """Return True if entity is available."""
@@ -61,9 +106,52 @@ class VmcHeltyEntity(Entity):
     async def async_added_to_hass(self):
         """Connect to dispatcher when added to hass."""
         self.async_on_remove(
-            self.coordinator.async_add_listener(self.async_write_ha_state)
+            self.coordinator.async_add_listener(self._handle_coordinator_update)
         )
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only if the entity inputs changed significantly."""
+        skip = self._skip_reason()
+        stats = getattr(self.coordinator, "state_writes", None)
+        if isinstance(stats, dict):
+            stats[skip or "written"] += 1
+        if skip is not None:
+            return
+        if self._deadband_option is not None:
+            self._written_value = getattr(self, "native_value", None)
+        self.async_write_ha_state()
+
+    def _skip_reason(self) -> str | None:
+        """Ritorna il motivo per non scrivere lo stato, None se va scritto."""
+        changed = getattr(self.coordinator, "changed_inputs", None)
+        if not isinstance(changed, frozenset):
+            # Prima notifica o disponibilità cambiata
+            return None
+        inputs = self._coordinator_inputs
+        if inputs is not None and inputs.isdisjoint(changed):
+            return "unchanged"
+        deadband = self._deadband()
+        if deadband:
+            value = getattr(self, "native_value", None)
+            last = self._written_value
+            if (
+                isinstance(value, int | float)
+                and isinstance(last, int | float)
+                and round(abs(value - last), 6) < deadband
+            ):
+                return "deadband"
+        return None
+
+    def _deadband(self) -> float:
+        """Return the deadband configured for the entity value."""
+        if self._deadband_option is None:
+            return 0.0
+        deadbands = getattr(self.coordinator, "deadbands", None)
+        if not isinstance(deadbands, dict):
+            return 0.0
+        return float(deadbands.get(self._deadband_option, 0.0))
+
     async def async_update(self):
         """Update the entity."""
         await self.coordinator.async_request_refresh()
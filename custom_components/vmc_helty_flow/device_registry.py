@@ -1,60 +1,183 @@
 """Device registry utilities for VMC Helty Flow integration."""
 
+import hashlib
+import json
 import logging
 import re
+import time
+from collections.abc import Mapping
 from typing import Any
 
+from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import device_registry, entity_registry
 from homeassistant.helpers.device_registry import DeviceEntry
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .const import DOMAIN, MAX_UNIQUE_ID_LENGTH, MIN_UNIQUE_ID_LENGTH
+from .const import (
+    CONF_DEVICE_IDENTITY,
+    DEVICE_IDENTITY_MAX_AGE,
+    DOMAIN,
+    MAX_UNIQUE_ID_LENGTH,
+    MIN_UNIQUE_ID_LENGTH,
+)
 from .helpers import tcp_send_command
 
 _LOGGER = logging.getLogger(__name__)
 
+# Campi dell'identità coperti dall'impronta
+_IDENTITY_FIELDS = (
+    "unique_id",
+    "name",
+    "model",
+    "sw_version",
+    "hw_version",
+    "suggested_area",
+    "mac",
+)
+
 
 async def async_get_or_create_device(
     hass: HomeAssistant, coordinator: DataUpdateCoordinator
 ) -> DeviceEntry:
     """Get o crea un device entry nel device registry."""
-    device_registry_instance = device_registry.async_get(hass)
-
     # Recupera l'indirizzo IP dal coordinatore
     ip_address = getattr(coordinator, "ip", "")
 
-    # Cerca di ottenere l'indirizzo MAC o un identificatore univoco
-    unique_id = await async_get_device_unique_id(hass, ip_address)
-
-    # Se non è disponibile un identificatore univoco, usa l'IP
-    # (non è l'ideale, ma è meglio di niente)
-    if not unique_id:
-        unique_id = f"helty_flow_{ip_address.replace('.', '_')}"
-
-    # Ottieni informazioni aggiuntive sul dispositivo
-    device_info = await async_get_device_info(hass, ip_address)
-
-    # Crea o aggiorna il device nel registry
     if coordinator.config_entry is None:
         raise ValueError("Coordinator config_entry is None")
+    entry = coordinator.config_entry
+
+    # Usa l'identità salvata nella config entry: evita VMSL?, VMNM? e VMCV?
+    # a ogni avvio e la riverifica in background solo quando è vecchia
+    identity = cached_device_identity(entry.data, ip_address)
+    if identity is None:
+        identity = await async_get_device_identity(hass, ip_address)
+        _store_device_identity(hass, entry, identity)
+    elif time.time() - identity["checked_at"] > DEVICE_IDENTITY_MAX_AGE:
+        entry.async_create_background_task(
+            hass,
+            _async_revalidate_device_identity(hass, coordinator, identity),
+            f"{DOMAIN} identity {ip_address}",
+        )
+
+    return _async_create_device_entry(hass, coordinator, identity)
+
+
+def _async_create_device_entry(
+    hass: HomeAssistant,
+    coordinator: DataUpdateCoordinator,
+    identity: dict[str, Any],
+) -> DeviceEntry:
+    """Crea o aggiorna il device nel registry a partire dall'identità."""
+    device_registry_instance = device_registry.async_get(hass)
+    ip_address = getattr(coordinator, "ip", "")
+
+    # Usa l'IP come connessione, più il MAC quando il dispositivo lo espone
+    connections = {("ip", ip_address)}
+    if identity.get("mac"):
+        connections.add((device_registry.CONNECTION_NETWORK_MAC, identity["mac"]))
 
     return device_registry_instance.async_get_or_create(  # type: ignore[no-any-return]
-        config_entry_id=coordinator.config_entry.entry_id,
+        config_entry_id=coordinator.config_entry.entry_id,  # type: ignore[union-attr]
         # Usa sia MAC/identificatore univoco che IP come identificatori
-        identifiers={(DOMAIN, unique_id), (DOMAIN, ip_address)},
-        # Usa l'IP come connessione
-        connections={("ip", ip_address)},
-        name=device_info.get("name", coordinator.name),
+        identifiers={(DOMAIN, identity["unique_id"]), (DOMAIN, ip_address)},
+        connections=connections,
+        name=identity.get("name") or coordinator.name,
         manufacturer="Helty",
-        model=device_info.get("model", "Flow"),
-        sw_version=device_info.get("sw_version"),
-        hw_version=device_info.get("hw_version"),
-        suggested_area=device_info.get("suggested_area"),
+        model=identity.get("model") or "Flow",
+        sw_version=identity.get("sw_version"),
+        hw_version=identity.get("hw_version"),
+        suggested_area=identity.get("suggested_area"),
         configuration_url=f"http://{ip_address}:5001",
     )
 
 
+async def async_get_device_identity(
+    hass: HomeAssistant, ip_address: str
+) -> dict[str, Any]:
+    """Legge dal dispositivo l'identità da salvare nella config entry."""
+    # Cerca di ottenere l'indirizzo MAC o un identificatore univoco
+    unique_id = await async_get_device_unique_id(hass, ip_address)
+
+    # Ottieni informazioni aggiuntive sul dispositivo
+    device_info = await async_get_device_info(hass, ip_address)
+
+    identity: dict[str, Any] = {
+        # Se non è disponibile un identificatore univoco, usa l'IP
+        # (non è l'ideale, ma è meglio di niente)
+        "unique_id": unique_id or f"helty_flow_{ip_address.replace('.', '_')}",
+        "name": device_info.get("name"),
+        "model": device_info.get("model", "Flow"),
+        "sw_version": device_info.get("sw_version"),
+        "hw_version": device_info.get("hw_version"),
+        "suggested_area": device_info.get("suggested_area"),
+        "mac": (
+            device_registry.format_mac(unique_id)
+            if unique_id and re.fullmatch(r"[0-9a-f]{12}", unique_id)
+            else None
+        ),
+    }
+    identity["fingerprint"] = _identity_fingerprint(ip_address, identity)
+    identity["checked_at"] = time.time()
+    return identity
+
+
+def cached_device_identity(
+    data: Mapping[str, Any], ip_address: str
+) -> dict[str, Any] | None:
+    """Restituisce l'identità salvata se integra e relativa a questo IP."""
+    identity = data.get(CONF_DEVICE_IDENTITY)
+    if not isinstance(identity, dict) or not identity.get("unique_id"):
+        return None
+    if identity.get("fingerprint") != _identity_fingerprint(ip_address, identity):
+        _LOGGER.debug("Cached identity for %s is invalid, reading it again", ip_address)
+        return None
+    if not isinstance(identity.get("checked_at"), int | float):
+        return None
+    return identity
+
+
+def _identity_fingerprint(ip_address: str, identity: dict[str, Any]) -> str:
+    """Impronta dei campi di identità, legata all'IP del dispositivo."""
+    fields = {key: identity.get(key) for key in _IDENTITY_FIELDS}
+    payload = json.dumps([ip_address, fields], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _store_device_identity(
+    hass: HomeAssistant, entry: ConfigEntry, identity: dict[str, Any]
+) -> None:
+    """Salva l'identità nei dati della config entry."""
+    # Senza risposta al nome il dispositivo non era raggiungibile: l'identità
+    # di ripiego non viene salvata e si riprova al prossimo avvio
+    if not identity.get("name"):
+        return
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, CONF_DEVICE_IDENTITY: identity}
+    )
+
+
+async def _async_revalidate_device_identity(
+    hass: HomeAssistant, coordinator: DataUpdateCoordinator, cached: dict[str, Any]
+) -> None:
+    """Riverifica in background l'identità salvata."""
+    ip_address = getattr(coordinator, "ip", "")
+    identity = await async_get_device_identity(hass, ip_address)
+    if not identity.get("name") or coordinator.config_entry is None:
+        return
+
+    if identity["fingerprint"] == cached["fingerprint"]:
+        # Identità invariata: aggiorna solo la data dell'ultima verifica
+        identity = {**cached, "checked_at": identity["checked_at"]}
+    else:
+        _LOGGER.info("Device identity changed for %s, updating registry", ip_address)
+        coordinator.device_entry = _async_create_device_entry(  # type: ignore[attr-defined]
+            hass, coordinator, identity
+        )
+    _store_device_identity(hass, coordinator.config_entry, identity)
+
+
 async def async_get_device_unique_id(
     _hass: HomeAssistant, ip_address: str
 ) -> str | None:
@@ -1,5 +1,7 @@
 """Diagnostics support for VMC Helty Flow integration."""
 
+import time
+
 from homeassistant.components.diagnostics import async_redact_data
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
@@ -63,6 +65,25 @@ async def async_get_config_entry_diagnostics(
         },
     }
 
+    # Stato del circuit breaker del dispositivo
+    diagnostics_data["circuit_breaker"] = coordinator.breaker.as_dict()
+
+    # Scritture di stato eseguite e saltate (ingressi invariati o deadband)
+    diagnostics_data["state_writes"] = dict(coordinator.state_writes)
+
+    # Piano di polling: cadenze ed età dei dati di ogni interrogazione
+    diagnostics_data["poll_plan"] = coordinator.poll_plan.as_dict(time.time())
+
+    # Poll contemporanei e fase del dispositivo nello scheduler globale
+    if coordinator.poll_scheduler is not None:
+        diagnostics_data["poll_scheduler"] = coordinator.poll_scheduler.as_dict(
+            coordinator.ip
+        )
+
+    # Statistiche della connessione persistente
+    if coordinator.connection is not None:
+        diagnostics_data["connection"] = coordinator.connection.as_dict()
+
     # Aggiunge statistiche aggiuntive se disponibili
     if coordinator.data:
         try:
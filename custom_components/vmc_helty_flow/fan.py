@@ -19,11 +19,12 @@ from .const import (
     FAN_SPEED_MAX_NORMAL,
     FAN_SPEED_NIGHT_MODE,
     FAN_SPEED_OFF,
-    PART_INDEX_PANEL_LED,
+    PART_INDEX_FAN_SPEED,
     PART_INDEX_SENSORS,
 )
 from .device_info import VmcHeltyEntity
-from .helpers import VMCConnectionError, tcp_send_command
+from .helpers import VMCConnectionError, async_write_setting
+from .protocol import fan_speed_command
 
 
 async def async_setup_entry(
@@ -40,6 +41,8 @@ async def async_setup_entry(
 class VmcHeltyFan(VmcHeltyEntity, FanEntity):
     """VMC Helty Fan entity."""
 
+    _coordinator_inputs = frozenset({"fan_speed", "panel_led", "sensors"})
+
     def __init__(self, coordinator):
         """Initialize the fan."""
         super().__init__(coordinator)
@@ -48,91 +51,64 @@ class VmcHeltyFan(VmcHeltyEntity, FanEntity):
         self._attr_speed_count = 4  # 4 velocità (1-4)
         self._attr_supported_features = FanEntityFeature.SET_SPEED
 
+    def _fan_speed(self) -> int | None:
+        """Velocità letta dallo stato; 0 se il campo manca, None se non valida."""
+        status = self.status_snapshot
+        if status is None:
+            return None
+        if status.part_count <= PART_INDEX_FAN_SPEED:
+            return FAN_SPEED_OFF
+        return status.fan_speed
+
     @property
     def is_on(self) -> bool:
         """Return True if fan is on."""
-        if not self.coordinator.data:
-            return False
-
-        # Parsa lo stato dalla risposta VMGH
-        status = self.coordinator.data.get("status", "")
-        if status and status.startswith("VMGO"):
-            try:
-                parts = status.split(",")
-                fan_speed = int(parts[1]) if len(parts) > 1 else 0
-                # Velocità 0 = off, 1-4 = on, 5-7 = modalità speciali
-                # (considerare come on)
-            except (ValueError, IndexError):
-                return False
-            else:
-                return fan_speed > 0
-        return False
+        # Velocità 0 = off, 1-4 = on, 5-7 = modalità speciali (considerate on)
+        fan_speed = self._fan_speed()
+        return fan_speed is not None and fan_speed > 0
 
     @property
     def percentage(self) -> int:
         """Return current speed percentage."""
-        result = 0
-        if self.coordinator.data:
-            status = self.coordinator.data.get("status", "")
-            if status and status.startswith("VMGO"):
-                try:
-                    parts = status.split(",")
-                    fan_speed = int(parts[1]) if len(parts) > 1 else 0
-
-                    # Gestione modalità speciali
-                    if fan_speed == FAN_SPEED_NIGHT_MODE:  # Modalità notte
-                        result = FAN_PERCENTAGE_STEP
-                    elif fan_speed == FAN_SPEED_HYPERVENTILATION:  # Iperventilazione
-                        result = 100
-                    elif fan_speed == FAN_SPEED_FREE_COOLING:  # Free cooling
-                        result = 0
-                    else:
-                        # Velocità normale 0-4
-                        result = min(fan_speed * FAN_PERCENTAGE_STEP, 100)
-                except (ValueError, IndexError):
-                    result = 0
-        return result
+        fan_speed = self._fan_speed()
+        if fan_speed is None:
+            return 0
+
+        # Gestione modalità speciali
+        if fan_speed == FAN_SPEED_NIGHT_MODE:  # Modalità notte
+            return FAN_PERCENTAGE_STEP
+        if fan_speed == FAN_SPEED_HYPERVENTILATION:  # Iperventilazione
+            return 100
+        if fan_speed == FAN_SPEED_FREE_COOLING:  # Free cooling
+            return 0
+        # Velocità normale 0-4
+        return min(fan_speed * FAN_PERCENTAGE_STEP, 100)
 
     @property
     def extra_state_attributes(self) -> dict[str, int | bool | None]:
         """Return extra state attributes."""
-        if not self.coordinator.data:
+        fan_speed = self._fan_speed()
+        if fan_speed is None:
             return {}
 
-        status = self.coordinator.data.get("status", "")
-        attributes: dict[str, int | bool | None] = {}
-
-        if status and status.startswith("VMGO"):
-            try:
-                parts = status.split(",")
-                fan_speed = int(parts[1]) if len(parts) > 1 else 0
-
-                # Modalità speciali
-                attributes["night_mode"] = fan_speed == FAN_SPEED_NIGHT_MODE
-                attributes["hyperventilation"] = fan_speed == FAN_SPEED_HYPERVENTILATION
-                attributes["free_cooling"] = fan_speed == FAN_SPEED_FREE_COOLING
-                attributes["manual_speed"] = (
-                    fan_speed
-                    if FAN_SPEED_OFF <= fan_speed <= FAN_SPEED_MAX_NORMAL
-                    else None
-                )
-
-                # Altri stati dal dispositivo
-                if len(parts) > PART_INDEX_PANEL_LED:
-                    attributes["panel_led"] = (
-                        parts[PART_INDEX_PANEL_LED] == "1"
-                        if len(parts) > PART_INDEX_PANEL_LED
-                        else False
-                    )
-                if len(parts) > PART_INDEX_SENSORS:
-                    attributes["sensors_active"] = (
-                        parts[PART_INDEX_SENSORS] == "0"
-                        if len(parts) > PART_INDEX_SENSORS
-                        else True
-                    )
-
-            except (ValueError, IndexError):
-                pass
+        status = self.status_snapshot
+        attributes: dict[str, int | bool | None] = {
+            # Modalità speciali
+            "night_mode": fan_speed == FAN_SPEED_NIGHT_MODE,
+            "hyperventilation": fan_speed == FAN_SPEED_HYPERVENTILATION,
+            "free_cooling": fan_speed == FAN_SPEED_FREE_COOLING,
+            "manual_speed": (
+                fan_speed
+                if FAN_SPEED_OFF <= fan_speed <= FAN_SPEED_MAX_NORMAL
+                else None
+            ),
+        }
+
+        # Altri stati dal dispositivo
+        if status is not None and status.panel_led is not None:
+            attributes["panel_led"] = status.panel_led_on
+        if status is not None and status.part_count > PART_INDEX_SENSORS:
+            attributes["sensors_active"] = status.sensors_active
 
         return attributes
 
@@ -146,13 +122,15 @@ class VmcHeltyFan(VmcHeltyEntity, FanEntity):
                 1, min(FAN_SPEED_MAX_NORMAL, round(percentage / FAN_PERCENTAGE_STEP))
             )
 
+        command = fan_speed_command(speed)
         try:
-            response = await tcp_send_command(
-                self.coordinator.ip, 5001, f"VMWH000000{speed}"
+            # Le variazioni ravvicinate (slider) inviano solo l'ultimo valore
+            await async_write_setting(
+                self.coordinator.ip,
+                command,
+                lambda: self.coordinator.async_write(command),
+                self.coordinator.data,
             )
-            if response == "OK":
-                # Forza aggiornamento del coordinatore
-                await self.coordinator.async_request_refresh()
         except VMCConnectionError:
             self._attr_available = False
             raise
@@ -3,12 +3,33 @@
 import asyncio
 import logging
 import socket
-import subprocess
+import statistics
 import sys
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
 
 from homeassistant.exceptions import HomeAssistantError
 
-from .const import DEFAULT_PORT, IP_RANGE_END, IP_RANGE_START, TCP_TIMEOUT
+from .const import (
+    CONNECTION_IDLE_TIMEOUT,
+    DEFAULT_PORT,
+    IP_RANGE_END,
+    IP_RANGE_START,
+    MAX_FRAME_SIZE,
+    NETWORK_DIAG_CONNECT_TIMEOUT,
+    NETWORK_DIAG_PING_TIMEOUT,
+    NETWORK_DIAG_PROBES,
+    TCP_TIMEOUT,
+)
+from .protocol import encode_command, format_command, write_setting_key
+from .resilience import RttEstimator
+from .scheduler import (
+    PRIORITY_POLL,
+    CommandScheduler,
+    WriteCoalescer,
+    command_priority,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,7 +58,7 @@ class VMCProtocolError(VMCResponseError):
     """Errore di protocollo nella comunicazione con VMC."""
 
 
-async def _establish_connection(ip: str, port: int, timeout: int) -> tuple:
+async def _establish_connection(ip: str, port: int, timeout: float) -> tuple:
     """Stabilisce una connessione TCP."""
     try:
         return await asyncio.wait_for(
@@ -77,17 +98,93 @@ async def _establish_connection(ip: str, port: int, timeout: int) -> tuple:
         raise VMCConnectionError(error_msg) from err
 
 
+async def _close_writer(writer) -> None:
+    """Chiude lo stream di scrittura ignorando gli errori di chiusura."""
+    try:
+        writer.close()
+        await asyncio.wait_for(writer.wait_closed(), timeout=1.0)
+    except (TimeoutError, Exception) as err:
+        _LOGGER.debug("Errore durante la chiusura della connessione: %s", err)
+
+
+class VmcFrameReader:
+    """Decodificatore delle risposte del protocollo VMC.
+
+    Il dispositivo termina ogni risposta con un fine riga; i byte letti dal
+    socket vengono accumulati in un buffer riutilizzato per tutta la durata
+    della connessione e restituiti un frame alla volta, così una lettura non
+    restituisce mai metà risposta o due risposte attaccate.
+    """
+
+    def __init__(
+        self, reader: asyncio.StreamReader, max_frame_size: int = MAX_FRAME_SIZE
+    ) -> None:
+        self._reader = reader
+        self._max_frame_size = max_frame_size
+        self._buffer = bytearray()
+        # True dopo un errore di framing: lo stream non è più allineato
+        self.broken = False
+
+    @property
+    def pending(self) -> int:
+        """Return the number of buffered bytes not yet returned as a frame."""
+        return len(self._buffer)
+
+    def at_eof(self) -> bool:
+        """Return True if the stream is closed and the buffer is empty."""
+        return not self._buffer and self._reader.at_eof()
+
+    async def async_read_frame(self) -> bytes:
+        """Legge la prossima risposta completa, senza terminatori.
+
+        Ritorna b"" se la connessione viene chiusa senza dati in sospeso.
+
+        Raises:
+            VMCProtocolError: Se la risposta supera la dimensione massima o la
+                connessione viene chiusa a metà di una risposta
+        """
+        while True:
+            end = self._buffer.find(b"\n")
+            if end >= 0:
+                frame = bytes(self._buffer[:end]).strip(b"\r")
+                del self._buffer[: end + 1]
+                if frame:
+                    return frame
+                # Riga vuota o terminatore \n\r spezzato: continua
+                continue
+
+            if len(self._buffer) > self._max_frame_size:
+                self._buffer.clear()
+                self.broken = True
+                raise VMCProtocolError(
+                    f"Risposta oltre la dimensione massima di "
+                    f"{self._max_frame_size} byte"
+                )
+
+            chunk = await self._reader.read(self._max_frame_size)
+            if not chunk:
+                if self._buffer.strip(b"\r"):
+                    self._buffer.clear()
+                    self.broken = True
+                    raise VMCProtocolError(
+                        "Connessione chiusa prima della fine della risposta"
+                    )
+                self._buffer.clear()
+                return b""
+            self._buffer += chunk
+
+
 async def _send_and_receive(
-    reader, writer, command: str, ip: str, port: int, timeout: int
+    frames: VmcFrameReader, writer, command: str, ip: str, port: int, timeout: float
 ) -> str:
     """Invia un comando e legge la risposta."""
     # Invia il comando
-    writer.write(command.encode("utf-8"))
+    writer.write(encode_command(command))
     await writer.drain()
 
     # Leggi la risposta con timeout
     try:
-        response = await asyncio.wait_for(reader.read(1024), timeout=timeout)
+        response = await asyncio.wait_for(frames.async_read_frame(), timeout=timeout)
     except TimeoutError:
         raise VMCTimeoutError(
             f"Timeout in attesa della risposta da {ip}:{port}"
@@ -112,11 +209,320 @@ async def _send_and_receive(
     return decoded_response
 
 
+class _StaleConnectionError(Exception):
+    """La connessione persistente è stata chiusa dal dispositivo."""
+
+
+class VmcConnection:
+    """Connessione TCP persistente verso un singolo dispositivo VMC.
+
+    Il socket resta aperto tra un comando e l'altro, così coordinatore, entità
+    e device actions non pagano l'handshake TCP a ogni comando. Non c'è un
+    timer che chiude i socket inattivi: il timeout di inattività
+    (CONNECTION_IDLE_TIMEOUT) è più lungo dell'intervallo massimo tra due
+    poll, quindi il socket viene riusato a ogni ciclo e riaperto solo se
+    resta inutilizzato oltre quel limite, al comando successivo. Un socket
+    chiuso dal dispositivo viene riaperto in modo trasparente; la connessione
+    viene chiusa allo scaricamento della config entry. L'accesso al socket
+    passa dallo scheduler, che serializza i comandi e dà precedenza alle
+    scritture dell'utente.
+
+    Se il chiamante non indica un timeout, connessione e lettura usano i
+    timeout adattivi ricavati dai tempi di risposta misurati.
+    """
+
+    def __init__(
+        self,
+        ip: str,
+        port: int = DEFAULT_PORT,
+        idle_timeout: float = CONNECTION_IDLE_TIMEOUT,
+    ) -> None:
+        self.ip = ip
+        self.port = port
+        self._idle_timeout = idle_timeout
+        self._frames: VmcFrameReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self.scheduler = CommandScheduler()
+        self.coalescer = WriteCoalescer()
+        self.connect_rtt = RttEstimator()
+        self.response_rtt = RttEstimator()
+        self._last_used = 0.0
+        self.connect_count = 0
+        self.reuse_count = 0
+
+    @property
+    def connected(self) -> bool:
+        """Return True if the socket is open."""
+        return self._writer is not None and not self._writer.is_closing()
+
+    def set_timeout_bounds(self, min_timeout: float, max_timeout: float) -> None:
+        """Aggiorna i limiti dei timeout adattivi."""
+        self.connect_rtt.set_bounds(min_timeout, max_timeout)
+        self.response_rtt.set_bounds(min_timeout, max_timeout)
+
+    def restore_timing(self, data: dict[str, Any] | None) -> None:
+        """Ripristina le stime dei tempi di risposta salvate."""
+        if not data:
+            return
+        self.connect_rtt.restore(data.get("connect"))
+        self.response_rtt.restore(data.get("response"))
+
+    def timing_as_stored_dict(self) -> dict[str, Any]:
+        """Return the timing estimates to persist across restarts."""
+        return {
+            "connect": self.connect_rtt.as_stored_dict(),
+            "response": self.response_rtt.as_stored_dict(),
+        }
+
+    async def _async_ensure_connected(self, timeout: float | None) -> bool:
+        """Apre il socket se necessario; ritorna True se è stato riutilizzato."""
+        if self.connected and time.monotonic() - self._last_used < self._idle_timeout:
+            self.reuse_count += 1
+            return True
+
+        await self._async_disconnect()
+        start = time.monotonic()
+        try:
+            reader, self._writer = await _establish_connection(
+                self.ip,
+                self.port,
+                self.connect_rtt.timeout if timeout is None else timeout,
+            )
+        except VMCTimeoutError:
+            self.connect_rtt.on_timeout()
+            raise
+        self._last_used = time.monotonic()
+        self.connect_rtt.observe(self._last_used - start)
+        self._frames = VmcFrameReader(reader)
+        self.connect_count += 1
+        return False
+
+    async def _async_disconnect(self) -> None:
+        """Chiude il socket corrente, se presente."""
+        writer = self._writer
+        self._frames = None
+        self._writer = None
+        if writer is not None:
+            await _close_writer(writer)
+
+    async def _async_exchange(self, command: str, timeout: float | None) -> str:
+        """Invia un comando sul socket corrente e legge la risposta."""
+        if self._frames is None or self._writer is None:
+            raise _StaleConnectionError("Connessione non aperta")
+        start = time.monotonic()
+        try:
+            response = await _send_and_receive(
+                self._frames,
+                self._writer,
+                command,
+                self.ip,
+                self.port,
+                self.response_rtt.timeout if timeout is None else timeout,
+            )
+        except VMCProtocolError:
+            if self._frames is not None and self._frames.broken:
+                # Frame non valido: il resto dello stream non è affidabile
+                await self._async_disconnect()
+            else:
+                # Il dispositivo ha risposto: la connessione resta valida
+                self._last_used = time.monotonic()
+                self.response_rtt.observe(self._last_used - start)
+            raise
+        except VMCTimeoutError:
+            # Lo stato dello stream non è più affidabile
+            self.response_rtt.on_timeout()
+            await self._async_disconnect()
+            raise
+        except OSError as err:
+            await self._async_disconnect()
+            raise _StaleConnectionError(str(err)) from err
+
+        if not response and self._frames is not None and self._frames.at_eof():
+            await self._async_disconnect()
+            raise _StaleConnectionError("Connessione chiusa dal dispositivo")
+
+        self._last_used = time.monotonic()
+        self.response_rtt.observe(self._last_used - start)
+        return response
+
+    async def _async_send_locked(self, command: str, timeout: float | None) -> str:
+        """Invia un comando già formattato; lo slot dello scheduler è già preso.
+
+        Un socket riutilizzato che risulta chiuso dal dispositivo viene riaperto
+        e il comando ripetuto una sola volta.
+        """
+        reused = await self._async_ensure_connected(timeout)
+        try:
+            return await self._async_exchange(command, timeout)
+        except _StaleConnectionError as err:
+            if not reused:
+                raise VMCConnectionError(
+                    f"Errore durante la comunicazione con {self.ip}:{self.port}: "
+                    f"{err}"
+                ) from err
+            _LOGGER.debug(
+                "Connessione persistente con %s:%s non più valida, riconnessione",
+                self.ip,
+                self.port,
+            )
+
+        await self._async_ensure_connected(timeout)
+        try:
+            return await self._async_exchange(command, timeout)
+        except _StaleConnectionError as err:
+            raise VMCConnectionError(
+                f"Errore durante la comunicazione con {self.ip}:{self.port}: {err}"
+            ) from err
+
+    async def async_send_command(
+        self, command: str, timeout: int | None = None, priority: int | None = None
+    ) -> str:
+        """Invia un comando sulla connessione persistente.
+
+        Se il timeout non è indicato viene usato quello adattivo; se la priorità
+        non è indicata viene ricavata dal comando (vedi command_priority).
+        """
+        if priority is None:
+            priority = command_priority(command)
+
+        async with self.scheduler.async_slot(priority):
+            return await self._async_send_locked(format_command(command), timeout)
+
+    async def async_send_commands(
+        self,
+        commands: list[str],
+        timeout: int | None = None,
+        priority: int | None = None,
+        return_exceptions: bool = False,
+    ) -> list[str | HomeAssistantError]:
+        """Invia una sequenza ordinata di comandi in un'unica sessione.
+
+        I comandi occupano un solo slot dello scheduler e condividono lo stesso
+        socket, senza che altri comandi possano inserirsi nel mezzo. Con
+        return_exceptions=True un errore di protocollo viene restituito al
+        posto della risposta e la sequenza prosegue; un errore di connessione
+        interrompe la sessione e viene restituito per tutti i comandi rimanenti.
+        """
+        if not commands:
+            return []
+        if priority is None:
+            priority = min(command_priority(command) for command in commands)
+
+        results: list[str | HomeAssistantError] = []
+        async with self.scheduler.async_slot(priority, cost=len(commands)):
+            for command in commands:
+                try:
+                    results.append(
+                        await self._async_send_locked(format_command(command), timeout)
+                    )
+                except VMCResponseError as err:
+                    if not return_exceptions:
+                        raise
+                    results.append(err)
+                except VMCConnectionError as err:
+                    if not return_exceptions:
+                        raise
+                    results.extend([err] * (len(commands) - len(results)))
+                    break
+        return results
+
+    async def async_probe(self, timeout: float | None = None) -> None:
+        """Verifica che il dispositivo accetti connessioni, senza inviare comandi.
+
+        Se il socket viene aperto resta disponibile per i comandi successivi.
+        """
+        async with self.scheduler.async_slot(PRIORITY_POLL, cost=0):
+            await self._async_ensure_connected(timeout)
+
+    async def async_close(self) -> None:
+        """Chiude la connessione persistente."""
+        await self._async_disconnect()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return connection statistics for diagnostics."""
+        return {
+            "connected": self.connected,
+            "connect_count": self.connect_count,
+            "reuse_count": self.reuse_count,
+            "idle_timeout": self._idle_timeout,
+            "timing": {
+                "connect": self.connect_rtt.as_dict(),
+                "response": self.response_rtt.as_dict(),
+            },
+            "scheduler": self.scheduler.as_dict(),
+            "coalescer": self.coalescer.as_dict(),
+        }
+
+
+# Connessioni persistenti registrate per (ip, porta)
+_DEVICE_CONNECTIONS: dict[tuple[str, int], VmcConnection] = {}
+
+
+def get_device_connection(ip: str, port: int = DEFAULT_PORT) -> VmcConnection:
+    """Restituisce la connessione persistente del dispositivo, creandola se serve.
+
+    Una volta registrata, tutti i comandi inviati con tcp_send_command verso
+    lo stesso ip e porta condividono questa connessione.
+    """
+    key = (ip, port)
+    connection = _DEVICE_CONNECTIONS.get(key)
+    if connection is None:
+        connection = VmcConnection(ip, port)
+        _DEVICE_CONNECTIONS[key] = connection
+    return connection
+
+
+def get_write_coalescer(ip: str, port: int = DEFAULT_PORT) -> WriteCoalescer:
+    """Restituisce l'accorpatore di scritture del dispositivo.
+
+    Senza una connessione persistente registrata restituisce un accorpatore
+    nuovo, quindi le scritture vengono inviate singolarmente.
+    """
+    connection = _DEVICE_CONNECTIONS.get((ip, port))
+    return connection.coalescer if connection is not None else WriteCoalescer()
+
+
+async def async_write_setting(
+    ip: str,
+    command: str,
+    send: Callable[[], Awaitable[str]],
+    data: dict[str, Any] | None = None,
+    force: bool = False,
+) -> str | None:
+    """Invia una scrittura di un'impostazione del dispositivo.
+
+    La scrittura viene saltata, restituendo None, se i dati recenti del
+    coordinatore (`data`) mostrano il dispositivo già nello stato richiesto,
+    a meno di `force`. Le scritture ravvicinate sulla stessa impostazione
+    vengono accorpate.
+    """
+    coalescer = get_write_coalescer(ip)
+    if not force and coalescer.is_redundant(command, data):
+        _LOGGER.debug("Skipping %s to %s: device already in that state", command, ip)
+        return None
+    return await coalescer.async_write(write_setting_key(command), send)
+
+
+async def async_close_device_connection(ip: str, port: int = DEFAULT_PORT) -> None:
+    """Chiude e rimuove la connessione persistente del dispositivo.
+
+    Le scritture ancora in attesa di invio vengono annullate.
+    """
+    connection = _DEVICE_CONNECTIONS.pop((ip, port), None)
+    if connection is not None:
+        await connection.coalescer.async_cancel()
+        await connection.async_close()
+
+
 async def tcp_send_command(
     ip: str, port: int, command: str, timeout: int | None = None
 ) -> str:
     """Invia un comando TCP al dispositivo VMC e restituisce la risposta.
 
+    Se per il dispositivo è registrata una connessione persistente (vedi
+    get_device_connection) il comando viene inviato su quella, altrimenti
+    viene aperta e chiusa una connessione dedicata.
+
     Args:
         ip: Indirizzo IP del dispositivo
         port: Porta TCP del dispositivo
@@ -138,16 +544,17 @@ async def tcp_send_command(
         command,
         timeout,
     )
-    if timeout is None:
-        timeout = TCP_TIMEOUT
-
-        # Assicura che il comando termini con NLCR (\n\r)
-        if not command.endswith("\n\r"):
-            # Rimuovi eventuali terminazioni errate
-            command = command.rstrip("\r\n")
-            command += "\n\r"
+    command = format_command(command)
 
     try:
+        connection = _DEVICE_CONNECTIONS.get((ip, port))
+        if connection is not None:
+            # Senza timeout esplicito la connessione usa quello adattivo
+            return await connection.async_send_command(command, timeout)
+
+        if timeout is None:
+            timeout = TCP_TIMEOUT
+
         _LOGGER.debug(
             "Connessione a %s:%s timeout: %s, comando: %s",
             ip,
@@ -159,14 +566,12 @@ async def tcp_send_command(
         reader, writer = await _establish_connection(ip, port, timeout)
 
         try:
-            return await _send_and_receive(reader, writer, command, ip, port, timeout)
+            return await _send_and_receive(
+                VmcFrameReader(reader), writer, command, ip, port, timeout
+            )
         finally:
             # Chiudi sempre la connessione
-            try:
-                writer.close()
-                await asyncio.wait_for(writer.wait_closed(), timeout=1.0)
-            except (TimeoutError, Exception) as err:
-                _LOGGER.debug("Errore durante la chiusura della connessione: %s", err)
+            await _close_writer(writer)
 
     except VMCConnectionError:
         # Rilancia le eccezioni specifiche
@@ -181,6 +586,71 @@ async def tcp_send_command(
         ) from err
 
 
+async def tcp_send_commands(
+    ip: str,
+    port: int,
+    commands: list[str],
+    timeout: int | None = None,
+    return_exceptions: bool = False,
+) -> list[str | HomeAssistantError]:
+    """Invia più comandi TCP al dispositivo VMC in un'unica sessione.
+
+    Usa la connessione persistente del dispositivo se registrata, altrimenti
+    apre una connessione dedicata per l'intera sequenza e la chiude alla fine.
+    Le risposte sono restituite nello stesso ordine dei comandi; per la
+    gestione degli errori vedi VmcConnection.async_send_commands.
+    """
+    _LOGGER.info(
+        "tcp_send_commands-> ip: %s, port: %s, commands: %s, timeout: %s",
+        ip,
+        port,
+        commands,
+        timeout,
+    )
+    connection = _DEVICE_CONNECTIONS.get((ip, port))
+    owned = connection is None
+    if connection is None:
+        connection = VmcConnection(ip, port)
+
+    try:
+        return await connection.async_send_commands(
+            commands, timeout, return_exceptions=return_exceptions
+        )
+    except (VMCConnectionError, VMCResponseError):
+        raise
+    except Exception as err:
+        _LOGGER.exception(
+            "Errore imprevisto durante la comunicazione con %s:%s", ip, port
+        )
+        raise VMCConnectionError(
+            f"Errore durante la comunicazione con {ip}:{port}: {err}"
+        ) from err
+    finally:
+        if owned:
+            await connection.async_close()
+
+
+async def async_probe_device(
+    ip: str, port: int = DEFAULT_PORT, timeout: float | None = None
+) -> None:
+    """Verifica con la sola connessione TCP che il dispositivo sia raggiungibile.
+
+    Usa la connessione persistente del dispositivo se registrata.
+
+    Raises:
+        VMCConnectionError: Se il dispositivo non accetta la connessione
+    """
+    connection = _DEVICE_CONNECTIONS.get((ip, port))
+    if connection is not None:
+        await connection.async_probe(timeout)
+        return
+
+    _, writer = await _establish_connection(
+        ip, port, TCP_TIMEOUT if timeout is None else timeout
+    )
+    await _close_writer(writer)
+
+
 async def _get_device_name(ip: str, port: int, timeout: int) -> str:
     """Get device mnemonic name."""
     _LOGGER.info("_get_device_name-> ip: %s, port: %s, timeout: %s", ip, port, timeout)
@@ -289,49 +759,108 @@ def get_device_name(ip: str) -> str:
     return f"VMC Helty {ip.split('.')[-1]}"
 
 
-async def validate_network_connectivity(
-    ip: str, port: int = DEFAULT_PORT
-) -> dict[str, str | bool | int | None]:
-    """Validate network connectivity to a VMC device and return diagnostic info."""
-    diagnostics: dict[str, str | bool | int | None] = {
-        "ip": ip,
-        "port": port,
-        "reachable": False,
-        "ping_success": False,
-        "tcp_connection": False,
-        "error_details": None,
-    }
+async def _async_ping(ip: str) -> tuple[bool, str | None]:
+    """Esegue un ping del dispositivo senza bloccare l'event loop.
 
-    # Test ping connectivity (basic network reachability)
-    try:
-        if sys.platform.startswith("win"):
-            ping_cmd = ["ping", "-n", "1", "-w", "1000", ip]
-        else:
-            ping_cmd = ["ping", "-c", "1", "-W", "1", ip]
+    Ritorna l'esito e, in caso di errore, il dettaglio.
+    """
+    if sys.platform.startswith("win"):
+        ping_cmd = ["ping", "-n", "1", "-w", "1000", ip]
+    else:
+        ping_cmd = ["ping", "-c", "1", "-W", "1", ip]
 
-        result = subprocess.run(ping_cmd, capture_output=True, timeout=5, check=False)
-        diagnostics["ping_success"] = result.returncode == 0
-        if not diagnostics["ping_success"]:
-            error_output = (
-                result.stderr.decode() if result.stderr else "Host unreachable"
-            )
-            diagnostics["error_details"] = f"Ping failed: {error_output}"
-    except Exception as err:
-        diagnostics["error_details"] = f"Ping test failed: {err}"
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *ping_cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except OSError as err:
+        return False, f"Ping test failed: {err}"
 
-    # Test TCP connection
     try:
-        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout=3)
-        diagnostics["tcp_connection"] = True
-        diagnostics["reachable"] = True
-        writer.close()
-        await writer.wait_closed()
-    except Exception as err:
-        diagnostics["tcp_connection"] = False
-        if not diagnostics["error_details"]:
-            diagnostics["error_details"] = f"TCP connection failed: {err}"
+        _, stderr = await asyncio.wait_for(
+            process.communicate(), timeout=NETWORK_DIAG_PING_TIMEOUT
+        )
+    except TimeoutError:
+        process.kill()
+        await process.wait()
+        return False, "Ping test failed: timeout"
+
+    if process.returncode == 0:
+        return True, None
+    error_output = stderr.decode(errors="replace").strip() if stderr else ""
+    return False, f"Ping failed: {error_output or 'Host unreachable'}"
+
+
+async def _async_connect_probes(
+    ip: str, port: int, probes: int, timeout: float
+) -> tuple[list[float], str | None]:
+    """Misura il tempo di connessione TCP su più tentativi consecutivi.
+
+    Se il primo tentativo fallisce il dispositivo è considerato irraggiungibile
+    e non si attendono gli altri timeout; dopo almeno un successo i fallimenti
+    vengono contati come perdite.
+    """
+    samples: list[float] = []
+    error: str | None = None
+    for _ in range(probes):
+        start = time.monotonic()
+        try:
+            _, writer = await _establish_connection(ip, port, timeout)
+        except HomeAssistantError as err:
+            error = f"TCP connection failed: {err}"
+            if not samples:
+                break
+            continue
+        samples.append(time.monotonic() - start)
+        await _close_writer(writer)
+    return samples, error
+
+
+def _rtt_distribution(samples: list[float]) -> dict[str, float] | None:
+    """Riassume i tempi di connessione misurati (millisecondi)."""
+    if not samples:
+        return None
+    values = [sample * 1000 for sample in samples]
+    return {
+        "min_ms": round(min(values), 1),
+        "median_ms": round(statistics.median(values), 1),
+        "mean_ms": round(statistics.fmean(values), 1),
+        "max_ms": round(max(values), 1),
+        "stdev_ms": round(statistics.pstdev(values), 1),
+    }
 
-    return diagnostics
+
+async def validate_network_connectivity(
+    ip: str,
+    port: int = DEFAULT_PORT,
+    probes: int = NETWORK_DIAG_PROBES,
+) -> dict[str, Any]:
+    """Validate network connectivity to a VMC device and return diagnostic info.
+
+    Ping e tentativi di connessione TCP vengono eseguiti in parallelo e senza
+    operazioni bloccanti, quindi più dispositivi possono essere diagnosticati
+    contemporaneamente. `connect_rtt` riporta la distribuzione dei tempi di
+    connessione sui `probes` tentativi.
+    """
+    (ping_success, ping_error), (samples, tcp_error) = await asyncio.gather(
+        _async_ping(ip),
+        _async_connect_probes(ip, port, probes, NETWORK_DIAG_CONNECT_TIMEOUT),
+    )
+    tcp_connection = bool(samples)
+
+    return {
+        "ip": ip,
+        "port": port,
+        "reachable": tcp_connection,
+        "ping_success": ping_success,
+        "tcp_connection": tcp_connection,
+        "tcp_probes": probes,
+        "tcp_successes": len(samples),
+        "connect_rtt": _rtt_distribution(samples),
+        "error_details": ping_error or (None if tcp_connection else tcp_error),
+    }
 
 
 def parse_vmsl_response(response: str) -> tuple[str, str]:
@@ -341,3 +870,24 @@ def parse_vmsl_response(response: str) -> tuple[str, str]:
     ssid = response[:32].replace("*", "").strip()
     password = response[32:64].replace("*", "").strip()
     return ssid, password
+
+
+def summarize_vmsl_response(response: str | None) -> dict[str, Any] | None:
+    """Riduce la risposta VMSL? a SSID e lunghezza della password.
+
+    La password non viene mai salvata su disco: basta la sua lunghezza per
+    mostrarla mascherata.
+    """
+    ssid, password = parse_vmsl_response(response or "")
+    if not ssid and not password:
+        return None
+    return {"ssid": ssid, "password_length": len(password)}
+
+
+def mask_vmsl_response(summary: dict[str, Any] | None) -> str | None:
+    """Ricostruisce una risposta VMSL? con la password mascherata."""
+    if not isinstance(summary, dict):
+        return None
+    ssid = str(summary.get("ssid") or "")[:32]
+    length = min(int(summary.get("password_length") or 0), 32)
+    return ssid.ljust(32, "*") + ("#" * length).ljust(32, "*")
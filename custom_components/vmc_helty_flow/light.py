@@ -14,7 +14,13 @@ from .const import (
     PART_INDEX_LIGHTS_TIMER,
 )
 from .device_info import VmcHeltyEntity
-from .helpers import tcp_send_command
+from .helpers import async_write_setting
+from .protocol import (
+    LIGHT_OFF_COMMAND,
+    LIGHT_TIMER_OFF_COMMAND,
+    light_level_command,
+    light_timer_command,
+)
 
 
 async def async_setup_entry(
@@ -36,6 +42,8 @@ async def async_setup_entry(
 class VmcHeltyLight(VmcHeltyEntity, LightEntity):
     """VMC Helty light entity for brightness control."""
 
+    _coordinator_inputs = frozenset({"light_level"})
+
     def __init__(self, coordinator):
         """Initialize the light."""
         super().__init__(coordinator)
@@ -47,24 +55,15 @@ class VmcHeltyLight(VmcHeltyEntity, LightEntity):
     @property
     def brightness(self) -> int | None:
         """Return current brightness (0-255)."""
-        if not self.coordinator.data:
+        status = self.status_snapshot
+        if status is None:
             return 0
-
-        status = self.coordinator.data.get("status", "")
-        if status and status.startswith("VMGO"):
-            try:
-                parts = status.split(",")
-                # Il livello luci è nella posizione 11 (0-100)
-                light_level = (
-                    int(parts[PART_INDEX_LIGHTS_LEVEL])
-                    if len(parts) > PART_INDEX_LIGHTS_LEVEL
-                    else 0
-                )
-                # Converti da 0-100 a 0-255
-                return int(light_level * 2.55)
-            except (ValueError, IndexError):
-                return 0
-        return 0
+        # Il livello luci è nella posizione 11 (0-100)
+        light_level = status.light_level
+        if status.part_count <= PART_INDEX_LIGHTS_LEVEL:
+            light_level = 0
+        # Converti da 0-100 a 0-255
+        return int((light_level or 0) * 2.55)
 
     @property
     def is_on(self) -> bool:
@@ -80,23 +79,28 @@ class VmcHeltyLight(VmcHeltyEntity, LightEntity):
         light_level = round(light_level / 25) * 25
 
         # Formato comando corretto: VMWH06nnn000 dove nnn è il livello (0-100)
-        response = await tcp_send_command(
-            self.coordinator.ip, 5001, f"VMWH06{light_level:03d}000"
-        )
-        if response == "OK":
-            await self.coordinator.async_request_refresh()
+        await self._async_write_level(light_level_command(light_level))
 
     async def async_turn_off(self, **_kwargs) -> None:
         """Turn off the light."""
         # VMWH0600000 per luci disattivate
-        response = await tcp_send_command(self.coordinator.ip, 5001, "VMWH0600000")
-        if response == "OK":
-            await self.coordinator.async_request_refresh()
+        await self._async_write_level(LIGHT_OFF_COMMAND)
+
+    async def _async_write_level(self, command: str) -> None:
+        """Send a light level command, coalescing rapid slider changes."""
+        await async_write_setting(
+            self.coordinator.ip,
+            command,
+            lambda: self.coordinator.async_write(command),
+            self.coordinator.data,
+        )
 
 
 class VmcHeltyLightTimer(VmcHeltyEntity, LightEntity):
     """VMC Helty light timer entity."""
 
+    _coordinator_inputs = frozenset({"light_timer"})
+
     def __init__(self, coordinator):
         """Initialize the light timer."""
         super().__init__(coordinator)
@@ -109,24 +113,15 @@ class VmcHeltyLightTimer(VmcHeltyEntity, LightEntity):
     @property
     def extra_state_attributes(self):
         """Return timer value in seconds."""
-        if not self.coordinator.data:
+        status = self.status_snapshot
+        if status is None:
             return {}
-
-        status = self.coordinator.data.get("status", "")
-        if status and status.startswith("VMGO"):
-            try:
-                parts = status.split(",")
-                # Il timer luci è nella posizione 15 (in secondi)
-                timer_seconds = (
-                    int(parts[PART_INDEX_LIGHTS_TIMER])
-                    if len(parts) > PART_INDEX_LIGHTS_TIMER
-                    else 0
-                )
-            except (ValueError, IndexError):
-                return {}
-            else:
-                return {"timer_seconds": timer_seconds}
-        return {}
+        # Il timer luci è nella posizione 15 (in secondi)
+        if status.part_count <= PART_INDEX_LIGHTS_TIMER:
+            return {"timer_seconds": 0}
+        if status.light_timer is None:
+            return {}
+        return {"timer_seconds": status.light_timer}
 
     @property
     def is_on(self) -> bool:
@@ -140,18 +135,13 @@ class VmcHeltyLightTimer(VmcHeltyEntity, LightEntity):
         timer_seconds = 300  # Default 5 minuti
 
         # Formato comando corretto: VMWH14nnnnn dove nnnnn è il timer in secondi
-        response = await tcp_send_command(
-            self.coordinator.ip, 5001, f"VMWH14{timer_seconds:05d}"
-        )
-        if response == "OK":
-            await self.coordinator.async_request_refresh()
+        command = light_timer_command(timer_seconds)
+        await self.coordinator.async_write(command)
 
     async def async_turn_off(self, **_kwargs) -> None:
         """Disable light timer."""
         # VMWH1400000 per disattivare il timer
-        response = await tcp_send_command(self.coordinator.ip, 5001, "VMWH1400000")
-        if response == "OK":
-            await self.coordinator.async_request_refresh()
+        await self.coordinator.async_write(LIGHT_TIMER_OFF_COMMAND)
 
     def turn_on(self, **_kwargs) -> None:
         """Synchronous write is not supported; use async path."""
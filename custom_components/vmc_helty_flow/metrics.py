@@ -0,0 +1,331 @@
+"""Metriche derivate dalle letture dei dispositivi VMC Helty Flow.
+
+Le metriche psicrometriche (punto di rugiada, umidità assoluta, indice di
+comfort) e di ventilazione (portata, ricambi d'aria, consumi) vengono
+calcolate al più una volta per ogni nuovo frame: `derive_metrics` è
+memorizzata sugli snapshot decodificati e sul volume dell'ambiente, quindi
+coordinatore ed entità di un dispositivo condividono lo stesso oggetto, e ogni
+gruppo di metriche viene calcolato solo quando un'entità abilitata lo legge.
+"""
+
+import math
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
+
+from .const import (
+    AIRFLOW_MAPPING,
+    COMFORT_HUMIDITY_ACCEPTABLE_MAX,
+    COMFORT_HUMIDITY_ACCEPTABLE_MIN,
+    COMFORT_HUMIDITY_MAX,
+    COMFORT_HUMIDITY_OPTIMAL_MAX,
+    COMFORT_HUMIDITY_OPTIMAL_MIN,
+    COMFORT_HUMIDITY_REFERENCE,
+    COMFORT_HUMIDITY_TOLERABLE_MAX,
+    COMFORT_HUMIDITY_TOLERABLE_MIN,
+    COMFORT_TEMP_ACCEPTABLE_MAX,
+    COMFORT_TEMP_ACCEPTABLE_MIN,
+    COMFORT_TEMP_OPTIMAL_MAX,
+    COMFORT_TEMP_OPTIMAL_MIN,
+    COMFORT_TEMP_REFERENCE,
+    COMFORT_TEMP_TOLERABLE_MAX,
+    COMFORT_TEMP_TOLERABLE_MIN,
+    POWER_MAPPING,
+)
+from .protocol import SNAPSHOT_CACHE_SIZE, SensorsSnapshot, StatusSnapshot
+
+# Costanti Magnus-Tetens per l'acqua
+MAGNUS_A = 17.27
+MAGNUS_B = 237.7
+MAGNUS_ES0 = 6.112  # Pressione di vapore saturo a 0 °C (hPa)
+
+# Costanti per l'umidità assoluta
+WATER_MOLAR_MASS = 18.016  # g/mol
+GAS_CONSTANT = 0.08314  # L·hPa/(mol·K)
+KELVIN_OFFSET = 273.15
+
+# Portata usata per velocità non riconosciute nei calcoli di ricambio (m³/h)
+DEFAULT_EXCHANGE_AIRFLOW = 10
+
+# Utilizzo tipico giornaliero (ore per velocità) per la stima dei consumi
+TYPICAL_DAILY_HOURS = {
+    0: 4,  # 4 hours off (sleep, maintenance)
+    1: 5,  # 5 hours at speed 1 (night, light usage)
+    2: 12,  # 12 hours at speed 2 (normal operation)
+    3: 2,  # 2 hours at speed 3 (cooking, showers)
+    4: 1,  # 1 hour at speed 4 (peak usage)
+}
+
+# Correzione della stima giornaliera in base alla velocità corrente
+DAILY_ENERGY_SPEED_FACTORS = {
+    0: 1.0,  # Off: baseline
+    1: 0.9,  # Speed 1: lower
+    2: 1.0,  # Speed 2: baseline
+    3: 1.1,  # Speed 3: higher
+    4: 1.2,  # Speed 4: highest
+    5: 1.3,  # Hyperventilation
+    6: 0.8,  # Night mode: lowest
+    7: 1.3,  # Free cooling
+}
+
+# Consumo giornaliero di riferimento (Wh) con l'utilizzo tipico
+DAILY_ENERGY_BASELINE = sum(
+    hours * POWER_MAPPING.get(speed, 0) for speed, hours in TYPICAL_DAILY_HOURS.items()
+)
+
+
+def dew_point(temperature: float, humidity: float) -> float:
+    """Calcola il punto di rugiada (°C) con la formula Magnus-Tetens."""
+    gamma = (MAGNUS_A * temperature) / (MAGNUS_B + temperature) + math.log(
+        humidity / 100.0
+    )
+    return (MAGNUS_B * gamma) / (MAGNUS_A - gamma)
+
+
+def absolute_humidity(temperature: float, humidity: float) -> float:
+    """Calcola l'umidità assoluta (g/m³) con la formula Magnus-Tetens."""
+    # Pressione vapore saturo e reale (hPa)
+    es = MAGNUS_ES0 * math.exp((MAGNUS_A * temperature) / (MAGNUS_B + temperature))
+    e = (humidity / 100.0) * es
+    return (e * WATER_MOLAR_MASS) / (GAS_CONSTANT * (temperature + KELVIN_OFFSET))
+
+
+def temperature_comfort(temp: float) -> float:
+    """Calcola il comfort termico (0.0-1.0)."""
+    # Range ottimale
+    if COMFORT_TEMP_OPTIMAL_MIN <= temp <= COMFORT_TEMP_OPTIMAL_MAX:
+        return 1.0
+    # Range accettabile con degradazione lineare
+    if COMFORT_TEMP_ACCEPTABLE_MIN <= temp < COMFORT_TEMP_OPTIMAL_MIN:
+        return 0.5 + (temp - COMFORT_TEMP_ACCEPTABLE_MIN) * 0.25  # da 0.5 a 1.0
+    if COMFORT_TEMP_OPTIMAL_MAX < temp <= COMFORT_TEMP_ACCEPTABLE_MAX:
+        return 1.0 - (temp - COMFORT_TEMP_OPTIMAL_MAX) * 0.25  # da 1.0 a 0.5
+    # Range sopportabile con ulteriore degradazione
+    if COMFORT_TEMP_TOLERABLE_MIN <= temp < COMFORT_TEMP_ACCEPTABLE_MIN:
+        return 0.2 + (temp - COMFORT_TEMP_TOLERABLE_MIN) * 0.15  # da 0.2 a 0.5
+    if COMFORT_TEMP_ACCEPTABLE_MAX < temp <= COMFORT_TEMP_TOLERABLE_MAX:
+        return 0.5 - (temp - COMFORT_TEMP_ACCEPTABLE_MAX) * 0.15  # da 0.5 a 0.2
+    # Fuori range accettabile
+    return max(0.0, 0.2 - abs(temp - COMFORT_TEMP_REFERENCE) * 0.02)
+
+
+def humidity_comfort(humidity: float) -> float:
+    """Calcola il comfort igrometrico (0.0-1.0)."""
+    # Range ottimale
+    if COMFORT_HUMIDITY_OPTIMAL_MIN <= humidity <= COMFORT_HUMIDITY_OPTIMAL_MAX:
+        return 1.0
+    # Range accettabile con degradazione lineare
+    if COMFORT_HUMIDITY_ACCEPTABLE_MIN <= humidity < COMFORT_HUMIDITY_OPTIMAL_MIN:
+        return 0.5 + (humidity - COMFORT_HUMIDITY_ACCEPTABLE_MIN) * 0.05  # 0.5-1.0
+    if COMFORT_HUMIDITY_OPTIMAL_MAX < humidity <= COMFORT_HUMIDITY_ACCEPTABLE_MAX:
+        return 1.0 - (humidity - COMFORT_HUMIDITY_OPTIMAL_MAX) * 0.05  # 1.0-0.5
+    # Range sopportabile con ulteriore degradazione
+    if COMFORT_HUMIDITY_TOLERABLE_MIN <= humidity < COMFORT_HUMIDITY_ACCEPTABLE_MIN:
+        return 0.2 + (humidity - COMFORT_HUMIDITY_TOLERABLE_MIN) * 0.06  # 0.2-0.5
+    if COMFORT_HUMIDITY_ACCEPTABLE_MAX < humidity <= COMFORT_HUMIDITY_TOLERABLE_MAX:
+        return 0.5 - (humidity - COMFORT_HUMIDITY_ACCEPTABLE_MAX) * 0.03  # 0.5-0.2
+    # Fuori range accettabile
+    return max(0.0, 0.2 - abs(humidity - COMFORT_HUMIDITY_REFERENCE) * 0.005)
+
+
+class DerivedMetrics:
+    """Metriche calcolate da uno stato VMGO e da una lettura VMGI.
+
+    Ogni gruppo di metriche viene calcolato al primo accesso a una delle sue
+    metriche: le metriche lette solo da entità disabilitate non vengono mai
+    calcolate. Ogni metrica vale None se i dati necessari mancano o non sono
+    validi. I punti di rugiada e il delta non sono arrotondati: le soglie di
+    allarme vanno confrontate con il valore esatto.
+    """
+
+    __slots__ = (
+        "_status_complete",
+        "absolute_humidity",
+        "air_exchange_time",
+        "airflow",
+        "comfort_index",
+        "daily_air_changes",
+        "daily_energy",
+        "dew_point_delta",
+        "external_dew_point",
+        "fan_speed",
+        "humidity",
+        "humidity_comfort",
+        "internal_dew_point",
+        "power",
+        "room_volume",
+        "temperature_comfort",
+        "temperature_external",
+        "temperature_internal",
+    )
+
+    fan_speed: int | None
+    temperature_internal: float | None
+    temperature_external: float | None
+    humidity: float | None
+    room_volume: Any
+    airflow: int | None
+    power: float | None
+    daily_energy: float | None
+    air_exchange_time: float | None
+    daily_air_changes: float | None
+    absolute_humidity: float | None
+    temperature_comfort: float | None
+    humidity_comfort: float | None
+    comfort_index: int | None
+    internal_dew_point: float | None
+    external_dew_point: float | None
+    dew_point_delta: float | None
+
+    def __init__(
+        self,
+        status: StatusSnapshot | None,
+        sensors: SensorsSnapshot | None,
+        room_volume: Any,
+    ) -> None:
+        self.room_volume = room_volume
+        self.fan_speed = status.fan_speed if status else None
+        self._status_complete = status is not None and status.is_complete
+        self.temperature_internal = sensors.temperature_internal if sensors else None
+        self.temperature_external = sensors.temperature_external if sensors else None
+        self.humidity = sensors.humidity if sensors else None
+
+    def __getattr__(self, name: str) -> Any:
+        """Calcola il gruppo di una metrica non ancora calcolata."""
+        # Chiamato solo per gli slot non ancora assegnati
+        group = _METRIC_GROUPS.get(name)
+        if group is None:
+            raise AttributeError(name)
+        group(self)
+        return object.__getattribute__(self, name)
+
+    def _derive_power(self) -> None:
+        """Calcola portata e consumi dalla velocità ventola."""
+        fan_speed = self.fan_speed
+        self.airflow = None
+        self.power = None
+        self.daily_energy = None
+        if fan_speed is None:
+            return
+        self.airflow = AIRFLOW_MAPPING.get(fan_speed, 0)
+        self.power = float(POWER_MAPPING.get(fan_speed, 0))
+        self.daily_energy = float(
+            DAILY_ENERGY_BASELINE * DAILY_ENERGY_SPEED_FACTORS.get(fan_speed, 1.0)
+        )
+
+    def _derive_air_changes(self) -> None:
+        """Calcola tempo di ricambio e ricambi giornalieri dal volume."""
+        fan_speed = self.fan_speed
+        self.air_exchange_time = None
+        self.daily_air_changes = None
+        # I ricambi d'aria richiedono un frame VMGO completo
+        if fan_speed is None or not self._status_complete:
+            return
+        exchange_airflow = AIRFLOW_MAPPING.get(fan_speed, DEFAULT_EXCHANGE_AIRFLOW)
+        room_volume = self.room_volume
+        try:
+            if fan_speed != 0:  # A ventilazione spenta il ricambio non avviene
+                exchange_time = (room_volume / exchange_airflow) * 60
+                self.air_exchange_time = float(round(exchange_time, 1))
+            self.daily_air_changes = float(
+                round(exchange_airflow / room_volume * 24, 1)
+            )
+        except (ValueError, TypeError, ZeroDivisionError):
+            pass
+
+    def _derive_absolute_humidity(self) -> None:
+        """Calcola l'umidità assoluta interna."""
+        self.absolute_humidity = None
+        if self.temperature_internal is None or self.humidity is None:
+            return
+        try:
+            value = absolute_humidity(self.temperature_internal, self.humidity)
+        except (ValueError, ZeroDivisionError, OverflowError):
+            return
+        self.absolute_humidity = round(value, 2)
+
+    def _derive_comfort(self) -> None:
+        """Calcola comfort termico, igrometrico e indice di comfort."""
+        temp_internal, humidity = self.temperature_internal, self.humidity
+        self.temperature_comfort = None
+        self.humidity_comfort = None
+        self.comfort_index = None
+        if temp_internal is None or humidity is None:
+            return
+        self.temperature_comfort = temperature_comfort(temp_internal)
+        self.humidity_comfort = humidity_comfort(humidity)
+        if 0 < humidity <= COMFORT_HUMIDITY_MAX:
+            self.comfort_index = round(
+                (self.temperature_comfort * 0.6 + self.humidity_comfort * 0.4) * 100
+            )
+
+    def _derive_dew_points(self) -> None:
+        """Calcola i punti di rugiada interno ed esterno e il loro delta."""
+        temp_internal, humidity = self.temperature_internal, self.humidity
+        self.internal_dew_point = None
+        self.external_dew_point = None
+        self.dew_point_delta = None
+        if temp_internal is None or humidity is None or humidity <= 0:
+            return
+        try:
+            self.internal_dew_point = dew_point(temp_internal, humidity)
+            if self.temperature_external is not None:
+                self.external_dew_point = dew_point(self.temperature_external, humidity)
+        except (ValueError, ZeroDivisionError, OverflowError):
+            return
+        if humidity <= COMFORT_HUMIDITY_MAX and self.external_dew_point is not None:
+            self.dew_point_delta = self.internal_dew_point - self.external_dew_point
+
+    @property
+    def dew_point(self) -> float | None:
+        """Return the internal dew point rounded to 0.1 °C."""
+        if self.internal_dew_point is None:
+            return None
+        return round(self.internal_dew_point, 1)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics for diagnostics."""
+        return {
+            name: getattr(self, name)
+            for name in self.__slots__
+            if not name.startswith("_")
+        }
+
+
+# Metodo che calcola ogni metrica calcolata su richiesta
+_METRIC_GROUPS: dict[str, Callable[[DerivedMetrics], None]] = {
+    "airflow": DerivedMetrics._derive_power,
+    "power": DerivedMetrics._derive_power,
+    "daily_energy": DerivedMetrics._derive_power,
+    "air_exchange_time": DerivedMetrics._derive_air_changes,
+    "daily_air_changes": DerivedMetrics._derive_air_changes,
+    "absolute_humidity": DerivedMetrics._derive_absolute_humidity,
+    "temperature_comfort": DerivedMetrics._derive_comfort,
+    "humidity_comfort": DerivedMetrics._derive_comfort,
+    "comfort_index": DerivedMetrics._derive_comfort,
+    "internal_dew_point": DerivedMetrics._derive_dew_points,
+    "external_dew_point": DerivedMetrics._derive_dew_points,
+    "dew_point_delta": DerivedMetrics._derive_dew_points,
+}
+
+
+@lru_cache(maxsize=SNAPSHOT_CACHE_SIZE)
+def _derive_metrics(
+    status: StatusSnapshot | None,
+    sensors: SensorsSnapshot | None,
+    room_volume: Any,
+) -> DerivedMetrics:
+    return DerivedMetrics(status, sensors, room_volume)
+
+
+def derive_metrics(
+    status: StatusSnapshot | None,
+    sensors: SensorsSnapshot | None,
+    room_volume: Any,
+) -> DerivedMetrics:
+    """Restituisce le metriche derivate, calcolate una sola volta per frame."""
+    try:
+        return _derive_metrics(status, sensors, room_volume)
+    except TypeError:
+        # Volume non hashable: calcolo senza memorizzazione
+        return DerivedMetrics(status, sensors, room_volume)
@@ -0,0 +1,369 @@
+"""Piano di polling dichiarativo dei dispositivi VMC Helty Flow.
+
+Ogni interrogazione (VMGH?, VMGI?, VMNM?, VMSL?) è descritta da una o più
+regole con intervallo, età massima dei dati, priorità e una condizione
+facoltativa. A ogni poll il piano decide quali comandi inviare e quando
+eseguire il poll successivo, al posto dei controlli temporali scritti a mano
+nel coordinatore.
+"""
+
+import math
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any
+
+from .const import (
+    ADAPTIVE_BACKOFF_FACTOR,
+    ADAPTIVE_CO2_MIN_DELTA,
+    ADAPTIVE_CO2_RATE,
+    ADAPTIVE_HUMIDITY_MIN_DELTA,
+    ADAPTIVE_HUMIDITY_RATE,
+    CO2_RISING_MIN_DELTA,
+    CONF_ADAPTIVE_MAX_INTERVAL,
+    CONF_ADAPTIVE_MIN_INTERVAL,
+    CONF_ADAPTIVE_POLLING,
+    CONF_DEVICE_INFO_INTERVAL,
+    CONF_SCAN_INTERVAL,
+    CONF_SENSORS_FAST_INTERVAL,
+    CONF_SENSORS_INTERVAL,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_POLL_INTERVALS,
+    POLL_MIN_INTERVAL,
+    POLL_STALENESS_FACTOR,
+    POLL_TICK_TOLERANCE,
+)
+from .protocol import SensorsSnapshot, StatusSnapshot, decode_sensors
+
+
+def _co2_rising(previous: str | None, last: str | None) -> bool:
+    """Ritorna True se la CO2 è aumentata tra le ultime due letture VMGI."""
+    before, after = decode_sensors(previous), decode_sensors(last)
+    if before is None or after is None or before.co2 is None or after.co2 is None:
+        return False
+    return after.co2 - before.co2 >= CO2_RISING_MIN_DELTA
+
+
+# Condizioni utilizzabili nelle regole: ricevono le ultime due risposte valide
+# del comando della regola
+POLL_CONDITIONS: dict[str, Callable[[str | None, str | None], bool]] = {
+    "co2_rising": _co2_rising,
+}
+
+
+class PollRule:
+    """Regola del piano: un comando, la sua cadenza e quando si applica.
+
+    Una regola con condizione vale solo finché la condizione è vera; se ha
+    un `max_staleness` il comando viene comunque inviato quando i suoi dati
+    superano quell'età. Per le regole senza condizione `max_staleness` è di
+    default un multiplo dell'intervallo e indica quando i dati sono vecchi.
+    L'intervallo delle regole `adaptive` viene scalato da `AdaptiveInterval`.
+    """
+
+    def __init__(
+        self,
+        command: str,
+        interval: float,
+        *,
+        priority: int = 0,
+        max_staleness: float | None = None,
+        condition: str | None = None,
+        adaptive: bool = False,
+    ) -> None:
+        if condition is not None and condition not in POLL_CONDITIONS:
+            raise ValueError(f"Unknown poll condition: {condition}")
+        self.command = command
+        self.interval = max(float(interval), POLL_MIN_INTERVAL)
+        self.priority = priority
+        if max_staleness is None and condition is None:
+            max_staleness = self.interval * POLL_STALENESS_FACTOR
+        self.max_staleness = None if max_staleness is None else float(max_staleness)
+        self.condition = condition
+        self.adaptive = adaptive
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the rule for diagnostics."""
+        return {
+            "interval_s": self.interval,
+            "max_staleness_s": self.max_staleness,
+            "priority": self.priority,
+            "condition": self.condition,
+            "adaptive": self.adaptive,
+        }
+
+
+class AdaptiveInterval:
+    """Controllore dell'intervallo di polling di stato e sensori.
+
+    Una variazione significativa tra due poll (velocità della ventola, CO2 o
+    umidità in rapido cambiamento) riporta l'intervallo al minimo; ogni poll
+    stabile lo allunga di ADAPTIVE_BACKOFF_FACTOR fino al massimo.
+    """
+
+    def __init__(
+        self, initial: float, min_interval: float, max_interval: float
+    ) -> None:
+        self.min_interval = max(float(min_interval), POLL_MIN_INTERVAL)
+        self.max_interval = max(float(max_interval), self.min_interval)
+        self.interval = min(max(float(initial), self.min_interval), self.max_interval)
+        self.reason = "initial"
+        self._status: StatusSnapshot | None = None
+        self._sensors: SensorsSnapshot | None = None
+        self._sensors_at: float | None = None
+
+    def observe(
+        self,
+        now: float,
+        status: StatusSnapshot | None,
+        sensors: SensorsSnapshot | None,
+    ) -> None:
+        """Aggiorna l'intervallo con lo stato e i sensori letti in un poll."""
+        if status is None and sensors is None:
+            return
+        transient = self._transient(now, status, sensors)
+        if status is not None:
+            self._status = status
+        if sensors is not None:
+            self._sensors, self._sensors_at = sensors, now
+        if transient is not None:
+            self.interval, self.reason = self.min_interval, transient
+        else:
+            self.interval = min(
+                self.interval * ADAPTIVE_BACKOFF_FACTOR, self.max_interval
+            )
+            self.reason = "stable"
+
+    def _transient(
+        self,
+        now: float,
+        status: StatusSnapshot | None,
+        sensors: SensorsSnapshot | None,
+    ) -> str | None:
+        """Ritorna il campo che ha avuto una variazione significativa, se c'è."""
+        if (
+            status is not None
+            and self._status is not None
+            and status.fan_speed != self._status.fan_speed
+        ):
+            return "fan_speed"
+        if sensors is None or self._sensors is None or self._sensors_at is None:
+            return None
+        minutes = max(now - self._sensors_at, POLL_MIN_INTERVAL) / 60
+        for field, min_delta, rate in (
+            ("co2", ADAPTIVE_CO2_MIN_DELTA, ADAPTIVE_CO2_RATE),
+            ("humidity", ADAPTIVE_HUMIDITY_MIN_DELTA, ADAPTIVE_HUMIDITY_RATE),
+        ):
+            before, after = getattr(self._sensors, field), getattr(sensors, field)
+            if before is None or after is None:
+                continue
+            delta = abs(after - before)
+            if delta >= min_delta and delta / minutes >= rate:
+                return field
+        return None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the controller state for diagnostics."""
+        return {
+            "interval_s": round(self.interval, 1),
+            "reason": self.reason,
+            "min_interval_s": self.min_interval,
+            "max_interval_s": self.max_interval,
+        }
+
+
+class _QueryState:
+    """Ultime risposte valide di un comando e istante dell'ultima."""
+
+    __slots__ = ("last", "last_at", "previous")
+
+    def __init__(self) -> None:
+        self.last_at: float | None = None
+        self.last: str | None = None
+        self.previous: str | None = None
+
+
+class PollPlan:
+    """Decide quali interrogazioni inviare a ogni poll e quando ripetere."""
+
+    def __init__(
+        self, rules: Iterable[PollRule], adaptive: AdaptiveInterval | None = None
+    ) -> None:
+        self.rules = sorted(rules, key=lambda rule: rule.priority)
+        self._state = {rule.command: _QueryState() for rule in self.rules}
+        self.adaptive = adaptive
+        # Intervallo di riferimento che AdaptiveInterval sostituisce
+        self._adaptive_base = min(
+            (rule.interval for rule in self.rules if rule.adaptive),
+            default=float(POLL_MIN_INTERVAL),
+        )
+
+    @property
+    def commands(self) -> list[str]:
+        """Return the planned commands ordered by priority."""
+        return list(self._state)
+
+    @property
+    def base_interval(self) -> float:
+        """Return the shortest interval among the unconditional rules."""
+        return min(
+            (rule.interval for rule in self.rules if rule.condition is None),
+            default=float(POLL_MIN_INTERVAL),
+        )
+
+    def carry_over(self, previous: "PollPlan") -> None:
+        """Riprende le risposte e lo stato adattivo di un piano precedente.
+
+        Usato quando le opzioni cambiano a caldo: i comandi già letti non
+        tornano tutti dovuti e il polling adattivo non riparte da zero.
+        """
+        for command, state in previous._state.items():
+            if command in self._state:
+                self._state[command] = state
+        if self.adaptive is not None and previous.adaptive is not None:
+            old = previous.adaptive
+            self.adaptive.interval = min(
+                max(old.interval, self.adaptive.min_interval),
+                self.adaptive.max_interval,
+            )
+            self.adaptive.reason = old.reason
+            self.adaptive._status = old._status
+            self.adaptive._sensors = old._sensors
+            self.adaptive._sensors_at = old._sensors_at
+
+    def record(self, command: str, when: float, response: str) -> None:
+        """Registra una risposta valida ricevuta per un comando."""
+        state = self._state.get(command)
+        if state is None:
+            return
+        state.previous, state.last = state.last, response
+        state.last_at = when
+
+    def invalidate(self, command: str) -> None:
+        """Segna come da rileggere i dati di un comando (es. dopo una scrittura)."""
+        state = self._state.get(command)
+        if state is not None:
+            state.last_at = None
+
+    def read_at(self, command: str) -> float | None:
+        """Return when the command data was last read, None if never."""
+        state = self._state.get(command)
+        return None if state is None else state.last_at
+
+    def age(self, command: str, now: float) -> float:
+        """Return the age in seconds of the command data (inf if never read)."""
+        state = self._state.get(command)
+        if state is None or state.last_at is None:
+            return math.inf
+        return max(0.0, now - state.last_at)
+
+    def interval(self, rule: PollRule) -> float:
+        """Return the effective interval of a rule."""
+        if not rule.adaptive or self.adaptive is None:
+            return rule.interval
+        scaled = rule.interval * self.adaptive.interval / self._adaptive_base
+        return min(max(scaled, self.adaptive.min_interval), self.adaptive.max_interval)
+
+    def _is_active(self, rule: PollRule) -> bool:
+        """Ritorna True se la condizione della regola è soddisfatta."""
+        if rule.condition is None:
+            return True
+        state = self._state[rule.command]
+        return POLL_CONDITIONS[rule.condition](state.previous, state.last)
+
+    def _wait(self, rule: PollRule, now: float) -> float:
+        """Secondi mancanti alla scadenza della regola."""
+        if self._is_active(rule):
+            limit = self.interval(rule)
+        elif rule.max_staleness is not None:
+            limit = rule.max_staleness
+        else:
+            return math.inf
+        return limit - self.age(rule.command, now)
+
+    def due_commands(self, now: float) -> list[str]:
+        """Return the commands to send now, ordered by priority."""
+        due: list[str] = []
+        for rule in self.rules:
+            if rule.command in due:
+                continue
+            if self._wait(rule, now) <= POLL_TICK_TOLERANCE:
+                due.append(rule.command)
+        return due
+
+    def next_poll_in(self, now: float) -> float:
+        """Return the seconds until the next command is due."""
+        wait = min(self._wait(rule, now) for rule in self.rules)
+        return max(float(POLL_MIN_INTERVAL), wait)
+
+    def as_dict(self, now: float) -> dict[str, Any]:
+        """Return the plan and the data age of each command for diagnostics."""
+        plan: dict[str, Any] = {}
+        for command, state in self._state.items():
+            rules = [rule for rule in self.rules if rule.command == command]
+            budgets = [rule.max_staleness for rule in rules if rule.max_staleness]
+            age = self.age(command, now)
+            plan[command] = {
+                "age_s": None if state.last_at is None else round(age, 1),
+                "stale": bool(budgets) and age > min(budgets),
+                "rules": [
+                    {
+                        **rule.as_dict(),
+                        "active": self._is_active(rule),
+                        "effective_interval_s": round(self.interval(rule), 1),
+                    }
+                    for rule in rules
+                ],
+            }
+        return {
+            "next_poll_in_s": round(self.next_poll_in(now), 1),
+            "adaptive": None if self.adaptive is None else self.adaptive.as_dict(),
+            "queries": plan,
+        }
+
+
+def build_poll_plan(options: Mapping[str, Any]) -> PollPlan:
+    """Costruisce il piano di polling dalle opzioni della config entry."""
+    intervals = {
+        key: options.get(key, default)
+        for key, default in DEFAULT_POLL_INTERVALS.items()
+    }
+    info_interval = intervals[CONF_DEVICE_INFO_INTERVAL]
+    adaptive = None
+    if options.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING):
+        adaptive = AdaptiveInterval(
+            min(intervals[CONF_SCAN_INTERVAL], intervals[CONF_SENSORS_INTERVAL]),
+            intervals[CONF_ADAPTIVE_MIN_INTERVAL],
+            intervals[CONF_ADAPTIVE_MAX_INTERVAL],
+        )
+    # Con il polling adattivo i dati restano validi fino all'intervallo massimo
+    staleness = None if adaptive is None else adaptive.max_interval
+    rules = [
+        PollRule(
+            "VMGH?",
+            intervals[CONF_SCAN_INTERVAL],
+            priority=0,
+            max_staleness=_staleness(intervals[CONF_SCAN_INTERVAL], staleness),
+            adaptive=adaptive is not None,
+        ),
+        PollRule(
+            "VMGI?",
+            intervals[CONF_SENSORS_INTERVAL],
+            priority=1,
+            max_staleness=_staleness(intervals[CONF_SENSORS_INTERVAL], staleness),
+            adaptive=adaptive is not None,
+        ),
+        PollRule("VMNM?", info_interval, priority=2),
+        PollRule("VMSL?", info_interval, priority=3),
+    ]
+    if fast_interval := intervals[CONF_SENSORS_FAST_INTERVAL]:
+        # Qualità dell'aria più frequente solo mentre la CO2 sale
+        rules.append(
+            PollRule("VMGI?", fast_interval, priority=1, condition="co2_rising")
+        )
+    return PollPlan(rules, adaptive)
+
+
+def _staleness(interval: float, max_interval: float | None) -> float | None:
+    """Età massima dei dati di una regola adattiva (None = default)."""
+    if max_interval is None:
+        return None
+    return max(float(interval), max_interval) * POLL_STALENESS_FACTOR
@@ -0,0 +1,351 @@
+"""Codifica e decodifica del protocollo dei dispositivi VMC Helty Flow.
+
+Le risposte VMGO (stato) e VMGI (sensori) vengono decodificate una sola volta
+in snapshot immutabili con campi tipizzati: i decoder sono memorizzati per
+frame, quindi tutte le entità di un dispositivo condividono lo stesso oggetto
+invece di ripetere split e conversioni a ogni accesso alle proprietà.
+"""
+
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any
+
+from .const import (
+    FILTER_MAX_HOURS,
+    MIN_RESPONSE_PARTS,
+    PART_INDEX_FAN_SPEED,
+    PART_INDEX_FILTER_HOURS,
+    PART_INDEX_LIGHTS_LEVEL,
+    PART_INDEX_LIGHTS_TIMER,
+    PART_INDEX_PANEL_LED,
+    PART_INDEX_SENSORS,
+)
+
+STATUS_PREFIX = "VMGO"
+SENSORS_PREFIX = "VMGI"
+
+# Valori dei registri
+PANEL_LED_ON = 10  # VMWH0100010
+SENSORS_ACTIVE = 0  # VMWH0300000 (2 = sensori disattivati)
+SENSORS_INACTIVE = 2
+
+# Indici dei campi della risposta VMGI
+SENSORS_INDEX_TEMPERATURE_INTERNAL = 1
+SENSORS_INDEX_TEMPERATURE_EXTERNAL = 2
+SENSORS_INDEX_HUMIDITY = 3
+SENSORS_INDEX_CO2 = 4
+SENSORS_INDEX_VOC = 11
+
+# Numero massimo di frame decodificati mantenuti in memoria
+SNAPSHOT_CACHE_SIZE = 64
+
+# Parte della risposta VMGO che riporta il valore di ogni registro scrivibile
+WRITE_STATUS_PARTS = {
+    "VMWH00": PART_INDEX_FAN_SPEED,
+    "VMWH01": PART_INDEX_PANEL_LED,
+    "VMWH03": PART_INDEX_SENSORS,
+    "VMWH06": PART_INDEX_LIGHTS_LEVEL,
+}
+
+# Cifre del valore per i registri con un suffisso dopo il valore (VMWH06nnn000)
+WRITE_VALUE_DIGITS = {"VMWH06": 3}
+
+
+def _int_part(parts: list[str], index: int) -> int | None:
+    """Restituisce un campo intero, None se assente o non valido."""
+    try:
+        return int(parts[index])
+    except (ValueError, IndexError):
+        return None
+
+
+def _tenths_part(parts: list[str], index: int) -> float | None:
+    """Restituisce un campo espresso in decimi, None se assente o non valido."""
+    try:
+        return float(parts[index]) / 10
+    except (ValueError, IndexError):
+        return None
+
+
+class _Snapshot:
+    """Base degli snapshot: attributi in __slots__ e non modificabili."""
+
+    __slots__ = ("part_count", "raw")
+
+    raw: str
+    part_count: int
+
+    def __init__(self, **fields: Any) -> None:
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other: object) -> bool:
+        return type(other) is type(self) and other.raw == self.raw  # type: ignore[attr-defined]
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.raw))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.raw!r})"
+
+    @property
+    def is_complete(self) -> bool:
+        """Return True if the frame has all the expected fields."""
+        return self.part_count >= MIN_RESPONSE_PARTS
+
+
+class StatusSnapshot(_Snapshot):
+    """Stato del dispositivo decodificato da una risposta VMGO."""
+
+    __slots__ = (
+        "fan_speed",
+        "filter_hours",
+        "light_level",
+        "light_timer",
+        "panel_led",
+        "sensors",
+    )
+
+    fan_speed: int | None
+    panel_led: int | None
+    sensors: int | None
+    filter_hours: int | None
+    light_level: int | None
+    light_timer: int | None
+
+    @property
+    def panel_led_on(self) -> bool:
+        """Return True if the panel LED is on."""
+        return self.panel_led == PANEL_LED_ON
+
+    @property
+    def sensors_active(self) -> bool:
+        """Return True if the device sensors are active."""
+        return self.sensors in (None, SENSORS_ACTIVE)
+
+
+class SensorsSnapshot(_Snapshot):
+    """Letture dei sensori decodificate da una risposta VMGI."""
+
+    __slots__ = (
+        "co2",
+        "humidity",
+        "temperature_external",
+        "temperature_internal",
+        "voc",
+    )
+
+    temperature_internal: float | None
+    temperature_external: float | None
+    humidity: float | None
+    co2: int | None
+    voc: int | None
+
+
+@lru_cache(maxsize=SNAPSHOT_CACHE_SIZE)
+def _decode_status(frame: str) -> StatusSnapshot:
+    parts = frame.split(",")
+    return StatusSnapshot(
+        raw=frame,
+        part_count=len(parts),
+        fan_speed=_int_part(parts, PART_INDEX_FAN_SPEED),
+        panel_led=_int_part(parts, PART_INDEX_PANEL_LED),
+        sensors=_int_part(parts, PART_INDEX_SENSORS),
+        filter_hours=_int_part(parts, PART_INDEX_FILTER_HOURS),
+        light_level=_int_part(parts, PART_INDEX_LIGHTS_LEVEL),
+        light_timer=_int_part(parts, PART_INDEX_LIGHTS_TIMER),
+    )
+
+
+@lru_cache(maxsize=SNAPSHOT_CACHE_SIZE)
+def _decode_sensors(frame: str) -> SensorsSnapshot:
+    parts = frame.split(",")
+    voc = _int_part(parts, SENSORS_INDEX_VOC)
+    return SensorsSnapshot(
+        raw=frame,
+        part_count=len(parts),
+        temperature_internal=_tenths_part(parts, SENSORS_INDEX_TEMPERATURE_INTERNAL),
+        temperature_external=_tenths_part(parts, SENSORS_INDEX_TEMPERATURE_EXTERNAL),
+        humidity=_tenths_part(parts, SENSORS_INDEX_HUMIDITY),
+        co2=_int_part(parts, SENSORS_INDEX_CO2),
+        voc=voc if voc else None,  # VOC = 0 significa nessun dato
+    )
+
+
+def decode_status(frame: Any) -> StatusSnapshot | None:
+    """Decodifica una risposta VMGO; None se il frame non è uno stato."""
+    if not isinstance(frame, str) or not frame.startswith(STATUS_PREFIX):
+        return None
+    return _decode_status(frame)
+
+
+def decode_sensors(frame: Any) -> SensorsSnapshot | None:
+    """Decodifica una risposta VMGI completa; None se non valida.
+
+    Le letture dei sensori sono considerate valide solo se il frame contiene
+    tutti i campi attesi.
+    """
+    if not isinstance(frame, str) or not frame.startswith(SENSORS_PREFIX):
+        return None
+    snapshot = _decode_sensors(frame)
+    return snapshot if snapshot.is_complete else None
+
+
+def changed_fields(before: _Snapshot | None, after: _Snapshot | None) -> set[str]:
+    """Restituisce i campi che differiscono tra due snapshot dello stesso tipo.
+
+    Se uno dei due snapshot manca, tutti i campi sono considerati cambiati.
+    """
+    if before == after:
+        return set()
+    if before is None or after is None:
+        snapshot = after or before
+        return set(type(snapshot).__slots__) if snapshot is not None else set()
+    fields = type(after).__slots__
+    return {name for name in fields if getattr(before, name) != getattr(after, name)}
+
+
+# Comandi di scrittura precostruiti
+FAN_SPEED_COMMANDS = tuple(f"VMWH{speed:07d}" for speed in range(8))
+PANEL_LED_COMMANDS = {True: f"VMWH01{PANEL_LED_ON:05d}", False: "VMWH0100000"}
+SENSORS_COMMANDS = {
+    True: f"VMWH03{SENSORS_ACTIVE:05d}",
+    False: f"VMWH03{SENSORS_INACTIVE:05d}",
+}
+LIGHT_LEVEL_COMMANDS = {level: f"VMWH06{level:03d}000" for level in range(0, 101, 25)}
+LIGHT_OFF_COMMAND = "VMWH0600000"
+LIGHT_TIMER_OFF_COMMAND = "VMWH1400000"
+FILTER_RESET_COMMAND = f"VMWH04{FILTER_MAX_HOURS}"
+
+
+# Velocità della ventola che attivano le modalità speciali
+SPECIAL_MODE_SPEEDS = {
+    "hyperventilation": 5,  # 125% -> comando VMWH0000005
+    "night_mode": 6,  # 150% -> comando VMWH0000006
+    "free_cooling": 7,  # 175% -> comando VMWH0000007
+}
+
+
+def fan_speed_command(speed: int) -> str:
+    """Restituisce il comando di velocità ventola (0-4, 5-7 modalità speciali)."""
+    return FAN_SPEED_COMMANDS[speed]
+
+
+def panel_led_command(on: bool) -> str:
+    """Restituisce il comando di accensione/spegnimento del LED del pannello."""
+    return PANEL_LED_COMMANDS[on]
+
+
+def sensors_command(active: bool) -> str:
+    """Restituisce il comando di attivazione/disattivazione dei sensori."""
+    return SENSORS_COMMANDS[active]
+
+
+def light_level_command(level: int) -> str:
+    """Restituisce il comando del livello luci (0, 25, 50, 75 o 100)."""
+    return LIGHT_LEVEL_COMMANDS[level]
+
+
+def light_timer_command(seconds: int) -> str:
+    """Restituisce il comando del timer luci in secondi."""
+    return f"VMWH14{seconds:05d}"
+
+
+def profile_commands(profile: Mapping[str, Any]) -> list[str]:
+    """Restituisce le scritture VMWH che portano il dispositivo allo stato voluto.
+
+    Le impostazioni assenti dal profilo non vengono toccate; una modalità
+    speciale (`mode`) prevale sulla velocità della ventola. Un timer luci a
+    0 disattiva il timer.
+    """
+    commands: list[str] = []
+    if (mode := profile.get("mode")) is not None:
+        commands.append(fan_speed_command(SPECIAL_MODE_SPEEDS[mode]))
+    elif (speed := profile.get("fan_speed")) is not None:
+        commands.append(fan_speed_command(int(speed)))
+    if (panel_led := profile.get("panel_led")) is not None:
+        commands.append(panel_led_command(bool(panel_led)))
+    if (sensors := profile.get("sensors")) is not None:
+        commands.append(sensors_command(bool(sensors)))
+    if (level := profile.get("light_level")) is not None:
+        commands.append(light_level_command(int(level)))
+    if (timer := profile.get("light_timer")) is not None:
+        commands.append(light_timer_command(int(timer)))
+    return commands
+
+
+def name_command(name: str) -> str:
+    """Restituisce il comando di cambio nome del dispositivo.
+
+    Il dispositivo accetta solo lettere, cifre e "_": gli altri caratteri
+    (spazi compresi) vengono rimossi.
+    """
+    safe_name = "".join(c for c in name if c.isalnum() or c == "_")
+    return f"VMNM {safe_name}"
+
+
+def network_command(ssid: str, password: str) -> str:
+    """Restituisce il comando di configurazione Wi-Fi con il padding richiesto."""
+    return f"VMSL {ssid.ljust(32, '*')}{password.ljust(32, '*')}"
+
+
+def format_command(command: str) -> str:
+    """Assicura che il comando termini con NLCR."""
+    if command.endswith("\n\r"):
+        return command
+    # Rimuovi eventuali terminazioni errate
+    return command.rstrip("\r\n") + "\n\r"
+
+
+@lru_cache(maxsize=128)
+def encode_command(command: str) -> bytes:
+    """Restituisce il frame da inviare al dispositivo, terminato con NLCR.
+
+    I comandi ricorrenti (interrogazioni e scritture precostruite) vengono
+    codificati una sola volta.
+    """
+    return format_command(command).encode("utf-8")
+
+
+def write_setting_key(command: str) -> str:
+    """Restituisce l'impostazione modificata da un comando di scrittura.
+
+    Nei comandi VMWH le due cifre dopo il prefisso identificano il parametro
+    (00 velocità ventola, 06 livello luci, 14 timer luci, ...).
+    """
+    command = command.strip()
+    return command[:6] if command.startswith("VMWH") else command
+
+
+def write_setting_value(command: str) -> int | None:
+    """Restituisce il valore scritto da un comando VMWH, se numerico."""
+    command = command.strip()
+    digits = WRITE_VALUE_DIGITS.get(command[:6])
+    value = command[6:] if digits is None else command[6 : 6 + digits]
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def apply_write_to_status(status: str | None, command: str) -> str | None:
+    """Restituisce la risposta VMGO aggiornata con il valore scritto.
+
+    Ritorna None se lo stato non è valido o il registro scritto non compare
+    nella risposta VMGO. La larghezza del campo originale viene mantenuta.
+    """
+    index = WRITE_STATUS_PARTS.get(write_setting_key(command))
+    value = write_setting_value(command)
+    if index is None or value is None or not status or not status.startswith("VMGO"):
+        return None
+    parts = status.split(",")
+    if index >= len(parts):
+        return None
+    parts[index] = str(value).zfill(len(parts[index]))
+    return ",".join(parts)
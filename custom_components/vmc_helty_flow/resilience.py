@@ -0,0 +1,198 @@
+"""Strumenti di resilienza della comunicazione con i dispositivi VMC."""
+
+import random
+import time
+from typing import Any
+
+from .const import (
+    ADAPTIVE_TIMEOUT_MIN,
+    BREAKER_BASE_DELAY,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_JITTER,
+    BREAKER_MAX_DELAY,
+    DEFAULT_TIMEOUT,
+    TCP_TIMEOUT,
+)
+
+# Coefficienti dello stimatore (RFC 6298)
+RTT_ALPHA = 1 / 8  # Peso del nuovo campione sulla media
+RTT_BETA = 1 / 4  # Peso del nuovo campione sulla variazione
+RTT_K = 4  # Moltiplicatore della variazione nel calcolo del timeout
+RTT_MAX_BACKOFF = 8  # Fattore massimo di backoff dopo timeout consecutivi
+
+# Stati del circuit breaker
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class RttEstimator:
+    """Stima del round-trip time di un dispositivo e timeout adattivo.
+
+    Mantiene media (srtt) e variazione (rttvar) dei tempi di risposta misurati
+    e ne ricava il timeout come srtt + K * rttvar, limitato tra `min_timeout`
+    e `max_timeout`. Finché non ci sono campioni usa `initial_timeout`. Ogni
+    timeout raddoppia il valore (backoff di Karn) fino al prossimo campione
+    valido, così un link congestionato non va in timeout a ogni comando.
+    """
+
+    def __init__(
+        self,
+        min_timeout: float = ADAPTIVE_TIMEOUT_MIN,
+        max_timeout: float = DEFAULT_TIMEOUT,
+        initial_timeout: float = TCP_TIMEOUT,
+    ) -> None:
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.initial_timeout = initial_timeout
+        self.srtt: float | None = None
+        self.rttvar = 0.0
+        self.samples = 0
+        self.timeouts = 0
+        self._backoff = 1
+
+    def set_bounds(self, min_timeout: float, max_timeout: float) -> None:
+        """Aggiorna i limiti del timeout."""
+        self.min_timeout = min_timeout
+        self.max_timeout = max(min_timeout, max_timeout)
+
+    @property
+    def timeout(self) -> float:
+        """Return the current timeout in seconds."""
+        if self.srtt is None:
+            base = self.initial_timeout
+        else:
+            base = self.srtt + RTT_K * self.rttvar
+        return min(self.max_timeout, max(self.min_timeout, base * self._backoff))
+
+    def observe(self, rtt: float) -> None:
+        """Registra un tempo di risposta misurato (secondi)."""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - RTT_BETA) * self.rttvar + RTT_BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - RTT_ALPHA) * self.srtt + RTT_ALPHA * rtt
+        self.samples += 1
+        self._backoff = 1
+
+    def on_timeout(self) -> None:
+        """Registra un timeout e allunga il prossimo timeout."""
+        self.timeouts += 1
+        self._backoff = min(self._backoff * 2, RTT_MAX_BACKOFF)
+
+    def restore(self, data: dict[str, Any] | None) -> None:
+        """Ripristina lo stato salvato con as_stored_dict."""
+        if not data or not isinstance(data.get("srtt"), int | float):
+            return
+        self.srtt = float(data["srtt"])
+        self.rttvar = float(data.get("rttvar", self.srtt / 2))
+        self.samples = int(data.get("samples", 0))
+
+    def as_stored_dict(self) -> dict[str, Any] | None:
+        """Return the state to persist across restarts."""
+        if self.srtt is None:
+            return None
+        return {
+            "srtt": round(self.srtt, 4),
+            "rttvar": round(self.rttvar, 4),
+            "samples": self.samples,
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return estimator statistics for diagnostics."""
+        return {
+            "srtt_ms": None if self.srtt is None else round(self.srtt * 1000, 1),
+            "rttvar_ms": round(self.rttvar * 1000, 1),
+            "timeout_s": round(self.timeout, 2),
+            "samples": self.samples,
+            "timeouts": self.timeouts,
+        }
+
+
+class CircuitBreaker:
+    """Circuit breaker per un dispositivo che non risponde.
+
+    Dopo `failure_threshold` errori consecutivi il circuito si apre e nessun
+    tentativo viene fatto fino allo scadere dell'attesa, che raddoppia a ogni
+    nuova apertura (con una variazione casuale, così più dispositivi offline
+    non riprovano tutti nello stesso istante). Scaduta l'attesa il circuito è
+    semiaperto: un solo tentativo, che lo richiude se riesce o lo riapre con
+    un'attesa più lunga se fallisce.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        base_delay: float = BREAKER_BASE_DELAY,
+        max_delay: float = BREAKER_MAX_DELAY,
+        jitter: float = BREAKER_JITTER,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.trips = 0  # Aperture consecutive senza un successo
+        self.total_trips = 0
+        self.rejected = 0  # Tentativi evitati a circuito aperto
+        self.last_delay = 0.0
+        self._retry_at = 0.0
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds left before the next attempt is allowed."""
+        if self.state != BREAKER_OPEN:
+            return 0.0
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def allow_request(self) -> bool:
+        """Ritorna True se è consentito un tentativo verso il dispositivo.
+
+        A circuito aperto e attesa scaduta passa allo stato semiaperto.
+        """
+        if self.state == BREAKER_OPEN:
+            if time.monotonic() < self._retry_at:
+                self.rejected += 1
+                return False
+            self.state = BREAKER_HALF_OPEN
+        return True
+
+    def record_success(self) -> None:
+        """Registra un tentativo riuscito e chiude il circuito."""
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.trips = 0
+
+    def record_failure(self) -> bool:
+        """Registra un errore; ritorna True se il circuito è stato aperto."""
+        self.failures += 1
+        if self.state == BREAKER_HALF_OPEN or (
+            self.state == BREAKER_CLOSED and self.failures >= self.failure_threshold
+        ):
+            self._open()
+            return True
+        return False
+
+    def _open(self) -> None:
+        """Apre il circuito con backoff esponenziale e jitter."""
+        delay = min(self.max_delay, self.base_delay * 2**self.trips)
+        delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        self.last_delay = delay
+        self._retry_at = time.monotonic() + delay
+        self.state = BREAKER_OPEN
+        self.trips += 1
+        self.total_trips += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return breaker state for diagnostics."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "consecutive_trips": self.trips,
+            "total_trips": self.total_trips,
+            "rejected_attempts": self.rejected,
+            "last_delay_s": round(self.last_delay, 1),
+            "retry_in_s": round(self.retry_in, 1),
+        }
@@ -0,0 +1,448 @@
+"""Scheduler dei comandi verso i dispositivi VMC Helty Flow."""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+
+from .const import (
+    COMMAND_RATE_BURST,
+    DEFAULT_COMMAND_RATE_LIMIT,
+    POLL_MAX_CONCURRENT,
+    POLL_MAX_RECOVERING,
+    REDUNDANT_WRITE_MAX_AGE,
+)
+from .protocol import WRITE_STATUS_PARTS, write_setting_key, write_setting_value
+
+# Corsie di priorità: i valori più bassi vengono serviti per primi
+PRIORITY_USER = 0  # Scritture richieste dall'utente (entità, servizi)
+PRIORITY_POLL = 1  # Letture periodiche del coordinatore
+
+LANE_NAMES = {
+    PRIORITY_USER: "user",
+    PRIORITY_POLL: "poll",
+}
+
+# Sfasamento dei dispositivi: la sequenza delle parti frazionarie dei multipli
+# della sezione aurea distribuisce uniformemente qualsiasi numero di fasi
+_PHASE_STEP = 0.6180339887498949
+
+
+def command_priority(command: str) -> int:
+    """Restituisce la corsia di priorità di un comando del protocollo.
+
+    Le interrogazioni (VMGH?, VMGI?, VMNM?, VMSL?) sono letture di background,
+    tutti gli altri comandi sono scritture richieste dall'utente.
+    """
+    return PRIORITY_POLL if command.strip().endswith("?") else PRIORITY_USER
+
+
+class TokenBucket:
+    """Limitatore token-bucket: `rate` comandi al secondo, raffica max `burst`."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def reserve(self, cost: int = 1) -> float:
+        """Consuma `cost` token e ritorna i secondi di attesa prima di usarli."""
+        if self.rate <= 0:
+            # Rate limit disabilitato
+            return 0.0
+
+        now = time.monotonic()
+        self._tokens = min(
+            float(self.burst), self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+        self._tokens -= cost
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+    async def async_acquire(self, cost: int = 1) -> float:
+        """Attende la disponibilità dei token e ritorna l'attesa effettuata."""
+        delay = self.reserve(cost)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class _LaneStats:
+    """Statistiche di attesa di una corsia di priorità."""
+
+    def __init__(self) -> None:
+        self.commands = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, commands: int = 1) -> None:
+        self.commands += commands
+        self.total_wait += wait * commands
+        self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self) -> dict[str, Any]:
+        avg_wait = self.total_wait / self.commands if self.commands else 0.0
+        return {
+            "commands": self.commands,
+            "avg_wait_ms": round(avg_wait * 1000, 1),
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+        }
+
+
+class CommandScheduler:
+    """Serializza l'accesso a un dispositivo VMC.
+
+    Un solo comando alla volta raggiunge il dispositivo; tra i comandi in
+    attesa vengono serviti prima quelli della corsia utente, poi quelli di
+    polling, in ordine di arrivo. Ogni comando consuma un token del
+    rate limiter così il firmware non viene mai sommerso di richieste.
+    """
+
+    def __init__(
+        self,
+        rate_limit: float = DEFAULT_COMMAND_RATE_LIMIT,
+        burst: int = COMMAND_RATE_BURST,
+    ) -> None:
+        self._bucket = TokenBucket(rate_limit, burst)
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._busy = False
+        self._max_queue_depth = 0
+        self._stats = {priority: _LaneStats() for priority in LANE_NAMES}
+
+    def set_rate_limit(self, rate_limit: float, burst: int | None = None) -> None:
+        """Aggiorna il rate limit (0 lo disabilita)."""
+        self._bucket.rate = rate_limit
+        if burst is not None:
+            self._bucket.burst = burst
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of commands waiting for the device."""
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    @asynccontextmanager
+    async def async_slot(
+        self, priority: int = PRIORITY_POLL, cost: int = 1
+    ) -> AsyncIterator[None]:
+        """Riserva l'accesso esclusivo al dispositivo.
+
+        `cost` è il numero di comandi inviati durante lo slot (maggiore di uno
+        per i batch di interrogazioni) e determina i token consumati.
+        """
+        start = time.monotonic()
+        await self._async_acquire(priority)
+        try:
+            await self._bucket.async_acquire(cost)
+            self._stats[priority].record(time.monotonic() - start, cost)
+            yield
+        finally:
+            self._release()
+
+    async def _async_acquire(self, priority: int) -> None:
+        """Attende il proprio turno nella corsia indicata."""
+        if not self._busy and not self.queue_depth:
+            self._busy = True
+            return
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._max_queue_depth = max(self._max_queue_depth, self.queue_depth)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Il turno era già stato assegnato: passalo al successivo
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        """Passa il dispositivo al prossimo comando in attesa."""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._busy = False
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return scheduler statistics for diagnostics."""
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self._max_queue_depth,
+            "rate_limit": self._bucket.rate,
+            "burst": self._bucket.burst,
+            "lanes": {
+                name: self._stats[priority].as_dict()
+                for priority, name in LANE_NAMES.items()
+            },
+        }
+
+
+class PollScheduler:
+    """Coordina i poll di tutti i dispositivi dell'integrazione.
+
+    Al massimo `max_concurrent` poll sono in corso contemporaneamente su tutta
+    la rete, serviti in ordine di arrivo; i dispositivi in errore (timeout,
+    circuito semiaperto) ne occupano al massimo `max_recovering`, così non
+    rallentano i poll di quelli raggiungibili. Ogni dispositivo riceve inoltre
+    una fase: il primo poll dopo la configurazione o dopo un ripristino viene
+    spostato di quella frazione dell'intervallo, distribuendo i poll invece di
+    farli partire tutti nello stesso istante.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = POLL_MAX_CONCURRENT,
+        max_recovering: int = POLL_MAX_RECOVERING,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_recovering = max_recovering
+        self._waiters: deque[tuple[bool, asyncio.Future[None]]] = deque()
+        self._in_flight = 0
+        self._recovering = 0
+        self._max_waiting = 0
+        self._phases: dict[str, float] = {}
+        self._unphased: set[str] = set()
+        self._phase_count = 0
+        self._stats = {False: _LaneStats(), True: _LaneStats()}
+
+    def add_device(self, key: str) -> None:
+        """Registra un dispositivo; il suo prossimo poll verrà sfasato."""
+        if key not in self._phases:
+            self._phases[key] = (self._phase_count * _PHASE_STEP) % 1
+            self._phase_count += 1
+        self._unphased.add(key)
+
+    def remove_device(self, key: str) -> None:
+        """Rimuove un dispositivo dallo scheduler."""
+        self._phases.pop(key, None)
+        self._unphased.discard(key)
+
+    def stagger(self, key: str, delay: float) -> float:
+        """Restituisce l'attesa del prossimo poll, sfasata se necessario."""
+        if key not in self._unphased:
+            return delay
+        self._unphased.discard(key)
+        return delay * (1 + self._phases[key])
+
+    @asynccontextmanager
+    async def async_slot(self, recovering: bool = False) -> AsyncIterator[None]:
+        """Riserva uno dei poll contemporanei consentiti."""
+        start = time.monotonic()
+        await self._async_acquire(recovering)
+        try:
+            self._stats[recovering].record(time.monotonic() - start)
+            yield
+        finally:
+            self._release(recovering)
+
+    def _can_start(self, recovering: bool) -> bool:
+        if self._in_flight >= self.max_concurrent:
+            return False
+        return not recovering or self._recovering < self.max_recovering
+
+    async def _async_acquire(self, recovering: bool) -> None:
+        """Attende che un poll possa partire."""
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append((recovering, future))
+        self._wake()
+        self._max_waiting = max(self._max_waiting, len(self._waiters))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Il turno era già stato assegnato: liberalo
+                self._release(recovering)
+            raise
+
+    def _release(self, recovering: bool) -> None:
+        self._in_flight -= 1
+        if recovering:
+            self._recovering -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        """Avvia, in ordine di arrivo, i poll in attesa che possono partire."""
+        for entry in list(self._waiters):
+            recovering, future = entry
+            if future.done():
+                self._waiters.remove(entry)
+            elif self._can_start(recovering):
+                self._waiters.remove(entry)
+                self._in_flight += 1
+                if recovering:
+                    self._recovering += 1
+                future.set_result(None)
+
+    def as_dict(self, key: str | None = None) -> dict[str, Any]:
+        """Return scheduler statistics (and the phase of `key`) for diagnostics."""
+        result: dict[str, Any] = {
+            "devices": len(self._phases),
+            "max_concurrent": self.max_concurrent,
+            "max_recovering": self.max_recovering,
+            "in_flight": self._in_flight,
+            "waiting": sum(1 for _, future in self._waiters if not future.done()),
+            "max_waiting": self._max_waiting,
+            "lanes": {
+                "healthy": self._stats[False].as_dict(),
+                "recovering": self._stats[True].as_dict(),
+            },
+        }
+        if key is not None and key in self._phases:
+            result["phase"] = round(self._phases[key], 3)
+        return result
+
+
+def is_redundant_write(
+    command: str,
+    data: dict[str, Any] | None,
+    last_write: float = 0.0,
+    max_age: float = REDUNDANT_WRITE_MAX_AGE,
+    now: float | None = None,
+) -> bool:
+    """Ritorna True se il dispositivo risulta già nello stato richiesto.
+
+    Il confronto usa l'ultima risposta VMGO dei dati del coordinatore ed è
+    valido solo se quei dati hanno meno di `max_age` secondi e sono stati letti
+    dopo l'ultima scrittura sullo stesso registro (`last_write`). In ogni altro
+    caso, o per registri senza corrispondenza nello stato, la scrittura va
+    inviata.
+    """
+    index = WRITE_STATUS_PARTS.get(write_setting_key(command))
+    if index is None or not data:
+        return False
+
+    status = data.get("status")
+    updated = data.get("last_update")
+    if not isinstance(status, str) or not status.startswith("VMGO"):
+        return False
+    if not isinstance(updated, int | float):
+        return False
+
+    now = time.time() if now is None else now
+    if now - updated > max_age or updated <= last_write:
+        return False
+
+    parts = status.split(",")
+    value = write_setting_value(command)
+    try:
+        return index < len(parts) and int(parts[index]) == value
+    except ValueError:
+        return False
+
+
+class _PendingWrite:
+    """Scritture in corso e in attesa per una singola impostazione."""
+
+    def __init__(self) -> None:
+        self.send: Callable[[], Awaitable[str]] | None = None
+        self.waiters: list[asyncio.Future[str]] = []
+        self.task: asyncio.Task[None] | None = None
+
+
+class WriteCoalescer:
+    """Accorpa le scritture ravvicinate sulla stessa impostazione.
+
+    La prima scrittura viene inviata subito. Quelle che arrivano mentre è in
+    corso non vengono accodate una per una: resta solo l'ultimo valore, che
+    viene inviato appena il dispositivo è libero, e tutti i chiamanti
+    superati ricevono la risposta di quell'invio (last-writer-wins). Trascinando
+    uno slider si invia così un comando per round-trip invece di uno per passo.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[str, _PendingWrite] = {}
+        self.writes = 0
+        self.sent = 0
+        self.coalesced = 0  # Scritture superate da un valore successivo
+        self.skipped = 0  # Scritture evitate perché già nello stato richiesto
+        self._last_write: dict[str, float] = {}
+
+    def is_redundant(self, command: str, data: dict[str, Any] | None) -> bool:
+        """Ritorna True se la scrittura non cambierebbe lo stato del dispositivo.
+
+        Una scrittura sulla stessa impostazione ancora in corso rende lo stato
+        letto non affidabile, quindi in quel caso la scrittura va inviata.
+        """
+        key = write_setting_key(command)
+        if key in self._pending or not is_redundant_write(
+            command, data, self._last_write.get(key, 0.0)
+        ):
+            return False
+        self.skipped += 1
+        return True
+
+    async def async_write(self, key: str, send: Callable[[], Awaitable[str]]) -> str:
+        """Invia una scrittura, accorpandola con quelle ravvicinate su `key`."""
+        self.writes += 1
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(key, _PendingWrite())
+        pending.send = send
+        pending.waiters.append(future)
+        if pending.task is None:
+            pending.task = asyncio.create_task(self._async_drain(key, pending))
+        return await future
+
+    async def _async_drain(self, key: str, pending: _PendingWrite) -> None:
+        """Invia l'ultimo valore richiesto finché ci sono scritture in attesa."""
+        try:
+            while pending.send is not None:
+                send, waiters = pending.send, pending.waiters
+                pending.send, pending.waiters = None, []
+                self.sent += 1
+                self.coalesced += len(waiters) - 1
+                # Lo stato letto prima dell'invio non è più affidabile; una
+                # rilettura fatta da send() stesso resta invece più recente
+                started = time.time()
+                try:
+                    result = await send()
+                except asyncio.CancelledError:
+                    for waiter in [*waiters, *pending.waiters]:
+                        waiter.cancel()
+                    raise
+                except Exception as err:
+                    for waiter in waiters:
+                        if not waiter.done():
+                            waiter.set_exception(err)
+                else:
+                    for waiter in waiters:
+                        if not waiter.done():
+                            waiter.set_result(result)
+                finally:
+                    self._last_write[key] = started
+        finally:
+            self._pending.pop(key, None)
+
+    async def async_cancel(self) -> None:
+        """Annulla le scritture in corso e in attesa.
+
+        Usato alla chiusura della connessione del dispositivo, perché nessun
+        invio sopravviva allo scaricamento dell'integrazione.
+        """
+        pending = list(self._pending.values())
+        self._pending.clear()
+        tasks = [write.task for write in pending if write.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Un invio annullato prima di partire non ha avvisato i suoi chiamanti
+        for write in pending:
+            for waiter in write.waiters:
+                waiter.cancel()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return coalescer statistics for diagnostics."""
+        return {
+            "writes": self.writes,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "skipped": self.skipped,
+        }
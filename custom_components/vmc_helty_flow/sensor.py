@@ -1,8 +1,6 @@
 """Entità sensori per VMC Helty Flow."""
 
 import logging
-import math
-from collections.abc import Callable
 from datetime import datetime, timedelta
 from typing import Any
 
@@ -37,28 +35,16 @@ from .const import (
     AIR_EXCHANGE_TIME_ACCEPTABLE,
     AIR_EXCHANGE_TIME_EXCELLENT,
     AIR_EXCHANGE_TIME_GOOD,
-    AIRFLOW_MAPPING,
     CO2_ALERT_DURATION_MINUTES,
     CO2_ALERT_THRESHOLD,
-    COMFORT_HUMIDITY_ACCEPTABLE_MAX,
-    COMFORT_HUMIDITY_ACCEPTABLE_MIN,
-    COMFORT_HUMIDITY_MAX,
-    COMFORT_HUMIDITY_OPTIMAL_MAX,
-    COMFORT_HUMIDITY_OPTIMAL_MIN,
-    COMFORT_HUMIDITY_REFERENCE,
-    COMFORT_HUMIDITY_TOLERABLE_MAX,
-    COMFORT_HUMIDITY_TOLERABLE_MIN,
     COMFORT_INDEX_ACCEPTABLE,
     COMFORT_INDEX_EXCELLENT,
     COMFORT_INDEX_GOOD,
     COMFORT_INDEX_MEDIOCRE,
-    COMFORT_TEMP_ACCEPTABLE_MAX,
-    COMFORT_TEMP_ACCEPTABLE_MIN,
-    COMFORT_TEMP_OPTIMAL_MAX,
-    COMFORT_TEMP_OPTIMAL_MIN,
-    COMFORT_TEMP_REFERENCE,
-    COMFORT_TEMP_TOLERABLE_MAX,
-    COMFORT_TEMP_TOLERABLE_MIN,
+    CONF_DEADBAND_CO2,
+    CONF_DEADBAND_HUMIDITY,
+    CONF_DEADBAND_TEMPERATURE,
+    CONF_DEADBAND_VOC,
     DAILY_AIR_CHANGES_ADEQUATE,
     DAILY_AIR_CHANGES_ADEQUATE_MIN,
     DAILY_AIR_CHANGES_EXCELLENT,
@@ -86,18 +72,28 @@ from .const import (
     FILTER_STATUS_FAIR,
     FILTER_STATUS_GOOD,
     FILTER_STATUS_POOR,
+    MAX_DEVICE_NAME_LENGTH,
     MAX_PASSWORD_LENGTH,
     MIN_PASSWORD_LENGTH,
-    MIN_RESPONSE_PARTS,
-    MIN_STATUS_PARTS,
     POWER_MAPPING,
 )
 from .coordinator import VmcHeltyCoordinator
 from .device_info import VmcHeltyEntity
 from .helpers import parse_vmsl_response, tcp_send_command
+from .metrics import dew_point, humidity_comfort, temperature_comfort
+from .protocol import name_command, network_command
 
 _LOGGER = logging.getLogger(__name__)
 
+# Deadband applicata a ogni sensore ambientale
+SENSOR_DEADBANDS = {
+    "temperature_internal": CONF_DEADBAND_TEMPERATURE,
+    "temperature_external": CONF_DEADBAND_TEMPERATURE,
+    "humidity": CONF_DEADBAND_HUMIDITY,
+    "co2": CONF_DEADBAND_CO2,
+    "voc": CONF_DEADBAND_VOC,
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -215,6 +211,8 @@ class VmcHeltySensor(VmcHeltyEntity, SensorEntity):
         """Initialize the sensor."""
         super().__init__(coordinator)
         self._sensor_key = sensor_key
+        self._coordinator_inputs = frozenset({sensor_key})
+        self._deadband_option = SENSOR_DEADBANDS.get(sensor_key)
         self._attr_unique_id = f"{coordinator.name_slug}_{sensor_key}"
         self._attr_name = f"{ENTITY_NAME_PREFIX} {coordinator.name} {sensor_name}"
         self._attr_native_unit_of_measurement = unit
@@ -227,41 +225,19 @@ class VmcHeltySensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return None
 
-        sensors_data = self.coordinator.data.get("sensors", "")
-        if not sensors_data or not sensors_data.startswith("VMGI"):
+        sensors = self.sensors_snapshot
+        if sensors is None:
             return None
 
-        try:
-            parts = sensors_data.split(",")
-            if len(parts) < MIN_RESPONSE_PARTS:
-                return None
-
-            # Mapping dei sensori con logica unificata
-            sensor_mapping: dict[str, tuple[int, Callable[[str], Any]]] = {
-                "temperature_internal": (1, lambda x: float(x) / 10),
-                "temperature_external": (2, lambda x: float(x) / 10),
-                "humidity": (3, lambda x: float(x) / 10),
-                "co2": (4, int),
-                "voc": (
-                    11,  # VOC is at position 11 based on real data analysis
-                    lambda x: int(x) if int(x) > 0 else None,  # VOC = 0 means no data
-                ),
-            }
-
-            if self._sensor_key in sensor_mapping:
-                index, converter = sensor_mapping[self._sensor_key]
-                if parts[index]:
-                    return converter(parts[index])
-
-        except (ValueError, IndexError):
-            pass
-
-        return None
+        # I valori sono già convertiti dallo snapshot (decimi, VOC = 0 -> None)
+        return getattr(sensors, self._sensor_key, None)
 
 
 class VmcHeltyAirflowSensor(VmcHeltyEntity, SensorEntity):
     """VMC Helty airflow sensor based on fan speed."""
 
+    _coordinator_inputs = frozenset({"fan_speed"})
+
     def __init__(self, coordinator):
         """Initialize the sensor."""
         super().__init__(coordinator)
@@ -277,28 +253,15 @@ class VmcHeltyAirflowSensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return None
 
-        status_data = self.coordinator.data.get("status", "")
-        if not status_data or not status_data.startswith("VMGO"):
-            return None
-
-        try:
-            parts = status_data.split(",")
-            if len(parts) < MIN_STATUS_PARTS:  # Need at least VMGO and fan_speed
-                return None
-
-            # Ottieni la velocità della ventola (posizione 1)
-            fan_speed_raw = int(parts[1])
-
-            # Mappa la velocità alla portata d'aria
-            return AIRFLOW_MAPPING.get(fan_speed_raw, 0)
-
-        except (ValueError, IndexError):
-            return None
+        # Portata d'aria mappata dalla velocità della ventola
+        return self.metrics.airflow
 
 
 class VmcHeltyOnOffSensor(VmcHeltyEntity, BinarySensorEntity):
     """VMC Helty device online/offline sensor."""
 
+    _coordinator_inputs = frozenset({"available", "data_age"})
+
     def __init__(self, coordinator):
         """Initialize the sensor."""
         super().__init__(coordinator)
@@ -313,10 +276,19 @@ class VmcHeltyOnOffSensor(VmcHeltyEntity, BinarySensorEntity):
             self.coordinator.data and self.coordinator.data.get("available", False)
         )
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the age of the data served after a failed poll."""
+        data_age = (self.coordinator.data or {}).get("data_age")
+        return None if data_age is None else {"data_age": data_age}
+
 
 class VmcHeltyAirQualityAlertBinarySensor(VmcHeltyEntity, BinarySensorEntity):
     """Alert when CO2 remains above threshold for more than 5 minutes."""
 
+    # Dipende dal tempo trascorso: valutato a ogni aggiornamento
+    _coordinator_inputs = None
+
     def __init__(self, coordinator):
         """Initialize the sensor."""
         super().__init__(coordinator)
@@ -347,22 +319,20 @@ class VmcHeltyAirQualityAlertBinarySensor(VmcHeltyEntity, BinarySensorEntity):
         if not self.coordinator.data:
             return None
 
-        sensors_data = self.coordinator.data.get("sensors", "")
-        if not sensors_data or not sensors_data.startswith("VMGI"):
+        sensors = self.sensors_snapshot
+        if sensors is None:
             return None
 
-        try:
-            parts = sensors_data.split(",")
-            if len(parts) < MIN_RESPONSE_PARTS:
-                return None
-            return int(parts[4])
-        except (ValueError, IndexError):
-            return None
+        return sensors.co2
 
 
 class VmcHeltyCondensationRiskBinarySensor(VmcHeltyEntity, BinarySensorEntity):
     """Alert when dew point delta indicates condensation risk."""
 
+    _coordinator_inputs = frozenset(
+        {"temperature_internal", "temperature_external", "humidity"}
+    )
+
     def __init__(self, coordinator):
         """Initialize the sensor."""
         super().__init__(coordinator)
@@ -379,42 +349,15 @@ class VmcHeltyCondensationRiskBinarySensor(VmcHeltyEntity, BinarySensorEntity):
         if not self.coordinator.data:
             return False
 
-        sensors_data = self.coordinator.data.get("sensors", "")
-        if not sensors_data or not sensors_data.startswith("VMGI"):
-            return False
-
-        delta = None
-        try:
-            parts = sensors_data.split(",")
-            if len(parts) < MIN_RESPONSE_PARTS:
-                return False
-
-            temp_internal = float(parts[1]) / 10
-            temp_external = float(parts[2]) / 10
-            humidity = float(parts[3]) / 10
-
-            if humidity <= 0 or humidity > COMFORT_HUMIDITY_MAX:
-                return False
-
-            internal_dew_point = self._calculate_dew_point(temp_internal, humidity)
-            external_dew_point = self._calculate_dew_point(temp_external, humidity)
-            delta = internal_dew_point - external_dew_point
-        except (ValueError, IndexError, TypeError, ZeroDivisionError):
-            return False
-
+        delta = self.metrics.dew_point_delta
         return delta is not None and delta < DEW_POINT_DELTA_MODERATE_RISK
 
-    def _calculate_dew_point(self, temperature: float, humidity: float) -> float:
-        """Calculate dew point using Magnus-Tetens formula."""
-        a = 17.27
-        b = 237.7
-        gamma = (a * temperature) / (b + temperature) + math.log(humidity / 100.0)
-        return (b * gamma) / (a - gamma)
-
 
 class VmcHeltyOfflineBinarySensor(VmcHeltyEntity, BinarySensorEntity):
     """Alert when coordinator reports communication failures."""
 
+    _coordinator_inputs = frozenset()
+
     def __init__(self, coordinator):
         """Initialize the sensor."""
         super().__init__(coordinator)
@@ -432,6 +375,8 @@ class VmcHeltyOfflineBinarySensor(VmcHeltyEntity, BinarySensorEntity):
 class VmcHeltyLastResponseSensor(VmcHeltyEntity, SensorEntity):
     """VMC Helty last response timestamp sensor."""
 
+    _coordinator_inputs = frozenset({"last_update"})
+
     def __init__(self, coordinator):
         """Initialize the sensor."""
         super().__init__(coordinator)
@@ -456,6 +401,8 @@ class VmcHeltyLastResponseSensor(VmcHeltyEntity, SensorEntity):
 class VmcHeltyFilterHoursSensor(VmcHeltyEntity, SensorEntity):
     """VMC Helty filter hours sensor."""
 
+    _coordinator_inputs = frozenset({"filter_hours"})
+
     def __init__(self, coordinator):
         """Initialize the sensor."""
         super().__init__(coordinator)
@@ -476,21 +423,9 @@ class VmcHeltyFilterHoursSensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return None
 
-        status_data = self.coordinator.data.get("status", "")
-        if not status_data or not status_data.startswith("VMGO"):
-            return None
-
-        try:
-            parts = status_data.split(",")
-            # Need 6 parts: VMGO + fan_speed + led + temp + humidity + filter_hours
-            if len(parts) < 6:  # noqa: PLR2004
-                return None
-
-            # Filter hours is at position 5
-            return int(parts[5])
-
-        except (ValueError, IndexError):
-            return None
+        # Filter hours is at position 5
+        status = self.status_snapshot
+        return status.filter_hours if status else None
 
 
 class VmcHeltyFilterLifePercentageSensor(VmcHeltyEntity, SensorEntity):
@@ -501,6 +436,8 @@ class VmcHeltyFilterLifePercentageSensor(VmcHeltyEntity, SensorEntity):
     Based on FILTER_MAX_HOURS constant.
     """
 
+    _coordinator_inputs = frozenset({"filter_hours"})
+
     def __init__(self, coordinator):
         """Initialize the sensor."""
         super().__init__(coordinator)
@@ -592,6 +529,8 @@ class VmcHeltyPowerSensor(VmcHeltyEntity, SensorEntity):
     Updates in real-time when fan speed changes.
     """
 
+    _coordinator_inputs = frozenset({"fan_speed"})
+
     def __init__(self, coordinator: VmcHeltyCoordinator) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
@@ -624,23 +563,8 @@ class VmcHeltyPowerSensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return None
 
-        # Get fan speed from status data
-        status_data = self.coordinator.data.get("status", "")
-        if not status_data or not status_data.startswith("VMGO"):
-            return None
-
-        try:
-            parts = status_data.split(",")
-            if len(parts) < MIN_STATUS_PARTS:
-                return None
-
-            fan_speed = int(parts[1])  # Part index 1 contains fan speed
-
-            # Map fan speed to power consumption
-            return float(POWER_MAPPING.get(fan_speed, 0))
-
-        except (ValueError, IndexError):
-            return None
+        # Map fan speed to power consumption
+        return self.metrics.power
 
     @property
     def extra_state_attributes(self) -> dict[str, Any] | None:
@@ -648,31 +572,21 @@ class VmcHeltyPowerSensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return None
 
-        status_data = self.coordinator.data.get("status", "")
-        if not status_data or not status_data.startswith("VMGO"):
+        metrics = self.metrics
+        if metrics.power is None or metrics.airflow is None:
             return None
 
-        try:
-            parts = status_data.split(",")
-            if len(parts) < MIN_STATUS_PARTS:
-                return None
-
-            fan_speed = int(parts[1])
-            power = float(POWER_MAPPING.get(fan_speed, 0))
+        # Calculate efficiency metrics
+        power = metrics.power
+        airflow = metrics.airflow
+        efficiency = (airflow / power) if power > 0 else 0
 
-            # Calculate efficiency metrics
-            airflow = AIRFLOW_MAPPING.get(fan_speed, 0)
-            efficiency = (airflow / power) if power > 0 else 0
-
-            return {
-                "fan_speed": fan_speed,
-                "airflow_m3h": airflow,
-                "efficiency_m3h_per_watt": round(efficiency, 2),
-                "power_mapping": dict(POWER_MAPPING),
-            }
-
-        except (ValueError, IndexError):
-            return None
+        return {
+            "fan_speed": metrics.fan_speed,
+            "airflow_m3h": airflow,
+            "efficiency_m3h_per_watt": round(efficiency, 2),
+            "power_mapping": dict(POWER_MAPPING),
+        }
 
 
 class VmcHeltyDailyEnergyEstimateSensor(VmcHeltyEntity, SensorEntity):
@@ -683,6 +597,9 @@ class VmcHeltyDailyEnergyEstimateSensor(VmcHeltyEntity, SensorEntity):
     typical speed distribution.
     """
 
+    _coordinator_inputs = frozenset({"fan_speed"})
+    _attr_entity_registry_enabled_default = False
+
     def __init__(self, coordinator: VmcHeltyCoordinator) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
@@ -717,50 +634,8 @@ class VmcHeltyDailyEnergyEstimateSensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return None
 
-        # Get current fan speed
-        status_data = self.coordinator.data.get("status", "")
-        if not status_data or not status_data.startswith("VMGO"):
-            return None
-
-        try:
-            parts = status_data.split(",")
-            if len(parts) < MIN_STATUS_PARTS:
-                return None
-
-            fan_speed = int(parts[1])
-
-            # Typical daily operation patterns (hours per speed per day)
-            typical_pattern = {
-                0: 4,  # 4 hours off (sleep, maintenance)
-                1: 5,  # 5 hours at speed 1 (night, light usage)
-                2: 12,  # 12 hours at speed 2 (normal operation)
-                3: 2,  # 2 hours at speed 3 (cooking, showers)
-                4: 1,  # 1 hour at speed 4 (peak usage)
-            }
-
-            # Calculate baseline daily energy from typical pattern
-            baseline_energy = sum(
-                hours * POWER_MAPPING.get(speed, 0)
-                for speed, hours in typical_pattern.items()
-            )
-
-            # Speed adjustment multipliers
-            speed_multipliers = {
-                0: 1.0,  # Off: baseline
-                1: 0.9,  # Speed 1: lower
-                2: 1.0,  # Speed 2: baseline
-                3: 1.1,  # Speed 3: higher
-                4: 1.2,  # Speed 4: highest
-                5: 1.3,  # Hyperventilation
-                6: 0.8,  # Night mode: lowest
-                7: 1.3,  # Free cooling
-            }
-
-            adjustment = speed_multipliers.get(fan_speed, 1.0)
-            return float(baseline_energy * adjustment)
-
-        except (ValueError, IndexError):
-            return None
+        # Typical usage pattern adjusted by the current speed (see metrics)
+        return self.metrics.daily_energy
 
     @property
     def extra_state_attributes(self) -> dict[str, Any] | None:
@@ -768,47 +643,38 @@ class VmcHeltyDailyEnergyEstimateSensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return None
 
-        status_data = self.coordinator.data.get("status", "")
-        if not status_data or not status_data.startswith("VMGO"):
+        metrics = self.metrics
+        if metrics.daily_energy is None:
             return None
 
-        try:
-            parts = status_data.split(",")
-            if len(parts) < MIN_STATUS_PARTS:
-                return None
-
-            fan_speed = int(parts[1])
-            current_power = POWER_MAPPING.get(fan_speed, 0)
-
-            # Daily cost estimate (assuming 0.25 €/kWh average EU rate)
-            daily_energy_wh = self.native_value or 0
-            daily_cost_eur = (daily_energy_wh / 1000) * 0.25
+        # Daily cost estimate (assuming 0.25 €/kWh average EU rate)
+        daily_energy_wh = metrics.daily_energy
+        daily_cost_eur = (daily_energy_wh / 1000) * 0.25
 
-            # Monthly and yearly projections
-            monthly_energy_kwh = (daily_energy_wh * 30) / 1000
-            yearly_energy_kwh = (daily_energy_wh * 365) / 1000
-            yearly_cost_eur = yearly_energy_kwh * 0.25
+        # Monthly and yearly projections
+        monthly_energy_kwh = (daily_energy_wh * 30) / 1000
+        yearly_energy_kwh = (daily_energy_wh * 365) / 1000
+        yearly_cost_eur = yearly_energy_kwh * 0.25
 
-            return {
-                "current_power_w": current_power,
-                "current_fan_speed": fan_speed,
-                "daily_cost_eur": round(daily_cost_eur, 2),
-                "monthly_energy_kwh": round(monthly_energy_kwh, 1),
-                "yearly_energy_kwh": round(yearly_energy_kwh, 1),
-                "yearly_cost_eur": round(yearly_cost_eur, 2),
-                "calculation_method": (
-                    "Typical usage pattern with current speed adjustment"
-                ),
-                "typical_runtime_hours": 20,
-            }
-
-        except (ValueError, IndexError):
-            return None
+        return {
+            "current_power_w": metrics.power,
+            "current_fan_speed": metrics.fan_speed,
+            "daily_cost_eur": round(daily_cost_eur, 2),
+            "monthly_energy_kwh": round(monthly_energy_kwh, 1),
+            "yearly_energy_kwh": round(yearly_energy_kwh, 1),
+            "yearly_cost_eur": round(yearly_cost_eur, 2),
+            "calculation_method": (
+                "Typical usage pattern with current speed adjustment"
+            ),
+            "typical_runtime_hours": 20,
+        }
 
 
 class VmcHeltyIPAddressSensor(VmcHeltyEntity, SensorEntity):
     """VMC Helty IP address sensor."""
 
+    _coordinator_inputs = frozenset()
+
     def __init__(self, coordinator):
         """Initialize the sensor."""
         super().__init__(coordinator)
@@ -825,6 +691,8 @@ class VmcHeltyIPAddressSensor(VmcHeltyEntity, SensorEntity):
 class VmcHeltyNameText(VmcHeltyEntity, TextEntity):
     """VMC Helty device name text entity."""
 
+    _coordinator_inputs = frozenset({"name"})
+
     def __init__(self, coordinator):
         """Initialize the text entity."""
         super().__init__(coordinator)
@@ -845,9 +713,16 @@ class VmcHeltyNameText(VmcHeltyEntity, TextEntity):
 
     async def async_set_value(self, value: str) -> None:
         """Set new device name."""
-        response = await tcp_send_command(self.coordinator.ip, 5001, f"VMNM {value}")
-        if response == "OK":
-            await self.coordinator.async_request_refresh()
+        if not value or len(value) > MAX_DEVICE_NAME_LENGTH:
+            raise HomeAssistantError("Name must be between 1 and 32 characters")
+
+        response = await tcp_send_command(
+            self.coordinator.ip, 5001, name_command(value)
+        )
+        if response != "OK":
+            raise HomeAssistantError(f"Failed to set device name: {response}")
+
+        await self.coordinator.async_invalidate("VMNM?")
 
     def set_value(self, _value: str) -> None:
         """Synchronous write is not supported; use async path."""
@@ -857,6 +732,8 @@ class VmcHeltyNameText(VmcHeltyEntity, TextEntity):
 class VmcHeltySSIDText(VmcHeltyEntity, TextEntity):
     """VMC Helty WiFi SSID text entity."""
 
+    _coordinator_inputs = frozenset({"network"})
+
     def __init__(self, coordinator):
         """Initialize the text entity."""
         super().__init__(coordinator)
@@ -888,6 +765,8 @@ class VmcHeltySSIDText(VmcHeltyEntity, TextEntity):
 class VmcHeltyPasswordText(VmcHeltyEntity, TextEntity):
     """VMC Helty WiFi password text entity."""
 
+    _coordinator_inputs = frozenset({"network"})
+
     def __init__(self, coordinator):
         """Initialize the text entity."""
         super().__init__(coordinator)
@@ -929,18 +808,14 @@ class VmcHeltyPasswordText(VmcHeltyEntity, TextEntity):
         if not ssid:
             raise HomeAssistantError("Current SSID is not available")
 
-        ssid_padded = ssid.ljust(32, "*")
-        password_padded = password.ljust(32, "*")
         response = await tcp_send_command(
-            self.coordinator.ip,
-            5001,
-            f"VMSL {ssid_padded}{password_padded}",
+            self.coordinator.ip, 5001, network_command(ssid, password)
         )
 
         if response != "OK":
             raise HomeAssistantError(f"Failed to set WiFi password: {response}")
 
-        await self.coordinator.async_request_refresh()
+        await self.coordinator.async_invalidate("VMSL?")
 
     def set_value(self, _value: str) -> None:
         """Synchronous write is not supported; use async path."""
@@ -950,6 +825,9 @@ class VmcHeltyPasswordText(VmcHeltyEntity, TextEntity):
 class VmcHeltyAbsoluteHumiditySensor(VmcHeltyEntity, SensorEntity):
     """VMC Helty absolute humidity sensor using Magnus-Tetens formula."""
 
+    _coordinator_inputs = frozenset({"temperature_internal", "humidity"})
+    _attr_entity_registry_enabled_default = False
+
     def __init__(self, coordinator):
         """Initialize the sensor."""
         super().__init__(coordinator)
@@ -966,47 +844,7 @@ class VmcHeltyAbsoluteHumiditySensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return None
 
-        try:
-            # Ottieni i dati dei sensori dalla stringa VMGI
-            sensors_data = self.coordinator.data.get("sensors", "")
-            if not sensors_data or not sensors_data.startswith("VMGI"):
-                return None
-
-            parts = sensors_data.split(",")
-            if (
-                len(parts) < MIN_RESPONSE_PARTS
-            ):  # Serve almeno temp_int, temp_ext, humidity, co2
-                return None
-
-            # Estrai temperatura interna (pos 1) e umidità (pos 3)
-            temp_internal = float(parts[1]) / 10  # Decimi di °C
-            humidity = float(parts[3]) / 10  # Decimi di %
-
-            if temp_internal is None or humidity is None:
-                return None
-
-            # Formula Magnus-Tetens per umidità assoluta
-            # Costanti per acqua
-            a = 17.27
-            b = 237.7
-
-            # Pressione vapore saturo (hPa) - formula Magnus-Tetens
-            es = 6.112 * math.exp((a * temp_internal) / (b + temp_internal))
-
-            # Pressione vapore reale (hPa)
-            e = (humidity / 100.0) * es
-
-            # Umidità assoluta (g/m³) usando formula termodinamica Magnus-Tetens
-            molar_mass = 18.016  # g/mol (peso molecolare acqua)
-            gas_constant = 0.08314  # L·hPa/(mol·K)
-            temp_kelvin = temp_internal + 273.15  # K
-
-            abs_humidity = (e * molar_mass) / (gas_constant * temp_kelvin)
-
-            return round(abs_humidity, 2)
-
-        except (ValueError, TypeError, ZeroDivisionError):
-            return None
+        return self.metrics.absolute_humidity
 
     @property
     def extra_state_attributes(self) -> dict[str, Any] | None:
@@ -1014,20 +852,10 @@ class VmcHeltyAbsoluteHumiditySensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return None
 
-        # Ottieni i dati dei sensori dalla stringa VMGI
-        sensors_data = self.coordinator.data.get("sensors", "")
-        if not sensors_data or not sensors_data.startswith("VMGI"):
-            return None
-
-        try:
-            parts = sensors_data.split(",")
-            if len(parts) < MIN_RESPONSE_PARTS:
-                return None
-
-            temp_internal = float(parts[1]) / 10  # Decimi di °C
-            humidity = float(parts[3]) / 10  # Decimi di %
-
-        except (ValueError, IndexError):
+        metrics = self.metrics
+        temp_internal = metrics.temperature_internal
+        humidity = metrics.humidity
+        if temp_internal is None or humidity is None:
             return None
 
         return {
@@ -1042,6 +870,9 @@ class VmcHeltyAbsoluteHumiditySensor(VmcHeltyEntity, SensorEntity):
 class VmcHeltyDewPointSensor(VmcHeltyEntity, SensorEntity):
     """VMC Helty dew point sensor using Magnus-Tetens formula."""
 
+    _coordinator_inputs = frozenset({"temperature_internal", "humidity"})
+    _deadband_option = CONF_DEADBAND_TEMPERATURE
+
     def __init__(self, coordinator):
         """Initialize the sensor."""
         super().__init__(coordinator)
@@ -1058,40 +889,7 @@ class VmcHeltyDewPointSensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return None
 
-        try:
-            # Ottieni i dati dei sensori dalla stringa VMGI
-            sensors_data = self.coordinator.data.get("sensors", "")
-            if not sensors_data or not sensors_data.startswith("VMGI"):
-                return None
-
-            parts = sensors_data.split(",")
-            if len(parts) < MIN_RESPONSE_PARTS:
-                return None
-
-            # Estrai temperatura interna (pos 1) e umidità (pos 3)
-            temp_internal = float(parts[1]) / 10  # Decimi di °C
-            humidity = float(parts[3]) / 10  # Decimi di %
-
-            if temp_internal is None or humidity is None or humidity <= 0:
-                return None
-
-            # Formula Magnus-Tetens per punto di rugiada
-            # Costanti per acqua
-            a = 17.27
-            b = 237.7
-
-            # Calcolo intermedio
-            alpha = ((a * temp_internal) / (b + temp_internal)) + math.log(
-                humidity / 100.0
-            )
-
-            # Punto di rugiada
-            dew_point = (b * alpha) / (a - alpha)
-
-            return round(dew_point, 1)
-
-        except (ValueError, TypeError, ZeroDivisionError):
-            return None
+        return self.metrics.dew_point
 
     def _calculate_dew_point_comfort(self, dew_point: float | None) -> tuple[str, str]:
         """Calculate dew point comfort level and color."""
@@ -1120,24 +918,16 @@ class VmcHeltyDewPointSensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return None
 
-        # Ottieni i dati dei sensori dalla stringa VMGI
-        sensors_data = self.coordinator.data.get("sensors", "")
-        if not sensors_data or not sensors_data.startswith("VMGI"):
-            return None
-
-        try:
-            parts = sensors_data.split(",")
-            if len(parts) < MIN_RESPONSE_PARTS:
-                return None
-
-            temp_internal = float(parts[1]) / 10  # Decimi di °C
-            humidity = float(parts[3]) / 10  # Decimi di %
-        except (ValueError, IndexError):
+        metrics = self.metrics
+        temp_internal = metrics.temperature_internal
+        humidity = metrics.humidity
+        if temp_internal is None or humidity is None:
             return None
 
         # Calcola anche il comfort level basato sul punto di rugiada
-        dew_point = self.native_value
-        comfort_level, comfort_color = self._calculate_dew_point_comfort(dew_point)
+        comfort_level, comfort_color = self._calculate_dew_point_comfort(
+            metrics.dew_point
+        )
 
         return {
             "formula": "Magnus-Tetens",
@@ -1153,6 +943,9 @@ class VmcHeltyDewPointSensor(VmcHeltyEntity, SensorEntity):
 class VmcHeltyComfortIndexSensor(VmcHeltyEntity, SensorEntity):
     """Indice di comfort igrometrico basato su temperatura e umidità."""
 
+    _coordinator_inputs = frozenset({"temperature_internal", "humidity"})
+    _attr_entity_registry_enabled_default = False
+
     def __init__(self, coordinator: VmcHeltyCoordinator) -> None:
         super().__init__(coordinator, "comfort_index")
         self._attr_name = (
@@ -1169,78 +962,16 @@ class VmcHeltyComfortIndexSensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return None
 
-        try:
-            # Ottieni i dati dei sensori dalla stringa VMGI
-            sensors_data = self.coordinator.data.get("sensors", "")
-            if not sensors_data or not sensors_data.startswith("VMGI"):
-                return None
-
-            parts = sensors_data.split(",")
-            if len(parts) < MIN_RESPONSE_PARTS:
-                return None
-
-            # Estrai temperatura interna (pos 1) e umidità (pos 3)
-            temp = float(parts[1]) / 10  # Decimi di °C
-            humidity = float(parts[3]) / 10  # Decimi di %
-
-            if humidity <= 0 or humidity > COMFORT_HUMIDITY_MAX:
-                return None
-
-            # Indice basato su temperature e umidità ottimali
-            temp_comfort = self._calculate_temperature_comfort(temp)
-            humidity_comfort = self._calculate_humidity_comfort(humidity)
-
-            # Combina i due fattori con peso bilanciato
-            comfort_index = (temp_comfort * 0.6 + humidity_comfort * 0.4) * 100
-
-            return round(comfort_index)
-
-        except (ValueError, TypeError, ZeroDivisionError):
-            return None
+        # Temperatura e umidità pesate 60/40 (vedi metrics)
+        return self.metrics.comfort_index
 
     def _calculate_temperature_comfort(self, temp: float) -> float:
         """Calcola il comfort termico (0.0-1.0)."""
-        # Range ottimale
-        if COMFORT_TEMP_OPTIMAL_MIN <= temp <= COMFORT_TEMP_OPTIMAL_MAX:
-            return 1.0
-        # Range accettabile con degradazione lineare
-        if COMFORT_TEMP_ACCEPTABLE_MIN <= temp < COMFORT_TEMP_OPTIMAL_MIN:
-            return 0.5 + (temp - COMFORT_TEMP_ACCEPTABLE_MIN) * 0.25  # da 0.5 a 1.0
-        if COMFORT_TEMP_OPTIMAL_MAX < temp <= COMFORT_TEMP_ACCEPTABLE_MAX:
-            return 1.0 - (temp - COMFORT_TEMP_OPTIMAL_MAX) * 0.25  # da 1.0 a 0.5
-        # Range sopportabile con ulteriore degradazione
-        if COMFORT_TEMP_TOLERABLE_MIN <= temp < COMFORT_TEMP_ACCEPTABLE_MIN:
-            return 0.2 + (temp - COMFORT_TEMP_TOLERABLE_MIN) * 0.15  # da 0.2 a 0.5
-        if COMFORT_TEMP_ACCEPTABLE_MAX < temp <= COMFORT_TEMP_TOLERABLE_MAX:
-            return 0.5 - (temp - COMFORT_TEMP_ACCEPTABLE_MAX) * 0.15  # da 0.5 a 0.2
-        # Fuori range accettabile
-        return max(0.0, 0.2 - abs(temp - COMFORT_TEMP_REFERENCE) * 0.02)
+        return temperature_comfort(temp)
 
     def _calculate_humidity_comfort(self, humidity: float) -> float:
         """Calcola il comfort igrometrico (0.0-1.0)."""
-        # Range ottimale
-        if COMFORT_HUMIDITY_OPTIMAL_MIN <= humidity <= COMFORT_HUMIDITY_OPTIMAL_MAX:
-            return 1.0
-        # Range accettabile con degradazione lineare
-        if COMFORT_HUMIDITY_ACCEPTABLE_MIN <= humidity < COMFORT_HUMIDITY_OPTIMAL_MIN:
-            return (
-                0.5 + (humidity - COMFORT_HUMIDITY_ACCEPTABLE_MIN) * 0.05
-            )  # da 0.5 a 1.0
-        if COMFORT_HUMIDITY_OPTIMAL_MAX < humidity <= COMFORT_HUMIDITY_ACCEPTABLE_MAX:
-            return (
-                1.0 - (humidity - COMFORT_HUMIDITY_OPTIMAL_MAX) * 0.05
-            )  # da 1.0 a 0.5
-        # Range sopportabile con ulteriore degradazione
-        if COMFORT_HUMIDITY_TOLERABLE_MIN <= humidity < COMFORT_HUMIDITY_ACCEPTABLE_MIN:
-            return (
-                0.2 + (humidity - COMFORT_HUMIDITY_TOLERABLE_MIN) * 0.06
-            )  # da 0.2 a 0.5
-        if COMFORT_HUMIDITY_ACCEPTABLE_MAX < humidity <= COMFORT_HUMIDITY_TOLERABLE_MAX:
-            return (
-                0.5 - (humidity - COMFORT_HUMIDITY_ACCEPTABLE_MAX) * 0.03
-            )  # da 0.5 a 0.2
-        # Fuori range accettabile
-        return max(0.0, 0.2 - abs(humidity - COMFORT_HUMIDITY_REFERENCE) * 0.005)
+        return humidity_comfort(humidity)
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
@@ -1250,51 +981,32 @@ class VmcHeltyComfortIndexSensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return attributes
 
-        try:
-            # Ottieni i dati dei sensori dalla stringa VMGI
-            sensors_data = self.coordinator.data.get("sensors", "")
-            if not sensors_data or not sensors_data.startswith("VMGI"):
-                return attributes
-
-            parts = sensors_data.split(",")
-            if len(parts) < MIN_RESPONSE_PARTS:
-                return attributes
-
-            # Estrai temperatura interna (pos 1) e umidità (pos 3)
-            temp = float(parts[1]) / 10  # Decimi di °C
-            humidity = float(parts[3]) / 10  # Decimi di %
-
-            temp_comfort = self._calculate_temperature_comfort(temp)
-            humidity_comfort = self._calculate_humidity_comfort(humidity)
-
-            comfort_value = self.native_value
-            if comfort_value is not None:
-                # Classificazione livello comfort
-                if comfort_value >= COMFORT_INDEX_EXCELLENT:
-                    comfort_category = "Eccellente"
-                elif comfort_value >= COMFORT_INDEX_GOOD:
-                    comfort_category = "Buono"
-                elif comfort_value >= COMFORT_INDEX_ACCEPTABLE:
-                    comfort_category = "Accettabile"
-                elif comfort_value >= COMFORT_INDEX_MEDIOCRE:
-                    comfort_category = "Mediocre"
-                else:
-                    comfort_category = "Scarso"
-
-                attributes.update(
-                    {
-                        "comfort_category": comfort_category,
-                        "temperature_comfort": f"{temp_comfort:.2f}",
-                        "humidity_comfort": f"{humidity_comfort:.2f}",
-                        "optimal_temperature": "20-24°C",
-                        "optimal_humidity": "40-60%",
-                        "current_temperature": f"{temp}°C",
-                        "current_humidity": f"{humidity}%",
-                    }
-                )
+        metrics = self.metrics
+        comfort_value = metrics.comfort_index
+        if comfort_value is not None:
+            # Classificazione livello comfort
+            if comfort_value >= COMFORT_INDEX_EXCELLENT:
+                comfort_category = "Eccellente"
+            elif comfort_value >= COMFORT_INDEX_GOOD:
+                comfort_category = "Buono"
+            elif comfort_value >= COMFORT_INDEX_ACCEPTABLE:
+                comfort_category = "Accettabile"
+            elif comfort_value >= COMFORT_INDEX_MEDIOCRE:
+                comfort_category = "Mediocre"
+            else:
+                comfort_category = "Scarso"
 
-        except (ValueError, TypeError, ZeroDivisionError):
-            pass
+            attributes.update(
+                {
+                    "comfort_category": comfort_category,
+                    "temperature_comfort": f"{metrics.temperature_comfort:.2f}",
+                    "humidity_comfort": f"{metrics.humidity_comfort:.2f}",
+                    "optimal_temperature": "20-24°C",
+                    "optimal_humidity": "40-60%",
+                    "current_temperature": f"{metrics.temperature_internal}°C",
+                    "current_humidity": f"{metrics.humidity}%",
+                }
+            )
 
         return attributes
 
@@ -1302,6 +1014,12 @@ class VmcHeltyComfortIndexSensor(VmcHeltyEntity, SensorEntity):
 class VmcHeltyDewPointDeltaSensor(VmcHeltyEntity, SensorEntity):
     """Sensore Delta Punto di Rugiada per controllo condensazione."""
 
+    _coordinator_inputs = frozenset(
+        {"temperature_internal", "temperature_external", "humidity"}
+    )
+    _deadband_option = CONF_DEADBAND_TEMPERATURE
+    _attr_entity_registry_enabled_default = False
+
     def __init__(self, coordinator):
         """Inizializza il sensore."""
         super().__init__(coordinator)
@@ -1320,44 +1038,12 @@ class VmcHeltyDewPointDeltaSensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return None
 
-        try:
-            # Ottieni i dati dei sensori dalla stringa VMGI
-            sensors_data = self.coordinator.data.get("sensors", "")
-            if not sensors_data or not sensors_data.startswith("VMGI"):
-                return None
-
-            parts = sensors_data.split(",")
-            if len(parts) < MIN_RESPONSE_PARTS:
-                return None
-
-            # Estrai temperature e umidità
-            temp_internal = float(parts[1]) / 10  # Decimi di °C (pos 1)
-            temp_external = float(parts[2]) / 10  # Decimi di °C (pos 2)
-            humidity = float(parts[3]) / 10  # Decimi di % (pos 3)
-
-            if humidity <= 0 or humidity > COMFORT_HUMIDITY_MAX:
-                return None
-
-            # Calcola i punti di rugiada interno ed esterno
-            internal_dew_point = self._calculate_dew_point(temp_internal, humidity)
-            external_dew_point = self._calculate_dew_point(temp_external, humidity)
-
-            delta = internal_dew_point - external_dew_point
-
-            return round(delta, 1)
-
-        except (ValueError, TypeError, ZeroDivisionError):
-            return None
+        delta = self.metrics.dew_point_delta
+        return None if delta is None else round(delta, 1)
 
     def _calculate_dew_point(self, temperature: float, humidity: float) -> float:
         """Calcola il punto di rugiada usando la formula Magnus-Tetens."""
-        # Costanti Magnus-Tetens per acqua
-        a = 17.27
-        b = 237.7
-
-        # Calcola il punto di rugiada
-        gamma = (a * temperature) / (b + temperature) + math.log(humidity / 100.0)
-        return (b * gamma) / (a - gamma)
+        return dew_point(temperature, humidity)
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
@@ -1367,44 +1053,28 @@ class VmcHeltyDewPointDeltaSensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return attributes
 
-        try:
-            # Ottieni i dati dei sensori dalla stringa VMGI
-            sensors_data = self.coordinator.data.get("sensors", "")
-            if not sensors_data or not sensors_data.startswith("VMGI"):
-                return attributes
-
-            parts = sensors_data.split(",")
-            if len(parts) < MIN_RESPONSE_PARTS:
-                return attributes
-
-            delta_value = self.native_value
-            if delta_value is not None:
-                # Classificazione del rischio di condensazione
-                risk_info = self._get_condensation_risk(delta_value)
-
-                # Estrai dati dalla stringa VMGI
-                temp_internal = float(parts[1]) / 10  # Decimi di °C (pos 1)
-                temp_external = float(parts[2]) / 10  # Decimi di °C (pos 2)
-                humidity = float(parts[3]) / 10  # Decimi di % (pos 3)
-
-                internal_dew_point = self._calculate_dew_point(temp_internal, humidity)
-                external_dew_point = self._calculate_dew_point(temp_external, humidity)
-
-                attributes.update(
-                    {
-                        "risk_level": risk_info["level"],
-                        "risk_description": risk_info["description"],
-                        "recommended_action": risk_info["action"],
-                        "internal_dew_point": f"{internal_dew_point:.1f}°C",
-                        "external_dew_point": f"{external_dew_point:.1f}°C",
-                        "internal_temperature": f"{temp_internal}°C",
-                        "external_temperature": f"{temp_external}°C",
-                        "humidity": f"{humidity}%",
-                    }
-                )
+        metrics = self.metrics
+        delta_value = self.native_value
+        if (
+            delta_value is not None
+            and metrics.internal_dew_point is not None
+            and metrics.external_dew_point is not None
+        ):
+            # Classificazione del rischio di condensazione
+            risk_info = self._get_condensation_risk(delta_value)
 
-        except (ValueError, TypeError, ZeroDivisionError):
-            pass
+            attributes.update(
+                {
+                    "risk_level": risk_info["level"],
+                    "risk_description": risk_info["description"],
+                    "recommended_action": risk_info["action"],
+                    "internal_dew_point": f"{metrics.internal_dew_point:.1f}°C",
+                    "external_dew_point": f"{metrics.external_dew_point:.1f}°C",
+                    "internal_temperature": f"{metrics.temperature_internal}°C",
+                    "external_temperature": f"{metrics.temperature_external}°C",
+                    "humidity": f"{metrics.humidity}%",
+                }
+            )
 
         return attributes
 
@@ -1448,6 +1118,9 @@ class VmcHeltyDewPointDeltaSensor(VmcHeltyEntity, SensorEntity):
 class VmcHeltyAirExchangeTimeSensor(VmcHeltyEntity, SensorEntity):
     """Air Exchange Time Sensor - calcola il tempo necessario per ricambio aria."""
 
+    _coordinator_inputs = frozenset({"fan_speed", "room_volume"})
+    _attr_entity_registry_enabled_default = False
+
     def __init__(self, coordinator):
         """Initialize the sensor."""
         super().__init__(coordinator)
@@ -1464,37 +1137,8 @@ class VmcHeltyAirExchangeTimeSensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return None
 
-        # Usa il parsing VMGO per ottenere la velocità ventola
-        status_data = self.coordinator.data.get("status", "")
-        if not status_data or not status_data.startswith("VMGO"):
-            return None
-
-        parts = status_data.split(",")
-        if len(parts) < MIN_RESPONSE_PARTS:  # Need at least 15 parts for VMGO
-            return None
-
-        try:
-            # Velocità ventola dalla posizione 1 del VMGO
-            fan_speed = int(parts[1])
-
-            if fan_speed == 0:
-                return None  # Ventilazione spenta
-
-            # Calcola portata aria stimata in m³/h basata sulla velocità
-            airflow = AIRFLOW_MAPPING.get(
-                fan_speed, 10
-            )  # Default 10 m³/h se non riconosciuto
-
-            # Volume ambiente dalla configurazione del dispositivo
-            room_volume = self.coordinator.room_volume  # m³
-
-            # Calcola tempo di ricambio: Volume / Portata * 60 (conversione minuti)
-            exchange_time = (room_volume / airflow) * 60
-
-            return float(round(exchange_time, 1))
-
-        except (ValueError, IndexError, TypeError):
-            return None
+        # Volume ambiente / portata stimata * 60 (None a ventilazione spenta)
+        return self.metrics.air_exchange_time
 
     @property
     def extra_state_attributes(self) -> dict[str, Any] | None:
@@ -1507,18 +1151,9 @@ class VmcHeltyAirExchangeTimeSensor(VmcHeltyEntity, SensorEntity):
                 "fan_speed": None,
             }
 
-        # Usa il parsing VMGO per ottenere la velocità ventola
-        status_data = self.coordinator.data.get("status", "")
-        if not status_data or not status_data.startswith("VMGO"):
-            return {
-                "efficiency_category": None,
-                "room_volume": None,
-                "estimated_airflow": None,
-                "fan_speed": None,
-            }
-
-        parts = status_data.split(",")
-        if len(parts) < MIN_STATUS_PARTS:
+        metrics = self.metrics
+        actual_speed = metrics.fan_speed
+        if actual_speed is None:
             return {
                 "efficiency_category": None,
                 "room_volume": None,
@@ -1527,13 +1162,10 @@ class VmcHeltyAirExchangeTimeSensor(VmcHeltyEntity, SensorEntity):
             }
 
         try:
-            # Velocità ventola dalla posizione 1 del VMGO
-            actual_speed = int(parts[1])
-
-            airflow = AIRFLOW_MAPPING.get(actual_speed, 0)
+            airflow = metrics.airflow
 
             # Determina categoria efficienza
-            exchange_time = self.native_value
+            exchange_time = metrics.air_exchange_time
             if exchange_time is None:
                 efficiency_category = None
             elif exchange_time <= AIR_EXCHANGE_TIME_EXCELLENT:
@@ -1584,6 +1216,9 @@ class VmcHeltyAirExchangeTimeSensor(VmcHeltyEntity, SensorEntity):
 class VmcHeltyDailyAirChangesSensor(VmcHeltyEntity, SensorEntity):
     """Sensore per ricambi d'aria giornalieri basato sulla velocità della ventola."""
 
+    _coordinator_inputs = frozenset({"fan_speed", "room_volume"})
+    _attr_entity_registry_enabled_default = False
+
     def __init__(self, coordinator: VmcHeltyCoordinator, _device_id: str) -> None:
         """Inizializza il sensore dei ricambi d'aria giornalieri."""
         super().__init__(coordinator)
@@ -1600,40 +1235,8 @@ class VmcHeltyDailyAirChangesSensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return None
 
-        # Usa il parsing VMGO per ottenere la velocità ventola
-        status_data = self.coordinator.data.get("status", "")
-        if (
-            not status_data
-            or not isinstance(status_data, str)
-            or not status_data.startswith("VMGO")
-        ):
-            return None
-
-        parts = status_data.split(",")
-        # Per dati VMGO, servono almeno 15 parti
-        if len(parts) < MIN_RESPONSE_PARTS:
-            return None
-
-        try:
-            # Velocità ventola dalla posizione 1 del VMGO (0-7 = velocità/modalità)
-            fan_speed_raw = int(parts[1])
-
-            # Calcola portata aria stimata in m³/h basata sulla velocità
-            airflow_rate = AIRFLOW_MAPPING.get(fan_speed_raw, 10)  # Default 10 m³/h
-
-            # Volume ambiente dalla configurazione del dispositivo
-            room_volume = self.coordinator.room_volume  # m³
-
-            # Calcola ricambi d'aria per ora
-            air_changes_per_hour = airflow_rate / room_volume
-
-            # Calcola ricambi d'aria per 24 ore
-            daily_air_changes = air_changes_per_hour * 24
-
-            return float(round(daily_air_changes, 1))
-
-        except (ValueError, IndexError, TypeError):
-            return None
+        # Portata stimata / volume ambiente * 24
+        return self.metrics.daily_air_changes
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
@@ -1701,23 +1304,17 @@ class VmcHeltyDailyAirChangesSensor(VmcHeltyEntity, SensorEntity):
         if not self.coordinator.data:
             return "Nessun dato disponibile"
 
-        status_data = self.coordinator.data.get("status", "")
-        if status_data and status_data.startswith("VMGO"):
-            try:
-                parts = status_data.split(",")
-                if len(parts) >= MIN_RESPONSE_PARTS:
-                    fan_speed_raw = int(parts[1])
-                    fan_speed = FANSPEED_MAPPING.get(fan_speed_raw, 1)
-
-                    if fan_speed < FAN_SPEED_MAX_NORMAL:
-                        return (
-                            f"Ricambio insufficiente, aumentare velocità "
-                            f"da {fan_speed} a 3-4"
-                        )
-                    return (
-                        "Ricambio insufficiente anche a velocità massima, "
-                        "verificare impianto"
-                    )
-            except (ValueError, IndexError):
-                pass
+        metrics = self.metrics
+        if metrics.daily_air_changes is not None and metrics.fan_speed is not None:
+            fan_speed = FANSPEED_MAPPING.get(metrics.fan_speed, 1)
+
+            if fan_speed < FAN_SPEED_MAX_NORMAL:
+                return (
+                    f"Ricambio insufficiente, aumentare velocità "
+                    f"da {fan_speed} a 3-4"
+                )
+            return (
+                "Ricambio insufficiente anche a velocità massima, "
+                "verificare impianto"
+            )
         return "Errore nel calcolo, verificare stato ventola"
@@ -0,0 +1,59 @@
+"""Dati persistenti per dispositivo dell'integrazione VMC Helty Flow."""
+
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 60  # Secondi di ritardo per raggruppare i salvataggi
+
+
+class VmcHeltyStorage:
+    """Archivio persistente di un config entry, diviso in sezioni.
+
+    Ogni componente registra una funzione che restituisce lo stato corrente
+    della propria sezione; al salvataggio vengono raccolte tutte le sezioni.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}"
+        )
+        self._data: dict[str, Any] = {}
+        self._providers: dict[str, Callable[[], Any]] = {}
+
+    async def async_load(self) -> None:
+        """Carica i dati salvati."""
+        data = await self._store.async_load()
+        self._data = data if isinstance(data, dict) else {}
+
+    def get(self, section: str) -> Any:
+        """Return the stored data of a section."""
+        return self._data.get(section)
+
+    def register(self, section: str, provider: Callable[[], Any]) -> None:
+        """Registra la funzione che fornisce i dati di una sezione."""
+        self._providers[section] = provider
+
+    def _collect(self) -> dict[str, Any]:
+        """Raccoglie lo stato corrente di tutte le sezioni."""
+        for section, provider in self._providers.items():
+            self._data[section] = provider()
+        return self._data
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Pianifica un salvataggio ritardato."""
+        self._store.async_delay_save(self._collect, STORAGE_SAVE_DELAY)
+
+    async def async_save(self) -> None:
+        """Salva immediatamente i dati."""
+        await self._store.async_save(self._collect())
+
+    async def async_remove(self) -> None:
+        """Rimuove i dati salvati."""
+        await self._store.async_remove()
@@ -7,9 +7,10 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN, ENTITY_NAME_PREFIX, PART_INDEX_PANEL_LED, PART_INDEX_SENSORS
+from .const import DOMAIN, ENTITY_NAME_PREFIX
 from .device_info import VmcHeltyEntity
-from .helpers import tcp_send_command
+from .helpers import async_write_setting
+from .protocol import fan_speed_command, panel_led_command, sensors_command
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,18 +38,37 @@ async def async_setup_entry(
 
 MODES = {
     "hyperventilation": {
-        "cmd": "VMWH0000005",
+        "cmd": fan_speed_command(5),
         "fan_value": 6,
         "name": "Iperventilazione",
     },
-    "night": {"cmd": "VMWH0000006", "fan_value": 5, "name": "Modalità Notte"},
-    "free_cooling": {"cmd": "VMWH0000007", "fan_value": 7, "name": "Free Cooling"},
+    "night": {"cmd": fan_speed_command(6), "fan_value": 5, "name": "Modalità Notte"},
+    "free_cooling": {
+        "cmd": fan_speed_command(7),
+        "fan_value": 7,
+        "name": "Free Cooling",
+    },
 }
 
 
+async def _async_write(coordinator, command: str) -> str | None:
+    """Invia una scrittura, saltandola se il dispositivo è già in quello stato.
+
+    Il coordinatore rilegge lo stato nella stessa sessione della scrittura.
+    """
+    return await async_write_setting(
+        str(coordinator.ip),
+        command,
+        lambda: coordinator.async_write(command),
+        coordinator.data,
+    )
+
+
 class VmcHeltyModeSwitch(VmcHeltyEntity, SwitchEntity):
     """VMC Helty special mode switch."""
 
+    _coordinator_inputs = frozenset({"fan_speed"})
+
     def __init__(self, coordinator, mode_key, mode_name):
         """Initialize the switch."""
         super().__init__(coordinator)
@@ -72,35 +92,27 @@ class VmcHeltyModeSwitch(VmcHeltyEntity, SwitchEntity):
         if not self.coordinator.data:
             return False
 
-        status = self.coordinator.data.get("status", "")
-        if status and status.startswith("VMGO"):
-            try:
-                parts = status.split(",")
-                fan_speed = int(parts[1]) if len(parts) > 1 else 0
-                return fan_speed == MODES[self._mode_key]["fan_value"]
-            except (ValueError, IndexError):
-                return False
-        return False
+        status = self.status_snapshot
+        if status is None:
+            return False
+        fan_speed = status.fan_speed if status.part_count > 1 else 0
+        return fan_speed == MODES[self._mode_key]["fan_value"]
 
     async def async_turn_on(self, **_kwargs) -> None:
         """Turn on the mode."""
-        response = await tcp_send_command(
-            str(self.coordinator.ip), 5001, str(MODES[self._mode_key]["cmd"])
-        )
-        if response == "OK":
-            await self.coordinator.async_request_refresh()
+        await _async_write(self.coordinator, str(MODES[self._mode_key]["cmd"]))
 
     async def async_turn_off(self, **_kwargs) -> None:
         """Turn off the mode (set to manual speed 1)."""
         # Disattiva la modalità speciale impostando velocità manuale 1
-        response = await tcp_send_command(str(self.coordinator.ip), 5001, "VMWH0000001")
-        if response == "OK":
-            await self.coordinator.async_request_refresh()
+        await _async_write(self.coordinator, fan_speed_command(1))
 
 
 class VmcHeltyPanelLedSwitch(VmcHeltyEntity, SwitchEntity):
     """VMC Helty panel LED switch."""
 
+    _coordinator_inputs = frozenset({"panel_led"})
+
     def __init__(self, coordinator):
         """Initialize the switch."""
         super().__init__(coordinator)
@@ -114,18 +126,8 @@ class VmcHeltyPanelLedSwitch(VmcHeltyEntity, SwitchEntity):
         if not self.coordinator.data:
             return False
 
-        status = self.coordinator.data.get("status", "")
-        if status and status.startswith("VMGO"):
-            try:
-                parts = status.split(",")
-                return bool(
-                    parts[PART_INDEX_PANEL_LED] == "00010"
-                    if len(parts) > PART_INDEX_PANEL_LED
-                    else False
-                )
-            except (ValueError, IndexError):
-                return False
-        return False
+        status = self.status_snapshot
+        return status is not None and status.panel_led_on
 
     async def async_turn_on(self, **_kwargs) -> None:
         """Turn on panel LED."""
@@ -133,13 +135,12 @@ class VmcHeltyPanelLedSwitch(VmcHeltyEntity, SwitchEntity):
             "Panel LED Switch: Sending turn_on command VMWH0100010 to %s",
             self.coordinator.ip,
         )
-        response = await tcp_send_command(str(self.coordinator.ip), 5001, "VMWH0100010")
+        response = await _async_write(self.coordinator, panel_led_command(True))
         _LOGGER.debug("Panel LED Switch: Turn_on response: %s", response)
+        if response is None:
+            return
         if response == "OK":
-            _LOGGER.debug(
-                "Panel LED Switch: Turn_on successful, requesting coordinator refresh"
-            )
-            await self.coordinator.async_request_refresh()
+            _LOGGER.debug("Panel LED Switch: Turn_on successful")
         else:
             _LOGGER.warning("Panel LED Switch: Turn_on failed, response: %s", response)
 
@@ -149,13 +150,12 @@ class VmcHeltyPanelLedSwitch(VmcHeltyEntity, SwitchEntity):
             "Panel LED Switch: Sending turn_off command VMWH0100000 to %s",
             self.coordinator.ip,
         )
-        response = await tcp_send_command(str(self.coordinator.ip), 5001, "VMWH0100000")
+        response = await _async_write(self.coordinator, panel_led_command(False))
         _LOGGER.debug("Panel LED Switch: Turn_off response: %s", response)
+        if response is None:
+            return
         if response == "OK":
-            _LOGGER.debug(
-                "Panel LED Switch: Turn_off successful, requesting coordinator refresh"
-            )
-            await self.coordinator.async_request_refresh()
+            _LOGGER.debug("Panel LED Switch: Turn_off successful")
         else:
             _LOGGER.warning("Panel LED Switch: Turn_off failed, response: %s", response)
 
@@ -163,6 +163,8 @@ class VmcHeltyPanelLedSwitch(VmcHeltyEntity, SwitchEntity):
 class VmcHeltySensorsSwitch(VmcHeltyEntity, SwitchEntity):
     """VMC Helty sensors activation switch."""
 
+    _coordinator_inputs = frozenset({"sensors"})
+
     def __init__(self, coordinator):
         """Initialize the switch."""
         super().__init__(coordinator)
@@ -176,28 +178,14 @@ class VmcHeltySensorsSwitch(VmcHeltyEntity, SwitchEntity):
         if not self.coordinator.data:
             return True  # Default active
 
-        status = self.coordinator.data.get("status", "")
-        if status and status.startswith("VMGO"):
-            try:
-                parts = status.split(",")
-                # Sensori attivi se il valore è 0, inattivi se 1
-                return bool(
-                    parts[PART_INDEX_SENSORS] == "00000"
-                    if len(parts) > PART_INDEX_SENSORS
-                    else True
-                )
-            except (ValueError, IndexError):
-                return True
-        return True
+        # Sensori attivi se il valore è 0, inattivi se 2
+        status = self.status_snapshot
+        return status is None or status.sensors_active
 
     async def async_turn_on(self, **_kwargs) -> None:
         """Turn on sensors."""
-        response = await tcp_send_command(str(self.coordinator.ip), 5001, "VMWH0300000")
-        if response == "OK":
-            await self.coordinator.async_request_refresh()
+        await _async_write(self.coordinator, sensors_command(True))
 
     async def async_turn_off(self, **_kwargs) -> None:
         """Turn off sensors."""
-        response = await tcp_send_command(str(self.coordinator.ip), 5001, "VMWH0300002")
-        if response == "OK":
-            await self.coordinator.async_request_refresh()
+        await _async_write(self.coordinator, sensors_command(False))
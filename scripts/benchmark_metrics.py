@@ -0,0 +1,157 @@
+"""Benchmark del calcolo delle metriche derivate per aggiornamento.
+
+Misura, per un'installazione con più dispositivi, il costo CPU di un
+aggiornamento del coordinatore seguito dalla lettura di stato e attributi di
+tutte le entità derivate (punto di rugiada, umidità assoluta, delta, comfort,
+ricambio aria, potenza, energia), confrontando:
+
+- "per entità": ogni accesso alle metriche ridecodifica i frame e riesegue
+  tutte le formule, come avveniva prima del motore di metriche;
+- "motore": frame decodificati e metriche calcolate una volta per frame dal
+  coordinatore, le entità leggono l'oggetto memorizzato.
+
+Richiede Home Assistant installato (requirements_test.txt).
+
+Uso: python scripts/benchmark_metrics.py [--devices 20] [--updates 200]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from custom_components.vmc_helty_flow import protocol
+from custom_components.vmc_helty_flow.device_info import (
+    VmcHeltyEntity,
+)
+from custom_components.vmc_helty_flow.metrics import (
+    DerivedMetrics,
+    derive_metrics,
+)
+from custom_components.vmc_helty_flow.sensor import (
+    VmcHeltyAbsoluteHumiditySensor,
+    VmcHeltyAirExchangeTimeSensor,
+    VmcHeltyAirflowSensor,
+    VmcHeltyComfortIndexSensor,
+    VmcHeltyCondensationRiskBinarySensor,
+    VmcHeltyDailyAirChangesSensor,
+    VmcHeltyDailyEnergyEstimateSensor,
+    VmcHeltyDewPointDeltaSensor,
+    VmcHeltyDewPointSensor,
+    VmcHeltyPowerSensor,
+)
+
+ROOM_VOLUME = 60.0
+
+
+def _frames(rng: random.Random) -> tuple[str, str]:
+    """Genera una coppia di frame VMGO/VMGI con valori plausibili."""
+    speed = rng.randint(0, 7)
+    status = f"VMGO,{speed},00010,25,00000,1234,0,0,0,0,0,050,0,0,0,00120"
+    sensors = (
+        f"VMGI,{rng.randint(150, 260)},{rng.randint(-50, 300)},"
+        f"{rng.randint(300, 700)},{rng.randint(400, 1500)},0,0,0,0,0,0,"
+        f"{rng.randint(0, 300)},0,0,0"
+    )
+    return status, sensors
+
+
+def _uncached_metrics(entity: VmcHeltyEntity) -> DerivedMetrics:
+    """Metriche ricalcolate a ogni accesso, senza memorizzazione."""
+    data = entity.coordinator.data
+    sensors = protocol._decode_sensors.__wrapped__(data["sensors"])
+    return DerivedMetrics(
+        protocol._decode_status.__wrapped__(data["status"]),
+        sensors if sensors.is_complete else None,
+        entity.coordinator.room_volume,
+    )
+
+
+def _devices(count: int) -> list[tuple[SimpleNamespace, list[Any]]]:
+    devices = []
+    for index in range(count):
+        coordinator = SimpleNamespace(
+            data={},
+            room_volume=ROOM_VOLUME,
+            ip=f"192.168.1.{index + 10}",
+            name=f"VMC {index}",
+            name_slug=f"vmc_{index}",
+            config_entry=SimpleNamespace(entry_id=f"entry_{index}"),
+        )
+        entities = [
+            VmcHeltyAbsoluteHumiditySensor(coordinator),
+            VmcHeltyDewPointSensor(coordinator),
+            VmcHeltyDewPointDeltaSensor(coordinator),
+            VmcHeltyComfortIndexSensor(coordinator),
+            VmcHeltyCondensationRiskBinarySensor(coordinator),
+            VmcHeltyAirExchangeTimeSensor(coordinator),
+            VmcHeltyDailyAirChangesSensor(coordinator, coordinator.ip),
+            VmcHeltyPowerSensor(coordinator),
+            VmcHeltyDailyEnergyEstimateSensor(coordinator),
+            VmcHeltyAirflowSensor(coordinator),
+        ]
+        devices.append((coordinator, entities))
+    return devices
+
+
+def _run(frames: list[list[tuple[str, str]]], *, engine: bool) -> float:
+    devices = _devices(len(frames[0]))
+    start = time.perf_counter()
+    for update in frames:
+        for (coordinator, entities), (status, sensors) in zip(
+            devices, update, strict=True
+        ):
+            coordinator.data = {"status": status, "sensors": sensors}
+            if engine:
+                # Coordinatore: decodifica e metriche una volta per frame
+                derive_metrics(
+                    protocol.decode_status(status),
+                    protocol.decode_sensors(sensors),
+                    ROOM_VOLUME,
+                )
+            # Home Assistant legge stato e attributi di ogni entità
+            for entity in entities:
+                if hasattr(entity, "is_on"):
+                    entity.is_on  # noqa: B018
+                else:
+                    entity.native_value  # noqa: B018
+                entity.extra_state_attributes  # noqa: B018
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Esegue il benchmark e stampa il costo medio per aggiornamento."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # Ogni aggiornamento porta frame nuovi per tutti i dispositivi
+    frames = [[_frames(rng) for _ in range(args.devices)] for _ in range(args.updates)]
+
+    engine_metrics = VmcHeltyEntity.metrics
+    VmcHeltyEntity.metrics = property(_uncached_metrics)  # type: ignore[assignment]
+    try:
+        legacy = _run(frames, engine=False)
+    finally:
+        VmcHeltyEntity.metrics = engine_metrics  # type: ignore[method-assign]
+    engine = _run(frames, engine=True)
+
+    per_update = 1_000_000 / args.updates
+    sys.stdout.write(
+        f"Dispositivi: {args.devices}, aggiornamenti: {args.updates}\n"
+        f"Per entità: {legacy * per_update:8.1f} µs/aggiornamento\n"
+        f"Motore:     {engine * per_update:8.1f} µs/aggiornamento\n"
+        f"Rapporto:   {legacy / engine:8.2f}x\n"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ from custom_components.vmc_helty_flow.sensor import (
     VmcHeltyAirQualityAlertBinarySensor,
     VmcHeltyCondensationRiskBinarySensor,
     VmcHeltyOfflineBinarySensor,
+    VmcHeltyOnOffSensor,
 )
 
 
@@ -91,3 +92,19 @@ def test_offline_alert_reflects_coordinator_status() -> None:
 
     coordinator.last_update_success = False
     assert sensor_entity.is_on is True
+
+
+def test_online_sensor_reports_age_of_stale_data() -> None:
+    """After a failed poll the online sensor is off and reports the data age."""
+    coordinator = MagicMock()
+    coordinator.name_slug = "vmc_helty_testvmc"
+    coordinator.name = "TestVMC"
+    coordinator.data = {"available": True}
+
+    online = VmcHeltyOnOffSensor(coordinator)
+    assert online.is_on is True
+    assert online.extra_state_attributes is None
+
+    coordinator.data = {"available": False, "stale": True, "data_age": 42}
+    assert online.is_on is False
+    assert online.extra_state_attributes == {"data_age": 42}
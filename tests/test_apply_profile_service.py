@@ -0,0 +1,250 @@
+"""Test the apply_profile service functionality."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import voluptuous as vol
+from homeassistant.core import ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+
+import custom_components.vmc_helty_flow as vmc_module
+from custom_components.vmc_helty_flow.const import CONF_PROFILES, DOMAIN
+from custom_components.vmc_helty_flow.helpers import VMCTimeoutError
+
+
+class TestApplyProfileService:
+    """Test the apply_profile service."""
+
+    def _setup(self, options=None):
+        """Prepara hass, config entry e coordinatore simulati."""
+        mock_hass = MagicMock()
+        mock_entity_registry = MagicMock()
+        mock_config_entry = MagicMock()
+        mock_coordinator = MagicMock()
+
+        mock_hass.data = {
+            "entity_registry": mock_entity_registry,
+            DOMAIN: {"test_entry_id": mock_coordinator},
+        }
+        mock_hass.config_entries.async_get_entry.return_value = mock_config_entry
+        mock_config_entry.domain = DOMAIN
+        mock_config_entry.entry_id = "test_entry_id"
+        mock_config_entry.options = options or {}
+
+        mock_coordinator.async_apply_profile = AsyncMock(return_value=["VMWH0000002"])
+        mock_entity_entry = MagicMock()
+        mock_entity_entry.config_entry_id = "test_entry_id"
+        mock_entity_registry.async_get.return_value = mock_entity_entry
+        return mock_hass, mock_config_entry, mock_coordinator
+
+    async def _call(self, mock_hass, **data):
+        """Invoca il servizio con i dati validati dallo schema."""
+        schema = vmc_module._create_service_schemas()[2]
+        call = ServiceCall(
+            hass=mock_hass,
+            domain=DOMAIN,
+            service="apply_profile",
+            data=schema({"entity_id": "fan.vmc_helty_test", **data}),
+        )
+        await vmc_module._handle_apply_profile(mock_hass, call)
+
+    async def test_service_registered(self):
+        """Il servizio viene registrato con il proprio schema."""
+        mock_hass = MagicMock()
+
+        await vmc_module.async_setup_services(mock_hass)
+
+        services = [
+            call[0][1] for call in mock_hass.services.async_register.call_args_list
+        ]
+        assert "apply_profile" in services
+
+    async def test_schema_rejects_speed_with_mode(self):
+        """Velocità e modalità speciale non possono essere combinate."""
+        schema = vmc_module._create_service_schemas()[2]
+        with pytest.raises(vol.Invalid):
+            schema({"entity_id": "fan.test", "fan_speed": 2, "mode": "night_mode"})
+
+    async def test_schema_accepts_only_supported_light_levels(self):
+        """Il livello luci deve essere uno di quelli supportati dal dispositivo."""
+        schema = vmc_module._create_service_schemas()[2]
+        assert (
+            schema({"entity_id": "fan.test", "light_level": "75"})["light_level"] == 75
+        )
+        with pytest.raises(vol.Invalid):
+            schema({"entity_id": "fan.test", "light_level": 37})
+
+    async def test_applies_explicit_settings(self):
+        """Le impostazioni passate vengono applicate dal coordinatore."""
+        mock_hass, _, coordinator = self._setup()
+
+        await self._call(mock_hass, fan_speed=2, panel_led=False)
+
+        coordinator.async_apply_profile.assert_awaited_once_with(
+            {"fan_speed": 2, "panel_led": False}, force=False
+        )
+
+    async def test_stored_profile_with_overrides_and_save_as(self):
+        """Il profilo salvato viene completato e salvato con un nuovo nome."""
+        stored = {"night": {"mode": "night_mode", "panel_led": False}}
+        mock_hass, config_entry, coordinator = self._setup({CONF_PROFILES: stored})
+
+        await self._call(mock_hass, profile="night", fan_speed=1, save_as="quiet")
+
+        expected = {"panel_led": False, "fan_speed": 1}
+        coordinator.async_apply_profile.assert_awaited_once_with(expected, force=False)
+        mock_hass.config_entries.async_update_entry.assert_called_once_with(
+            config_entry,
+            options={CONF_PROFILES: {**stored, "quiet": expected}},
+        )
+
+    async def test_unknown_or_empty_profile(self):
+        """Un profilo sconosciuto o vuoto solleva un errore senza scritture."""
+        mock_hass, _, coordinator = self._setup()
+
+        with pytest.raises(HomeAssistantError, match="not found"):
+            await self._call(mock_hass, profile="missing")
+        with pytest.raises(HomeAssistantError, match="No settings"):
+            await self._call(mock_hass)
+        coordinator.async_apply_profile.assert_not_awaited()
+
+
+class TestBulkApplyProfileService:
+    """Test the bulk_apply_profile service."""
+
+    def _setup(self, count):
+        """Prepara `count` dispositivi con un'entità e un'area ciascuno."""
+        mock_hass = MagicMock()
+        entries, devices, entities = {}, {}, {}
+        mock_hass.data = {DOMAIN: {"services_setup": True}}
+        for number in range(count):
+            entry = MagicMock()
+            entry.entry_id = f"entry_{number}"
+            entry.title = f"VMC {number}"
+            entry.options = {}
+            coordinator = MagicMock()
+            coordinator.ip = f"192.168.1.{100 + number}"
+            coordinator.async_apply_profile = AsyncMock(return_value=["VMWH0000006"])
+            mock_hass.data[DOMAIN][entry.entry_id] = coordinator
+            entries[entry.entry_id] = entry
+            devices[f"device_{number}"] = MagicMock(
+                config_entries={entry.entry_id}, area_id=f"area_{number % 2}"
+            )
+            entities[f"fan.vmc_{number}"] = MagicMock(
+                config_entry_id=entry.entry_id, area_id=None
+            )
+        mock_hass.config_entries.async_get_entry.side_effect = entries.get
+        return mock_hass, devices, entities
+
+    async def _call(self, mock_hass, devices, entities, **data):
+        """Invoca il servizio con registri simulati e restituisce la risposta."""
+        schema = vmc_module._create_service_schemas()[3]
+        call = ServiceCall(
+            hass=mock_hass,
+            domain=DOMAIN,
+            service="bulk_apply_profile",
+            data=schema(data),
+        )
+
+        def _in_area(registry, area_id):
+            return [item for item in registry.values() if item.area_id == area_id]
+
+        with (
+            patch.object(
+                vmc_module.dr,
+                "async_get",
+                return_value=MagicMock(async_get=devices.get),
+            ),
+            patch.object(
+                vmc_module.entity_registry,
+                "async_get",
+                return_value=MagicMock(async_get=entities.get),
+            ),
+            patch.object(
+                vmc_module.dr,
+                "async_entries_for_area",
+                side_effect=lambda _, area_id: _in_area(devices, area_id),
+            ),
+            patch.object(
+                vmc_module.entity_registry,
+                "async_entries_for_area",
+                side_effect=lambda _, area_id: _in_area(entities, area_id),
+            ),
+        ):
+            return await vmc_module._handle_bulk_apply_profile(mock_hass, call)
+
+    async def test_schema_requires_a_target(self):
+        """Senza entità, dispositivi o aree lo schema rifiuta la chiamata."""
+        schema = vmc_module._create_service_schemas()[3]
+        with pytest.raises(vol.Invalid):
+            schema({"mode": "night_mode"})
+
+    async def test_resolves_entities_devices_and_areas(self):
+        """Entità, dispositivi e aree si risolvono una volta per dispositivo."""
+        mock_hass, devices, entities = self._setup(5)
+
+        response = await self._call(
+            mock_hass,
+            devices,
+            entities,
+            entity_id=["fan.vmc_0"],
+            device_id=["device_0", "device_1"],
+            area_id="area_0",
+            mode="night_mode",
+        )
+
+        assert sorted(response["devices"]) == [
+            "entry_0",
+            "entry_1",
+            "entry_2",
+            "entry_4",
+        ]
+        assert response["succeeded"] == 4
+        result = response["devices"]["entry_1"]
+        assert result["ip"] == "192.168.1.101"
+        assert result["commands"] == ["VMWH0000006"]
+        assert result["latency_ms"] >= 0
+        coordinator = mock_hass.data[DOMAIN]["entry_0"]
+        coordinator.async_apply_profile.assert_awaited_once_with(
+            {"mode": "night_mode"}, force=False
+        )
+        mock_hass.data[DOMAIN]["entry_3"].async_apply_profile.assert_not_awaited()
+
+    async def test_unknown_target(self):
+        """Un'entità che non appartiene all'integrazione solleva un errore."""
+        mock_hass, devices, entities = self._setup(1)
+
+        with pytest.raises(HomeAssistantError, match=r"light\.kitchen"):
+            await self._call(
+                mock_hass, devices, entities, entity_id="light.kitchen", fan_speed=1
+            )
+
+    async def test_bounded_concurrency_and_partial_failure(self):
+        """Al massimo BULK_MAX_CONCURRENT dispositivi alla volta, errori isolati."""
+        mock_hass, devices, entities = self._setup(10)
+        running = peak = 0
+
+        async def _apply(_profile, **_kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return ["VMWH0000001"]
+
+        for number in range(10):
+            coordinator = mock_hass.data[DOMAIN][f"entry_{number}"]
+            coordinator.async_apply_profile.side_effect = _apply
+        failing = mock_hass.data[DOMAIN]["entry_7"]
+        failing.async_apply_profile.side_effect = VMCTimeoutError("timeout")
+
+        response = await self._call(
+            mock_hass, devices, entities, area_id=["area_0", "area_1"], fan_speed=1
+        )
+
+        assert peak == vmc_module.BULK_MAX_CONCURRENT
+        assert response["succeeded"] == 9
+        assert response["failed"] == 1
+        assert response["devices"]["entry_7"]["success"] is False
+        assert "timeout" in response["devices"]["entry_7"]["error"]
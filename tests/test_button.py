@@ -1,6 +1,6 @@
 """Tests for button module."""
 
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from homeassistant.config_entries import ConfigEntry
@@ -20,6 +20,7 @@ def mock_coordinator():
     coordinator.name_slug = "vmc_helty_testvmc"
     coordinator.data = {"status": "VMGO,3,1,25,0,24"}
     coordinator.async_request_refresh = AsyncMock()
+    coordinator.async_write = AsyncMock(return_value="OK")
     return coordinator
 
 
@@ -72,38 +73,30 @@ class TestVmcHeltyResetFilterButton:
         assert button_entity._attr_icon == "mdi:air-filter"
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.button.tcp_send_command")
-    async def test_async_press_success(self, mock_tcp_send, mock_coordinator):
+    async def test_async_press_success(self, mock_coordinator):
         """Test async_press with successful command."""
-        mock_tcp_send.return_value = "OK"
+        mock_coordinator.async_write.return_value = "OK"
         button_entity = VmcHeltyResetFilterButton(mock_coordinator)
 
         await button_entity.async_press()
 
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH0417744")
-        mock_coordinator.async_request_refresh.assert_called_once()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH0417744")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.button.tcp_send_command")
-    async def test_async_press_failure(self, mock_tcp_send, mock_coordinator):
+    async def test_async_press_failure(self, mock_coordinator):
         """Test async_press with failed command."""
-        mock_tcp_send.return_value = "ERROR"
+        mock_coordinator.async_write.return_value = "ERROR"
         button_entity = VmcHeltyResetFilterButton(mock_coordinator)
 
         await button_entity.async_press()
 
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH0417744")
-        # Should not refresh on non-OK response
-        mock_coordinator.async_request_refresh.assert_not_called()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH0417744")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.button.tcp_send_command")
-    async def test_async_press_exception(self, mock_tcp_send, mock_coordinator):
+    async def test_async_press_exception(self, mock_coordinator):
         """Test async_press with exception."""
-        mock_tcp_send.side_effect = Exception("Connection error")
+        mock_coordinator.async_write.side_effect = Exception("Connection error")
         button_entity = VmcHeltyResetFilterButton(mock_coordinator)
 
         with pytest.raises(Exception, match="Connection error"):
             await button_entity.async_press()
-
-        mock_coordinator.async_request_refresh.assert_not_called()
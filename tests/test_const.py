@@ -2,11 +2,13 @@
 
 import custom_components.vmc_helty_flow.const as const_module
 from custom_components.vmc_helty_flow.const import (
+    CONNECTION_IDLE_TIMEOUT,
     DEFAULT_PORT,
     DEFAULT_SUBNET,
     DOMAIN,
     IP_RANGE_END,
     IP_RANGE_START,
+    POLL_INTERVAL_RANGES,
     TCP_TIMEOUT,
 )
 
@@ -50,6 +52,11 @@ class TestConstants:
         assert IP_RANGE_END < 256
         assert IP_RANGE_START < IP_RANGE_END
 
+    def test_idle_timeout_outlasts_poll_intervals(self):
+        """Il socket persistente non scade tra due poll consecutivi."""
+        for key in ("scan_interval", "sensors_interval", "adaptive_max_interval"):
+            assert POLL_INTERVAL_RANGES[key][1] < CONNECTION_IDLE_TIMEOUT
+
     def test_all_constants_defined(self):
         """Test che tutte le costanti essenziali siano definite."""
         required_constants = [
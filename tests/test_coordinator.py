@@ -2,16 +2,30 @@
 
 # ruff: noqa: PT019
 
+import time
 from datetime import timedelta
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.update_coordinator import UpdateFailed
 
 from custom_components.vmc_helty_flow.coordinator import VmcHeltyCoordinator
-from custom_components.vmc_helty_flow.helpers import VMCConnectionError
+from custom_components.vmc_helty_flow.helpers import (
+    VmcConnection,
+    VMCConnectionError,
+    VMCTimeoutError,
+    async_write_setting,
+    parse_vmsl_response,
+)
+from custom_components.vmc_helty_flow.resilience import (
+    BREAKER_CLOSED,
+    BREAKER_HALF_OPEN,
+    BREAKER_OPEN,
+)
+from custom_components.vmc_helty_flow.scheduler import WriteCoalescer
 
 
 @patch("custom_components.vmc_helty_flow.helpers.tcp_send_command")
@@ -54,7 +68,7 @@ class TestVmcHeltyCoordinator:
     @patch(
         "custom_components.vmc_helty_flow.coordinator.DataUpdateCoordinator.__init__"
     )
-    @patch("custom_components.vmc_helty_flow.coordinator.tcp_send_command")
+    @patch("custom_components.vmc_helty_flow.coordinator.tcp_send_commands")
     @pytest.mark.asyncio
     async def test_update_data_successful(
         self, mock_tcp_send, mock_super_init, _mock_tcp
@@ -68,8 +82,8 @@ class TestVmcHeltyCoordinator:
         coordinator._normal_update_interval = timedelta(seconds=60)
         coordinator.hass = self.hass
 
-        async def tcp_response(*_args, **_kwargs):
-            return "VMGO,2,1,0,0,1,0"
+        async def tcp_response(_ip, _port, commands, **_kwargs):
+            return ["VMGO,2,1,0,0,1,0"] * len(commands)
 
         mock_tcp_send.side_effect = tcp_response
 
@@ -85,6 +99,7 @@ class TestVmcHeltyCoordinator:
         """Test aggiornamento dati con errore di connessione."""
         mock_super_init.return_value = None
         coordinator = VmcHeltyCoordinator(self.hass, self.config_entry)
+        coordinator.data = None
         coordinator._consecutive_errors = 0
 
         mock_tcp.side_effect = VMCConnectionError("Connection failed")
@@ -100,6 +115,7 @@ class TestVmcHeltyCoordinator:
         """Test aggiornamento dati con errori multipli."""
         mock_super_init.return_value = None
         coordinator = VmcHeltyCoordinator(self.hass, self.config_entry)
+        coordinator.data = None
         coordinator._consecutive_errors = 0
 
         mock_tcp.side_effect = VMCConnectionError("Connection failed")
@@ -115,7 +131,7 @@ class TestVmcHeltyCoordinator:
     @patch(
         "custom_components.vmc_helty_flow.coordinator.DataUpdateCoordinator.__init__"
     )
-    @patch("custom_components.vmc_helty_flow.coordinator.tcp_send_command")
+    @patch("custom_components.vmc_helty_flow.coordinator.tcp_send_commands")
     @pytest.mark.asyncio
     async def test_update_data_recovery_after_error(
         self, mock_tcp_send, mock_super_init, _mock_tcp
@@ -129,8 +145,8 @@ class TestVmcHeltyCoordinator:
         coordinator._normal_update_interval = timedelta(seconds=60)
         coordinator.hass = self.hass
 
-        async def tcp_response(*_args, **_kwargs):
-            return "VMGO,1,0,1,0,0,1"
+        async def tcp_response(_ip, _port, commands, **_kwargs):
+            return ["VMGO,1,0,1,0,0,1"] * len(commands)
 
         mock_tcp_send.side_effect = tcp_response
 
@@ -152,3 +168,753 @@ class TestVmcHeltyCoordinator:
         assert coordinator.config_entry == self.config_entry
         assert coordinator.ip == "192.168.1.100"
         assert coordinator.name == "Test VMC"
+
+
+class TestCoordinatorStorage:
+    """Test per i dati persistenti gestiti dal coordinator."""
+
+    def _coordinator(self):
+        hass = Mock(spec=HomeAssistant)
+        config_entry = Mock(spec=ConfigEntry)
+        config_entry.entry_id = "entry_1"
+        config_entry.data = {"ip": "192.168.1.100", "name": "Test VMC"}
+        config_entry.options = {}
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.DataUpdateCoordinator.__init__",
+            return_value=None,
+        ):
+            coordinator = VmcHeltyCoordinator(hass, config_entry)
+        coordinator.hass = hass
+        coordinator.connection = VmcConnection("192.168.1.100", 5001)
+        return coordinator
+
+    @pytest.mark.asyncio
+    async def test_setup_restores_timing(self):
+        """Le stime dei tempi salvate vengono ripristinate al setup."""
+        coordinator = self._coordinator()
+        storage = Mock()
+        storage.async_load = AsyncMock()
+        storage.get.return_value = {"response": {"srtt": 0.25, "rttvar": 0.05}}
+
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.VmcHeltyStorage",
+            return_value=storage,
+        ):
+            await coordinator._async_setup()
+
+        storage.get.assert_called_once_with("timing")
+        assert coordinator.connection.response_rtt.srtt == 0.25
+        storage.register.assert_any_call(
+            "timing", coordinator.connection.timing_as_stored_dict
+        )
+
+    @pytest.mark.asyncio
+    async def test_shutdown_saves_storage(self):
+        """Lo spegnimento del coordinator salva i dati persistenti."""
+        coordinator = self._coordinator()
+        coordinator.storage = Mock()
+        coordinator.storage.async_save = AsyncMock()
+
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.DataUpdateCoordinator.async_shutdown",
+            new=AsyncMock(),
+        ):
+            await coordinator.async_shutdown()
+
+        coordinator.storage.async_save.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_restore_snapshot_marks_data_stale(self):
+        """L'ultimo snapshot salvato viene ripristinato come non aggiornato."""
+        coordinator = self._coordinator()
+        storage = Mock()
+        storage.async_load = AsyncMock()
+        storage.get.side_effect = lambda section: (
+            {"status": "VMGO,2,00010", "sensors": None, "last_update": 1000.0}
+            if section == "snapshot"
+            else None
+        )
+
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.VmcHeltyStorage",
+            return_value=storage,
+        ):
+            assert await coordinator.async_restore_snapshot() is True
+
+        assert coordinator.data["status"] == "VMGO,2,00010"
+        assert coordinator.data["last_update"] == 1000.0
+        assert coordinator.data["available"] is False
+        assert coordinator.data["stale"] is True
+        storage.register.assert_any_call(
+            "snapshot", coordinator._snapshot_as_stored_dict
+        )
+
+    @pytest.mark.asyncio
+    async def test_restore_snapshot_requires_valid_status(self):
+        """Senza uno stato salvato valido serve il primo poll."""
+        coordinator = self._coordinator()
+        coordinator.data = None
+        storage = Mock()
+        storage.async_load = AsyncMock()
+        storage.get.return_value = {"status": "ERROR"}
+
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.VmcHeltyStorage",
+            return_value=storage,
+        ):
+            assert await coordinator.async_restore_snapshot() is False
+
+        assert coordinator.data is None
+
+    def test_snapshot_persists_last_known_data(self):
+        """Lo snapshot salvato contiene gli ultimi dati noti del dispositivo."""
+        coordinator = self._coordinator()
+        coordinator.storage = Mock()
+        coordinator.storage.get.return_value = {"status": "VMGO,1"}
+        coordinator.data = None
+        assert coordinator._snapshot_as_stored_dict() == {"status": "VMGO,1"}
+
+        coordinator.data = {
+            "status": "VMGO,3",
+            "sensors": "VMGI,1",
+            "name": "VMNM,Test",
+            "network": None,
+            "filter_hours": 10,
+            "available": True,
+            "stale": False,
+            "last_update": 2000.0,
+        }
+        assert coordinator._snapshot_as_stored_dict() == {
+            "status": "VMGO,3",
+            "sensors": "VMGI,1",
+            "name": "VMNM,Test",
+            "network": None,
+            "filter_hours": 10,
+            "last_update": 2000.0,
+            "read_at": {"VMNM?": None, "VMSL?": None},
+        }
+
+    @pytest.mark.asyncio
+    async def test_restore_snapshot_keeps_device_info_fresh(self):
+        """Nome e rete salvati non vengono riletti prima della scadenza."""
+        coordinator = self._coordinator()
+        coordinator.poll_plan.record("VMNM?", 1000.0, "VMNM,Test")
+        coordinator.data = {"status": "VMGO,2,00010", "name": "VMNM,Test"}
+        stored = coordinator._snapshot_as_stored_dict()
+        assert stored["read_at"] == {"VMNM?": 1000.0, "VMSL?": None}
+
+        restored = self._coordinator()
+        storage = Mock()
+        storage.async_load = AsyncMock()
+        storage.get.side_effect = lambda section: (
+            stored if section == "snapshot" else None
+        )
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.VmcHeltyStorage",
+            return_value=storage,
+        ):
+            assert await restored.async_restore_snapshot() is True
+
+        assert "read_at" not in restored.data
+        assert restored._get_additional_data({})["name"] == "VMNM,Test"
+        assert restored._build_poll_commands(2000.0) == ["VMGH?", "VMGI?", "VMSL?"]
+
+    @pytest.mark.asyncio
+    async def test_snapshot_does_not_persist_wifi_password(self):
+        """La password del Wi-Fi non finisce mai nello snapshot salvato."""
+        network = "MyWifi".ljust(32, "*") + "secret123".ljust(32, "*")
+        coordinator = self._coordinator()
+        coordinator.poll_plan.record("VMSL?", 1000.0, network)
+        coordinator.data = {"status": "VMGO,2,00010", "network": network}
+        stored = coordinator._snapshot_as_stored_dict()
+        assert stored["network"] == {"ssid": "MyWifi", "password_length": 9}
+        assert "secret123" not in repr(stored)
+
+        # Anche uno snapshot salvato da versioni precedenti viene mascherato
+        for saved in (stored, {**stored, "network": network}):
+            restored = self._coordinator()
+            storage = Mock()
+            storage.async_load = AsyncMock()
+            storage.get.side_effect = lambda section, saved=saved: (
+                saved if section == "snapshot" else None
+            )
+            with patch(
+                "custom_components.vmc_helty_flow.coordinator.VmcHeltyStorage",
+                return_value=storage,
+            ):
+                assert await restored.async_restore_snapshot() is True
+
+            restored_network = restored._get_additional_data({})["network"]
+            assert "secret123" not in restored_network
+            assert parse_vmsl_response(restored_network) == ("MyWifi", "#" * 9)
+
+
+def _batch_returning(result):
+    """Crea un side effect di tcp_send_commands con lo stesso esito per tutti."""
+
+    def _side_effect(_ip, _port, commands, **_kwargs):
+        return [result] * len(commands)
+
+    return _side_effect
+
+
+class TestCoordinatorCircuitBreaker:
+    """Test per il circuit breaker del coordinator."""
+
+    def _coordinator(self):
+        hass = Mock(spec=HomeAssistant)
+        config_entry = Mock(spec=ConfigEntry)
+        config_entry.data = {"ip": "192.168.1.100", "name": "Test VMC"}
+        config_entry.options = {"adaptive_polling": False}
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.DataUpdateCoordinator.__init__",
+            return_value=None,
+        ):
+            coordinator = VmcHeltyCoordinator(hass, config_entry)
+        coordinator.hass = hass
+        coordinator.data = None
+        coordinator._update_interval = coordinator._normal_update_interval
+        coordinator.breaker.jitter = 0
+        return coordinator
+
+    @pytest.mark.asyncio
+    async def test_breaker_opens_and_skips_polls(self):
+        """Dopo troppi errori i poll vengono saltati senza traffico di rete."""
+        coordinator = self._coordinator()
+        timeout = VMCTimeoutError("timeout")
+
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.tcp_send_commands",
+            new=AsyncMock(
+                side_effect=lambda _ip, _port, cmds, **_kw: [timeout] * len(cmds)
+            ),
+        ) as mock_batch:
+            for _ in range(coordinator.breaker.failure_threshold):
+                with pytest.raises(UpdateFailed):
+                    await coordinator._async_update_data()
+
+            assert coordinator.breaker.state == BREAKER_OPEN
+            assert coordinator.update_interval == timedelta(
+                seconds=coordinator.breaker.last_delay
+            )
+            calls = mock_batch.await_count
+
+            with pytest.raises(UpdateFailed, match="next attempt"):
+                await coordinator._async_update_data()
+            assert mock_batch.await_count == calls
+
+    @pytest.mark.asyncio
+    async def test_half_open_probe_failure_reopens(self):
+        """Una sonda fallita riapre il circuito senza eseguire il poll."""
+        coordinator = self._coordinator()
+        coordinator.breaker.state = BREAKER_HALF_OPEN
+        coordinator.breaker.trips = 1
+
+        with (
+            patch(
+                "custom_components.vmc_helty_flow.coordinator.async_probe_device",
+                new=AsyncMock(side_effect=VMCConnectionError("refused")),
+            ),
+            patch(
+                "custom_components.vmc_helty_flow.coordinator.tcp_send_commands",
+                new=AsyncMock(),
+            ) as mock_batch,
+            pytest.raises(UpdateFailed, match="still unreachable"),
+        ):
+            await coordinator._async_update_data()
+
+        mock_batch.assert_not_awaited()
+        assert coordinator.breaker.state == BREAKER_OPEN
+        assert coordinator.breaker.last_delay == 2 * coordinator.breaker.base_delay
+
+    @pytest.mark.asyncio
+    async def test_half_open_probe_success_resumes_polling(self):
+        """Una sonda riuscita consente il poll, che chiude il circuito."""
+        coordinator = self._coordinator()
+        coordinator.breaker.state = BREAKER_HALF_OPEN
+        coordinator._update_interval = timedelta(seconds=120)
+
+        with (
+            patch(
+                "custom_components.vmc_helty_flow.coordinator.async_probe_device",
+                new=AsyncMock(),
+            ) as mock_probe,
+            patch(
+                "custom_components.vmc_helty_flow.coordinator.tcp_send_commands",
+                new=AsyncMock(
+                    side_effect=lambda _ip, _port, cmds, **_kw: ["VMGO,1"] * len(cmds)
+                ),
+            ),
+        ):
+            data = await coordinator._async_update_data()
+
+        mock_probe.assert_awaited_once_with("192.168.1.100", 5001)
+        assert data["status"] == "VMGO,1"
+        assert coordinator.breaker.state == BREAKER_CLOSED
+        assert coordinator.update_interval == coordinator._normal_update_interval
+
+
+class TestCoordinatorStaleData:
+    """Test per i dati serviti dopo un poll fallito."""
+
+    STATUS = "VMGO,1,00010,25,00000,100"
+
+    def _coordinator(self, options=None, age=10.0):
+        coordinator = TestCoordinatorCircuitBreaker._coordinator(self)
+        coordinator.options = options or {}
+        coordinator.data = {
+            "status": self.STATUS,
+            "available": True,
+            "stale": False,
+            "last_update": time.time() - age,
+        }
+        return coordinator
+
+    async def _fail(self, coordinator):
+        """Esegue un poll in cui tutte le interrogazioni vanno in timeout."""
+        timeout = VMCTimeoutError("timeout")
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.tcp_send_commands",
+            new=AsyncMock(
+                side_effect=lambda _ip, _port, cmds, **_kw: [timeout] * len(cmds)
+            ),
+        ):
+            return await coordinator._async_update_data()
+
+    @pytest.mark.asyncio
+    async def test_single_timeout_serves_last_data_and_retries_fast(self):
+        """Un timeout isolato mantiene i dati e anticipa il nuovo tentativo."""
+        coordinator = self._coordinator()
+
+        data = await self._fail(coordinator)
+
+        assert data["status"] == self.STATUS
+        assert data["available"] is False
+        assert data["stale"] is True
+        assert 10 <= data["data_age"] <= 11
+        assert coordinator.update_interval == timedelta(seconds=5)
+
+        coordinator.data = data
+        await self._fail(coordinator)
+        assert coordinator.update_interval == coordinator._normal_update_interval
+
+    @pytest.mark.asyncio
+    async def test_unavailable_once_breaker_opens(self):
+        """Con il circuit breaker aperto le entità diventano non disponibili."""
+        coordinator = self._coordinator()
+        for _ in range(coordinator.breaker.failure_threshold - 1):
+            coordinator.data = await self._fail(coordinator)
+
+        with pytest.raises(UpdateFailed):
+            await self._fail(coordinator)
+        assert coordinator.breaker.state == BREAKER_OPEN
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("options", "age"),
+        [({}, 301.0), ({"stale_grace_period": 0}, 1.0)],
+    )
+    async def test_unavailable_after_grace_period(self, options, age):
+        """Dati più vecchi della tolleranza, o tolleranza 0: poll fallito."""
+        coordinator = self._coordinator(options, age)
+
+        with pytest.raises(UpdateFailed):
+            await self._fail(coordinator)
+
+    @pytest.mark.asyncio
+    async def test_read_back_clears_stale_flags(self):
+        """Una rilettura riuscita dello stato rende di nuovo disponibili i dati."""
+        coordinator = self._coordinator()
+        coordinator.data = await self._fail(coordinator)
+        coordinator.async_update_listeners = Mock()
+
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.tcp_send_command",
+            new=AsyncMock(return_value="VMGO,2,00010,25,00000,100"),
+        ):
+            await coordinator._async_verify_status()
+
+        assert coordinator.data["status"] == "VMGO,2,00010,25,00000,100"
+        assert coordinator.data["available"] is True
+        assert coordinator.data["stale"] is False
+        assert "data_age" not in coordinator.data
+
+
+class TestCoordinatorOptimisticWrites:
+    """Test per l'aggiornamento ottimistico dopo una scrittura."""
+
+    STATUS = "VMGO,1,00010,25,00000,100"
+
+    def _coordinator(self):
+        hass = Mock(spec=HomeAssistant)
+        config_entry = Mock(spec=ConfigEntry)
+        config_entry.data = {"ip": "192.168.1.100", "name": "Test VMC"}
+        config_entry.options = {}
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.DataUpdateCoordinator.__init__",
+            return_value=None,
+        ):
+            coordinator = VmcHeltyCoordinator(hass, config_entry)
+        coordinator.hass = hass
+        coordinator.data = {"status": self.STATUS, "last_update": 100.0}
+        coordinator.async_update_listeners = Mock()
+        coordinator.async_request_refresh = AsyncMock()
+        coordinator._verify_debouncer = Mock()
+        return coordinator
+
+    def test_apply_write_updates_status_without_polling(self):
+        """Il valore scritto compare subito nello stato e si pianifica la verifica."""
+        coordinator = self._coordinator()
+
+        coordinator.async_apply_write("VMWH0000003")
+
+        assert coordinator.data["status"] == "VMGO,3,00010,25,00000,100"
+        assert coordinator.data["last_update"] == 100.0
+        coordinator.async_update_listeners.assert_called_once()
+        coordinator._verify_debouncer.async_schedule_call.assert_called_once()
+        coordinator.async_request_refresh.assert_not_called()
+
+    def test_apply_write_of_unmapped_register_only_verifies(self):
+        """Un registro non presente in VMGO viene solo riletto."""
+        coordinator = self._coordinator()
+
+        coordinator.async_apply_write("VMWH0417744")
+
+        assert coordinator.data["status"] == self.STATUS
+        coordinator.async_update_listeners.assert_not_called()
+        coordinator._verify_debouncer.async_schedule_call.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_verify_reconciles_status(self):
+        """La rilettura sostituisce lo stato ottimistico con quello reale."""
+        coordinator = self._coordinator()
+        coordinator.async_apply_write("VMWH0000003")
+
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.tcp_send_command",
+            new=AsyncMock(return_value="VMGO,2,00010,25,00000,90"),
+        ) as mock_tcp:
+            await coordinator._async_verify_status()
+
+        mock_tcp.assert_awaited_once_with("192.168.1.100", 5001, "VMGH?")
+        assert coordinator.data["status"] == "VMGO,2,00010,25,00000,90"
+        assert coordinator.data["filter_hours"] == 90
+        assert coordinator.data["last_update"] > 100.0
+        coordinator.async_request_refresh.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_verify_failure_falls_back_to_refresh(self):
+        """Se la rilettura fallisce si richiede un aggiornamento completo."""
+        coordinator = self._coordinator()
+
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.tcp_send_command",
+            new=AsyncMock(side_effect=VMCConnectionError("down")),
+        ):
+            await coordinator._async_verify_status()
+
+        coordinator.async_request_refresh.assert_awaited_once()
+        assert coordinator.data["status"] == self.STATUS
+
+
+class TestCoordinatorWriteAndVerify:
+    """Test per la scrittura seguita dalla rilettura dello stato."""
+
+    STATUS = TestCoordinatorOptimisticWrites.STATUS
+    _coordinator = TestCoordinatorOptimisticWrites._coordinator
+
+    async def _write(self, coordinator, results):
+        """Esegue async_write con le risposte indicate per la sessione."""
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.tcp_send_commands",
+            new=AsyncMock(return_value=results),
+        ) as mock_send:
+            response = await coordinator.async_write("VMWH0000003")
+        return response, mock_send
+
+    @pytest.mark.asyncio
+    async def test_write_reads_back_status_in_same_session(self):
+        """Scrittura e VMGH? in una sessione: cambia solo lo stato."""
+        coordinator = self._coordinator()
+        coordinator.data["sensors"] = "VMGI,215"
+
+        response, mock_send = await self._write(
+            coordinator, ["OK", "VMGO,3,00010,25,00000,95"]
+        )
+
+        assert response == "OK"
+        mock_send.assert_awaited_once_with(
+            "192.168.1.100", 5001, ["VMWH0000003", "VMGH?"], return_exceptions=True
+        )
+        assert coordinator.data["status"] == "VMGO,3,00010,25,00000,95"
+        assert coordinator.data["filter_hours"] == 95
+        assert coordinator.data["sensors"] == "VMGI,215"
+        assert coordinator.poll_plan.age("VMGH?", time.time()) < 5
+        coordinator.async_update_listeners.assert_called_once()
+        coordinator._verify_debouncer.async_schedule_call.assert_not_called()
+        coordinator.async_request_refresh.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failed_read_back_falls_back_to_optimistic_update(self):
+        """Se la rilettura fallisce si applica il valore scritto e si verifica dopo."""
+        coordinator = self._coordinator()
+
+        await self._write(coordinator, ["OK", VMCTimeoutError("timeout")])
+
+        assert coordinator.data["status"] == "VMGO,3,00010,25,00000,100"
+        coordinator._verify_debouncer.async_schedule_call.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_rejected_or_failed_write(self):
+        """Una scrittura rifiutata non cambia i dati, un errore viene sollevato."""
+        coordinator = self._coordinator()
+
+        response, _ = await self._write(coordinator, ["ERROR", "VMGO,1"])
+        assert response == "ERROR"
+        assert coordinator.data["status"] == self.STATUS
+
+        with pytest.raises(VMCConnectionError):
+            await self._write(coordinator, [VMCConnectionError("down")] * 2)
+        coordinator.async_update_listeners.assert_not_called()
+
+
+PROFILE = {
+    "fan_speed": 3,
+    "panel_led": True,
+    "sensors": False,
+    "light_level": 75,
+    "light_timer": 0,
+}
+
+
+class TestCoordinatorRedundantWrites:
+    """Test per il filtro delle scritture ridondanti dopo la rilettura."""
+
+    STATUS = TestCoordinatorOptimisticWrites.STATUS
+
+    @pytest.mark.asyncio
+    async def test_repeated_write_skipped_after_read_back(self):
+        """Lo stato riletto dopo la scrittura rende ridondante la ripetizione."""
+        coordinator = TestCoordinatorOptimisticWrites._coordinator(self)
+        coordinator.data = {
+            "status": "VMGO,1,00000,25,00000,100",
+            "last_update": time.time() - 10,
+        }
+        coalescer = WriteCoalescer()
+        command = "VMWH0100010"
+
+        with (
+            patch(
+                "custom_components.vmc_helty_flow.helpers.get_write_coalescer",
+                return_value=coalescer,
+            ),
+            patch(
+                "custom_components.vmc_helty_flow.coordinator.tcp_send_commands",
+                new=AsyncMock(return_value=["OK", "VMGO,1,00010,25,00000,100"]),
+            ) as mock_send,
+        ):
+            for _ in range(2):
+                result = await async_write_setting(
+                    coordinator.ip,
+                    command,
+                    lambda: coordinator.async_write(command),
+                    coordinator.data,
+                )
+
+        assert result is None
+        mock_send.assert_awaited_once()
+        assert coalescer.skipped == 1
+
+
+class TestCoordinatorApplyProfile:
+    """Test per l'applicazione di un profilo in un'unica sessione."""
+
+    STATUS = "VMGO,3,00010,25,00000,24,0,0,0,0,0,050,0,0,0,0"
+
+    def _coordinator(self):
+        coordinator = TestCoordinatorOptimisticWrites._coordinator(self)
+        coordinator.data = {"status": self.STATUS, "last_update": time.time()}
+        return coordinator
+
+    async def _apply(self, coordinator, results, **kwargs):
+        """Applica PROFILE con le risposte indicate per la sessione."""
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.tcp_send_commands",
+            new=AsyncMock(return_value=results),
+        ) as mock_send:
+            commands = await coordinator.async_apply_profile(PROFILE, **kwargs)
+        return commands, mock_send
+
+    @pytest.mark.asyncio
+    async def test_sends_only_changed_settings_in_one_session(self):
+        """Solo le impostazioni diverse, una sola sessione e una sola rilettura."""
+        coordinator = self._coordinator()
+        status = "VMGO,3,00010,25,00002,24,0,0,0,0,0,075,0,0,0,0"
+
+        commands, mock_send = await self._apply(coordinator, ["OK", "OK", "OK", status])
+
+        assert commands == ["VMWH0300002", "VMWH06075000", "VMWH1400000"]
+        mock_send.assert_awaited_once_with(
+            "192.168.1.100", 5001, [*commands, "VMGH?"], return_exceptions=True
+        )
+        assert coordinator.data["status"] == status
+        coordinator.async_update_listeners.assert_called_once()
+        coordinator._verify_debouncer.async_schedule_call.assert_not_called()
+        coordinator.async_request_refresh.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_force_and_already_applied(self):
+        """Con force si inviano tutte le scritture; senza, nulla se già applicato."""
+        coordinator = self._coordinator()
+        commands, _ = await self._apply(coordinator, ["OK"] * 6, force=True)
+        assert len(commands) == 5
+
+        coordinator.data["status"] = "VMGO,3,00010,25,00002,24,0,0,0,0,0,075,0,0,0,0"
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.tcp_send_commands",
+            new=AsyncMock(),
+        ) as mock_send:
+            profile = {**PROFILE, "light_timer": None}
+            assert await coordinator.async_apply_profile(profile) == []
+        mock_send.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_rejected_command_raises(self):
+        """Le scritture confermate restano applicate, quelle rifiutate sollevano."""
+        coordinator = self._coordinator()
+
+        with pytest.raises(HomeAssistantError, match="VMWH06075000"):
+            await self._apply(
+                coordinator, ["OK", "ERROR", "OK", VMCTimeoutError("timeout")]
+            )
+
+        assert coordinator.data["status"].split(",")[4] == "00002"
+        coordinator._verify_debouncer.async_schedule_call.assert_called()
+
+
+class TestCoordinatorChangeDetection:
+    """Test per il rilevamento degli ingressi cambiati tra due notifiche."""
+
+    STATUS = "VMGO,1,00010,25,00000,100,0,0,0,0,0,050,0,0,0,00120"
+    SENSORS = "VMGI,215,180,456,850,0,0,0,0,0,0,120,0,0,0"
+
+    def _coordinator(self):
+        hass = Mock(spec=HomeAssistant)
+        config_entry = Mock(spec=ConfigEntry)
+        config_entry.data = {"ip": "192.168.1.100", "name": "Test VMC"}
+        config_entry.options = {}
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.DataUpdateCoordinator.__init__",
+            return_value=None,
+        ):
+            coordinator = VmcHeltyCoordinator(hass, config_entry)
+        coordinator._listeners = {}
+        coordinator.last_update_success = True
+        coordinator.data = {
+            "status": self.STATUS,
+            "sensors": self.SENSORS,
+            "name": "VMNM,Test",
+            "last_update": 100.0,
+        }
+        return coordinator
+
+    def test_first_notification_updates_everything(self):
+        """Alla prima notifica tutte le entità vengono aggiornate."""
+        coordinator = self._coordinator()
+
+        coordinator.async_update_listeners()
+
+        assert coordinator.changed_inputs is None
+
+    def test_only_changed_fields_are_reported(self):
+        """Vengono riportati solo i campi di stato e sensori cambiati."""
+        coordinator = self._coordinator()
+        coordinator.async_update_listeners()
+
+        coordinator.data = {
+            **coordinator.data,
+            "status": self.STATUS.replace("VMGO,1", "VMGO,3"),
+            "sensors": self.SENSORS.replace(",456,", ",470,"),
+            "last_update": 280.0,
+        }
+        coordinator.async_update_listeners()
+
+        assert coordinator.changed_inputs == frozenset(
+            {"fan_speed", "humidity", "last_update"}
+        )
+
+    def test_unchanged_data(self):
+        """Dati identici non cambiano alcun ingresso."""
+        coordinator = self._coordinator()
+        coordinator.async_update_listeners()
+
+        coordinator.async_update_listeners()
+
+        assert coordinator.changed_inputs == frozenset()
+
+    def test_availability_change_updates_everything(self):
+        """Un cambio di disponibilità aggiorna tutte le entità."""
+        coordinator = self._coordinator()
+        coordinator.async_update_listeners()
+
+        coordinator.last_update_success = False
+        coordinator.async_update_listeners()
+
+        assert coordinator.changed_inputs is None
+
+    def test_deadbands_from_options(self):
+        """Le deadband configurate sostituiscono quelle predefinite."""
+        coordinator = self._coordinator()
+        coordinator.config_entry.options = {"deadband_co2": 50}
+
+        deadbands = coordinator.deadbands
+
+        assert deadbands["deadband_co2"] == 50.0
+        assert deadbands["deadband_temperature"] == 0.2
+
+
+class TestCoordinatorHotOptions:
+    """Test per le opzioni applicate senza reload della config entry."""
+
+    _coordinator = TestCoordinatorChangeDetection._coordinator
+    STATUS = TestCoordinatorChangeDetection.STATUS
+    SENSORS = TestCoordinatorChangeDetection.SENSORS
+
+    def test_room_volume_updates_only_dependent_inputs(self):
+        """Un nuovo volume ricalcola le metriche e notifica solo quell'ingresso."""
+        coordinator = self._coordinator()
+        coordinator.async_update_listeners()
+        exchange_time = coordinator.metrics.air_exchange_time
+
+        coordinator.config_entry.options = {"room_volume": 120.0}
+        coordinator.async_apply_options()
+
+        assert coordinator.changed_inputs == frozenset({"room_volume"})
+        assert coordinator.metrics.air_exchange_time != exchange_time
+
+    def test_poll_options_rebuild_plan(self):
+        """Nuovi intervalli ricostruiscono il piano senza perdere le letture."""
+        coordinator = self._coordinator()
+        coordinator._unsub_refresh = Mock()
+        for command in coordinator.poll_plan.commands:
+            coordinator.poll_plan.record(command, 1000.0, self.SENSORS)
+        old_plan = coordinator.poll_plan
+
+        coordinator.config_entry.options = {
+            "scan_interval": 60,
+            "adaptive_polling": False,
+        }
+        with (
+            patch.object(coordinator, "_schedule_refresh") as mock_schedule,
+            patch(
+                "custom_components.vmc_helty_flow.coordinator.time.time",
+                return_value=1030.0,
+            ),
+        ):
+            coordinator.async_apply_options()
+
+        assert coordinator.poll_plan is not old_plan
+        assert coordinator.poll_plan.age("VMGH?", 1030.0) == 30.0
+        assert coordinator.update_interval == timedelta(seconds=30)
+        assert coordinator._normal_update_interval == timedelta(seconds=60)
+        mock_schedule.assert_called_once_with()
@@ -1,6 +1,6 @@
 """Test device actions for VMC Helty Flow."""
 
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from homeassistant.core import HomeAssistant
@@ -89,6 +89,38 @@ class TestAsyncSetupDeviceActions:
         assert callable(call_args[0][2])  # Handler function
         assert call_args[1]["schema"] == DEVICE_ACTION_SCHEMA
 
+    async def test_name_action_invalidates_coordinator(self, mock_hass):
+        """Dopo set_device_name il coordinatore rilegge subito il nome."""
+        coordinator = MagicMock()
+        coordinator.async_invalidate = AsyncMock()
+        mock_hass.data = {DOMAIN: {"entry_1": coordinator}}
+        device = MagicMock(
+            identifiers={(DOMAIN, "192.168.1.100")}, config_entries={"entry_1"}
+        )
+        await async_setup_device_actions(mock_hass)
+        handler = mock_hass.services.async_register.call_args[0][2]
+        call = MagicMock(
+            data={
+                "device_id": "dev",
+                "action": "set_device_name",
+                "parameters": {"name": "Sala"},
+            }
+        )
+
+        with (
+            patch(
+                "custom_components.vmc_helty_flow.device_action.dr.async_get"
+            ) as mock_registry,
+            patch(
+                "custom_components.vmc_helty_flow.device_action.tcp_send_command",
+                return_value="OK",
+            ),
+        ):
+            mock_registry.return_value.async_get.return_value = device
+            await handler(call)
+
+        coordinator.async_invalidate.assert_awaited_once_with("VMNM?")
+
 
 class TestExecuteDeviceAction:
     """Test _execute_device_action function."""
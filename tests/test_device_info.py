@@ -183,3 +183,77 @@ class TestVmcHeltyEntity:
         assert entity.coordinator is coordinator
         assert entity.coordinator.ip == "192.168.1.100"
         assert entity.coordinator.name == "Test VMC"
+
+
+class TestStateWriteFiltering:
+    """Test per la scrittura dello stato solo al cambio degli ingressi."""
+
+    class _Entity(VmcHeltyEntity):
+        _coordinator_inputs = frozenset({"temperature_internal"})
+        _deadband_option = "deadband_temperature"
+        native_value: float | None = 21.5
+
+    def _entity(self, changed, deadband=0.2):
+        coordinator = Mock()
+        coordinator.changed_inputs = changed
+        coordinator.deadbands = {"deadband_temperature": deadband}
+        coordinator.state_writes = {"written": 0, "unchanged": 0, "deadband": 0}
+        entity = self._Entity(coordinator)
+        entity.async_write_ha_state = Mock()
+        return entity
+
+    def test_first_update_writes(self):
+        """Senza informazioni sui cambiamenti lo stato viene scritto."""
+        entity = self._entity(None)
+
+        entity._handle_coordinator_update()
+
+        entity.async_write_ha_state.assert_called_once()
+        assert entity.coordinator.state_writes["written"] == 1
+
+    def test_unrelated_change_is_skipped(self):
+        """Un cambiamento di altri ingressi non scrive lo stato."""
+        entity = self._entity(frozenset({"fan_speed"}))
+
+        entity._handle_coordinator_update()
+
+        entity.async_write_ha_state.assert_not_called()
+        assert entity.coordinator.state_writes["unchanged"] == 1
+
+    def test_change_within_deadband_is_skipped(self):
+        """Una variazione inferiore alla deadband non scrive lo stato."""
+        entity = self._entity(None)
+        entity._handle_coordinator_update()
+        entity.coordinator.changed_inputs = frozenset({"temperature_internal"})
+
+        entity.native_value = 21.6
+        entity._handle_coordinator_update()
+        assert entity.async_write_ha_state.call_count == 1
+        assert entity.coordinator.state_writes["deadband"] == 1
+
+        # La variazione si misura dall'ultimo valore scritto
+        entity.native_value = 21.7
+        entity._handle_coordinator_update()
+        assert entity.async_write_ha_state.call_count == 2
+
+    def test_zero_deadband_writes_every_change(self):
+        """Con deadband 0 ogni variazione scrive lo stato."""
+        entity = self._entity(None, deadband=0)
+        entity._handle_coordinator_update()
+        entity.coordinator.changed_inputs = frozenset({"temperature_internal"})
+
+        entity.native_value = 21.6
+        entity._handle_coordinator_update()
+
+        assert entity.async_write_ha_state.call_count == 2
+
+    def test_value_becoming_unknown_is_written(self):
+        """Il passaggio a valore sconosciuto viene sempre scritto."""
+        entity = self._entity(None)
+        entity._handle_coordinator_update()
+        entity.coordinator.changed_inputs = frozenset({"temperature_internal"})
+
+        entity.native_value = None
+        entity._handle_coordinator_update()
+
+        assert entity.async_write_ha_state.call_count == 2
@@ -9,10 +9,12 @@ from custom_components.vmc_helty_flow.const import DOMAIN
 from custom_components.vmc_helty_flow.device_registry import (
     _extract_unique_id_from_network_info,
     _get_device_name_based_id,
+    async_get_device_identity,
     async_get_device_info,
     async_get_device_unique_id,
     async_get_or_create_device,
     async_remove_orphaned_devices,
+    cached_device_identity,
 )
 
 
@@ -26,6 +28,7 @@ class TestAsyncGetOrCreateDevice:
         self.coordinator.ip = "192.168.1.100"
         self.coordinator.name = "Test Device"
         self.coordinator.config_entry.entry_id = "test_entry_id"
+        self.coordinator.config_entry.data = {"ip": "192.168.1.100"}
 
     @pytest.mark.asyncio
     async def test_create_new_device(self):
@@ -111,6 +114,139 @@ class TestAsyncGetOrCreateDevice:
             assert (DOMAIN, "helty_flow_192_168_1_100") in identifiers
 
 
+_REGISTRY = "custom_components.vmc_helty_flow.device_registry"
+
+
+class TestDeviceIdentityCache:
+    """Test per l'identità del dispositivo salvata nella config entry."""
+
+    def setup_method(self):
+        """Setup per ogni test."""
+        self.hass = Mock(spec=HomeAssistant)
+        self.coordinator = Mock()
+        self.coordinator.ip = "192.168.1.100"
+        self.coordinator.name = "Test Device"
+        self.entry = self.coordinator.config_entry
+        self.entry.entry_id = "test_entry_id"
+        self.entry.data = {"ip": "192.168.1.100"}
+        self.registry = Mock()
+
+    async def _identity(self, unique_id="a1b2c3d4e5f6", name="VMC Sala"):
+        """Legge un'identità con le risposte del dispositivo simulate."""
+        with (
+            patch(f"{_REGISTRY}.async_get_device_unique_id", return_value=unique_id),
+            patch(
+                f"{_REGISTRY}.async_get_device_info",
+                return_value={"name": name, "model": "Flow", "sw_version": "2.1.0"},
+            ),
+        ):
+            return await async_get_device_identity(self.hass, "192.168.1.100")
+
+    async def _get_or_create(self, identity):
+        """Chiama async_get_or_create_device restituendo il mock di lettura."""
+        with (
+            patch(f"{_REGISTRY}.device_registry.async_get", return_value=self.registry),
+            patch(
+                f"{_REGISTRY}.async_get_device_identity", return_value=identity
+            ) as mock_fetch,
+        ):
+            await async_get_or_create_device(self.hass, self.coordinator)
+        return mock_fetch
+
+    @pytest.mark.asyncio
+    async def test_missing_identity_is_read_and_stored(self):
+        """Senza identità salvata il dispositivo viene interrogato una volta."""
+        identity = await self._identity()
+        mock_fetch = await self._get_or_create(identity)
+
+        mock_fetch.assert_awaited_once()
+        stored = self.hass.config_entries.async_update_entry.call_args[1]["data"]
+        assert stored["device_identity"] == identity
+        assert stored["ip"] == "192.168.1.100"
+        kwargs = self.registry.async_get_or_create.call_args[1]
+        assert ("mac", "a1:b2:c3:d4:e5:f6") in kwargs["connections"]
+        assert kwargs["sw_version"] == "2.1.0"
+
+    @pytest.mark.asyncio
+    async def test_cached_identity_skips_network(self):
+        """Con un'identità valida e recente non parte nessuna richiesta."""
+        identity = await self._identity()
+        self.entry.data = {"ip": "192.168.1.100", "device_identity": identity}
+
+        mock_fetch = await self._get_or_create(identity)
+
+        mock_fetch.assert_not_called()
+        self.entry.async_create_background_task.assert_not_called()
+        kwargs = self.registry.async_get_or_create.call_args[1]
+        assert (DOMAIN, "a1b2c3d4e5f6") in kwargs["identifiers"]
+        assert kwargs["name"] == "VMC Sala"
+
+    @pytest.mark.asyncio
+    async def test_tampered_identity_is_read_again(self):
+        """Un'identità che non corrisponde all'impronta viene ignorata."""
+        identity = await self._identity()
+        cached = {**identity, "unique_id": "other"}
+        self.entry.data = {"ip": "192.168.1.100", "device_identity": cached}
+
+        assert cached_device_identity(self.entry.data, "192.168.1.100") is None
+        assert cached_device_identity({"device_identity": identity}, "10.0.0.1") is None
+        mock_fetch = await self._get_or_create(identity)
+        mock_fetch.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_unreachable_device_identity_not_stored(self):
+        """L'identità di ripiego di un dispositivo muto non viene salvata."""
+        identity = await self._identity(unique_id=None, name=None)
+        await self._get_or_create(identity)
+
+        assert identity["unique_id"] == "helty_flow_192_168_1_100"
+        self.hass.config_entries.async_update_entry.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_old_identity_revalidated_in_background(self):
+        """Un'identità vecchia viene usata subito e riverificata in background."""
+        identity = await self._identity()
+        identity["checked_at"] -= 8 * 86400
+        self.entry.data = {"ip": "192.168.1.100", "device_identity": identity}
+
+        mock_fetch = await self._get_or_create(identity)
+        mock_fetch.assert_not_called()
+        self.registry.async_get_or_create.assert_called_once()
+
+        # Dispositivo invariato: si aggiorna solo la data della verifica
+        coro = self.entry.async_create_background_task.call_args[0][1]
+        with patch(
+            f"{_REGISTRY}.device_registry.async_get", return_value=self.registry
+        ):
+            fresh = await self._identity()
+            with patch(f"{_REGISTRY}.async_get_device_identity", return_value=fresh):
+                await coro
+
+        self.registry.async_get_or_create.assert_called_once()
+        stored = self.hass.config_entries.async_update_entry.call_args[1]["data"]
+        assert stored["device_identity"]["checked_at"] == fresh["checked_at"]
+
+    @pytest.mark.asyncio
+    async def test_changed_identity_updates_registry(self):
+        """Se la riverifica trova un'identità diversa il registry si aggiorna."""
+        identity = await self._identity()
+        identity["checked_at"] -= 8 * 86400
+        self.entry.data = {"ip": "192.168.1.100", "device_identity": identity}
+        await self._get_or_create(identity)
+
+        coro = self.entry.async_create_background_task.call_args[0][1]
+        renamed = await self._identity(name="VMC Cucina")
+        with (
+            patch(f"{_REGISTRY}.device_registry.async_get", return_value=self.registry),
+            patch(f"{_REGISTRY}.async_get_device_identity", return_value=renamed),
+        ):
+            await coro
+
+        assert self.registry.async_get_or_create.call_args[1]["name"] == "VMC Cucina"
+        stored = self.hass.config_entries.async_update_entry.call_args[1]["data"]
+        assert stored["device_identity"] == renamed
+
+
 class TestAsyncRemoveOrphanedDevices:
     """Test class per async_remove_orphaned_devices."""
 
@@ -10,6 +10,9 @@ from custom_components.vmc_helty_flow.diagnostics import (
     async_get_config_entry_diagnostics,
     async_get_device_diagnostics,
 )
+from custom_components.vmc_helty_flow.helpers import VmcConnection
+from custom_components.vmc_helty_flow.poll_plan import build_poll_plan
+from custom_components.vmc_helty_flow.resilience import CircuitBreaker
 
 
 @pytest.fixture
@@ -250,6 +253,50 @@ class TestDiagnostics:
         assert result["device_info"]["model"] == "Unknown"
         assert result["device_info"]["manufacturer"] == "Helty"
 
+    @pytest.mark.asyncio
+    async def test_async_get_config_entry_diagnostics_connection_stats(
+        self, mock_hass, mock_config_entry, mock_coordinator
+    ):
+        """Test diagnostics include connection and scheduler statistics."""
+        mock_coordinator.connection = VmcConnection("192.168.1.100", 5001)
+
+        result = await async_get_config_entry_diagnostics(mock_hass, mock_config_entry)
+
+        assert result["connection"]["connected"] is False
+        assert result["connection"]["connect_count"] == 0
+        scheduler = result["connection"]["scheduler"]
+        assert scheduler["queue_depth"] == 0
+        assert set(scheduler["lanes"]) == {"user", "poll"}
+
+    @pytest.mark.asyncio
+    async def test_async_get_config_entry_diagnostics_circuit_breaker(
+        self, mock_hass, mock_config_entry, mock_coordinator
+    ):
+        """Test diagnostics include the circuit breaker state."""
+        mock_coordinator.breaker = CircuitBreaker(failure_threshold=1)
+        mock_coordinator.breaker.record_failure()
+
+        result = await async_get_config_entry_diagnostics(mock_hass, mock_config_entry)
+
+        assert result["circuit_breaker"]["state"] == "open"
+        assert result["circuit_breaker"]["total_trips"] == 1
+        assert result["circuit_breaker"]["retry_in_s"] > 0
+
+    @pytest.mark.asyncio
+    async def test_async_get_config_entry_diagnostics_poll_plan(
+        self, mock_hass, mock_config_entry, mock_coordinator
+    ):
+        """Test diagnostics include the poll plan and the data age."""
+        mock_coordinator.poll_plan = build_poll_plan({"scan_interval": 60})
+
+        result = await async_get_config_entry_diagnostics(mock_hass, mock_config_entry)
+
+        queries = result["poll_plan"]["queries"]
+        assert list(queries) == ["VMGH?", "VMGI?", "VMNM?", "VMSL?"]
+        assert queries["VMGH?"]["rules"][0]["interval_s"] == 60
+        assert queries["VMGH?"]["age_s"] is None
+        assert result["poll_plan"]["next_poll_in_s"] == 10
+
     @pytest.mark.asyncio
     async def test_async_get_device_diagnostics(self, mock_hass, mock_config_entry):
         """Test device diagnostics returns same as config entry diagnostics."""
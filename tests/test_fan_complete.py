@@ -1,6 +1,6 @@
 """Test per il modulo fan con maggiore copertura."""
 
-from unittest.mock import AsyncMock, Mock, patch
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 from homeassistant.components.fan import FanEntity
@@ -18,6 +18,7 @@ class TestVmcHeltyFan:
         self.coordinator.name_slug = "vmc_helty_testvmc"
         self.coordinator.data = {}
         self.coordinator.async_request_refresh = AsyncMock()
+        self.coordinator.async_write = AsyncMock(return_value="OK")
 
     def test_init(self):
         """Test inizializzazione del fan."""
@@ -133,100 +134,82 @@ class TestVmcHeltyFan:
         """Test turn_on senza percentuale specificata."""
         fan = VmcHeltyFan(self.coordinator)
 
-        with patch("custom_components.vmc_helty_flow.fan.tcp_send_command") as mock_cmd:
-            mock_cmd.return_value = "OK"
-            await fan.async_turn_on()
+        await fan.async_turn_on()
 
-        mock_cmd.assert_called_once_with(self.coordinator.ip, 5001, "VMWH0000001")
+        self.coordinator.async_write.assert_awaited_once_with("VMWH0000001")
 
     @pytest.mark.asyncio
     async def test_async_turn_on_with_percentage_25(self):
         """Test turn_on con percentuale 25%."""
         fan = VmcHeltyFan(self.coordinator)
 
-        with patch("custom_components.vmc_helty_flow.fan.tcp_send_command") as mock_cmd:
-            mock_cmd.return_value = "OK"
-            await fan.async_turn_on(percentage=25)
+        await fan.async_turn_on(percentage=25)
 
-        mock_cmd.assert_called_once_with(self.coordinator.ip, 5001, "VMWH0000001")
+        self.coordinator.async_write.assert_awaited_once_with("VMWH0000001")
 
     @pytest.mark.asyncio
     async def test_async_turn_on_with_percentage_50(self):
         """Test turn_on con percentuale 50%."""
         fan = VmcHeltyFan(self.coordinator)
 
-        with patch("custom_components.vmc_helty_flow.fan.tcp_send_command") as mock_cmd:
-            mock_cmd.return_value = "OK"
-            await fan.async_turn_on(percentage=50)
+        await fan.async_turn_on(percentage=50)
 
-        mock_cmd.assert_called_once_with(self.coordinator.ip, 5001, "VMWH0000002")
+        self.coordinator.async_write.assert_awaited_once_with("VMWH0000002")
 
     @pytest.mark.asyncio
     async def test_async_turn_on_with_percentage_75(self):
         """Test turn_on con percentuale 75%."""
         fan = VmcHeltyFan(self.coordinator)
 
-        with patch("custom_components.vmc_helty_flow.fan.tcp_send_command") as mock_cmd:
-            mock_cmd.return_value = "OK"
-            await fan.async_turn_on(percentage=75)
+        await fan.async_turn_on(percentage=75)
 
-        mock_cmd.assert_called_once_with(self.coordinator.ip, 5001, "VMWH0000003")
+        self.coordinator.async_write.assert_awaited_once_with("VMWH0000003")
 
     @pytest.mark.asyncio
     async def test_async_turn_on_with_percentage_100(self):
         """Test turn_on con percentuale 100%."""
         fan = VmcHeltyFan(self.coordinator)
 
-        with patch("custom_components.vmc_helty_flow.fan.tcp_send_command") as mock_cmd:
-            mock_cmd.return_value = "OK"
-            await fan.async_turn_on(percentage=100)
+        await fan.async_turn_on(percentage=100)
 
-        mock_cmd.assert_called_once_with(self.coordinator.ip, 5001, "VMWH0000004")
+        self.coordinator.async_write.assert_awaited_once_with("VMWH0000004")
 
     @pytest.mark.asyncio
     async def test_async_turn_off(self):
         """Test turn_off."""
         fan = VmcHeltyFan(self.coordinator)
 
-        with patch("custom_components.vmc_helty_flow.fan.tcp_send_command") as mock_cmd:
-            mock_cmd.return_value = "OK"
-            await fan.async_turn_off()
+        await fan.async_turn_off()
 
-        mock_cmd.assert_called_once_with(self.coordinator.ip, 5001, "VMWH0000000")
+        self.coordinator.async_write.assert_awaited_once_with("VMWH0000000")
 
     @pytest.mark.asyncio
     async def test_async_set_percentage_0(self):
         """Test set_percentage con 0%."""
         fan = VmcHeltyFan(self.coordinator)
 
-        with patch("custom_components.vmc_helty_flow.fan.tcp_send_command") as mock_cmd:
-            mock_cmd.return_value = "OK"
-            await fan.async_set_percentage(0)
+        await fan.async_set_percentage(0)
 
-        mock_cmd.assert_called_once_with(self.coordinator.ip, 5001, "VMWH0000000")
+        self.coordinator.async_write.assert_awaited_once_with("VMWH0000000")
 
     @pytest.mark.asyncio
     async def test_async_set_percentage_25(self):
         """Test set_percentage con 25%."""
         fan = VmcHeltyFan(self.coordinator)
 
-        with patch("custom_components.vmc_helty_flow.fan.tcp_send_command") as mock_cmd:
-            mock_cmd.return_value = "OK"
-            await fan.async_set_percentage(25)
+        await fan.async_set_percentage(25)
 
-        mock_cmd.assert_called_once_with(self.coordinator.ip, 5001, "VMWH0000001")
+        self.coordinator.async_write.assert_awaited_once_with("VMWH0000001")
 
     @pytest.mark.asyncio
     async def test_async_set_percentage_intermediate(self):
         """Test set_percentage con valore intermedio (30% -> velocità 1)."""
         fan = VmcHeltyFan(self.coordinator)
 
-        with patch("custom_components.vmc_helty_flow.fan.tcp_send_command") as mock_cmd:
-            mock_cmd.return_value = "OK"
-            await fan.async_set_percentage(30)
+        await fan.async_set_percentage(30)
 
         # 30% dovrebbe essere mappato alla velocità 1 (max(1, min(4, round(30 / 25))))
-        mock_cmd.assert_called_once_with(self.coordinator.ip, 5001, "VMWH0000001")
+        self.coordinator.async_write.assert_awaited_once_with("VMWH0000001")
 
 
 class TestAsyncSetupEntry:
@@ -2,16 +2,23 @@
 
 import asyncio
 import socket
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
 from custom_components.vmc_helty_flow.helpers import (
+    VmcConnection,
     VMCConnectionError,
+    VmcFrameReader,
     VMCProtocolError,
     VMCResponseError,
     VMCTimeoutError,
+    async_close_device_connection,
+    async_probe_device,
+    get_device_connection,
     tcp_send_command,
+    tcp_send_commands,
+    validate_network_connectivity,
 )
 
 
@@ -155,7 +162,7 @@ class TestTcpSendCommand:
         mock_reader = AsyncMock()
         mock_writer = AsyncMock()
         # Bytes che causano UnicodeDecodeError con UTF-8
-        mock_reader.read.return_value = b"\xff\xfe\x41\x00"  # UTF-16 BOM + 'A'
+        mock_reader.read.return_value = b"\xff\xfe\x41\x00\r\n"  # UTF-16 BOM + 'A'
 
         with patch("asyncio.open_connection", return_value=(mock_reader, mock_writer)):
             result = await tcp_send_command("192.168.1.100", 5001, "TEST")
@@ -222,3 +229,504 @@ class TestTcpSendCommand:
                 await tcp_send_command("192.168.1.100", 5001, "TEST")
 
         mock_writer.close.assert_called_once()
+
+
+class TestVmcFrameReader:
+    """Test per il decodificatore dei frame di risposta."""
+
+    @pytest.mark.asyncio
+    async def test_frame_split_across_reads(self):
+        """Una risposta arrivata in più segmenti viene ricomposta."""
+        reader = Mock()
+        reader.read = AsyncMock(side_effect=[b"VMGO,01,", b"02,03", b"\r\n"])
+        frames = VmcFrameReader(reader)
+
+        assert await frames.async_read_frame() == b"VMGO,01,02,03"
+        assert frames.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_multiple_frames_in_one_read(self):
+        """Due risposte nello stesso segmento vengono separate."""
+        reader = Mock()
+        reader.read = AsyncMock(side_effect=[b"VMGO,1\n\rVMGI,2\n\r", b""])
+        reader.at_eof = Mock(return_value=True)
+        frames = VmcFrameReader(reader)
+
+        assert await frames.async_read_frame() == b"VMGO,1"
+        assert await frames.async_read_frame() == b"VMGI,2"
+        assert await frames.async_read_frame() == b""
+        assert frames.at_eof()
+        assert reader.read.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_oversized_frame(self):
+        """Una risposta oltre la dimensione massima è un errore di protocollo."""
+        reader = Mock()
+        reader.read = AsyncMock(return_value=b"X" * 16)
+        frames = VmcFrameReader(reader, max_frame_size=32)
+
+        with pytest.raises(VMCProtocolError, match="dimensione massima"):
+            await frames.async_read_frame()
+        assert frames.broken
+        assert frames.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_truncated_frame(self):
+        """Una connessione chiusa a metà risposta è un errore di protocollo."""
+        reader = Mock()
+        reader.read = AsyncMock(side_effect=[b"VMGO,1,2", b""])
+        frames = VmcFrameReader(reader)
+
+        with pytest.raises(VMCProtocolError, match="fine della risposta"):
+            await frames.async_read_frame()
+        assert frames.broken
+
+
+def _mock_stream(responses):
+    """Crea reader e writer finti per una connessione persistente."""
+    reader = Mock()
+    reader.read = AsyncMock(side_effect=responses)
+    reader.at_eof = Mock(return_value=False)
+    writer = Mock()
+    writer.drain = AsyncMock()
+    writer.wait_closed = AsyncMock()
+    writer.is_closing = Mock(return_value=False)
+    return reader, writer
+
+
+class TestVmcConnection:
+    """Test per la connessione persistente VmcConnection."""
+
+    @pytest.mark.asyncio
+    async def test_connection_is_reused(self):
+        """Più comandi condividono lo stesso socket."""
+        reader, writer = _mock_stream([b"VMGO,1\r\n", b"OK\r\n"])
+        connection = VmcConnection("192.168.1.100", 5001)
+
+        with patch(
+            "asyncio.open_connection", return_value=(reader, writer)
+        ) as mock_open:
+            assert await connection.async_send_command("VMGH?") == "VMGO,1"
+            assert await connection.async_send_command("VMWH0000001") == "OK"
+
+        mock_open.assert_called_once()
+        writer.close.assert_not_called()
+        assert connection.connect_count == 1
+        assert connection.reuse_count == 1
+
+    @pytest.mark.asyncio
+    async def test_reconnects_when_device_closed_socket(self):
+        """Un socket chiuso dal dispositivo viene riaperto in modo trasparente."""
+        stale_reader, stale_writer = _mock_stream([b"OK\r\n", b""])
+        stale_reader.at_eof.return_value = True
+        fresh_reader, fresh_writer = _mock_stream([b"VMGO,2\r\n"])
+        connection = VmcConnection("192.168.1.100", 5001)
+
+        with patch(
+            "asyncio.open_connection",
+            side_effect=[(stale_reader, stale_writer), (fresh_reader, fresh_writer)],
+        ):
+            assert await connection.async_send_command("VMWH0000002") == "OK"
+            assert await connection.async_send_command("VMGH?") == "VMGO,2"
+
+        stale_writer.close.assert_called_once()
+        assert connection.connect_count == 2
+
+    @pytest.mark.asyncio
+    async def test_reconnects_after_idle_timeout(self):
+        """Un socket inattivo oltre il limite viene riaperto."""
+        first_reader, first_writer = _mock_stream([b"OK\r\n"])
+        second_reader, second_writer = _mock_stream([b"OK\r\n"])
+        connection = VmcConnection("192.168.1.100", 5001, idle_timeout=0)
+
+        with patch(
+            "asyncio.open_connection",
+            side_effect=[(first_reader, first_writer), (second_reader, second_writer)],
+        ):
+            await connection.async_send_command("VMWH0000001")
+            await connection.async_send_command("VMWH0000002")
+
+        first_writer.close.assert_called_once()
+        assert connection.connect_count == 2
+        assert connection.reuse_count == 0
+
+    @pytest.mark.asyncio
+    async def test_timeout_drops_socket(self):
+        """Dopo un timeout il socket viene chiuso e riaperto al comando successivo."""
+        reader, writer = _mock_stream([TimeoutError()])
+        connection = VmcConnection("192.168.1.100", 5001)
+
+        with (
+            patch("asyncio.open_connection", return_value=(reader, writer)),
+            pytest.raises(VMCTimeoutError),
+        ):
+            await connection.async_send_command("VMGH?")
+
+        writer.close.assert_called_once()
+        assert connection.connected is False
+
+    @pytest.mark.asyncio
+    async def test_tcp_send_command_uses_registered_connection(self):
+        """tcp_send_command usa la connessione persistente registrata."""
+        reader, writer = _mock_stream([b"OK\r\n", b"OK\r\n"])
+        connection = get_device_connection("192.168.1.201", 5001)
+        assert get_device_connection("192.168.1.201", 5001) is connection
+
+        try:
+            with patch(
+                "asyncio.open_connection", return_value=(reader, writer)
+            ) as mock_open:
+                await tcp_send_command("192.168.1.201", 5001, "VMWH0100010")
+                await tcp_send_command("192.168.1.201", 5001, "VMWH0100000")
+
+            mock_open.assert_called_once()
+            writer.write.assert_called_with(b"VMWH0100000\n\r")
+        finally:
+            await async_close_device_connection("192.168.1.201", 5001)
+
+        writer.close.assert_called_once()
+        assert get_device_connection("192.168.1.201", 5001) is not connection
+        await async_close_device_connection("192.168.1.201", 5001)
+
+
+class TestTcpSendCommands:
+    """Test per l'invio di più comandi in un'unica sessione."""
+
+    @pytest.mark.asyncio
+    async def test_batch_uses_single_session(self):
+        """I comandi del batch condividono connessione e slot dello scheduler."""
+        reader, writer = _mock_stream([b"VMGO,1\r\n", b"VMGI,2\r\n", b"VMNM,X\r\n"])
+
+        with patch(
+            "asyncio.open_connection", return_value=(reader, writer)
+        ) as mock_open:
+            responses = await tcp_send_commands(
+                "192.168.1.100", 5001, ["VMGH?", "VMGI?", "VMNM?"]
+            )
+
+        assert responses == ["VMGO,1", "VMGI,2", "VMNM,X"]
+        mock_open.assert_called_once()
+        assert [c.args[0] for c in writer.write.call_args_list] == [
+            b"VMGH?\n\r",
+            b"VMGI?\n\r",
+            b"VMNM?\n\r",
+        ]
+        # La connessione dedicata viene chiusa a fine sequenza
+        writer.close.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_batch_on_persistent_connection(self):
+        """Il batch occupa un solo slot con costo pari al numero di comandi."""
+        reader, writer = _mock_stream([b"VMGO,1\r\n", b"VMGI,2\r\n"])
+        connection = VmcConnection("192.168.1.100", 5001)
+
+        with patch("asyncio.open_connection", return_value=(reader, writer)):
+            responses = await connection.async_send_commands(["VMGH?", "VMGI?"])
+
+        assert responses == ["VMGO,1", "VMGI,2"]
+        writer.close.assert_not_called()
+        assert connection.scheduler.as_dict()["lanes"]["poll"]["commands"] == 2
+
+    @pytest.mark.asyncio
+    async def test_protocol_error_does_not_stop_batch(self):
+        """Un errore di protocollo viene restituito e la sequenza prosegue."""
+        reader, writer = _mock_stream([b"VMGO,1\r\n", b"ERROR\r\n", b"VMSL,x\r\n"])
+        connection = VmcConnection("192.168.1.100", 5001)
+
+        with patch("asyncio.open_connection", return_value=(reader, writer)):
+            responses = await connection.async_send_commands(
+                ["VMGH?", "VMNM?", "VMSL?"], return_exceptions=True
+            )
+
+        assert responses[0] == "VMGO,1"
+        assert isinstance(responses[1], VMCProtocolError)
+        assert responses[2] == "VMSL,x"
+
+    @pytest.mark.asyncio
+    async def test_connection_error_ends_batch(self):
+        """Un errore di connessione viene restituito per i comandi rimanenti."""
+        reader, writer = _mock_stream([b"VMGO,1\r\n", TimeoutError()])
+        connection = VmcConnection("192.168.1.100", 5001)
+
+        with patch("asyncio.open_connection", return_value=(reader, writer)):
+            responses = await connection.async_send_commands(
+                ["VMGH?", "VMGI?", "VMNM?"], return_exceptions=True
+            )
+
+        assert responses[0] == "VMGO,1"
+        assert isinstance(responses[1], VMCTimeoutError)
+        assert responses[2] is responses[1]
+        assert reader.read.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_batch_raises_without_return_exceptions(self):
+        """Senza return_exceptions il primo errore viene rilanciato."""
+        reader, writer = _mock_stream([TimeoutError()])
+
+        with (
+            patch("asyncio.open_connection", return_value=(reader, writer)),
+            pytest.raises(VMCTimeoutError),
+        ):
+            await tcp_send_commands("192.168.1.100", 5001, ["VMGH?", "VMGI?"])
+
+        writer.close.assert_called_once()
+
+
+class TestPersistentFraming:
+    """Test del framing sulla connessione persistente."""
+
+    @pytest.mark.asyncio
+    async def test_framing_error_drops_socket(self):
+        """Dopo un errore di framing il socket viene riaperto."""
+        bad_reader, bad_writer = _mock_stream([b"VMGO,1", b""])
+        good_reader, good_writer = _mock_stream([b"VMGO,2\r\n"])
+        connection = VmcConnection("192.168.1.100", 5001)
+
+        with patch(
+            "asyncio.open_connection",
+            side_effect=[(bad_reader, bad_writer), (good_reader, good_writer)],
+        ):
+            with pytest.raises(VMCProtocolError):
+                await connection.async_send_command("VMGH?")
+            assert await connection.async_send_command("VMGH?") == "VMGO,2"
+
+        bad_writer.close.assert_called_once()
+        assert connection.connect_count == 2
+
+    @pytest.mark.asyncio
+    async def test_device_error_keeps_socket(self):
+        """Una risposta ERROR completa non chiude la connessione."""
+        reader, writer = _mock_stream([b"ERROR\r\n", b"VMGO,1\r\n"])
+        connection = VmcConnection("192.168.1.100", 5001)
+
+        with patch("asyncio.open_connection", return_value=(reader, writer)):
+            with pytest.raises(VMCProtocolError):
+                await connection.async_send_command("VMXX")
+            assert await connection.async_send_command("VMGH?") == "VMGO,1"
+
+        writer.close.assert_not_called()
+        assert connection.connect_count == 1
+
+
+class TestAdaptiveTimeouts:
+    """Test dei timeout adattivi sulla connessione persistente."""
+
+    @pytest.mark.asyncio
+    async def test_round_trip_times_are_measured(self):
+        """Connessione e risposte alimentano le stime dei tempi."""
+        reader, writer = _mock_stream([b"VMGO,1\r\n", b"VMGI,1\r\n"])
+        connection = VmcConnection("192.168.1.100", 5001)
+
+        with patch("asyncio.open_connection", return_value=(reader, writer)):
+            await connection.async_send_commands(["VMGH?", "VMGI?"])
+
+        assert connection.connect_rtt.samples == 1
+        assert connection.response_rtt.samples == 2
+        timing = connection.as_dict()["timing"]
+        assert timing["response"]["samples"] == 2
+        assert timing["response"]["timeout_s"] == connection.response_rtt.timeout
+
+    @pytest.mark.asyncio
+    async def test_adaptive_read_timeout_is_used(self):
+        """Senza timeout esplicito la lettura usa il timeout stimato."""
+        reader, writer = _mock_stream([b"VMGO,1\r\n"])
+        connection = VmcConnection("192.168.1.100", 5001)
+        connection.set_timeout_bounds(1.0, 10.0)
+        connection.response_rtt.observe(0.05)
+
+        with (
+            patch("asyncio.open_connection", return_value=(reader, writer)),
+            patch(
+                "custom_components.vmc_helty_flow.helpers._send_and_receive",
+                new=AsyncMock(return_value="VMGO,1"),
+            ) as mock_exchange,
+        ):
+            await connection.async_send_command("VMGH?")
+            await connection.async_send_command("VMGH?", timeout=7)
+
+        assert mock_exchange.await_args_list[0].args[5] == 1.0
+        assert mock_exchange.await_args_list[1].args[5] == 7
+
+    @pytest.mark.asyncio
+    async def test_timeout_backs_off(self):
+        """Un timeout di lettura allunga il timeout successivo."""
+        reader, writer = _mock_stream([TimeoutError()])
+        connection = VmcConnection("192.168.1.100", 5001)
+        connection.response_rtt.observe(0.5)
+        before = connection.response_rtt.timeout
+
+        with (
+            patch("asyncio.open_connection", return_value=(reader, writer)),
+            pytest.raises(VMCTimeoutError),
+        ):
+            await connection.async_send_command("VMGH?")
+
+        assert connection.response_rtt.timeouts == 1
+        assert connection.response_rtt.timeout > before
+
+    def test_timing_round_trip(self):
+        """Le stime salvate vengono ripristinate su una nuova connessione."""
+        connection = VmcConnection("192.168.1.100", 5001)
+        connection.connect_rtt.observe(0.02)
+        connection.response_rtt.observe(0.3)
+
+        restored = VmcConnection("192.168.1.100", 5001)
+        restored.restore_timing(connection.timing_as_stored_dict())
+        restored.restore_timing(None)
+
+        assert restored.connect_rtt.srtt == pytest.approx(0.02)
+        assert restored.response_rtt.srtt == pytest.approx(0.3)
+
+
+class TestProbeDevice:
+    """Test per la sonda di sola connessione."""
+
+    @pytest.mark.asyncio
+    async def test_probe_keeps_persistent_socket(self):
+        """La sonda apre il socket, poi riusato dal comando successivo."""
+        reader, writer = _mock_stream([b"VMGO,1\r\n"])
+        connection = get_device_connection("192.168.1.202", 5001)
+
+        try:
+            with patch(
+                "asyncio.open_connection", return_value=(reader, writer)
+            ) as mock_open:
+                await async_probe_device("192.168.1.202", 5001)
+                writer.write.assert_not_called()
+                assert await connection.async_send_command("VMGH?") == "VMGO,1"
+
+            mock_open.assert_called_once()
+            assert connection.reuse_count == 1
+        finally:
+            await async_close_device_connection("192.168.1.202", 5001)
+
+    @pytest.mark.asyncio
+    async def test_probe_without_registered_connection(self):
+        """Senza connessione registrata la sonda apre e chiude un socket."""
+        reader, writer = _mock_stream([])
+
+        with patch("asyncio.open_connection", return_value=(reader, writer)):
+            await async_probe_device("192.168.1.100", 5001)
+
+        writer.write.assert_not_called()
+        writer.close.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_probe_failure(self):
+        """Un dispositivo che rifiuta la connessione fa fallire la sonda."""
+        with (
+            patch("asyncio.open_connection", side_effect=ConnectionRefusedError()),
+            pytest.raises(VMCConnectionError),
+        ):
+            await async_probe_device("192.168.1.100", 5001)
+
+
+def _ping_process(returncode=0, stderr=b""):
+    """Crea un processo ping simulato."""
+    process = Mock()
+    process.returncode = returncode
+    process.communicate = AsyncMock(return_value=(b"", stderr))
+    process.wait = AsyncMock()
+    return process
+
+
+class TestNetworkDiagnostics:
+    """Test per la diagnostica di rete asincrona."""
+
+    @pytest.mark.asyncio
+    async def test_reachable_device_reports_rtt_distribution(self):
+        """Con il dispositivo raggiungibile si misurano tutti i tentativi."""
+        writer = Mock()
+        writer.wait_closed = AsyncMock()
+        with (
+            patch(
+                "asyncio.create_subprocess_exec",
+                new=AsyncMock(return_value=_ping_process()),
+            ),
+            patch(
+                "custom_components.vmc_helty_flow.helpers._establish_connection",
+                new=AsyncMock(return_value=(Mock(), writer)),
+            ) as mock_connect,
+        ):
+            result = await validate_network_connectivity("192.168.1.100", probes=3)
+
+        assert mock_connect.await_count == 3
+        assert result["reachable"] is True
+        assert result["ping_success"] is True
+        assert result["tcp_successes"] == 3
+        assert set(result["connect_rtt"]) == {
+            "min_ms",
+            "median_ms",
+            "mean_ms",
+            "max_ms",
+            "stdev_ms",
+        }
+        assert result["error_details"] is None
+
+    @pytest.mark.asyncio
+    async def test_unreachable_device_stops_after_first_probe(self):
+        """Se il primo tentativo fallisce non si attendono gli altri timeout."""
+        with (
+            patch(
+                "asyncio.create_subprocess_exec",
+                new=AsyncMock(return_value=_ping_process(1, b"unreachable")),
+            ),
+            patch(
+                "custom_components.vmc_helty_flow.helpers._establish_connection",
+                new=AsyncMock(side_effect=VMCTimeoutError("timeout")),
+            ) as mock_connect,
+        ):
+            result = await validate_network_connectivity("192.168.1.100", probes=5)
+
+        assert mock_connect.await_count == 1
+        assert result["reachable"] is False
+        assert result["tcp_successes"] == 0
+        assert result["connect_rtt"] is None
+        assert result["error_details"] == "Ping failed: unreachable"
+
+    @pytest.mark.asyncio
+    async def test_lost_probes_after_success_are_counted(self):
+        """Dopo un successo i tentativi falliti vengono contati come persi."""
+        writer = Mock()
+        writer.wait_closed = AsyncMock()
+        with (
+            patch(
+                "asyncio.create_subprocess_exec",
+                new=AsyncMock(side_effect=FileNotFoundError("ping")),
+            ),
+            patch(
+                "custom_components.vmc_helty_flow.helpers._establish_connection",
+                new=AsyncMock(
+                    side_effect=[
+                        (Mock(), writer),
+                        VMCTimeoutError("t"),
+                        (Mock(), writer),
+                    ]
+                ),
+            ),
+        ):
+            result = await validate_network_connectivity("192.168.1.100", probes=3)
+
+        assert result["reachable"] is True
+        assert result["tcp_successes"] == 2
+        assert result["ping_success"] is False
+        assert result["error_details"].startswith("Ping test failed")
+
+    @pytest.mark.asyncio
+    async def test_ping_timeout_kills_process(self):
+        """Un ping che non termina viene interrotto."""
+        process = _ping_process()
+        process.communicate = AsyncMock(side_effect=TimeoutError)
+        with (
+            patch(
+                "asyncio.create_subprocess_exec", new=AsyncMock(return_value=process)
+            ),
+            patch(
+                "custom_components.vmc_helty_flow.helpers._establish_connection",
+                new=AsyncMock(side_effect=VMCConnectionError("refused")),
+            ),
+        ):
+            result = await validate_network_connectivity("192.168.1.100", probes=1)
+
+        process.kill.assert_called_once()
+        assert result["error_details"] == "Ping test failed: timeout"
@@ -5,14 +5,22 @@ from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 from homeassistant.const import Platform
+from homeassistant.exceptions import ConfigEntryNotReady
 
 from custom_components.vmc_helty_flow import (
     DEFAULT_SCAN_INTERVAL,
     PLATFORMS,
+    _async_start_device,
+    async_reload_entry,
+    async_remove_entry,
     async_setup_entry,
     async_unload_entry,
 )
 from custom_components.vmc_helty_flow.const import DOMAIN
+from custom_components.vmc_helty_flow.helpers import (
+    async_close_device_connection,
+    get_device_connection,
+)
 
 
 class TestConstants:
@@ -65,6 +73,7 @@ class TestAsyncSetupEntry:
         ):
             mock_device.return_value = Mock()
             mock_coordinator = Mock()
+            mock_coordinator.async_restore_snapshot = AsyncMock(return_value=False)
             mock_coordinator.async_config_entry_first_refresh = AsyncMock()
             mock_coordinator_class.return_value = mock_coordinator
             mock_forward.return_value = None
@@ -98,6 +107,7 @@ class TestAsyncSetupEntry:
         ):
             # Setup coordinator mock
             mock_coordinator = Mock()
+            mock_coordinator.async_restore_snapshot = AsyncMock(return_value=False)
             mock_coordinator.async_config_entry_first_refresh = AsyncMock()
             mock_coordinator_class.return_value = mock_coordinator
 
@@ -108,6 +118,62 @@ class TestAsyncSetupEntry:
             with pytest.raises(Exception, match="Device creation failed"):
                 await async_setup_entry(hass, config_entry)
 
+    @pytest.mark.asyncio
+    async def test_setup_entry_from_restored_snapshot(self):
+        """Con uno snapshot salvato le piattaforme partono senza attendere il poll."""
+        hass = Mock()
+        hass.data = {}
+        config_entry = Mock()
+        config_entry.data = {"ip": "192.168.1.100", "name": "Test VMC"}
+        config_entry.options = {"scan_interval": 60}
+        config_entry.entry_id = "test_entry"
+        config_entry.async_create_background_task = Mock(
+            side_effect=lambda _hass, coro, _name: coro.close()
+        )
+
+        with (
+            patch(
+                "custom_components.vmc_helty_flow.async_get_or_create_device"
+            ) as mock_device,
+            patch("custom_components.vmc_helty_flow.async_setup_device_actions"),
+            patch(
+                "custom_components.vmc_helty_flow.VmcHeltyCoordinator"
+            ) as mock_coordinator_class,
+            patch.object(
+                hass.config_entries, "async_forward_entry_setups", new=AsyncMock()
+            ) as mock_forward,
+        ):
+            mock_coordinator = Mock()
+            mock_coordinator.async_restore_snapshot = AsyncMock(return_value=True)
+            mock_coordinator.async_config_entry_first_refresh = AsyncMock()
+            mock_coordinator_class.return_value = mock_coordinator
+
+            assert await async_setup_entry(hass, config_entry) is True
+
+        mock_coordinator.async_config_entry_first_refresh.assert_not_awaited()
+        mock_device.assert_not_called()
+        config_entry.async_create_background_task.assert_called_once()
+        mock_forward.assert_awaited_once_with(config_entry, PLATFORMS)
+
+    @pytest.mark.asyncio
+    async def test_background_start_polls_and_registers_device(self):
+        """Il poll e la registrazione del dispositivo avvengono in background."""
+        hass = Mock()
+        coordinator = Mock()
+        coordinator.ip = "192.168.1.100"
+        coordinator.async_refresh = AsyncMock()
+
+        with patch(
+            "custom_components.vmc_helty_flow.async_get_or_create_device",
+            new=AsyncMock(side_effect=[Exception("offline"), Mock(id="dev_1")]),
+        ):
+            # Un errore di registrazione non interrompe l'avvio
+            await _async_start_device(hass, coordinator)
+            await _async_start_device(hass, coordinator)
+
+        assert coordinator.async_refresh.await_count == 2
+        assert coordinator.device_id == "dev_1"
+
 
 class TestAsyncUnloadEntry:
     """Test per la funzione async_unload_entry."""
@@ -149,3 +215,169 @@ class TestAsyncUnloadEntry:
             assert result is False
             # I dati dovrebbero rimanere in caso di fallimento
             assert "test_entry" in hass.data[DOMAIN]
+
+    @pytest.mark.asyncio
+    async def test_failed_setup_releases_connection_and_scheduler(self):
+        """Un setup non pronto rilascia connessione e slot dello scheduler."""
+        hass = Mock()
+        hass.data = {}
+        on_unload = []
+        config_entry = Mock()
+        config_entry.data = {"ip": "192.168.1.100", "name": "Test VMC"}
+        config_entry.options = {}
+        config_entry.entry_id = "test_entry"
+        config_entry.async_on_unload = on_unload.append
+
+        with (
+            patch("custom_components.vmc_helty_flow.async_setup_device_actions"),
+            patch(
+                "custom_components.vmc_helty_flow.VmcHeltyCoordinator"
+            ) as mock_coordinator_class,
+            patch(
+                "custom_components.vmc_helty_flow.async_close_device_connection",
+                new=AsyncMock(),
+            ) as mock_close,
+        ):
+            coordinator = mock_coordinator_class.return_value
+            coordinator.ip = "192.168.1.100"
+            coordinator.async_restore_snapshot = AsyncMock(return_value=False)
+            coordinator.async_config_entry_first_refresh = AsyncMock(
+                side_effect=ConfigEntryNotReady("offline")
+            )
+            with pytest.raises(ConfigEntryNotReady):
+                await async_setup_entry(hass, config_entry)
+
+            scheduler = hass.data[DOMAIN]["poll_scheduler"]
+            assert scheduler.as_dict()["devices"] == 1
+            # HA esegue le callback di unload quando il setup fallisce
+            for callback in reversed(on_unload):
+                if (job := callback()) is not None:
+                    await job
+
+        mock_close.assert_awaited_once_with("192.168.1.100", 5001)
+        assert scheduler.as_dict()["devices"] == 0
+        assert "test_entry" not in hass.data[DOMAIN]
+
+
+class TestAsyncReloadEntry:
+    """Test per l'aggiornamento della config entry."""
+
+    def setup_method(self):
+        """Setup per ogni test."""
+        self.coordinator = Mock()
+        self.coordinator.ip = "192.168.1.100"
+        self.coordinator.options = {"timeout": 10, "room_volume": 60.0}
+        self.hass = Mock()
+        self.hass.data = {DOMAIN: {"test_entry": self.coordinator}}
+        self.entry = Mock()
+        self.entry.entry_id = "test_entry"
+        self.entry.data = {"ip": "192.168.1.100"}
+
+    async def _reload(self, options):
+        """Aggiorna le opzioni e ritorna il mock del reload di HA."""
+        self.entry.options = options
+        await async_reload_entry(self.hass, self.entry)
+        return self.hass.config_entries.async_schedule_reload
+
+    @pytest.mark.asyncio
+    async def test_calculation_options_applied_live(self):
+        """Volume e intervalli vengono applicati senza reload."""
+        mock_reload = await self._reload(
+            {"timeout": 10, "room_volume": 90.0, "scan_interval": 60}
+        )
+
+        mock_reload.assert_not_called()
+        self.coordinator.async_apply_options.assert_called_once_with()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "changed",
+        [{"timeout": 20}, {"retry_attempts": 5}, {"command_rate_limit": 2.0}],
+    )
+    async def test_connection_options_reload(self, changed):
+        """Un cambio dei parametri di connessione ricarica l'entry."""
+        mock_reload = await self._reload(
+            {"timeout": 10, "room_volume": 60.0, **changed}
+        )
+
+        mock_reload.assert_called_once_with("test_entry")
+        self.coordinator.async_apply_options.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_reload_without_coordinator(self):
+        """Senza un coordinatore attivo (setup fallito) l'entry viene ricaricata."""
+        self.hass.data = {DOMAIN: {}}
+        mock_reload = await self._reload({"timeout": 10, "room_volume": 60.0})
+
+        mock_reload.assert_called_once_with("test_entry")
+
+    @pytest.mark.asyncio
+    async def test_ip_change_releases_old_connection(self):
+        """Il reload per un nuovo IP chiude la connessione al vecchio indirizzo."""
+        hass = Mock()
+        hass.data = {}
+        hass.config_entries.async_forward_entry_setups = AsyncMock()
+        hass.config_entries.async_unload_platforms = AsyncMock(return_value=True)
+        on_unload = []
+        entry = Mock()
+        entry.entry_id = "test_entry"
+        entry.data = {"ip": "192.168.1.100", "name": "Test VMC"}
+        entry.options = {"timeout": 10}
+        entry.async_on_unload = on_unload.append
+        entry.async_create_background_task = Mock(
+            side_effect=lambda _hass, job, _name: job.close()
+        )
+
+        with (
+            patch("custom_components.vmc_helty_flow.async_setup_device_actions"),
+            patch("custom_components.vmc_helty_flow.async_setup_services"),
+            patch(
+                "custom_components.vmc_helty_flow.VmcHeltyCoordinator"
+            ) as mock_coordinator_class,
+        ):
+            coordinator = mock_coordinator_class.return_value
+            coordinator.ip = "192.168.1.100"
+            coordinator.options = entry.options
+            coordinator.async_restore_snapshot = AsyncMock(return_value=True)
+            await async_setup_entry(hass, entry)
+
+        connection = get_device_connection("192.168.1.100")
+        scheduler = hass.data[DOMAIN]["poll_scheduler"]
+        assert scheduler.as_dict()["devices"] == 1
+
+        entry.data = {"ip": "192.168.1.101", "name": "Test VMC"}
+        await async_reload_entry(hass, entry)
+        hass.config_entries.async_schedule_reload.assert_called_once_with("test_entry")
+
+        # Lo scaricamento eseguito da HA durante il reload
+        assert await async_unload_entry(hass, entry) is True
+        with patch.object(connection, "async_close", new=AsyncMock()) as mock_close:
+            for callback in reversed(on_unload):
+                if (job := callback()) is not None:
+                    await job
+
+        mock_close.assert_awaited_once()
+        assert get_device_connection("192.168.1.100") is not connection
+        assert scheduler.as_dict()["devices"] == 0
+        await async_close_device_connection("192.168.1.100")
+
+
+@pytest.mark.asyncio
+async def test_remove_entry_removes_storage():
+    """Test che la rimozione dell'entry cancelli i dati persistenti."""
+    hass = Mock()
+    config_entry = Mock()
+    config_entry.entry_id = "test_entry"
+
+    with (
+        patch("custom_components.vmc_helty_flow.VmcHeltyStorage") as mock_storage,
+        patch(
+            "custom_components.vmc_helty_flow.async_remove_orphaned_devices",
+            new=AsyncMock(),
+        ),
+    ):
+        mock_storage.return_value.async_remove = AsyncMock()
+        await async_remove_entry(hass, config_entry)
+
+    mock_storage.assert_called_once_with(hass, "test_entry")
+    mock_storage.return_value.async_remove.assert_awaited_once()
@@ -1,6 +1,6 @@
 """Tests for light module."""
 
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from homeassistant.components.light import ColorMode
@@ -24,6 +24,7 @@ def mock_coordinator():
         "temperature": 22.5,
     }
     coordinator.async_request_refresh = AsyncMock()
+    coordinator.async_write = AsyncMock(return_value="OK")
     return coordinator
 
 
@@ -147,101 +148,82 @@ class TestVmcHeltyLight:
         assert light_entity.is_on is False
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.light.tcp_send_command")
-    async def test_async_turn_on_default_brightness(
-        self, mock_tcp_send, mock_coordinator
-    ):
+    async def test_async_turn_on_default_brightness(self, mock_coordinator):
         """Test async_turn_on with default brightness."""
-        mock_tcp_send.return_value = "OK"
+        mock_coordinator.async_write.return_value = "OK"
         light_entity = VmcHeltyLight(mock_coordinator)
 
         await light_entity.async_turn_on()
 
         # Default brightness 255 -> 100 (rounded to 25 step) -> VMWH06100000
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH06100000")
-        mock_coordinator.async_request_refresh.assert_called_once()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH06100000")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.light.tcp_send_command")
-    async def test_async_turn_on_with_brightness(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_on_with_brightness(self, mock_coordinator):
         """Test async_turn_on with specific brightness."""
-        mock_tcp_send.return_value = "OK"
+        mock_coordinator.async_write.return_value = "OK"
         light_entity = VmcHeltyLight(mock_coordinator)
 
         # Brightness 128 -> ~50 -> rounded to 50
         await light_entity.async_turn_on(brightness=128)
 
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH06050000")
-        mock_coordinator.async_request_refresh.assert_called_once()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH06050000")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.light.tcp_send_command")
-    async def test_async_turn_on_low_brightness(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_on_low_brightness(self, mock_coordinator):
         """Test async_turn_on with low brightness."""
-        mock_tcp_send.return_value = "OK"
+        mock_coordinator.async_write.return_value = "OK"
         light_entity = VmcHeltyLight(mock_coordinator)
 
         # Brightness 32 -> ~12.5 -> rounded to 0
         await light_entity.async_turn_on(brightness=32)
 
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH06000000")
-        mock_coordinator.async_request_refresh.assert_called_once()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH06000000")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.light.tcp_send_command")
-    async def test_async_turn_on_mid_brightness(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_on_mid_brightness(self, mock_coordinator):
         """Test async_turn_on with mid brightness."""
-        mock_tcp_send.return_value = "OK"
+        mock_coordinator.async_write.return_value = "OK"
         light_entity = VmcHeltyLight(mock_coordinator)
 
         # Brightness 191 -> ~75 -> rounded to 75
         await light_entity.async_turn_on(brightness=191)
 
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH06075000")
-        mock_coordinator.async_request_refresh.assert_called_once()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH06075000")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.light.tcp_send_command")
-    async def test_async_turn_on_failure(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_on_failure(self, mock_coordinator):
         """Test async_turn_on with failed command."""
-        mock_tcp_send.return_value = "ERROR"
+        mock_coordinator.async_write.return_value = "ERROR"
         light_entity = VmcHeltyLight(mock_coordinator)
 
         await light_entity.async_turn_on()
 
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH06100000")
-        # Should not refresh on non-OK response
-        mock_coordinator.async_request_refresh.assert_not_called()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH06100000")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.light.tcp_send_command")
-    async def test_async_turn_on_exception(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_on_exception(self, mock_coordinator):
         """Test async_turn_on with exception."""
-        mock_tcp_send.side_effect = Exception("Connection error")
+        mock_coordinator.async_write.side_effect = Exception("Connection error")
         light_entity = VmcHeltyLight(mock_coordinator)
 
         with pytest.raises(Exception, match="Connection error"):
             await light_entity.async_turn_on()
 
-        mock_coordinator.async_request_refresh.assert_not_called()
-
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.light.tcp_send_command")
-    async def test_async_turn_off_success(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_off_success(self, mock_coordinator):
         """Test async_turn_off with successful command."""
-        mock_tcp_send.return_value = "OK"
+        mock_coordinator.async_write.return_value = "OK"
         light_entity = VmcHeltyLight(mock_coordinator)
 
         await light_entity.async_turn_off()
 
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH0600000")
-        mock_coordinator.async_request_refresh.assert_called_once()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH0600000")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.light.tcp_send_command")
-    async def test_async_turn_off_exception(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_off_exception(self, mock_coordinator):
         """Test async_turn_off with exception."""
-        mock_tcp_send.side_effect = Exception("Connection error")
+        mock_coordinator.async_write.side_effect = Exception("Connection error")
         light_entity = VmcHeltyLight(mock_coordinator)
 
         with pytest.raises(Exception, match="Connection error"):
@@ -328,60 +310,49 @@ class TestVmcHeltyLightTimer:
         assert timer_entity.is_on is False
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.light.tcp_send_command")
-    async def test_async_turn_on_success(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_on_success(self, mock_coordinator):
         """Test async_turn_on with successful command."""
-        mock_tcp_send.return_value = "OK"
+        mock_coordinator.async_write.return_value = "OK"
         timer_entity = VmcHeltyLightTimer(mock_coordinator)
 
         await timer_entity.async_turn_on()
 
         # Default timer 300 seconds
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH1400300")
-        mock_coordinator.async_request_refresh.assert_called_once()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH1400300")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.light.tcp_send_command")
-    async def test_async_turn_on_failure(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_on_failure(self, mock_coordinator):
         """Test async_turn_on with failed command."""
-        mock_tcp_send.return_value = "ERROR"
+        mock_coordinator.async_write.return_value = "ERROR"
         timer_entity = VmcHeltyLightTimer(mock_coordinator)
 
         await timer_entity.async_turn_on()
 
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH1400300")
-        # Should not refresh on non-OK response
-        mock_coordinator.async_request_refresh.assert_not_called()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH1400300")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.light.tcp_send_command")
-    async def test_async_turn_on_exception(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_on_exception(self, mock_coordinator):
         """Test async_turn_on with exception."""
-        mock_tcp_send.side_effect = Exception("Connection error")
+        mock_coordinator.async_write.side_effect = Exception("Connection error")
         timer_entity = VmcHeltyLightTimer(mock_coordinator)
 
         with pytest.raises(Exception, match="Connection error"):
             await timer_entity.async_turn_on()
 
-        mock_coordinator.async_request_refresh.assert_not_called()
-
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.light.tcp_send_command")
-    async def test_async_turn_off_success(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_off_success(self, mock_coordinator):
         """Test async_turn_off with successful command."""
-        mock_tcp_send.return_value = "OK"
+        mock_coordinator.async_write.return_value = "OK"
         timer_entity = VmcHeltyLightTimer(mock_coordinator)
 
         await timer_entity.async_turn_off()
 
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH1400000")
-        mock_coordinator.async_request_refresh.assert_called_once()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH1400000")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.light.tcp_send_command")
-    async def test_async_turn_off_exception(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_off_exception(self, mock_coordinator):
         """Test async_turn_off with exception."""
-        mock_tcp_send.side_effect = Exception("Connection error")
+        mock_coordinator.async_write.side_effect = Exception("Connection error")
         timer_entity = VmcHeltyLightTimer(mock_coordinator)
 
         with pytest.raises(Exception, match="Connection error"):
@@ -0,0 +1,190 @@
+"""Test per il motore delle metriche derivate."""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.vmc_helty_flow.coordinator import VmcHeltyCoordinator
+from custom_components.vmc_helty_flow.metrics import (
+    DerivedMetrics,
+    absolute_humidity,
+    derive_metrics,
+    dew_point,
+)
+from custom_components.vmc_helty_flow.protocol import decode_sensors, decode_status
+from custom_components.vmc_helty_flow.sensor import (
+    VmcHeltyComfortIndexSensor,
+    VmcHeltyDewPointSensor,
+)
+
+STATUS = "VMGO,3,00010,25,00000,1234,0,0,0,0,0,050,0,0,0,00120"
+SENSORS = "VMGI,215,180,456,850,0,0,0,0,0,0,120,0,0,0"
+
+
+def _metrics(status=STATUS, sensors=SENSORS, room_volume=60.0) -> DerivedMetrics:
+    return derive_metrics(decode_status(status), decode_sensors(sensors), room_volume)
+
+
+class TestFormulas:
+    """Test per le formule psicrometriche."""
+
+    def test_dew_point(self):
+        """Punto di rugiada con la formula di Magnus."""
+        assert dew_point(21.5, 45.6) == pytest.approx(9.3, abs=0.05)
+
+    def test_absolute_humidity(self):
+        """Umidità assoluta in g/m³."""
+        assert absolute_humidity(21.5, 45.6) == pytest.approx(8.59, abs=0.01)
+
+
+class TestDerivedMetrics:
+    """Test per il calcolo delle metriche di un frame."""
+
+    def test_psychrometric_metrics(self):
+        """Le metriche ambientali derivano dai sensori."""
+        metrics = _metrics()
+        assert metrics.temperature_internal == 21.5
+        assert metrics.humidity == 45.6
+        assert metrics.dew_point == 9.3
+        assert metrics.absolute_humidity == pytest.approx(8.59, abs=0.01)
+        assert metrics.dew_point_delta == pytest.approx(
+            metrics.internal_dew_point - metrics.external_dew_point
+        )
+        assert 0 <= metrics.comfort_index <= 100
+
+    def test_ventilation_metrics(self):
+        """Le metriche di ventilazione derivano dalla velocità e dal volume."""
+        metrics = _metrics()
+        assert metrics.fan_speed == 3
+        assert metrics.airflow == 26
+        assert metrics.power == 9.0
+        assert metrics.air_exchange_time == round(60.0 / 26 * 60, 1)
+        assert metrics.daily_air_changes == round(26 / 60.0 * 24, 1)
+
+    def test_fan_off_has_no_exchange_time(self):
+        """A ventola spenta il tempo di ricambio non è definito."""
+        metrics = _metrics(status=STATUS.replace("VMGO,3", "VMGO,0"))
+        assert metrics.airflow == 0
+        assert metrics.air_exchange_time is None
+        assert metrics.daily_air_changes is not None
+
+    def test_missing_sensors(self):
+        """Senza sensori le metriche ambientali sono None."""
+        metrics = _metrics(sensors=None)
+        assert metrics.dew_point is None
+        assert metrics.absolute_humidity is None
+        assert metrics.comfort_index is None
+        assert metrics.dew_point_delta is None
+        assert metrics.power == 9.0
+
+    def test_invalid_humidity(self):
+        """Umidità oltre il 100% non produce comfort né delta."""
+        metrics = _metrics(sensors=SENSORS.replace(",456,", ",1200,"))
+        assert metrics.comfort_index is None
+        assert metrics.dew_point_delta is None
+
+    def test_invalid_room_volume(self):
+        """Un volume non valido non blocca le altre metriche."""
+        metrics = _metrics(room_volume=None)
+        assert metrics.air_exchange_time is None
+        assert metrics.daily_air_changes is None
+        assert metrics.dew_point == 9.3
+
+    def test_as_dict(self):
+        """Le metriche sono esportabili come dizionario."""
+        data = _metrics().as_dict()
+        assert data["airflow"] == 26
+        assert data["dew_point_delta"] is not None
+
+
+class TestMemoization:
+    """Test per il calcolo unico per frame."""
+
+    def test_same_frame_same_object(self):
+        """Lo stesso frame restituisce lo stesso oggetto."""
+        assert _metrics() is _metrics()
+
+    def test_new_frame_new_metrics(self):
+        """Un frame diverso produce nuove metriche."""
+        other = _metrics(sensors=SENSORS.replace(",215,", ",230,"))
+        assert other is not _metrics()
+        assert other.temperature_internal == 23.0
+
+    def test_room_volume_is_part_of_key(self):
+        """Il cambio di volume ricalcola le metriche di ventilazione."""
+        assert _metrics(room_volume=30.0).air_exchange_time != (
+            _metrics(room_volume=60.0).air_exchange_time
+        )
+
+    def test_unhashable_room_volume(self):
+        """Un volume non hashable viene calcolato senza memorizzazione."""
+        metrics = derive_metrics(decode_status(STATUS), None, [60])
+        assert metrics.airflow == 26
+        assert metrics.air_exchange_time is None
+
+    def test_coordinator_metrics(self):
+        """Il coordinatore espone le metriche del frame corrente."""
+        coordinator = SimpleNamespace(
+            data={"status": STATUS, "sensors": SENSORS}, room_volume=60.0
+        )
+        metrics = VmcHeltyCoordinator.metrics.fget(coordinator)
+        assert metrics is _metrics()
+
+    def test_entity_reuses_metrics_until_frame_changes(self):
+        """L'entità riusa le metriche finché i frame non cambiano."""
+        coordinator = SimpleNamespace(
+            data={"status": STATUS, "sensors": SENSORS},
+            room_volume=60.0,
+            ip="192.168.1.100",
+            name="VMC",
+            name_slug="vmc",
+            config_entry=SimpleNamespace(entry_id="entry"),
+        )
+        entity = VmcHeltyDewPointSensor(coordinator)
+        first = entity.metrics
+        assert entity.metrics is first
+        coordinator.data = {"status": STATUS, "sensors": SENSORS.replace("215", "230")}
+        assert entity.metrics is not first
+        assert entity.native_value == entity.metrics.dew_point
+
+
+class TestLazyMetrics:
+    """Test per il calcolo delle metriche su richiesta."""
+
+    def test_groups_computed_on_first_access(self):
+        """Solo il gruppo letto viene calcolato."""
+        sensors = decode_sensors(SENSORS.replace(",215,", ",199,"))
+        with patch(
+            "custom_components.vmc_helty_flow.metrics.dew_point", wraps=dew_point
+        ) as dew_point_mock:
+            metrics = DerivedMetrics(decode_status(STATUS), sensors, 60.0)
+            assert metrics.power == 9.0
+            assert metrics.comfort_index is not None
+            dew_point_mock.assert_not_called()
+
+            assert metrics.dew_point_delta is not None
+            assert metrics.internal_dew_point is not None
+            assert dew_point_mock.call_count == 2
+
+    def test_unknown_attribute(self):
+        """Gli attributi inesistenti sollevano AttributeError."""
+        with pytest.raises(AttributeError):
+            _metrics().unknown  # noqa: B018
+
+    def test_as_dict_has_only_metrics(self):
+        """Il dizionario non contiene lo stato interno."""
+        assert "_status_complete" not in _metrics().as_dict()
+
+
+def test_analytics_entities_disabled_by_default():
+    """Le entità di analisi poco usate sono disabilitate nel registro."""
+    coordinator = SimpleNamespace(
+        data={},
+        ip="192.168.1.100",
+        name="VMC",
+        name_slug="vmc",
+        config_entry=SimpleNamespace(entry_id="entry"),
+    )
+    assert not VmcHeltyComfortIndexSensor(coordinator).entity_registry_enabled_default
+    assert VmcHeltyDewPointSensor(coordinator).entity_registry_enabled_default
@@ -0,0 +1,243 @@
+"""Test per il piano di polling dichiarativo."""
+
+import math
+
+import pytest
+
+from custom_components.vmc_helty_flow.const import POLL_MIN_INTERVAL
+from custom_components.vmc_helty_flow.poll_plan import (
+    AdaptiveInterval,
+    PollPlan,
+    PollRule,
+    build_poll_plan,
+)
+from custom_components.vmc_helty_flow.protocol import decode_sensors, decode_status
+
+NOW = 1_000_000.0
+
+
+def _sensors(co2: int) -> str:
+    """Costruisce una risposta VMGI con la CO2 indicata."""
+    return f"VMGI,215,180,456,{co2},0,0,0,0,0,0,120,0,0,0"
+
+
+def _record_all(plan: PollPlan, when: float) -> None:
+    """Registra una risposta per tutti i comandi del piano."""
+    for command in plan.commands:
+        plan.record(command, when, _sensors(600) if command == "VMGI?" else "OK")
+
+
+class TestPollRule:
+    """Test per le regole del piano."""
+
+    def test_interval_clamped_to_minimum(self):
+        """Un intervallo troppo breve viene portato al minimo."""
+        assert PollRule("VMGH?", 1).interval == POLL_MIN_INTERVAL
+
+    def test_default_staleness_only_for_unconditional_rules(self):
+        """Solo le regole senza condizione hanno un'età massima di default."""
+        assert PollRule("VMGH?", 60).max_staleness == 180
+        assert PollRule("VMGI?", 30, condition="co2_rising").max_staleness is None
+
+    def test_unknown_condition_rejected(self):
+        """Una condizione sconosciuta solleva ValueError."""
+        with pytest.raises(ValueError, match="Unknown poll condition"):
+            PollRule("VMGI?", 30, condition="humidity_rising")
+
+
+class TestPollPlan:
+    """Test per la scelta dei comandi a ogni poll."""
+
+    def test_everything_due_before_first_read(self):
+        """Prima della prima lettura tutti i comandi sono dovuti, per priorità."""
+        plan = build_poll_plan({})
+        assert plan.due_commands(NOW) == ["VMGH?", "VMGI?", "VMNM?", "VMSL?"]
+        assert plan.age("VMGH?", NOW) == math.inf
+
+    def test_per_command_cadence(self):
+        """Ogni comando torna dovuto allo scadere del proprio intervallo."""
+        plan = build_poll_plan({"scan_interval": 60, "sensors_interval": 120})
+        _record_all(plan, NOW)
+
+        assert plan.due_commands(NOW + 30) == []
+        assert plan.due_commands(NOW + 60) == ["VMGH?"]
+        assert plan.due_commands(NOW + 120) == ["VMGH?", "VMGI?"]
+        assert plan.due_commands(NOW + 900) == ["VMGH?", "VMGI?"]
+        assert plan.due_commands(NOW + 86400) == ["VMGH?", "VMGI?", "VMNM?", "VMSL?"]
+
+    def test_invalidate(self):
+        """Un comando invalidato torna dovuto al poll successivo."""
+        plan = build_poll_plan({})
+        _record_all(plan, NOW)
+        assert plan.read_at("VMNM?") == NOW
+
+        plan.invalidate("VMNM?")
+
+        assert plan.read_at("VMNM?") is None
+        assert plan.due_commands(NOW + 1) == ["VMNM?"]
+
+    def test_tick_tolerance(self):
+        """Un comando in scadenza entro la tolleranza parte con il poll corrente."""
+        plan = build_poll_plan({"scan_interval": 60})
+        _record_all(plan, NOW)
+        assert plan.due_commands(NOW + 59.5) == ["VMGH?"]
+
+    def test_next_poll_in(self):
+        """Il poll successivo parte alla prima scadenza, mai sotto il minimo."""
+        plan = build_poll_plan({"scan_interval": 60, "sensors_interval": 120})
+        _record_all(plan, NOW)
+
+        assert plan.next_poll_in(NOW) == 60
+        assert plan.next_poll_in(NOW + 55) == POLL_MIN_INTERVAL
+        assert plan.base_interval == 60
+
+    def test_fast_sensors_while_co2_rises(self):
+        """Con la CO2 in aumento VMGI? viene letto con l'intervallo rapido."""
+        plan = build_poll_plan({"sensors_fast_interval": 30})
+        _record_all(plan, NOW)
+        assert plan.next_poll_in(NOW) == 180
+
+        plan.record("VMGI?", NOW + 1, _sensors(700))
+        assert plan.due_commands(NOW + 31) == ["VMGI?"]
+        assert plan.next_poll_in(NOW + 1) == 30
+
+        # CO2 stabile: si torna alla cadenza normale
+        plan.record("VMGI?", NOW + 31, _sensors(702))
+        assert plan.due_commands(NOW + 61) == []
+
+    def test_fast_sensors_disabled(self):
+        """Con intervallo rapido 0 la regola condizionale non viene creata."""
+        plan = build_poll_plan({"sensors_fast_interval": 0})
+        assert [rule.condition for rule in plan.rules] == [None] * 4
+
+    def test_carry_over(self):
+        """Un piano ricostruito riprende le letture e lo stato adattivo."""
+        old = build_poll_plan({})
+        _record_all(old, NOW)
+        assert old.adaptive is not None
+        old.adaptive.interval, old.adaptive.reason = 400, "stable"
+
+        plan = build_poll_plan({"adaptive_max_interval": 300})
+        plan.carry_over(old)
+
+        assert plan.due_commands(NOW + 10) == []
+        assert plan.adaptive is not None
+        assert plan.adaptive.interval == 300
+        assert plan.adaptive.reason == "stable"
+
+    def test_as_dict(self):
+        """La diagnostica riporta età dei dati e regole di ogni comando."""
+        plan = build_poll_plan({"scan_interval": 60, "adaptive_polling": False})
+        _record_all(plan, NOW)
+
+        result = plan.as_dict(NOW + 200)
+
+        status = result["queries"]["VMGH?"]
+        assert status["age_s"] == 200
+        assert status["stale"] is True
+        assert result["queries"]["VMGI?"]["stale"] is False
+        assert [rule["active"] for rule in result["queries"]["VMGI?"]["rules"]] == [
+            True,
+            False,
+        ]
+        assert result["next_poll_in_s"] == POLL_MIN_INTERVAL
+
+
+def _humid(humidity: float, co2: int = 600) -> str:
+    """Costruisce una risposta VMGI con umidità e CO2 indicate."""
+    return f"VMGI,215,180,{round(humidity * 10)},{co2},0,0,0,0,0,0,120,0,0,0"
+
+
+class TestAdaptiveInterval:
+    """Test per il polling adattivo di stato e sensori."""
+
+    def _observe(self, controller, now, status=None, sensors=None):
+        controller.observe(now, decode_status(status), decode_sensors(sensors))
+
+    def test_backs_off_while_stable(self):
+        """Ogni poll stabile allunga l'intervallo fino al massimo."""
+        controller = AdaptiveInterval(180, 30, 600)
+        intervals = []
+        now = NOW
+        for _ in range(5):
+            self._observe(controller, now, "VMGO,1", _humid(50.0))
+            intervals.append(controller.interval)
+            now += controller.interval
+
+        assert intervals == [270, 405, 600, 600, 600]
+        assert controller.reason == "stable"
+
+    def test_speeds_up_on_humidity_transient(self):
+        """Un rapido aumento dell'umidità riporta l'intervallo al minimo."""
+        controller = AdaptiveInterval(600, 30, 600)
+        self._observe(controller, NOW, sensors=_humid(50.0))
+        self._observe(controller, NOW + 600, sensors=_humid(62.0))
+
+        assert controller.interval == 30
+        assert controller.reason == "humidity"
+
+    def test_slow_drift_is_stable(self):
+        """Una variazione lenta della CO2 non è un transitorio."""
+        controller = AdaptiveInterval(600, 30, 600)
+        self._observe(controller, NOW, sensors=_humid(50.0, co2=600))
+        self._observe(controller, NOW + 600, sensors=_humid(50.0, co2=650))
+
+        assert controller.reason == "stable"
+
+    def test_speeds_up_on_fan_change(self):
+        """Un cambio di velocità della ventola riporta l'intervallo al minimo."""
+        controller = AdaptiveInterval(180, 30, 600)
+        self._observe(controller, NOW, status="VMGO,1")
+        self._observe(controller, NOW + 270, status="VMGO,4")
+
+        assert controller.interval == 30
+        assert controller.reason == "fan_speed"
+
+    def test_plan_scales_adaptive_rules(self):
+        """Il piano scala gli intervalli di stato e sensori mantenendone il rapporto."""
+        plan = build_poll_plan({"scan_interval": 60, "sensors_interval": 120})
+        assert plan.adaptive is not None
+        plan.adaptive.interval = plan.adaptive.min_interval
+
+        assert [plan.interval(rule) for rule in plan.rules[:2]] == [30, 60]
+        name_rule = next(rule for rule in plan.rules if rule.command == "VMNM?")
+        assert plan.interval(name_rule) == 86400
+        assert plan.as_dict(NOW)["adaptive"]["interval_s"] == 30
+
+    def test_disabled_by_option(self):
+        """Con il polling adattivo disattivato gli intervalli restano fissi."""
+        plan = build_poll_plan({"adaptive_polling": False})
+        assert plan.adaptive is None
+        assert not any(rule.adaptive for rule in plan.rules)
+        assert plan.as_dict(NOW)["adaptive"] is None
+
+    def test_day_with_shower_uses_fewer_requests(self):
+        """Su un giorno con una doccia: meno richieste e più campioni utili."""
+
+        def simulate(options):
+            plan = build_poll_plan(options)
+            now, requests, shower_samples = NOW, 0, 0
+            while now < NOW + 86400:
+                # Doccia: l'umidità sale dell'1,5 %/min fino all'80 % e poi scende
+                minutes = (now - NOW - 43200) / 60
+                shower = 0 <= minutes < 20
+                humidity = 50 + min(max(minutes, 0) * 1.5, 30)
+                if minutes >= 20:
+                    humidity = max(80 - (minutes - 20) * 0.5, 50)
+                sensors = _humid(humidity)
+                commands = plan.due_commands(now)
+                for command in commands:
+                    plan.record(command, now, sensors if command == "VMGI?" else "OK")
+                requests += len(commands)
+                if "VMGI?" in commands:
+                    shower_samples += shower
+                    if plan.adaptive is not None:
+                        plan.adaptive.observe(now, None, decode_sensors(sensors))
+                now += plan.next_poll_in(now)
+            return requests, shower_samples
+
+        fixed_requests, fixed_samples = simulate({"adaptive_polling": False})
+        adaptive_requests, adaptive_samples = simulate({})
+
+        assert adaptive_requests < fixed_requests * 0.6
+        assert adaptive_samples >= 2 * fixed_samples
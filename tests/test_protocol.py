@@ -0,0 +1,261 @@
+"""Test per la codifica e decodifica del protocollo VMC."""
+
+import pytest
+
+from custom_components.vmc_helty_flow.const import FILTER_MAX_HOURS
+from custom_components.vmc_helty_flow.protocol import (
+    FAN_SPEED_COMMANDS,
+    SensorsSnapshot,
+    StatusSnapshot,
+    apply_write_to_status,
+    changed_fields,
+    decode_sensors,
+    decode_status,
+    encode_command,
+    fan_speed_command,
+    light_level_command,
+    light_timer_command,
+    name_command,
+    network_command,
+    panel_led_command,
+    profile_commands,
+    sensors_command,
+    write_setting_key,
+    write_setting_value,
+)
+
+STATUS = "VMGO,3,00010,25,00000,1234,0,0,0,0,0,050,0,0,0,00120"
+SENSORS = "VMGI,215,180,456,850,0,0,0,0,0,0,120,0,0,0"
+
+
+class TestDecodeStatus:
+    """Test per la decodifica della risposta VMGO."""
+
+    def test_decodes_fields(self):
+        """I campi dello stato vengono convertiti in interi."""
+        status = decode_status(STATUS)
+        assert isinstance(status, StatusSnapshot)
+        assert status.fan_speed == 3
+        assert status.panel_led == 10
+        assert status.panel_led_on
+        assert status.sensors == 0
+        assert status.sensors_active
+        assert status.filter_hours == 1234
+        assert status.light_level == 50
+        assert status.light_timer == 120
+        assert status.is_complete
+
+    def test_short_frame_has_missing_fields(self):
+        """I campi assenti valgono None e il frame non è completo."""
+        status = decode_status("VMGO,2")
+        assert status is not None
+        assert status.fan_speed == 2
+        assert status.light_level is None
+        assert status.part_count == 2
+        assert not status.is_complete
+
+    def test_invalid_field_is_none(self):
+        """Un campo non numerico non invalida gli altri."""
+        status = decode_status("VMGO,x,00000,25,00002")
+        assert status is not None
+        assert status.fan_speed is None
+        assert not status.panel_led_on
+        assert not status.sensors_active
+
+    @pytest.mark.parametrize("frame", [None, "", "VMGI,1,2", "ERROR", 42])
+    def test_not_a_status(self, frame):
+        """Solo le risposte VMGO vengono decodificate."""
+        assert decode_status(frame) is None
+
+    def test_same_frame_is_decoded_once(self):
+        """Lo stesso frame restituisce lo stesso snapshot."""
+        assert decode_status(STATUS) is decode_status(STATUS)
+
+    def test_snapshot_is_immutable(self):
+        """Gli snapshot non possono essere modificati."""
+        status = decode_status(STATUS)
+        assert status is not None
+        with pytest.raises(AttributeError):
+            status.fan_speed = 4
+        with pytest.raises(AttributeError):
+            del status.fan_speed
+        with pytest.raises(AttributeError):
+            status.extra = 1  # type: ignore[attr-defined]
+
+
+class TestDecodeSensors:
+    """Test per la decodifica della risposta VMGI."""
+
+    def test_decodes_readings(self):
+        """Le letture in decimi vengono convertite."""
+        sensors = decode_sensors(SENSORS)
+        assert isinstance(sensors, SensorsSnapshot)
+        assert sensors.temperature_internal == 21.5
+        assert sensors.temperature_external == 18.0
+        assert sensors.humidity == 45.6
+        assert sensors.co2 == 850
+        assert sensors.voc == 120
+
+    def test_voc_zero_means_no_data(self):
+        """VOC = 0 indica l'assenza del dato."""
+        sensors = decode_sensors(SENSORS.replace(",120,", ",0,"))
+        assert sensors is not None
+        assert sensors.voc is None
+
+    @pytest.mark.parametrize("frame", [None, "", "VMGI,215,180", STATUS])
+    def test_incomplete_or_invalid(self, frame):
+        """Le letture sono valide solo con un frame VMGI completo."""
+        assert decode_sensors(frame) is None
+
+    def test_equality_on_frame(self):
+        """Due snapshot sono uguali se derivano dallo stesso frame."""
+        sensors = decode_sensors(SENSORS)
+        assert sensors == decode_sensors(SENSORS)
+        assert sensors != decode_status(STATUS)
+        assert hash(sensors) == hash(decode_sensors(SENSORS))
+
+
+class TestCommands:
+    """Test per la costruzione dei comandi."""
+
+    def test_command_builders(self):
+        """I comandi precostruiti rispettano il formato del protocollo."""
+        assert fan_speed_command(0) == "VMWH0000000"
+        assert fan_speed_command(5) == "VMWH0000005"
+        assert len(FAN_SPEED_COMMANDS) == 8
+        assert panel_led_command(True) == "VMWH0100010"
+        assert panel_led_command(False) == "VMWH0100000"
+        assert sensors_command(True) == "VMWH0300000"
+        assert sensors_command(False) == "VMWH0300002"
+        assert light_level_command(75) == "VMWH06075000"
+        assert light_level_command(0) == "VMWH06000000"
+        assert light_timer_command(300) == "VMWH1400300"
+
+    def test_unsupported_light_level(self):
+        """Un livello luci non supportato dal dispositivo non produce un comando."""
+        with pytest.raises(KeyError):
+            light_level_command(37)
+
+    def test_profile_commands(self):
+        """Un profilo produce solo le scritture delle impostazioni indicate."""
+        assert profile_commands({"fan_speed": 2, "light_timer": 0}) == [
+            "VMWH0000002",
+            "VMWH1400000",
+        ]
+        assert profile_commands(
+            {
+                "mode": "night_mode",
+                "fan_speed": 2,
+                "panel_led": False,
+                "sensors": True,
+                "light_level": 50,
+            }
+        ) == ["VMWH0000006", "VMWH0100000", "VMWH0300000", "VMWH06050000"]
+        assert profile_commands({}) == []
+
+    @pytest.mark.parametrize(
+        ("name", "command"),
+        [("Test_Device", "VMNM Test_Device"), ("Test Device@#$%", "VMNM TestDevice")],
+    )
+    def test_name_command_strips_unsupported_characters(self, name, command):
+        """Il nome inviato contiene solo lettere, cifre e "_"."""
+        assert name_command(name) == command
+
+    def test_network_command_padding(self):
+        """SSID e password vengono completati a 32 caratteri."""
+        command = network_command("casa", "password1")
+        assert command == f"VMSL {'casa'.ljust(32, '*')}{'password1'.ljust(32, '*')}"
+
+    @pytest.mark.parametrize(
+        ("command", "frame"),
+        [
+            ("VMGH?", b"VMGH?\n\r"),
+            ("VMGI?\n\r", b"VMGI?\n\r"),
+            ("VMWH0000003\r\n", b"VMWH0000003\n\r"),
+        ],
+    )
+    def test_encode_command(self, command, frame):
+        """I comandi vengono codificati con terminazione NLCR."""
+        assert encode_command(command) == frame
+
+    @pytest.mark.parametrize(
+        ("command", "key"),
+        [
+            ("VMWH0000003", "VMWH00"),
+            ("VMWH0605000\n\r", "VMWH06"),
+            ("VMNM Salotto", "VMNM Salotto"),
+        ],
+    )
+    def test_write_setting_key(self, command, key):
+        """La chiave identifica il registro scritto."""
+        assert write_setting_key(command) == key
+
+
+class TestWriteValues:
+    """Test per la lettura dei valori scritti e l'aggiornamento dello stato."""
+
+    STATUS = "VMGO,3,00010,25,00000,24,0,0,0,0,0,050,0,0,0,0"
+
+    @pytest.mark.parametrize(
+        ("command", "value"),
+        [
+            ("VMWH0000004", 4),
+            ("VMWH0100010", 10),
+            ("VMWH0607500\n\r", 75),
+            ("VMWH0600000", 0),
+            ("VMNM Salotto", None),
+        ],
+    )
+    def test_write_setting_value(self, command, value):
+        """Il valore viene estratto secondo il formato del registro."""
+        assert write_setting_value(command) == value
+
+    @pytest.mark.parametrize(
+        ("command", "index", "part"),
+        [
+            ("VMWH0000004", 1, "4"),
+            ("VMWH0100000", 2, "00000"),
+            ("VMWH0300002", 4, "00002"),
+            ("VMWH0610000", 11, "100"),
+        ],
+    )
+    def test_apply_write_to_status(self, command, index, part):
+        """Il campo scritto viene aggiornato mantenendo la larghezza."""
+        status = apply_write_to_status(self.STATUS, command)
+        assert status is not None
+        parts = status.split(",")
+        assert parts[index] == part
+        assert len(parts) == len(self.STATUS.split(","))
+
+    @pytest.mark.parametrize(
+        ("status", "command"),
+        [
+            (STATUS, f"VMWH04{FILTER_MAX_HOURS}"),
+            (STATUS, "VMWH1400300"),
+            ("", "VMWH0000004"),
+            ("VMGO,3", "VMWH0300002"),
+        ],
+    )
+    def test_apply_write_to_status_not_applicable(self, status, command):
+        """Registri non presenti o stati non validi non vengono modificati."""
+        assert apply_write_to_status(status, command) is None
+
+
+class TestChangedFields:
+    """Test per il confronto campo per campo degli snapshot."""
+
+    def test_same_frame(self):
+        """Lo stesso frame non ha campi cambiati."""
+        assert changed_fields(decode_status(STATUS), decode_status(STATUS)) == set()
+
+    def test_changed_field(self):
+        """Vengono riportati solo i campi diversi."""
+        other = decode_sensors(SENSORS.replace(",850,", ",900,"))
+        assert changed_fields(decode_sensors(SENSORS), other) == {"co2"}
+
+    def test_missing_snapshot(self):
+        """Uno snapshot mancante cambia tutti i campi."""
+        assert changed_fields(None, decode_sensors(SENSORS)) == set(
+            SensorsSnapshot.__slots__
+        )
+        assert changed_fields(None, None) == set()
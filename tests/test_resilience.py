@@ -0,0 +1,158 @@
+"""Test per gli strumenti di resilienza della comunicazione."""
+
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.vmc_helty_flow.resilience import (
+    BREAKER_CLOSED,
+    BREAKER_HALF_OPEN,
+    BREAKER_OPEN,
+    CircuitBreaker,
+    RttEstimator,
+)
+
+
+class TestRttEstimator:
+    """Test per lo stimatore del round-trip time."""
+
+    def test_initial_timeout_without_samples(self):
+        """Senza campioni viene usato il timeout iniziale."""
+        estimator = RttEstimator(min_timeout=1.0, max_timeout=10.0, initial_timeout=5)
+        assert estimator.timeout == 5
+        assert estimator.as_stored_dict() is None
+
+    def test_fast_device_gets_short_timeout(self):
+        """Un dispositivo veloce ottiene il timeout minimo."""
+        estimator = RttEstimator(min_timeout=1.0, max_timeout=10.0)
+        for _ in range(10):
+            estimator.observe(0.05)
+        assert estimator.srtt == pytest.approx(0.05)
+        assert estimator.timeout == 1.0
+
+    def test_slow_link_timeout_follows_variance(self):
+        """Un link lento e irregolare ottiene un timeout più lungo."""
+        estimator = RttEstimator(min_timeout=1.0, max_timeout=10.0)
+        for rtt in (1.0, 2.0, 1.0, 2.0):
+            estimator.observe(rtt)
+        assert 2.0 < estimator.timeout <= 10.0
+        assert estimator.timeout == pytest.approx(estimator.srtt + 4 * estimator.rttvar)
+
+    def test_timeout_is_bounded(self):
+        """Il timeout resta tra i limiti configurati."""
+        estimator = RttEstimator(min_timeout=1.0, max_timeout=3.0)
+        estimator.observe(30.0)
+        assert estimator.timeout == 3.0
+
+        estimator.set_bounds(1.0, 60.0)
+        assert estimator.timeout == 60.0
+
+    def test_backoff_after_timeouts(self):
+        """I timeout consecutivi allungano il timeout fino al prossimo campione."""
+        estimator = RttEstimator(min_timeout=0.1, max_timeout=2.0)
+        estimator.observe(0.2)
+        base = estimator.timeout
+
+        estimator.on_timeout()
+        assert estimator.timeout == pytest.approx(base * 2)
+        estimator.on_timeout()
+        estimator.on_timeout()
+        assert estimator.timeout == 2.0
+        assert estimator.timeouts == 3
+
+        estimator.observe(0.2)
+        assert estimator.timeout < base
+
+    def test_stored_state_round_trip(self):
+        """Lo stato salvato viene ripristinato in un nuovo stimatore."""
+        estimator = RttEstimator()
+        estimator.observe(0.3)
+        estimator.observe(0.5)
+
+        restored = RttEstimator()
+        restored.restore(estimator.as_stored_dict())
+
+        assert restored.srtt == pytest.approx(estimator.srtt, abs=1e-4)
+        assert restored.rttvar == pytest.approx(estimator.rttvar, abs=1e-4)
+        assert restored.samples == 2
+
+    @pytest.mark.parametrize("data", [None, {}, {"srtt": "bad"}])
+    def test_restore_ignores_invalid_data(self, data):
+        """Dati salvati mancanti o non validi vengono ignorati."""
+        estimator = RttEstimator()
+        estimator.restore(data)
+        assert estimator.srtt is None
+
+
+class TestCircuitBreaker:
+    """Test per il circuit breaker dei dispositivi."""
+
+    def test_opens_after_threshold(self):
+        """Il circuito si apre dopo il numero di errori configurato."""
+        breaker = CircuitBreaker(failure_threshold=3, base_delay=30, jitter=0)
+        assert breaker.record_failure() is False
+        assert breaker.record_failure() is False
+        assert breaker.record_failure() is True
+
+        assert breaker.state == BREAKER_OPEN
+        assert breaker.last_delay == 30
+        assert breaker.allow_request() is False
+        assert breaker.rejected == 1
+
+    def test_half_open_after_delay(self):
+        """Scaduta l'attesa è consentito un solo tentativo di prova."""
+        breaker = CircuitBreaker(failure_threshold=1, base_delay=30, jitter=0)
+        with patch("time.monotonic", return_value=1000.0):
+            breaker.record_failure()
+        with patch("time.monotonic", return_value=1031.0):
+            assert breaker.retry_in == 0
+            assert breaker.allow_request() is True
+        assert breaker.state == BREAKER_HALF_OPEN
+
+    def test_half_open_failure_doubles_delay(self):
+        """Un tentativo di prova fallito riapre il circuito con attesa doppia."""
+        breaker = CircuitBreaker(
+            failure_threshold=1, base_delay=30, max_delay=100, jitter=0
+        )
+        breaker.record_failure()
+        delays = [breaker.last_delay]
+        for _ in range(3):
+            breaker.state = BREAKER_HALF_OPEN
+            breaker.record_failure()
+            delays.append(breaker.last_delay)
+        assert delays == [30, 60, 100, 100]
+
+    def test_success_closes_circuit(self):
+        """Un tentativo riuscito chiude il circuito e azzera il backoff."""
+        breaker = CircuitBreaker(failure_threshold=1, base_delay=30, jitter=0)
+        breaker.record_failure()
+        breaker.state = BREAKER_HALF_OPEN
+        breaker.record_success()
+
+        assert breaker.state == BREAKER_CLOSED
+        assert breaker.failures == 0
+        assert breaker.trips == 0
+        assert breaker.allow_request() is True
+
+    def test_jitter_spreads_delay(self):
+        """Il jitter varia l'attesa entro i limiti configurati."""
+        delays = set()
+        for _ in range(20):
+            breaker = CircuitBreaker(failure_threshold=1, base_delay=100, jitter=0.2)
+            breaker.record_failure()
+            assert 80 <= breaker.last_delay <= 120
+            delays.add(breaker.last_delay)
+        assert len(delays) > 1
+
+    def test_as_dict(self):
+        """Lo stato esposto nei diagnostics."""
+        breaker = CircuitBreaker()
+        assert breaker.as_dict() == {
+            "state": "closed",
+            "consecutive_failures": 0,
+            "consecutive_trips": 0,
+            "total_trips": 0,
+            "rejected_attempts": 0,
+            "last_delay_s": 0.0,
+            "retry_in_s": 0.0,
+        }
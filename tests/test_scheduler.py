@@ -0,0 +1,454 @@
+"""Test per lo scheduler dei comandi."""
+
+import asyncio
+import itertools
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.vmc_helty_flow.scheduler import (
+    PRIORITY_POLL,
+    PRIORITY_USER,
+    CommandScheduler,
+    PollScheduler,
+    TokenBucket,
+    WriteCoalescer,
+    command_priority,
+    is_redundant_write,
+)
+
+
+class TestCommandPriority:
+    """Test per la classificazione dei comandi."""
+
+    @pytest.mark.parametrize("command", ["VMGH?", "VMGI?", "VMNM?", "VMSL?\n\r"])
+    def test_queries_are_poll_priority(self, command):
+        """Le interrogazioni vanno nella corsia di polling."""
+        assert command_priority(command) == PRIORITY_POLL
+
+    @pytest.mark.parametrize("command", ["VMWH0000003", "VMNM Salotto", "VMWH0417744"])
+    def test_writes_are_user_priority(self, command):
+        """Le scritture vanno nella corsia utente."""
+        assert command_priority(command) == PRIORITY_USER
+
+
+class TestTokenBucket:
+    """Test per il rate limiter token-bucket."""
+
+    def test_burst_is_free(self):
+        """I primi `burst` comandi non attendono."""
+        bucket = TokenBucket(rate=2.0, burst=3)
+        with patch("time.monotonic", return_value=100.0):
+            bucket._updated = 100.0
+            assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+            assert bucket.reserve() == pytest.approx(0.5)
+            assert bucket.reserve() == pytest.approx(1.0)
+
+    def test_tokens_refill_over_time(self):
+        """I token si ricaricano in base al tempo trascorso."""
+        bucket = TokenBucket(rate=2.0, burst=1)
+        with patch("time.monotonic", return_value=100.0):
+            bucket._updated = 100.0
+            assert bucket.reserve() == 0.0
+        with patch("time.monotonic", return_value=100.5):
+            assert bucket.reserve() == 0.0
+
+    def test_zero_rate_disables_limit(self):
+        """Un rate pari a zero disabilita il limite."""
+        bucket = TokenBucket(rate=0, burst=1)
+        assert all(bucket.reserve() == 0.0 for _ in range(10))
+
+
+class TestCommandScheduler:
+    """Test per lo scheduler con corsie di priorità."""
+
+    @pytest.mark.asyncio
+    async def test_serializes_access(self):
+        """Un solo comando alla volta accede al dispositivo."""
+        scheduler = CommandScheduler(rate_limit=0)
+        active = 0
+        peak = 0
+
+        async def command():
+            nonlocal active, peak
+            async with scheduler.async_slot(PRIORITY_POLL):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0)
+                active -= 1
+
+        await asyncio.gather(*(command() for _ in range(5)))
+        assert peak == 1
+
+    @pytest.mark.asyncio
+    async def test_user_lane_served_before_poll_lane(self):
+        """Le scritture utente in attesa passano davanti ai poll."""
+        scheduler = CommandScheduler(rate_limit=0)
+        order: list[str] = []
+        release = asyncio.Event()
+
+        async def holder():
+            async with scheduler.async_slot(PRIORITY_POLL):
+                await release.wait()
+
+        async def command(name, priority):
+            async with scheduler.async_slot(priority):
+                order.append(name)
+
+        holder_task = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        tasks = [
+            asyncio.create_task(command("poll-1", PRIORITY_POLL)),
+            asyncio.create_task(command("poll-2", PRIORITY_POLL)),
+            asyncio.create_task(command("user", PRIORITY_USER)),
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.queue_depth == 3
+
+        release.set()
+        await asyncio.gather(holder_task, *tasks)
+        assert order == ["user", "poll-1", "poll-2"]
+        assert scheduler.queue_depth == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_block_queue(self):
+        """Un comando annullato in coda non blocca i successivi."""
+        scheduler = CommandScheduler(rate_limit=0)
+        release = asyncio.Event()
+        done: list[str] = []
+
+        async def holder():
+            async with scheduler.async_slot(PRIORITY_POLL):
+                await release.wait()
+
+        async def command(name):
+            async with scheduler.async_slot(PRIORITY_USER):
+                done.append(name)
+
+        holder_task = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(command("cancelled"))
+        survivor = asyncio.create_task(command("survivor"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        release.set()
+
+        await asyncio.gather(holder_task, survivor)
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert done == ["survivor"]
+
+    @pytest.mark.asyncio
+    async def test_statistics(self):
+        """Le statistiche riportano code e attese per corsia."""
+        scheduler = CommandScheduler(rate_limit=5.0, burst=2)
+
+        async with scheduler.async_slot(PRIORITY_USER):
+            pass
+        async with scheduler.async_slot(PRIORITY_POLL):
+            pass
+
+        stats = scheduler.as_dict()
+        assert stats["queue_depth"] == 0
+        assert stats["rate_limit"] == 5.0
+        assert stats["burst"] == 2
+        assert stats["lanes"]["user"]["commands"] == 1
+        assert stats["lanes"]["poll"]["commands"] == 1
+        assert stats["lanes"]["poll"]["max_wait_ms"] >= 0
+
+    def test_set_rate_limit(self):
+        """Il rate limit può essere aggiornato a runtime."""
+        scheduler = CommandScheduler()
+        scheduler.set_rate_limit(0.5, burst=1)
+        stats = scheduler.as_dict()
+        assert stats["rate_limit"] == 0.5
+        assert stats["burst"] == 1
+
+
+class TestPollScheduler:
+    """Test per lo scheduler globale dei poll."""
+
+    @pytest.mark.asyncio
+    async def test_caps_concurrent_polls(self):
+        """Non più di max_concurrent poll sono in corso insieme."""
+        scheduler = PollScheduler(max_concurrent=3)
+        active = 0
+        peak = 0
+
+        async def poll():
+            nonlocal active, peak
+            async with scheduler.async_slot():
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0)
+                active -= 1
+
+        await asyncio.gather(*(poll() for _ in range(20)))
+        assert peak == 3
+        stats = scheduler.as_dict()
+        assert stats["in_flight"] == 0
+        assert stats["max_waiting"] == 17
+        assert stats["lanes"]["healthy"]["commands"] == 20
+
+    @pytest.mark.asyncio
+    async def test_recovering_devices_do_not_starve_healthy_ones(self):
+        """I dispositivi in errore occupano al massimo max_recovering posti."""
+        scheduler = PollScheduler(max_concurrent=2, max_recovering=1)
+        release = asyncio.Event()
+        order: list[str] = []
+
+        async def poll(name, recovering):
+            async with scheduler.async_slot(recovering):
+                order.append(name)
+                await release.wait()
+
+        tasks = [
+            asyncio.create_task(poll("timeout-1", True)),
+            asyncio.create_task(poll("timeout-2", True)),
+            asyncio.create_task(poll("healthy", False)),
+        ]
+        await asyncio.sleep(0)
+        # Il secondo dispositivo in errore attende, quello sano parte subito
+        assert order == ["timeout-1", "healthy"]
+        assert scheduler.as_dict()["waiting"] == 1
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert order == ["timeout-1", "healthy", "timeout-2"]
+        assert scheduler.as_dict()["lanes"]["recovering"]["commands"] == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_releases_its_turn(self):
+        """Un poll annullato in attesa non blocca i successivi."""
+        scheduler = PollScheduler(max_concurrent=1)
+        release = asyncio.Event()
+        done: list[str] = []
+
+        async def poll(name):
+            async with scheduler.async_slot():
+                done.append(name)
+                await release.wait()
+
+        holder = asyncio.create_task(poll("holder"))
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(poll("cancelled"))
+        survivor = asyncio.create_task(poll("survivor"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        release.set()
+
+        await asyncio.gather(holder, survivor)
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert done == ["holder", "survivor"]
+        assert scheduler.as_dict()["in_flight"] == 0
+
+    def test_phases_spread_devices_across_interval(self):
+        """Il primo poll di ogni dispositivo viene sfasato nell'intervallo."""
+        scheduler = PollScheduler()
+        devices = [f"192.168.1.{index}" for index in range(20)]
+        for device in devices:
+            scheduler.add_device(device)
+
+        delays = sorted(scheduler.stagger(device, 180) for device in devices)
+        assert delays[0] == 180
+        assert delays[-1] < 360
+        # Nessuna coppia di dispositivi parte a meno di 3 secondi di distanza
+        assert min(b - a for a, b in itertools.pairwise(delays)) > 3
+
+        # Una volta sfasati, gli intervalli successivi non cambiano
+        assert scheduler.stagger(devices[5], 180) == 180
+
+    def test_readding_device_keeps_phase(self):
+        """Dopo un ripristino il dispositivo torna alla propria fase."""
+        scheduler = PollScheduler()
+        scheduler.add_device("a")
+        scheduler.add_device("b")
+        first = scheduler.stagger("b", 100)
+
+        scheduler.add_device("b")
+        assert scheduler.stagger("b", 100) == first
+        assert scheduler.as_dict("b")["phase"] == round(first / 100 - 1, 3)
+
+        scheduler.remove_device("b")
+        assert scheduler.as_dict()["devices"] == 1
+        assert scheduler.stagger("b", 100) == 100
+
+
+class TestRedundantWrites:
+    """Test per il filtro delle scritture ridondanti."""
+
+    STATUS = "VMGO,3,00010,25,00000,24"
+
+    def _data(self, updated=100.0, status=STATUS):
+        return {"status": status, "last_update": updated}
+
+    @pytest.mark.parametrize(
+        ("command", "redundant"),
+        [
+            ("VMWH0000003", True),
+            ("VMWH0000002", False),
+            ("VMWH0100010", True),
+            ("VMWH0100000", False),
+            ("VMWH0300000", True),
+            ("VMWH0300002", False),
+            ("VMWH0605000", False),  # Registro senza corrispondenza nello stato
+            ("VMNM Salotto", False),
+        ],
+    )
+    def test_compares_with_latest_status(self, command, redundant):
+        """La scrittura è ridondante se il valore coincide con lo stato."""
+        assert is_redundant_write(command, self._data(), now=110.0) is redundant
+
+    def test_stale_status_is_not_trusted(self):
+        """Uno stato più vecchio di max_age non basta per saltare la scrittura."""
+        data = self._data(updated=100.0)
+        assert is_redundant_write("VMWH0000003", data, max_age=60, now=150.0)
+        assert not is_redundant_write("VMWH0000003", data, max_age=60, now=161.0)
+
+    def test_status_read_before_last_write_is_not_trusted(self):
+        """Uno stato letto prima dell'ultima scrittura sul registro è superato."""
+        data = self._data(updated=100.0)
+        assert not is_redundant_write("VMWH0000003", data, last_write=105.0, now=110.0)
+
+    @pytest.mark.parametrize(
+        "data", [None, {}, {"status": STATUS}, {"status": "", "last_update": 100.0}]
+    )
+    def test_missing_status_is_not_redundant(self, data):
+        """Senza uno stato valido la scrittura viene sempre inviata."""
+        assert not is_redundant_write("VMWH0000003", data, now=110.0)
+
+    @pytest.mark.asyncio
+    async def test_coalescer_tracks_writes_and_skips(self):
+        """Dopo una scrittura serve un nuovo stato per saltare la successiva."""
+        coalescer = WriteCoalescer()
+
+        async def send():
+            return "OK"
+
+        with patch("time.time", return_value=100.0):
+            assert coalescer.is_redundant("VMWH0000003", self._data(updated=90.0))
+            await coalescer.async_write("VMWH00", send)
+            assert not coalescer.is_redundant("VMWH0000003", self._data(updated=90.0))
+        assert coalescer.as_dict()["skipped"] == 1
+
+
+class TestWriteCoalescer:
+    """Test per l'accorpamento delle scritture."""
+
+    @pytest.mark.asyncio
+    async def test_single_write_is_sent_immediately(self):
+        """Una scrittura isolata viene inviata senza ritardi."""
+        coalescer = WriteCoalescer()
+        sent: list[str] = []
+
+        async def send():
+            sent.append("1")
+            return "OK"
+
+        assert await coalescer.async_write("VMWH00", send) == "OK"
+        assert sent == ["1"]
+        assert coalescer.as_dict() == {
+            "writes": 1,
+            "sent": 1,
+            "coalesced": 0,
+            "skipped": 0,
+        }
+
+    @pytest.mark.asyncio
+    async def test_rapid_writes_send_leading_and_latest_value(self):
+        """Le scritture durante un invio collassano nell'ultimo valore."""
+        coalescer = WriteCoalescer()
+        release = asyncio.Event()
+        sent: list[str] = []
+
+        def sender(value):
+            async def send():
+                sent.append(value)
+                await release.wait()
+                return f"OK{value}"
+
+            return send
+
+        tasks = [asyncio.create_task(coalescer.async_write("VMWH00", sender("1")))]
+        await asyncio.sleep(0)
+        tasks += [
+            asyncio.create_task(coalescer.async_write("VMWH00", sender(value)))
+            for value in ("2", "3", "4")
+        ]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*tasks) == ["OK1", "OK4", "OK4", "OK4"]
+        assert sent == ["1", "4"]
+        assert coalescer.as_dict()["coalesced"] == 2
+
+    @pytest.mark.asyncio
+    async def test_different_settings_are_independent(self):
+        """Scritture su impostazioni diverse non vengono accorpate."""
+        coalescer = WriteCoalescer()
+        sent: list[str] = []
+
+        def sender(value):
+            async def send():
+                sent.append(value)
+                await asyncio.sleep(0)
+                return "OK"
+
+            return send
+
+        await asyncio.gather(
+            coalescer.async_write("VMWH00", sender("fan")),
+            coalescer.async_write("VMWH06", sender("light")),
+        )
+        assert sorted(sent) == ["fan", "light"]
+
+    @pytest.mark.asyncio
+    async def test_error_propagates_to_coalesced_callers(self):
+        """Un errore di invio raggiunge tutti i chiamanti accorpati."""
+        coalescer = WriteCoalescer()
+        release = asyncio.Event()
+
+        async def first():
+            await release.wait()
+            return "OK"
+
+        async def failing():
+            raise OSError("boom")
+
+        leading = asyncio.create_task(coalescer.async_write("VMWH00", first))
+        await asyncio.sleep(0)
+        trailing = [
+            asyncio.create_task(coalescer.async_write("VMWH00", failing))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await leading == "OK"
+        results = await asyncio.gather(*trailing, return_exceptions=True)
+        assert all(isinstance(result, OSError) for result in results)
+        assert coalescer.sent == 2
+
+    @pytest.mark.asyncio
+    async def test_cancel_stops_pending_writes(self):
+        """L'annullamento interrompe l'invio in corso e avvisa i chiamanti."""
+        coalescer = WriteCoalescer()
+        started = asyncio.Event()
+
+        async def send():
+            started.set()
+            await asyncio.Event().wait()
+            return "OK"
+
+        writes = [asyncio.create_task(coalescer.async_write("VMWH00", send))]
+        await started.wait()
+        writes.append(asyncio.create_task(coalescer.async_write("VMWH00", send)))
+        writes.append(asyncio.create_task(coalescer.async_write("VMWH06", send)))
+        await asyncio.sleep(0)
+
+        await coalescer.async_cancel()
+
+        results = await asyncio.gather(*writes, return_exceptions=True)
+        assert all(isinstance(result, asyncio.CancelledError) for result in results)
+        assert not coalescer._pending
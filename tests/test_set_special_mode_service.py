@@ -1,11 +1,11 @@
 """Test the set_special_mode service functionality."""
 
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock
 
 from homeassistant.core import ServiceCall
 
 import custom_components.vmc_helty_flow as vmc_module
-from custom_components.vmc_helty_flow.const import DEFAULT_PORT, DOMAIN
+from custom_components.vmc_helty_flow.const import DOMAIN
 
 
 class TestSetSpecialModeService:
@@ -58,6 +58,7 @@ class TestSetSpecialModeService:
         # Set coordinator IP as string (not AsyncMock)
         mock_coordinator.ip = "192.168.1.100"
         mock_coordinator.async_request_refresh = AsyncMock()
+        mock_coordinator.async_write = AsyncMock(return_value="OK")
 
         # Mock entity entry
         mock_entity_entry = MagicMock()
@@ -85,17 +86,10 @@ class TestSetSpecialModeService:
             data={"entity_id": "fan.vmc_helty_test", "mode": "hyperventilation"},
         )
 
-        # Mock tcp_send_command since the service now uses it directly
-        with patch("custom_components.vmc_helty_flow.tcp_send_command") as mock_tcp:
-            mock_tcp.return_value = "OK"
+        # Il servizio scrive tramite il coordinatore (scrittura + VMGH?)
+        await handler(call)
 
-            # Call the handler directly
-            await handler(call)
-
-            # Verify tcp_send_command was called with correct parameters
-            mock_tcp.assert_called_once_with(
-                "192.168.1.100", DEFAULT_PORT, "VMWH0000005"
-            )
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH0000005")
 
     async def test_special_mode_mappings(self):
         """Test that the mode mappings are correct."""
@@ -0,0 +1,75 @@
+"""Test per i dati persistenti del dispositivo."""
+
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from custom_components.vmc_helty_flow.storage import (
+    STORAGE_SAVE_DELAY,
+    VmcHeltyStorage,
+)
+
+
+@pytest.fixture
+def mock_store():
+    """Crea uno Store mock."""
+    store = Mock()
+    store.async_load = AsyncMock(return_value={"timing": {"connect": None}})
+    store.async_save = AsyncMock()
+    store.async_remove = AsyncMock()
+    with patch(
+        "custom_components.vmc_helty_flow.storage.Store", return_value=store
+    ) as mock_store_class:
+        yield store, mock_store_class
+
+
+class TestVmcHeltyStorage:
+    """Test per l'archivio persistente per config entry."""
+
+    @pytest.mark.asyncio
+    async def test_load_and_get(self, mock_store):
+        """I dati caricati sono disponibili per sezione."""
+        _, mock_store_class = mock_store
+        storage = VmcHeltyStorage(Mock(), "entry_1")
+        await storage.async_load()
+
+        assert mock_store_class.call_args.args[2] == "vmc_helty_flow.entry_1"
+        assert storage.get("timing") == {"connect": None}
+        assert storage.get("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_load_without_data(self, mock_store):
+        """Un archivio vuoto non genera errori."""
+        store, _ = mock_store
+        store.async_load.return_value = None
+        storage = VmcHeltyStorage(Mock(), "entry_1")
+        await storage.async_load()
+        assert storage.get("timing") is None
+
+    @pytest.mark.asyncio
+    async def test_save_collects_registered_sections(self, mock_store):
+        """Il salvataggio raccoglie lo stato corrente delle sezioni registrate."""
+        store, _ = mock_store
+        storage = VmcHeltyStorage(Mock(), "entry_1")
+        await storage.async_load()
+        storage.register("snapshot", lambda: {"status": "VMGO,1"})
+
+        await storage.async_save()
+
+        store.async_save.assert_awaited_once_with(
+            {"timing": {"connect": None}, "snapshot": {"status": "VMGO,1"}}
+        )
+
+    def test_schedule_save_is_delayed(self, mock_store):
+        """Il salvataggio pianificato usa il ritardo configurato."""
+        store, _ = mock_store
+        storage = VmcHeltyStorage(Mock(), "entry_1")
+        storage.async_schedule_save()
+        assert store.async_delay_save.call_args.args[1] == STORAGE_SAVE_DELAY
+
+    @pytest.mark.asyncio
+    async def test_remove(self, mock_store):
+        """La rimozione cancella l'archivio."""
+        store, _ = mock_store
+        await VmcHeltyStorage(Mock(), "entry_1").async_remove()
+        store.async_remove.assert_awaited_once()
@@ -1,6 +1,7 @@
 """Tests for switch module."""
 
-from unittest.mock import AsyncMock, MagicMock, patch
+import time
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from homeassistant.config_entries import ConfigEntry
@@ -27,6 +28,7 @@ def mock_coordinator():
         "temperature": 22.5,
     }
     coordinator.async_request_refresh = AsyncMock()
+    coordinator.async_write = AsyncMock(return_value="OK")
     return coordinator
 
 
@@ -164,64 +166,80 @@ class TestVmcHeltyModeSwitch:
         assert switch_entity.is_on is False
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.switch.tcp_send_command")
-    async def test_async_turn_on_success(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_on_success(self, mock_coordinator):
         """Test async_turn_on with successful command."""
-        mock_tcp_send.return_value = "OK"
+        mock_coordinator.async_write.return_value = "OK"
         switch_entity = VmcHeltyModeSwitch(mock_coordinator, "hyperventilation", "Test")
 
         await switch_entity.async_turn_on()
 
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH0000005")
-        mock_coordinator.async_request_refresh.assert_called_once()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH0000005")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.switch.tcp_send_command")
-    async def test_async_turn_on_failure(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_on_failure(self, mock_coordinator):
         """Test async_turn_on with failed command."""
-        mock_tcp_send.return_value = "ERROR"
+        mock_coordinator.async_write.return_value = "ERROR"
         switch_entity = VmcHeltyModeSwitch(mock_coordinator, "hyperventilation", "Test")
 
         await switch_entity.async_turn_on()
 
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH0000005")
-        # Should not refresh on non-OK response
-        mock_coordinator.async_request_refresh.assert_not_called()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH0000005")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.switch.tcp_send_command")
-    async def test_async_turn_on_exception(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_on_exception(self, mock_coordinator):
         """Test async_turn_on with exception."""
-        mock_tcp_send.side_effect = Exception("Connection error")
+        mock_coordinator.async_write.side_effect = Exception("Connection error")
         switch_entity = VmcHeltyModeSwitch(mock_coordinator, "hyperventilation", "Test")
 
         with pytest.raises(Exception, match="Connection error"):
             await switch_entity.async_turn_on()
 
-        mock_coordinator.async_request_refresh.assert_not_called()
-
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.switch.tcp_send_command")
-    async def test_async_turn_off_success(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_off_success(self, mock_coordinator):
         """Test async_turn_off with successful command."""
-        mock_tcp_send.return_value = "OK"
+        mock_coordinator.async_write.return_value = "OK"
         switch_entity = VmcHeltyModeSwitch(mock_coordinator, "hyperventilation", "Test")
 
         await switch_entity.async_turn_off()
 
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH0000001")
-        mock_coordinator.async_request_refresh.assert_called_once()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH0000001")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.switch.tcp_send_command")
-    async def test_async_turn_off_exception(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_off_exception(self, mock_coordinator):
         """Test async_turn_off with exception."""
-        mock_tcp_send.side_effect = Exception("Connection error")
+        mock_coordinator.async_write.side_effect = Exception("Connection error")
         switch_entity = VmcHeltyModeSwitch(mock_coordinator, "hyperventilation", "Test")
 
         with pytest.raises(Exception, match="Connection error"):
             await switch_entity.async_turn_off()
 
+    @pytest.mark.asyncio
+    async def test_async_turn_on_skipped_when_already_active(self, mock_coordinator):
+        """Test async_turn_on skips the write when the mode is already active."""
+        mock_coordinator.data = {
+            "status": "VMGO,5,00010,25,00000,24",
+            "last_update": time.time(),
+        }
+        switch_entity = VmcHeltyModeSwitch(mock_coordinator, "hyperventilation", "Test")
+
+        await switch_entity.async_turn_on()
+
+        mock_coordinator.async_write.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_async_turn_on_sent_when_status_is_stale(self, mock_coordinator):
+        """Test async_turn_on is sent when the last status is too old."""
+        mock_coordinator.async_write.return_value = "OK"
+        mock_coordinator.data = {
+            "status": "VMGO,5,00010,25,00000,24",
+            "last_update": time.time() - 3600,
+        }
+        switch_entity = VmcHeltyModeSwitch(mock_coordinator, "hyperventilation", "Test")
+
+        await switch_entity.async_turn_on()
+
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH0000005")
+
 
 class TestVmcHeltyPanelLedSwitch:
     """Test VmcHeltyPanelLedSwitch class."""
@@ -275,44 +293,38 @@ class TestVmcHeltyPanelLedSwitch:
         assert switch_entity.is_on is False
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.switch.tcp_send_command")
-    async def test_async_turn_on_success(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_on_success(self, mock_coordinator):
         """Test async_turn_on with successful command."""
-        mock_tcp_send.return_value = "OK"
+        mock_coordinator.async_write.return_value = "OK"
         switch_entity = VmcHeltyPanelLedSwitch(mock_coordinator)
 
         await switch_entity.async_turn_on()
 
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH0100010")
-        mock_coordinator.async_request_refresh.assert_called_once()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH0100010")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.switch.tcp_send_command")
-    async def test_async_turn_off_success(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_off_success(self, mock_coordinator):
         """Test async_turn_off with successful command."""
-        mock_tcp_send.return_value = "OK"
+        mock_coordinator.async_write.return_value = "OK"
         switch_entity = VmcHeltyPanelLedSwitch(mock_coordinator)
 
         await switch_entity.async_turn_off()
 
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH0100000")
-        mock_coordinator.async_request_refresh.assert_called_once()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH0100000")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.switch.tcp_send_command")
-    async def test_async_turn_on_exception(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_on_exception(self, mock_coordinator):
         """Test async_turn_on with exception."""
-        mock_tcp_send.side_effect = Exception("Connection error")
+        mock_coordinator.async_write.side_effect = Exception("Connection error")
         switch_entity = VmcHeltyPanelLedSwitch(mock_coordinator)
 
         with pytest.raises(Exception, match="Connection error"):
             await switch_entity.async_turn_on()
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.switch.tcp_send_command")
-    async def test_async_turn_off_exception(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_off_exception(self, mock_coordinator):
         """Test async_turn_off with exception."""
-        mock_tcp_send.side_effect = Exception("Connection error")
+        mock_coordinator.async_write.side_effect = Exception("Connection error")
         switch_entity = VmcHeltyPanelLedSwitch(mock_coordinator)
 
         with pytest.raises(Exception, match="Connection error"):
@@ -371,44 +383,38 @@ class TestVmcHeltySensorsSwitch:
         assert switch_entity.is_on is True
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.switch.tcp_send_command")
-    async def test_async_turn_on_success(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_on_success(self, mock_coordinator):
         """Test async_turn_on with successful command."""
-        mock_tcp_send.return_value = "OK"
+        mock_coordinator.async_write.return_value = "OK"
         switch_entity = VmcHeltySensorsSwitch(mock_coordinator)
 
         await switch_entity.async_turn_on()
 
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH0300000")
-        mock_coordinator.async_request_refresh.assert_called_once()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH0300000")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.switch.tcp_send_command")
-    async def test_async_turn_off_success(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_off_success(self, mock_coordinator):
         """Test async_turn_off with successful command."""
-        mock_tcp_send.return_value = "OK"
+        mock_coordinator.async_write.return_value = "OK"
         switch_entity = VmcHeltySensorsSwitch(mock_coordinator)
 
         await switch_entity.async_turn_off()
 
-        mock_tcp_send.assert_called_once_with("192.168.1.100", 5001, "VMWH0300002")
-        mock_coordinator.async_request_refresh.assert_called_once()
+        mock_coordinator.async_write.assert_awaited_once_with("VMWH0300002")
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.switch.tcp_send_command")
-    async def test_async_turn_on_exception(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_on_exception(self, mock_coordinator):
         """Test async_turn_on with exception."""
-        mock_tcp_send.side_effect = Exception("Connection error")
+        mock_coordinator.async_write.side_effect = Exception("Connection error")
         switch_entity = VmcHeltySensorsSwitch(mock_coordinator)
 
         with pytest.raises(Exception, match="Connection error"):
             await switch_entity.async_turn_on()
 
     @pytest.mark.asyncio
-    @patch("custom_components.vmc_helty_flow.switch.tcp_send_command")
-    async def test_async_turn_off_exception(self, mock_tcp_send, mock_coordinator):
+    async def test_async_turn_off_exception(self, mock_coordinator):
         """Test async_turn_off with exception."""
-        mock_tcp_send.side_effect = Exception("Connection error")
+        mock_coordinator.async_write.side_effect = Exception("Connection error")
         switch_entity = VmcHeltySensorsSwitch(mock_coordinator)
 
         with pytest.raises(Exception, match="Connection error"):
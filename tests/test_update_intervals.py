@@ -8,11 +8,14 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
 from custom_components.vmc_helty_flow.const import (
+    DEVICE_INFO_TTL,
     NETWORK_INFO_UPDATE_INTERVAL,
     SENSORS_UPDATE_INTERVAL,
 )
 from custom_components.vmc_helty_flow.coordinator import VmcHeltyCoordinator
 from custom_components.vmc_helty_flow.helpers import VMCConnectionError
+from custom_components.vmc_helty_flow.poll_plan import build_poll_plan
+from custom_components.vmc_helty_flow.scheduler import PollScheduler
 
 
 @pytest.fixture
@@ -32,7 +35,7 @@ def mock_config_entry():
         "ip": "192.168.1.100",
         "name": "Test VMC",
     }
-    config_entry.options = {"scan_interval": 60}
+    config_entry.options = {"scan_interval": 60, "adaptive_polling": False}
     return config_entry
 
 
@@ -48,104 +51,88 @@ def coordinator(mock_hass, mock_config_entry):
         return coord
 
 
+SENSORS_RESPONSE = (
+    "VMGI,00251,00254,00510,00510,16384,05839,00249,"
+    "00112,04354,00140,00203,00249,00510,00000,00001"
+)
+
+
 class TestUpdateIntervals:
     """Test per gli intervalli di aggiornamento differenziati."""
 
-    @pytest.mark.asyncio
-    async def test_sensors_always_updated(self, coordinator):
-        """Test che i sensori vengano sempre aggiornati."""
-        sensors_response = (
-            "VMGI,00251,00254,00510,00510,16384,05839,00249,"
-            "00112,04354,00140,00203,00249,00510,00000,00001"
-        )
+    def test_sensors_updated_when_due(self, coordinator):
+        """Test che i sensori vengano letti quando il piano li richiede."""
+        current_time = time.time()
+        coordinator.poll_plan.record("VMNM?", current_time, "VMNM,Test")
+        coordinator.poll_plan.record("VMSL?", current_time, "net")
 
-        with patch(
-            "custom_components.vmc_helty_flow.coordinator.tcp_send_command"
-        ) as mock_tcp:
-            mock_tcp.return_value = sensors_response
+        commands = coordinator._build_poll_commands(current_time)
+        assert commands == ["VMGH?", "VMGI?"]
 
-            result = await coordinator._get_additional_data()
+        result = coordinator._get_additional_data(
+            {"VMGH?": "VMGO,1", "VMGI?": SENSORS_RESPONSE}
+        )
 
-            # I sensori devono essere sempre aggiornati
-            assert result["sensors"] is not None
-            assert result["sensors"].startswith("VMGI")
+        # I sensori devono essere sempre aggiornati
+        assert result["sensors"] is not None
+        assert result["sensors"].startswith("VMGI")
 
-    @pytest.mark.asyncio
-    async def test_network_info_cached_when_not_time(self, coordinator):
+    def test_network_info_cached_when_not_time(self, coordinator):
         """Test cache quando non è ora di aggiornare."""
         current_time = time.time()
 
         # Simula che l'ultimo aggiornamento sia avvenuto poco fa
-        coordinator._last_name_update = current_time - 60  # 1 minuto fa
-        coordinator._last_network_update = current_time - 60  # 1 minuto fa
+        coordinator.poll_plan.record("VMNM?", current_time - 60, "VMNM,Test")
+        coordinator.poll_plan.record("VMSL?", current_time - 60, "net")
         coordinator._cached_data = {
             "name": "VMNM cached_device",
             "network": "cached_network_data",
         }
 
-        sensors_response = (
-            "VMGI,00251,00254,00510,00510,16384,05839,00249,"
-            "00112,04354,00140,00203,00249,00510,00000,00001"
-        )
+        # Solo stato e sensori vengono interrogati
+        commands = coordinator._build_poll_commands(current_time)
+        assert commands == ["VMGH?", "VMGI?"]
 
-        with patch(
-            "custom_components.vmc_helty_flow.coordinator.tcp_send_command"
-        ) as mock_tcp:
-            mock_tcp.return_value = sensors_response
-
-            with patch("time.time", return_value=current_time):
-                result = await coordinator._get_additional_data()
-
-                # Solo i sensori dovrebbero essere aggiornati
-                assert result["sensors"] is not None
-                assert result["name"] == "VMNM cached_device"  # Dalla cache
-                assert result["network"] == "cached_network_data"  # Dalla cache
+        result = coordinator._get_additional_data(
+            {"VMGH?": "VMGO,1", "VMGI?": SENSORS_RESPONSE}
+        )
 
-                # tcp_send_command chiamato solo per i sensori
-                assert mock_tcp.call_count == 1
-                mock_tcp.assert_called_with(coordinator.ip, 5001, "VMGI?")
+        assert result["sensors"] is not None
+        assert result["name"] == "VMNM cached_device"  # Dalla cache
+        assert result["network"] == "cached_network_data"  # Dalla cache
 
-    @pytest.mark.asyncio
-    async def test_network_info_updated_after_interval(self, coordinator):
+    def test_network_info_updated_after_interval(self, coordinator):
         """Test aggiornamento dopo l'intervallo."""
         current_time = time.time()
 
         # Simula che l'ultimo aggiornamento sia avvenuto più dell'intervallo fa
-        old_time = current_time - NETWORK_INFO_UPDATE_INTERVAL - 10
-        coordinator._last_name_update = old_time
-        coordinator._last_network_update = old_time
-
-        responses = [
-            (
-                "VMGI,00251,00254,00510,00510,16384,05839,00249,"
-                "00112,04354,00140,00203,00249,00510,00000,00001"
-            ),
-            "VMNM new_device",
-            "new_network_data",
-        ]
-
-        with patch(
-            "custom_components.vmc_helty_flow.coordinator.tcp_send_command"
-        ) as mock_tcp:
-            mock_tcp.side_effect = responses
-
-            with patch("time.time", return_value=current_time):
-                result = await coordinator._get_additional_data()
-
-                # Tutto dovrebbe essere aggiornato
-                assert result["sensors"] is not None
-                assert result["name"] == "VMNM new_device"  # Nuovo valore
-                assert result["network"] == "new_network_data"  # Nuovo valore
+        old_time = current_time - DEVICE_INFO_TTL - 10
+        coordinator.poll_plan.record("VMNM?", old_time, "VMNM,Test")
+        coordinator.poll_plan.record("VMSL?", old_time, "net")
+
+        # Tutte le interrogazioni nella stessa sessione
+        commands = coordinator._build_poll_commands(current_time)
+        assert commands == ["VMGH?", "VMGI?", "VMNM?", "VMSL?"]
+
+        result = coordinator._get_additional_data(
+            {
+                "VMGH?": "VMGO,1",
+                "VMGI?": SENSORS_RESPONSE,
+                "VMNM?": "VMNM new_device",
+                "VMSL?": "new_network_data",
+            }
+        )
 
-                # tcp_send_command chiamato per tutti e 3 i comandi
-                assert mock_tcp.call_count == 3
+        # Tutto dovrebbe essere aggiornato
+        assert result["sensors"] is not None
+        assert result["name"] == "VMNM new_device"  # Nuovo valore
+        assert result["network"] == "new_network_data"  # Nuovo valore
 
-                # Verifica che la cache sia stata aggiornata
-                assert coordinator._cached_data["name"] == "VMNM new_device"
-                assert coordinator._cached_data["network"] == "new_network_data"
+        # Verifica che la cache sia stata aggiornata
+        assert coordinator._cached_data["name"] == "VMNM new_device"
+        assert coordinator._cached_data["network"] == "new_network_data"
 
-    @pytest.mark.asyncio
-    async def test_cache_not_updated_on_error(self, coordinator):
+    def test_cache_not_updated_on_error(self, coordinator):
         """Test che la cache non venga aggiornata se il comando fallisce."""
         current_time = time.time()
         old_cached_name = "VMNM old_cached"
@@ -156,26 +143,108 @@ class TestUpdateIntervals:
             "network": old_cached_network,
         }
 
-        responses = [
-            (
-                "VMGI,00251,00254,00510,00510,16384,05839,00249,"
-                "00112,04354,00140,00203,00249,00510,00000,00001"
-            ),
-            VMCConnectionError("Error getting name"),
-            VMCConnectionError("Error getting network"),
+        result = coordinator._get_additional_data(
+            {
+                "VMGH?": "VMGO,1",
+                "VMGI?": SENSORS_RESPONSE,
+                "VMNM?": VMCConnectionError("Error getting name"),
+                "VMSL?": VMCConnectionError("Error getting network"),
+            }
+        )
+
+        assert result["name"] is None
+        assert result["network"] is None
+        # La cache non dovrebbe essere cambiata
+        assert coordinator._cached_data["name"] == old_cached_name
+        assert coordinator._cached_data["network"] == old_cached_network
+        # Il prossimo poll interroga di nuovo nome e rete
+        assert coordinator._build_poll_commands(current_time)[2:] == [
+            "VMNM?",
+            "VMSL?",
         ]
 
+    @pytest.mark.asyncio
+    async def test_poll_uses_single_batch(self, coordinator):
+        """Test che un poll invii tutte le interrogazioni in un unico batch."""
+        coordinator._update_interval = coordinator._normal_update_interval
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.tcp_send_commands",
+            return_value=["VMGO,1,0,0,0,0,1", SENSORS_RESPONSE, "VMNM,Test", "net"],
+        ) as mock_batch:
+            data = await coordinator._async_update_data()
+
+        mock_batch.assert_called_once_with(
+            coordinator.ip,
+            5001,
+            ["VMGH?", "VMGI?", "VMNM?", "VMSL?"],
+            return_exceptions=True,
+        )
+        assert data["status"] == "VMGO,1,0,0,0,0,1"
+        assert data["sensors"] == SENSORS_RESPONSE
+        assert data["network"] == "net"
+
+    @pytest.mark.asyncio
+    async def test_poll_reuses_status_when_not_due(self, coordinator):
+        """Test che un poll dei soli sensori mantenga lo stato precedente."""
+        current_time = time.time()
+        coordinator.data = {"status": "VMGO,1,0,0,0,0,1", "sensors": None}
+        coordinator.poll_plan.record("VMGH?", current_time, "VMGO,1,0,0,0,0,1")
+        coordinator.poll_plan.record("VMNM?", current_time, "VMNM,Test")
+        coordinator.poll_plan.record("VMSL?", current_time, "net")
+
         with patch(
-            "custom_components.vmc_helty_flow.helpers.tcp_send_command"
-        ) as mock_tcp:
-            mock_tcp.side_effect = responses
+            "custom_components.vmc_helty_flow.coordinator.tcp_send_commands",
+            return_value=[SENSORS_RESPONSE],
+        ) as mock_batch:
+            data = await coordinator._async_update_data()
 
-            with patch("time.time", return_value=current_time):
-                await coordinator._get_additional_data()
+        assert mock_batch.call_args.args[2] == ["VMGI?"]
+        assert data["status"] == "VMGO,1,0,0,0,0,1"
+        assert data["sensors"] == SENSORS_RESPONSE
+        # Il prossimo poll è fissato dalla regola dello stato (60 s)
+        assert 55 <= coordinator.update_interval.total_seconds() <= 60
+
+    @pytest.mark.asyncio
+    async def test_adaptive_interval_follows_transients(self, coordinator):
+        """Test che il polling adattivo acceleri durante una variazione rapida."""
+        coordinator.poll_plan = build_poll_plan({})
+        humid = SENSORS_RESPONSE.replace(",00510,00510,", ",00650,00510,", 1)
+
+        for sensors in (SENSORS_RESPONSE, humid):
+            with patch(
+                "custom_components.vmc_helty_flow.coordinator.tcp_send_commands",
+                side_effect=lambda _ip, _port, cmds, resp=sensors, **_kw: [
+                    resp if cmd == "VMGI?" else "VMGO,1,0,0,0,0,1" for cmd in cmds
+                ],
+            ):
+                await coordinator._async_update_data()
+            # Il poll successivo deve trovare scaduti stato e sensori
+            coordinator.poll_plan.record("VMGH?", 0, "VMGO,1,0,0,0,0,1")
+            coordinator.poll_plan.record("VMGI?", 0, sensors)
+
+        assert coordinator.poll_plan.adaptive.reason == "humidity"
+        assert coordinator.update_interval.total_seconds() == 30
 
-                # La cache non dovrebbe essere cambiata
-                assert coordinator._cached_data["name"] == old_cached_name
-                assert coordinator._cached_data["network"] == old_cached_network
+    @pytest.mark.asyncio
+    async def test_poll_goes_through_global_scheduler(self, coordinator):
+        """Test che il poll passi dallo scheduler globale e venga sfasato."""
+        scheduler = PollScheduler()
+        scheduler.add_device("192.168.1.99")
+        scheduler.add_device(coordinator.ip)
+        coordinator.poll_scheduler = scheduler
+
+        with patch(
+            "custom_components.vmc_helty_flow.coordinator.tcp_send_commands",
+            return_value=["VMGO,1,0,0,0,0,1", SENSORS_RESPONSE, "VMNM,Test", "net"],
+        ):
+            await coordinator._async_update_data()
+
+        phase = scheduler.as_dict(coordinator.ip)["phase"]
+        assert phase > 0
+        assert coordinator.update_interval.total_seconds() == pytest.approx(
+            60 * (1 + phase), abs=0.1
+        )
+        assert scheduler.as_dict()["lanes"]["healthy"]["commands"] == 1
 
     def test_update_intervals_constants(self):
         """Test che le costanti degli intervalli siano configurate correttamente."""
@@ -1,8 +1,9 @@
 """Test entità VMC Helty."""
 
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
+from homeassistant.exceptions import HomeAssistantError
 
 from custom_components.vmc_helty_flow.button import VmcHeltyResetFilterButton
 from custom_components.vmc_helty_flow.fan import VmcHeltyFan
@@ -117,3 +118,43 @@ def test_entity_instantiation_extended(entity_cls, additional_args):
     assert entity is not None
     assert hasattr(entity, "coordinator")
     # Ulteriori test specifici possono essere aggiunti qui
+
+
+@pytest.mark.asyncio
+async def test_name_text_sends_sanitized_name(mock_coordinator):
+    """Il nome viene inviato con lo stesso comando delle device action."""
+    mock_coordinator.async_invalidate = AsyncMock()
+    entity = VmcHeltyNameText(mock_coordinator)
+
+    with patch(
+        "custom_components.vmc_helty_flow.sensor.tcp_send_command",
+        new=AsyncMock(return_value="OK"),
+    ) as mock_tcp:
+        await entity.async_set_value("Test Device@#$%")
+
+    mock_tcp.assert_awaited_once_with(IP, 5001, "VMNM TestDevice")
+    mock_coordinator.async_invalidate.assert_awaited_once_with("VMNM?")
+
+    with pytest.raises(HomeAssistantError):
+        await entity.async_set_value("")
+
+
+@pytest.mark.asyncio
+async def test_password_text_keeps_ssid(mock_coordinator):
+    """La nuova password viene inviata insieme all'SSID attuale."""
+    mock_coordinator.data = {
+        "network": SSID.ljust(32, "*") + PASSWORD.ljust(32, "*"),
+    }
+    mock_coordinator.async_invalidate = AsyncMock()
+    entity = VmcHeltyPasswordText(mock_coordinator)
+
+    with patch(
+        "custom_components.vmc_helty_flow.sensor.tcp_send_command",
+        new=AsyncMock(return_value="OK"),
+    ) as mock_tcp:
+        await entity.async_set_value("NewPassword1")
+
+    mock_tcp.assert_awaited_once_with(
+        IP, 5001, f"VMSL {SSID.ljust(32, '*')}{'NewPassword1'.ljust(32, '*')}"
+    )
+    mock_coordinator.async_invalidate.assert_awaited_once_with("VMSL?")